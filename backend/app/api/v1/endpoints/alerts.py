@@ -0,0 +1,145 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import json
+
+from ....core.config import get_settings
+from ....db import SessionLocal, get_db
+from ....models.alerts import AlertEvent, AlertRule
+from ....services.alerts import FIELDS, SINKS, create_rule, deactivate_rule
+
+router = APIRouter()
+
+
+def _split(raw: Optional[str]):
+	return [s.strip() for s in raw.split(",") if s.strip()] if raw else None
+
+
+def _rule_out(rule: AlertRule) -> Dict[str, Any]:
+	return {
+		"id": rule.id,
+		"name": rule.name,
+		"expression": rule.expression,
+		"symbols": json.loads(rule.symbols_json) if rule.symbols_json else None,
+		"sinks": json.loads(rule.sinks_json) if rule.sinks_json else [],
+		"webhook_url": rule.webhook_url,
+		"cooldown_minutes": rule.cooldown_minutes,
+		"is_active": rule.is_active,
+		"created_at": rule.created_at,
+	}
+
+
+def _event_out(event: AlertEvent) -> Dict[str, Any]:
+	return {"id": event.id, **json.loads(event.payload_json), "created_at": event.created_at}
+
+
+@router.post("/rules", summary="Create an alert rule")
+def create_alert_rule(
+	name: str = Query(..., description="Label shown with fired alerts"),
+	expression: str = Query(..., description="Conditions joined by 'and', e.g. 'grade >= A+ and direction == long' or 'climax_15m'"),
+	symbols: Optional[str] = Query(None, description="Comma-separated symbols to watch; omit for every screened symbol"),
+	sinks: Optional[str] = Query(None, description="Comma-separated extra sinks (log, webhook)"),
+	webhook_url: Optional[str] = Query(None, description="Receiver for the webhook sink"),
+	cooldown_minutes: int = Query(60, ge=0, le=10080, description="Silence after firing for a symbol"),
+	db: Session = Depends(get_db),
+):
+	try:
+		rule = create_rule(
+			db, name, expression,
+			symbols=_split(symbols), sinks=_split(sinks), webhook_url=webhook_url, cooldown_minutes=cooldown_minutes,
+		)
+	except ValueError as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	return _rule_out(rule)
+
+
+@router.get("/rules", summary="List alert rules")
+def list_alert_rules(
+	include_inactive: bool = Query(False),
+	db: Session = Depends(get_db),
+):
+	q = db.query(AlertRule)
+	if not include_inactive:
+		q = q.filter(AlertRule.is_active.is_(True))
+	return {
+		"rules": [_rule_out(r) for r in q.order_by(AlertRule.id.asc()).all()],
+		"fields": list(FIELDS),
+		"sinks": list(SINKS),
+	}
+
+
+@router.delete("/rules/{rule_id}", summary="Deactivate an alert rule")
+def delete_alert_rule(rule_id: int, db: Session = Depends(get_db)):
+	rule: Optional[AlertRule] = db.query(AlertRule).filter(AlertRule.id == rule_id).first()
+	if not rule:
+		raise HTTPException(status_code=404, detail="Alert rule not found")
+	deactivate_rule(db, rule)
+	return _rule_out(rule)
+
+
+@router.get("/events", summary="Recently fired alerts")
+def list_alert_events(
+	rule_id: Optional[int] = Query(None),
+	symbol: Optional[str] = Query(None),
+	after_id: Optional[int] = Query(None, description="Only alerts newer than this id"),
+	limit: int = Query(100, ge=1, le=1000),
+	db: Session = Depends(get_db),
+):
+	q = db.query(AlertEvent)
+	if rule_id is not None:
+		q = q.filter(AlertEvent.rule_id == rule_id)
+	if symbol:
+		q = q.filter(AlertEvent.symbol == symbol.upper())
+	if after_id is not None:
+		q = q.filter(AlertEvent.id > after_id)
+	events = q.order_by(AlertEvent.id.desc()).limit(limit).all()
+	return {"events": [_event_out(e) for e in events]}
+
+
+def _poll_events(last_id: Optional[int], rule_id: Optional[int]) -> Tuple[List[str], int]:
+	"""
+	SSE frames of alerts recorded after `last_id` (the newest alert when
+	None), and the id to poll after next.
+	"""
+	db = SessionLocal()
+	try:
+		if last_id is None:
+			return [], db.query(AlertEvent.id).order_by(AlertEvent.id.desc()).limit(1).scalar() or 0
+		q = db.query(AlertEvent).filter(AlertEvent.id > last_id)
+		if rule_id is not None:
+			q = q.filter(AlertEvent.rule_id == rule_id)
+		frames = []
+		for event in q.order_by(AlertEvent.id.asc()).limit(500).all():
+			last_id = event.id
+			frames.append(f"id: {event.id}\nevent: alert\ndata: {json.dumps(_event_out(event), default=str)}\n\n")
+		return frames, last_id
+	finally:
+		db.close()
+
+
+@router.get("/stream", summary="Server-sent events stream of fired alerts")
+async def stream_alert_events(
+	rule_id: Optional[int] = Query(None),
+	last_event_id: Optional[int] = Header(None, description="Resume after this alert id (sent by EventSource on reconnect)"),
+):
+	poll_seconds = get_settings().alerts_stream_poll_seconds
+
+	async def events() -> AsyncIterator[str]:
+		# Alerts are recorded by whichever process holds the screener lease, so
+		# every process streams by tailing the table. Clients wait on the event
+		# loop between polls; only the query itself borrows a worker thread.
+		last_id = last_event_id
+		if last_id is None:
+			_, last_id = await run_in_threadpool(_poll_events, None, rule_id)
+		while True:
+			frames, last_id = await run_in_threadpool(_poll_events, last_id, rule_id)
+			for frame in frames:
+				yield frame
+			if not frames:
+				yield ": keep-alive\n\n"
+			await asyncio.sleep(poll_seconds)
+
+	return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -1,24 +1,50 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import csv
 import io
-from typing import Optional
+import json
+from typing import Dict, Optional
+import logging
 
 from ....db import get_db
+from ....models.forward_replay import ReplayRun, ReplayTrade
 from ....models.forward_test import ForwardTestRun, ForwardTestTrade
-from ....services.forward_test import start_test_run
+from ....services.forward_replay import replay_run
+from ....services.forward_test import list_runs, open_pl, run_trade_stats, start_test_run
+from ....services.market_data import DataSourceUnavailable, SymbolNotSupported
+from ....services.strategies import UnknownStrategy
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.post("/start", summary="Start a 5-day forward test run")
-def start_forward_test(symbol: str, db: Session = Depends(get_db)):
-	run = start_test_run(db, symbol=symbol)
+def start_forward_test(
+	symbol: str,
+	strategy: str = Query("fusion", description="Strategy definition to trade (see /strategies)"),
+	params: Optional[str] = Query(None, description='JSON object of this run\'s own overrides of the strategy, e.g. {"take_profit": 0.03}'),
+	db: Session = Depends(get_db),
+):
+	overrides = None
+	if params:
+		try:
+			overrides = json.loads(params)
+		except ValueError:
+			pass
+		if not isinstance(overrides, dict):
+			raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="params must be a JSON object")
+	try:
+		run = start_test_run(db, symbol=symbol, strategy=strategy, params=overrides)
+	except (UnknownStrategy, ValueError) as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 	return {
 		"id": run.id,
 		"symbol": run.symbol,
+		"strategy": run.strategy,
+		"params": overrides,
 		"start_time": run.start_time,
 		"end_time": run.end_time,
 		"is_active": run.is_active,
@@ -48,6 +74,8 @@ def get_forward_test_status(
 		"run": {
 			"id": run.id,
 			"symbol": run.symbol,
+			"strategy": run.strategy or "fusion",
+			"params": json.loads(run.strategy_params_json) if run.strategy_params_json else None,
 			"start_time": run.start_time,
 			"end_time": run.end_time,
 			"is_active": run.is_active,
@@ -83,6 +111,53 @@ def get_forward_test_status(
 	}
 
 
+@router.get("/runs", summary="List forward test runs with their trade stats")
+def list_forward_test_runs(
+	symbol: Optional[str] = Query(None, description="Only runs on this pair (e.g., BTC/USD)"),
+	active: Optional[bool] = Query(None, description="Only active (true) or finished (false) runs"),
+	cursor: Optional[int] = Query(None, description="next_cursor of the previous page"),
+	limit: int = Query(50, ge=1, le=500, description="Runs per page"),
+	mark: bool = Query(False, description="Also price open trades at the latest 5m close (one candle fetch per symbol)"),
+	db: Session = Depends(get_db),
+):
+	runs, next_cursor = list_runs(db, symbol=symbol, active=active, before_id=cursor, limit=limit)
+	run_ids = [run.id for run in runs]
+	stats = run_trade_stats(db, run_ids)
+	unrealized: Dict[int, float] = {}
+	if mark:
+		from .ohlcv import load_candles  # type: ignore
+
+		marks: Dict[str, float] = {}
+		for sym in {run.symbol for run in runs if stats.get(run.id, {}).get("open_trades")}:
+			try:
+				rows = load_candles(sym, {"5m": 1}).timeframes["5m"]
+			except HTTPException:
+				logger.warning("Forward test runs: no mark price", extra={"symbol": sym})
+				continue
+			if len(rows):
+				marks[sym] = float(rows[-1][4])
+		unrealized = open_pl(db, run_ids, marks)
+	empty = {"trades": 0, "open_trades": 0, "wins": 0, "losses": 0, "win_rate": 0.0, "pl_sum_pct": 0.0, "profit_factor": 0.0, "last_trade_time": None}
+	return {
+		"runs": [
+			{
+				"id": run.id,
+				"symbol": run.symbol,
+				"strategy": run.strategy or "fusion",
+				"params": json.loads(run.strategy_params_json) if run.strategy_params_json else None,
+				"start_time": run.start_time,
+				"end_time": run.end_time,
+				"is_active": run.is_active,
+				"last_candle_ts": run.last_candle_ts,
+				"stats": stats.get(run.id, empty),
+				**({"open_pl_pct": unrealized.get(run.id)} if mark else {}),
+			}
+			for run in runs
+		],
+		"next_cursor": next_cursor,
+	}
+
+
 @router.get("/trades", summary="Get all trades for a forward test run")
 def get_forward_test_trades(
 	test_run_id: int = Query(..., description="ID of the forward test run"),
@@ -174,3 +249,71 @@ def export_forward_test(
 	)
 
 
+@router.post("/replay", summary="Replay a forward test over stored history with a simulated clock")
+def start_replay(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USD)"),
+	days: float = Query(5.0, gt=0, le=30, description="Length of the replayed run in days"),
+	start: Optional[datetime] = Query(None, description="Simulated start time (ISO 8601); defaults to `days` before now"),
+	fetch_missing: bool = Query(True, description="Backfill missing candles from the exchanges first"),
+	strategy: str = Query("fusion", description="Strategy definition to trade (see /strategies)"),
+	db: Session = Depends(get_db),
+):
+	if start is None:
+		start = datetime.now(tz=timezone.utc) - timedelta(days=days)
+	elif start.tzinfo is None:
+		start = start.replace(tzinfo=timezone.utc)
+	try:
+		run, timing = replay_run(db, symbol, start, days=days, fetch_missing=fetch_missing, strategy=strategy)
+	except (SymbolNotSupported, UnknownStrategy, ValueError) as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	except DataSourceUnavailable as e:
+		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to backfill candles: {e}")
+	return {
+		"id": run.id,
+		"symbol": run.symbol,
+		"strategy": run.strategy,
+		"start_time": run.start_time,
+		"end_time": run.end_time,
+		"summary": json.loads(run.summary_json) if run.summary_json else None,
+		"timing": timing,
+	}
+
+
+@router.get("/replay/{run_id}", summary="Get a replayed forward test run and its trades")
+def get_replay(run_id: int, db: Session = Depends(get_db)):
+	run: Optional[ReplayRun] = db.query(ReplayRun).filter(ReplayRun.id == run_id).first()
+	if not run:
+		raise HTTPException(status_code=404, detail="Replay run not found")
+
+	trades = db.query(ReplayTrade).filter(
+		ReplayTrade.test_run_id == run.id
+	).order_by(ReplayTrade.id.asc()).all()
+
+	return {
+		"run": {
+			"id": run.id,
+			"symbol": run.symbol,
+			"strategy": run.strategy or "fusion",
+			"start_time": run.start_time,
+			"end_time": run.end_time,
+			"summary": run.summary_json,
+			"candles_processed": run.candles_processed,
+			"elapsed_ms": run.elapsed_ms,
+			"created_at": run.created_at,
+		},
+		"trades": [
+			{
+				"id": t.id,
+				"direction": t.direction,
+				"entry_price": t.entry_price,
+				"stop_loss": t.stop_loss,
+				"take_profit": t.take_profit,
+				"exit_price": t.exit_price,
+				"exit_reason": t.exit_reason,
+				"r_multiple": t.r_multiple,
+				"profit_loss": t.profit_loss,
+				"candle_time": t.candle_time,
+			}
+			for t in trades
+		],
+	}
@@ -1,151 +1,67 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import Dict, Any, List
 from datetime import datetime, timezone
-import ccxt
-import pandas as pd
-import math
-
-# Reuse helpers
-from .trend import compute_emas  # type: ignore
-from .volume import compute_volume_features  # type: ignore
-from .fusion import score_setup  # type: ignore
+import json
+
+from ....db import get_db
+from ....models.learning import LearnedWeightSet
+from ....services.learning import (
+	FEATURES,
+	WARMUP_BARS,
+	component_weights,
+	feature_effectiveness,
+	feature_matrix,
+	forward_returns,
+	normalized_weights,
+	run_walk_forward,
+)
+from ....services.learning_model import get_model, train_model
+from ....services.market_data import DataSourceUnavailable, SymbolNotSupported
+from ....services.warm_cache import get_warm_cache
+from .ohlcv import load_candles  # type: ignore
+from ....core.metrics import span
+from ....core.profiling import profiled
+from ....core.lazy import lazy_import
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
-
-def _direction_from_alignment(row: pd.Series) -> str:
-	if row["ema20"] > row["ema50"] > row["ema200"]:
-		return "uptrend"
-	if row["ema20"] < row["ema50"] < row["ema200"]:
-		return "downtrend"
-	return "sideways"
+LEARNING_LIMIT = 1200  # default 5m candles (and the window pre-computed for the watchlist)
 
 
-@router.get("", summary="Analyze backtest features to optimize fusion weights")
-def learning_task(
-	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
-	limit: int = Query(1200, ge=400, le=5000, description="Number of 5m candles"),
-) -> Dict[str, Any]:
+def learn_weights(symbol: str, limit: int) -> Dict[str, Any]:
+	"""
+	The `/learning` response: feature effectiveness over `limit` 5m candles.
+	"""
 	try:
-		exchange = ccxt.coinbase({
-			"enableRateLimit": True,
-		})
-		markets = exchange.load_markets()
-		if symbol not in markets:
-			raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Symbol not available on Coinbase: {symbol}")
-
 		# Fetch data
-		df5 = pd.DataFrame(exchange.fetch_ohlcv(symbol, timeframe="5m", limit=limit),
+		candles = load_candles(symbol, {"5m": limit, "15m": max(300, limit // 3)})
+		df5 = pd.DataFrame(candles.timeframes["5m"],
 			columns=["timestamp", "open", "high", "low", "close", "volume"])
-		df15 = pd.DataFrame(exchange.fetch_ohlcv(symbol, timeframe="15m", limit=max(300, limit // 3)),
+		df15 = pd.DataFrame(candles.timeframes["15m"],
 			columns=["timestamp", "open", "high", "low", "close", "volume"])
 
-		# Indicators
-		df5 = compute_emas(df5, [20, 50, 200])
-		df15 = compute_emas(df15, [20, 50, 200])
-		df5 = compute_volume_features(df5)
-		df15 = compute_volume_features(df15)
-
-		# Collect feature occurrences and outcomes over rolling window
-		features = [
-			"trend_up", "trend_down", "confirm_5m",
-			"ema_cross_up", "ema_cross_down",
-			"bos_up", "bos_down",
-			"ignition_up", "ignition_down",
-			"climax", "accumulation", "distribution",
-		]
-		stats = {f: {"hits": 0, "wins": 0} for f in features}
-
-		def last_15(ts_ms: int) -> Optional[pd.Series]:
-			row = df15[df15["timestamp"] <= ts_ms].tail(1)
-			return row.iloc[0] if len(row) else None
-
-		def feature_flags(i: int) -> Dict[str, int]:
-			row5 = df5.iloc[i]
-			row15 = last_15(int(row5["timestamp"]))
-			flags = {f: 0 for f in features}
-			if row15 is not None:
-				trend_15 = _direction_from_alignment(row15)
-				if trend_15 == "uptrend":
-					flags["trend_up"] = 1
-				elif trend_15 == "downtrend":
-					flags["trend_down"] = 1
-			# 5m confirm
-			trend_5 = _direction_from_alignment(row5)
-			if trend_5 in ["uptrend", "downtrend"]:
-				flags["confirm_5m"] = 1
-			# EMA crosses
-			if i >= 1:
-				prev = df5.iloc[i - 1]; curr = row5
-				for a, b, up_key, down_key in [(20, 50, "ema_cross_up", "ema_cross_down"), (50, 200, "ema_cross_up", "ema_cross_down"), (20, 200, "ema_cross_up", "ema_cross_down")]:
-					prev_diff = prev[f"ema{a}"] - prev[f"ema{b}"]
-					curr_diff = curr[f"ema{a}"] - curr[f"ema{b}"]
-					if pd.notna(prev_diff) and pd.notna(curr_diff):
-						if prev_diff <= 0 and curr_diff > 0:
-							flags[up_key] = 1
-						if prev_diff >= 0 and curr_diff < 0:
-							flags[down_key] = 1
-			# BOS
-			if i >= 21:
-				window = df5.iloc[i - 21: i - 1]
-				last = row5
-				if last["close"] > window["high"].max():
-					flags["bos_up"] = 1
-				if last["close"] < window["low"].min():
-					flags["bos_down"] = 1
-			# Volume features
-			rv = row5.get("rv"); body_pct = row5.get("body_pct")
-			if pd.notna(rv) and rv is not None:
-				if rv >= 3.0:
-					flags["climax"] = 1
-				if rv >= 2.0 and pd.notna(body_pct) and body_pct is not None and body_pct >= 0.6:
-					if row5["close"] > row5["open"]:
-						flags["ignition_up"] = 1
-					elif row5["close"] < row5["open"]:
-						flags["ignition_down"] = 1
-			win50 = df5.iloc[max(0, i - 50): i + 1]
-			active = win50[win50["rv"] >= 1.5] if "rv" in win50 else pd.DataFrame()
-			if len(active) >= 5:
-				score = int((active["close"] > active["open"]).sum() - (active["close"] < active["open"]).sum())
-				if score > 0:
-					flags["accumulation"] = 1
-				elif score < 0:
-					flags["distribution"] = 1
-			return flags
-
-		# Evaluate outcomes using forward return next N bars (e.g., 12 bars ~ 1 hour)
+		# Feature flags for every bar in one vectorized pass
 		horizon = 12
-		for i in range(250, len(df5) - horizon):
-			flags = feature_flags(i)
-			entry = float(df5.iloc[i]["close"])
-			exit = float(df5.iloc[i + horizon]["close"])
-			ret = (exit / entry - 1.0)
-			win = 1 if ret >= 0 else 0
-			for k, v in flags.items():
-				if v:
-					stats[k]["hits"] += 1
-					stats[k]["wins"] += win
+		with span("indicators"):
+			X = feature_matrix(df5, df15)[WARMUP_BARS:]
+			R = forward_returns(df5["close"].to_numpy(dtype=float), [horizon])[WARMUP_BARS:]
 
 		# Effectiveness: win rate minus baseline
+		baseline = 0.5  # assume 50% unless data-rich (walk-forward uses the window's own win rate)
+		with span("learning"):
+			eff, hits, _ = feature_effectiveness(X, R, baseline=baseline, min_hits=20)
+		effectiveness = {k: float(eff[i, 0]) for i, k in enumerate(FEATURES)}
+		stats = {k: {"hits": int(hits[i, 0])} for i, k in enumerate(FEATURES)}
 		total = sum(s["hits"] for s in stats.values())
-		baseline = 0.5  # assume 50% unless data-rich (we could compute overall)
-		effectiveness = {k: ((s["wins"] / s["hits"]) - baseline) if s["hits"] > 20 else 0.0 for k, s in stats.items()}
 
 		# Normalize to weights (0..1), preserve sign preference
-		max_abs = max((abs(v) for v in effectiveness.values()), default=1.0) or 1.0
-		weights = {k: round((v / max_abs + 0.0), 3) for k, v in effectiveness.items()}
+		weights = {k: round(float(v), 3) for k, v in zip(FEATURES, normalized_weights(eff)[:, 0])}
 
 		# Map to fusion components
-		updated_weights = {
-			"trend_base": round(max(weights["trend_up"], weights["trend_down"]) * 30, 1),
-			"confirm_5m": round(weights["confirm_5m"] * 15, 1),
-			"ema_cross": round(max(weights["ema_cross_up"], weights["ema_cross_down"]) * 20, 1),
-			"bos": round(max(weights["bos_up"], weights["bos_down"]) * 15, 1),
-			"ignition": round(max(weights["ignition_up"], weights["ignition_down"]) * 12, 1),
-			"climax": round(weights["climax"] * 6, 1),
-			"accumulation": round(weights["accumulation"] * 10, 1),
-			"distribution": round(weights["distribution"] * 10, 1),
-		}
+		updated_weights = component_weights(weights)
 
 		ranking = sorted([{ "feature": k, "effectiveness": round(v, 3), "hits": stats[k]["hits"] } for k, v in effectiveness.items()], key=lambda x: x["effectiveness"], reverse=True)
 
@@ -161,8 +77,9 @@ def learning_task(
 		)
 
 		return {
-			"exchange": "coinbase",
+			"exchange": candles.exchange,
 			"symbol": symbol,
+			"normalized_symbol": candles.normalized_symbol,
 			"updated_weights": updated_weights,
 			"feature_ranking": ranking,
 			"formula_preview": formula_preview,
@@ -178,3 +95,105 @@ def learning_task(
 		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to learn weights: {e}")
 
 
+@router.get("", summary="Analyze backtest features to optimize fusion weights")
+@profiled
+def learning_task(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
+	limit: int = Query(LEARNING_LIMIT, ge=400, le=5000, description="Number of 5m candles"),
+) -> Dict[str, Any]:
+	# Watchlist symbols are usually pre-computed for the current candle
+	return get_warm_cache().get("learning", symbol, limit, lambda: learn_weights(symbol, limit), warmed=limit == LEARNING_LIMIT)
+
+
+@router.post("/walk-forward", summary="Walk-forward weight learning over stored candle history")
+def walk_forward(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
+	days: int = Query(90, ge=14, le=730, description="Days of 5m history to evaluate"),
+	train_days: int = Query(30, ge=3, le=365, description="Train window length (days)"),
+	test_days: int = Query(7, ge=1, le=90, description="Out-of-sample window length (days)"),
+	horizons: str = Query("6,12,24", description="Comma-separated forward horizons in 5m bars"),
+	fetch_missing: bool = Query(True, description="Backfill missing candles from the exchanges first"),
+	db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+	try:
+		horizon_list = [int(h) for h in horizons.split(",") if h.strip()]
+	except ValueError:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid horizons: {horizons}")
+	if not horizon_list or any(h <= 0 for h in horizon_list):
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid horizons: {horizons}")
+	try:
+		result = run_walk_forward(
+			db,
+			symbol,
+			days=days,
+			train_days=train_days,
+			test_days=test_days,
+			horizons=horizon_list,
+			fetch_missing=fetch_missing,
+		)
+	except SymbolNotSupported as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	except ValueError as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	except DataSourceUnavailable as e:
+		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to backfill candles: {e}")
+	result["meta"] = {"generated_at": datetime.now(tz=timezone.utc).isoformat()}
+	return result
+
+
+@router.get("/weights", summary="List persisted learned weight sets")
+def list_weight_sets(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
+	limit: int = Query(20, ge=1, le=200),
+	db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+	rows: List[LearnedWeightSet] = db.query(LearnedWeightSet).filter(
+		LearnedWeightSet.symbol == symbol.upper()
+	).order_by(LearnedWeightSet.id.desc()).limit(limit).all()
+	return {
+		"symbol": symbol,
+		"weight_sets": [
+			{
+				"id": r.id,
+				"method": r.method,
+				"horizon_bars": r.horizon_bars,
+				"weights": json.loads(r.weights_json),
+				"metrics": json.loads(r.metrics_json) if r.metrics_json else None,
+				"data_start_ts": r.data_start_ts,
+				"data_end_ts": r.data_end_ts,
+				"created_at": r.created_at,
+			}
+			for r in rows
+		],
+	}
+
+
+@router.post("/model", summary="Train the model-based learner (logistic regression) for a symbol")
+def train_learning_model(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
+	limit: int = Query(5000, ge=400, le=5000, description="Number of recent 5m candles to train on"),
+	horizon: int = Query(12, ge=1, le=288, description="Forward horizon in 5m bars"),
+) -> Dict[str, Any]:
+	candles = load_candles(symbol, {"5m": limit, "15m": max(300, limit // 3)})
+	df5 = pd.DataFrame(candles.timeframes["5m"],
+		columns=["timestamp", "open", "high", "low", "close", "volume"])
+	df15 = pd.DataFrame(candles.timeframes["15m"],
+		columns=["timestamp", "open", "high", "low", "close", "volume"])
+	try:
+		result = train_model(symbol, df5, df15, horizon=horizon)
+	except ValueError as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	result["exchange"] = candles.exchange
+	# Pre-computed signals used the previous model
+	get_warm_cache().invalidate(symbol)
+	return result
+
+
+@router.get("/model", summary="Describe the trained model for a symbol")
+def describe_learning_model(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
+) -> Dict[str, Any]:
+	model = get_model(symbol)
+	if model is None:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No trained model for {symbol}")
+	return model.describe()
@@ -2,9 +2,11 @@ from fastapi import APIRouter, Query, HTTPException, status
 from typing import List, Dict, Any
 from datetime import datetime, timezone
 import logging
-import ccxt
 import math
 
+from ....core import profiling
+from ....services.market_data import CandleSet, DataSourceUnavailable, SymbolNotSupported, get_market_data
+
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
@@ -26,36 +28,43 @@ def _map_ohlcv_rows(rows: List[List[float]]) -> List[Dict[str, Any]]:
 	return mapped
 
 
-def _normalize_coinbase_symbol(symbol: str, markets: Dict[str, Any]) -> str:
+def load_candles(symbol: str, limits: Dict[str, int]) -> CandleSet:
 	"""
-	Normalize user symbol (e.g. BTC/USDT) to a Coinbase-supported one (e.g. BTC/USD).
+	Fetch OHLCV for each timeframe in `limits` from the best available exchange,
+	mapping data-source errors to HTTP errors for the endpoints.
 	"""
-	raw = symbol.upper()
-	# Prefer USD mapping for USDT pairs on Coinbase if available
-	if raw.endswith("/USDT"):
-		alt = raw.replace("/USDT", "/USD")
-		if alt in markets:
-			return alt
-		# if no USD alt, fall back to raw and let validation handle it
-		return raw
-	# otherwise, keep as-is if supported
-	if raw in markets:
-		return raw
-	# fall back to raw; validation will handle unsupported ones
-	return raw
+	snapshot = profiling.replay_snapshot(symbol, limits)
+	if snapshot is not None:
+		return CandleSet(
+			exchange=snapshot["exchange"],
+			symbol=symbol,
+			normalized_symbol=snapshot["normalized_symbol"],
+			timeframes=snapshot["timeframes"],
+		)
+	try:
+		candles = get_market_data().fetch_candles(symbol, limits)
+	except SymbolNotSupported as e:
+		logger.warning("OHLCV: symbol not available", extra={"requested": symbol})
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	except DataSourceUnavailable as e:
+		logger.exception("OHLCV: all data sources failed", extra={"requested": symbol})
+		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to fetch OHLCV: {e}")
+	profiling.record_candles(symbol, limits, candles)
+	return candles
 
 
-@router.get("", summary="Get OHLCV data from Coinbase (5m & 15m)")
+@router.get("", summary="Get OHLCV data (5m & 15m) from the fastest healthy exchange")
 def get_ohlcv(
 	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
 	limit: int = Query(200, ge=1, le=500, description="Number of candles to fetch"),
 ):
 	"""
-	Returns both 5m and 15m OHLCV candles for the requested symbol from Coinbase.
+	Returns both 5m and 15m OHLCV candles for the requested symbol.
 	Response shape:
 	{
 		"exchange": "coinbase",
 		"symbol": "BTC/USDT",
+		"normalized_symbol": "BTC/USD",
 		"timeframes": {
 			"5m": [...],
 			"15m": [...]
@@ -63,82 +72,16 @@ def get_ohlcv(
 	}
 	"""
 	try:
-		exchange = ccxt.coinbase({
-			"enableRateLimit": True,
-			"timeout": 7000,  # 7s network timeout
-		})
-
-		logger.info("OHLCV: instantiated exchange", extra={"exchange_id": getattr(exchange, "id", None)})
-
-		logger.info("OHLCV: loading markets for Coinbase")
-		try:
-			markets = exchange.load_markets()
-		except Exception as e:
-			logger.exception("OHLCV: failed to load markets from Coinbase", extra={"symbol": symbol, "limit": limit})
-			raise HTTPException(
-				status_code=status.HTTP_502_BAD_GATEWAY,
-				detail=f"Failed to load markets from Coinbase: {type(e).__name__}: {e}",
-			)
-
-		internal_symbol = _normalize_coinbase_symbol(symbol, markets)
-		# If caller used USDT, enforce a normalized mapping when possible
-		if symbol.upper().endswith("/USDT") and internal_symbol == symbol.upper():
-			alt = symbol.upper().replace("/USDT", "/USD")
-			if alt in markets:
-				logger.warning(
-					"OHLCV: forcing USDT -> USD normalization",
-					extra={"requested": symbol, "normalized": alt},
-				)
-				internal_symbol = alt
-		if internal_symbol not in markets:
-			logger.warning("OHLCV: symbol not available on Coinbase", extra={"requested": symbol, "normalized": internal_symbol})
-			raise HTTPException(
-				status_code=status.HTTP_400_BAD_REQUEST,
-				detail=f"Symbol not available on Coinbase: {symbol} (normalized: {internal_symbol})",
-			)
-
-		logger.info(
-			"OHLCV: fetching candles",
-			extra={"symbol": symbol, "normalized": internal_symbol, "limit": limit},
-		)
-		try:
-			tf_5 = exchange.fetch_ohlcv(internal_symbol, timeframe="5m", limit=limit)
-			tf_15 = exchange.fetch_ohlcv(internal_symbol, timeframe="15m", limit=limit)
-		except ccxt.NetworkError as e:
-			logger.exception(
-				"OHLCV: network error fetching OHLCV",
-				extra={"symbol": symbol, "normalized": internal_symbol, "limit": limit},
-			)
-			raise HTTPException(
-				status_code=status.HTTP_502_BAD_GATEWAY,
-				detail=f"Network error fetching OHLCV from Coinbase: {type(e).__name__}: {e}",
-			)
-		except ccxt.ExchangeError as e:
-			logger.exception(
-				"OHLCV: exchange error fetching OHLCV",
-				extra={"symbol": symbol, "normalized": internal_symbol, "limit": limit},
-			)
-			raise HTTPException(
-				status_code=status.HTTP_502_BAD_GATEWAY,
-				detail=f"Exchange error fetching OHLCV from Coinbase: {type(e).__name__}: {e}",
-			)
-		except Exception as e:
-			logger.exception(
-				"OHLCV: unexpected error fetching OHLCV",
-				extra={"symbol": symbol, "normalized": internal_symbol, "limit": limit},
-			)
-			raise HTTPException(
-				status_code=status.HTTP_502_BAD_GATEWAY,
-				detail=f"Failed to fetch OHLCV from Coinbase: {type(e).__name__}: {e}",
-			)
+		logger.info("OHLCV: fetching candles", extra={"symbol": symbol, "limit": limit})
+		candles = load_candles(symbol, {"5m": limit, "15m": limit})
 
 		return {
-			"exchange": "coinbase",
+			"exchange": candles.exchange,
 			"symbol": symbol,
-			"normalized_symbol": internal_symbol,
+			"normalized_symbol": candles.normalized_symbol,
 			"timeframes": {
-				"5m": _map_ohlcv_rows(tf_5),
-				"15m": _map_ohlcv_rows(tf_15),
+				"5m": _map_ohlcv_rows(candles.timeframes["5m"]),
+				"15m": _map_ohlcv_rows(candles.timeframes["15m"]),
 			},
 		}
 	except HTTPException:
@@ -154,3 +97,6 @@ def get_ohlcv(
 		)
 
 
+@router.get("/sources", summary="Health and latency of configured exchanges")
+def get_sources() -> Dict[str, Any]:
+	return {"sources": get_market_data().health()}
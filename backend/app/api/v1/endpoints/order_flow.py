@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict
+import logging
+
+from ....db import get_db
+from ....services.market_data import DataSourceUnavailable, SymbolNotSupported
+from ....services.order_flow import IngestionInProgress, flow_series, ingest_symbol
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@router.get("", summary="Stored 5m trade-flow bars for charting")
+def get_order_flow(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USD)"),
+	limit: int = Query(288, ge=1, le=5000, description="Latest bars returned"),
+	db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+	series = flow_series(db, symbol, limit=limit)
+	return {"symbol": symbol, "bars": len(series["ts"]), **series}
+
+
+@router.post("/ingest", summary="Fetch new public trades and a book snapshot into the flow bars")
+def post_ingest(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USD)"),
+	db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+	try:
+		return ingest_symbol(db, symbol)
+	except SymbolNotSupported as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	except IngestionInProgress as e:
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+	except DataSourceUnavailable as e:
+		logger.exception("Order flow: all data sources failed", extra={"requested": symbol})
+		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to fetch trades: {e}")
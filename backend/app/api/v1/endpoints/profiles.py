@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import FileResponse
+from typing import Any, Dict, List
+
+from ....core.config import get_settings
+from ....core.profiling import get_store
+
+router = APIRouter()
+
+
+def require_profiling_access(request: Request) -> None:
+	"""
+	Captures contain market data and code paths; only serve them when
+	profiling is enabled and to the allowed clients.
+	"""
+	settings = get_settings()
+	if not settings.profiling_enabled:
+		raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profiling is disabled")
+	client = request.client.host if request.client else None
+	if client not in settings.profiling_allowed_clients:
+		raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Client not allowed to access profiles")
+
+
+@router.get("", summary="List stored request profiles", dependencies=[Depends(require_profiling_access)])
+def list_profiles() -> List[Dict[str, Any]]:
+	return [{k: v for k, v in meta.items() if k != "top"} for meta in get_store().list()]
+
+
+@router.get("/{capture_id}", summary="Profile summary for a captured request", dependencies=[Depends(require_profiling_access)])
+def get_profile(capture_id: str) -> Dict[str, Any]:
+	meta = get_store().get(capture_id)
+	if meta is None:
+		raise HTTPException(status_code=404, detail="Profile not found")
+	return meta
+
+
+@router.get("/{capture_id}/download", summary="Download a capture bundle or its raw profile", dependencies=[Depends(require_profiling_access)])
+def download_profile(capture_id: str, kind: str = "capture") -> FileResponse:
+	"""
+	`kind=capture` returns the replayable bundle (request + candles, .json.gz);
+	`kind=profile` returns the cProfile stats (.prof) or collapsed stacks (.folded).
+	"""
+	if kind not in ("capture", "profile"):
+		raise HTTPException(status_code=400, detail="kind must be 'capture' or 'profile'")
+	path = get_store().file(capture_id, kind)
+	if path is None:
+		raise HTTPException(status_code=404, detail="Profile not found")
+	return FileResponse(path, media_type="application/octet-stream", filename=path.rsplit("/", 1)[-1])
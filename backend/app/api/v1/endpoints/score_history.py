@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from ....db import get_db
+from ....services.score_history import load_series
+
+router = APIRouter()
+
+
+def _ms(value: datetime) -> int:
+	if value.tzinfo is None:
+		value = value.replace(tzinfo=timezone.utc)
+	return int(value.timestamp() * 1000)
+
+
+@router.get("", summary="Stored per-candle score history for charting")
+def get_score_history(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USD)"),
+	source: str = Query("signals", description="signals (forward-test worker) or fusion (screener)"),
+	start: Optional[datetime] = Query(None, description="Range start (ISO 8601); defaults to 7 days before end"),
+	end: Optional[datetime] = Query(None, description="Range end (ISO 8601, exclusive); defaults to now"),
+	bucket: Optional[str] = Query(None, description="Downsample to 15m, 1h, 4h or 1d; picked from max_points when omitted"),
+	max_points: int = Query(1000, ge=10, le=10000, description="Largest number of points returned when bucket is omitted"),
+	db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+	end = end or datetime.now(tz=timezone.utc)
+	start = start or end - timedelta(days=7)
+	start_ms, end_ms = _ms(start), _ms(end)
+	if start_ms >= end_ms:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+	try:
+		history = load_series(db, symbol, source, start_ms, end_ms, bucket=bucket, max_points=max_points)
+	except ValueError as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	history["start_ms"] = start_ms
+	history["end_ms"] = end_ms
+	return history
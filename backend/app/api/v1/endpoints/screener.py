@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Optional
+
+from ....db import get_db
+from ....services.market_data import DataSourceUnavailable
+from ....services.screener import ScreenerBusy, latest_snapshot, refresh_now
+
+router = APIRouter()
+
+
+@router.get("", summary="Latest market screen ranked by fusion score")
+def get_screener(
+	min_grade: str = Query("none", description="Lowest grade to include: none, C, B, A, A+"),
+	direction: str = Query("any", description="any, long, short or none"),
+	min_volume: float = Query(0.0, ge=0, description="Minimum 24h quote volume"),
+	quote: Optional[str] = Query(None, description="Only pairs quoted in this asset (e.g., USDT)"),
+	sort: str = Query("score", description="score, confidence, volume or change"),
+	limit: int = Query(50, ge=1, le=500),
+	db: Session = Depends(get_db),
+) -> Dict[str, Any]:
+	snapshot = latest_snapshot(db)
+	if snapshot is None:
+		raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Screener has not run yet")
+	try:
+		rows = snapshot.query(min_grade=min_grade, direction=direction, min_volume=min_volume, quote=quote, sort=sort, limit=limit)
+	except ValueError as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	return {
+		"exchange": snapshot.exchange,
+		"results": rows,
+		"meta": {
+			"snapshot_id": snapshot.id,
+			"generated_at": snapshot.created_at.isoformat() if snapshot.created_at else None,
+			"symbols": len(snapshot),
+			"failed": snapshot.failed,
+			"refresh_ms": snapshot.elapsed_ms,
+			"count": len(rows),
+		},
+	}
+
+
+@router.post("/refresh", summary="Re-screen the market now")
+def refresh_screener(db: Session = Depends(get_db)) -> Dict[str, Any]:
+	try:
+		row = refresh_now(db)
+	except ScreenerBusy as e:
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+	except DataSourceUnavailable as e:
+		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to load markets: {e}")
+	return {
+		"snapshot_id": row.id,
+		"exchange": row.exchange,
+		"symbols": row.symbols,
+		"failed": row.failed,
+		"elapsed_ms": row.elapsed_ms,
+	}
@@ -1,192 +1,271 @@
 from fastapi import APIRouter, Query, HTTPException, status
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Sequence
 from datetime import datetime, timezone
-import ccxt
-import pandas as pd
+
+import numpy as np
 
 # Reuse helpers
-from .trend import compute_emas, detect_trend_and_signals  # type: ignore
-from .volume import compute_volume_features, detect_volume_signals  # type: ignore
-from .fusion import score_setup  # type: ignore
+from .trend import detect_trend_and_signals  # type: ignore
+from .volume import detect_volume_signals_multi  # type: ignore
+from .ohlcv import load_candles  # type: ignore
+from ....core.market_frame import MarketFrame
+from ....core.metrics import span
+from ....core.profiling import profiled
+from ....core.scoring import score_setup
+from ....core.strategy import DEFAULT_STRATEGY, GRADES, StrategySpec
+from ....services.learning import FEATURES, WARMUP_BARS, FrameLike, component_weights, feature_effectiveness, feature_matrix, forward_returns
+from ....services.learning_model import get_model, model_stamp
+from ....services.market_data import CandleSet
+from ....services.order_flow import detect_flow_signals, flow_summary, recent_flow
+from ....services.strategies import UnknownStrategy, get_strategy
+from ....services.warm_cache import get_warm_cache
 
 router = APIRouter()
 
+# Defaults of `/signals` (and the variant pre-computed for the watchlist)
+SIGNALS_LIMIT = 600
+SIGNALS_LEARNER = "auto"
 
-def _latest_15(df15: pd.DataFrame, ts_ms: int) -> Optional[pd.Series]:
-	row = df15[df15["timestamp"] <= ts_ms].tail(1)
-	return row.iloc[0] if len(row) else None
 
+def candle_limits(limit: int) -> Dict[str, int]:
+	"""
+	Candles per timeframe behind a `limit`-bar signal.
+	"""
+	return {"5m": limit, "15m": max(200, limit // 3)}
 
-@router.get("", summary="Realtime signal combining trend, volume, EMA/BOS, and learned weights")
-def get_signals(
-	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
-	limit: int = Query(600, ge=200, le=3000, description="Number of 5m candles for learning context"),
+
+def heuristic_feature_weights(
+	df5: "FrameLike",
+	df15: "FrameLike",
+	horizon: int = 12,
+	strategy: Optional[StrategySpec] = None,
+) -> Dict[str, float]:
+	"""
+	On-the-fly "learning" when no model is trained: how often each learning
+	feature preceded a non-negative `horizon`-bar return over the window
+	(vs. a 0.5 baseline, features with more than 20 hits), scaled so the
+	strongest is 1.
+
+	BOS here compares the close with the `bos_lookback` (20) bars before the
+	previous bar.
+	"""
+	spec = strategy or DEFAULT_STRATEGY
+	f5 = MarketFrame.wrap(df5, "5m")
+	X = feature_matrix(f5, MarketFrame.wrap(df15, "15m"), spec)
+	n = X.shape[0]
+	col = {f: i for i, f in enumerate(FEATURES)}
+	c = f5["close"].to_numpy(dtype=float)
+	if n > 1:
+		# Shift the BOS swing window back one bar (prior N bars of bar i-1)
+		swing_high = f5[f"swing_high{spec.bos_lookback}"].to_numpy(dtype=float)
+		swing_low = f5[f"swing_low{spec.bos_lookback}"].to_numpy(dtype=float)
+		with np.errstate(invalid="ignore"):
+			X[1:, col["bos_up"]] = c[1:] > swing_high[:-1]
+			X[1:, col["bos_down"]] = c[1:] < swing_low[:-1]
+	rows = slice(WARMUP_BARS, max(WARMUP_BARS, n - horizon))
+	R = forward_returns(c, [horizon])
+	eff, _, _ = feature_effectiveness(X[rows], R[rows], baseline=0.5, min_hits=20)
+	eff = eff[:, 0]
+	max_abs = float(np.abs(eff).max()) if eff.size else 0.0
+	return dict(zip(FEATURES, (eff / (max_abs or 1.0)).tolist()))
+
+
+def _clamped(weights: Dict[str, float]) -> Dict[str, float]:
+	return {k: float(max(0.0, min(100.0, v))) for k, v in weights.items()}
+
+
+def heuristic_weights(
+	df5: "FrameLike",
+	df15: "FrameLike",
+	horizon: int = 12,
+	strategy: Optional[StrategySpec] = None,
+) -> Dict[str, float]:
+	"""
+	`heuristic_feature_weights` mapped onto the fusion score components,
+	clamped non-negative.
+	"""
+	return _clamped(component_weights(heuristic_feature_weights(df5, df15, horizon, strategy), strategy, digits=None))
+
+
+def _adjusted_signal(
+	spec: StrategySpec,
+	trend_summary: Dict[str, Any],
+	trend_signals: List[Dict[str, Any]],
+	vol_signals: List[Dict[str, Any]],
+	flow_signals: List[Dict[str, Any]],
+	weights: Dict[str, float],
 ) -> Dict[str, Any]:
-	try:
-		exchange = ccxt.coinbase({ "enableRateLimit": True })
-		markets = exchange.load_markets()
-		if symbol not in markets:
-			raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Symbol not available on Coinbase: {symbol}")
+	"""
+	Fusion score adjusted by learned weights, mapped to an action.
+	"""
+	fused = score_setup(trend_summary, trend_signals, vol_signals, spec, flow_signals)
+
+	# Adjust fusion score using learned weights by emphasizing presence of signals in recent window
+	adj = fused["score"]
+	reasons = [fused.get("reasoning","")]
+	# Trend
+	adj += weights.get("trend_base", 0) * (1 if trend_summary.get("trend") in ["uptrend","downtrend"] else 0)
+	# 5m confirm
+	adj += weights.get("confirm_5m", 0) * (1 if trend_summary.get("trend_5m") in ["uptrend","downtrend"] else 0)
+	# EMA/BOS
+	last_trend_signals = trend_signals[-3:]
+	if any(s["type"] == "ema_cross_up" for s in last_trend_signals): adj += weights.get("ema_cross", 0)
+	if any(s["type"] == "ema_cross_down" for s in last_trend_signals): adj += weights.get("ema_cross", 0)
+	if any(s["type"] in ["bos_up","bos_down"] for s in last_trend_signals): adj += weights.get("bos", 0)
+	# Volume
+	last_vol = vol_signals[-3:]
+	if any(s["type"] == "ignition" for s in last_vol): adj += weights.get("ignition", 0)
+	if any(s["type"] == "climax" for s in last_vol): adj += weights.get("climax", 0)
+	if any(s["type"] == "accumulation" for s in last_vol): adj += weights.get("accumulation", 0)
+	if any(s["type"] == "distribution" for s in last_vol): adj += weights.get("distribution", 0)
 
+	adj = max(0, min(100, int(adj)))
+	grade = spec.grade(adj)
+	direction = fused.get("direction","none")
+	confidence = min(100, int(60 + (adj / 5))) if direction in ["long","short"] else min(100, int(adj / 2))
+
+	# Map to actionable decision: grade at or above the strategy's min_grade (B)
+	tradable = GRADES.index(grade) >= spec.min_grade_index
+	if direction == "long" and tradable:
+		action = "buy"
+		reasons.append("Trend supports long and fusion grade is tradable")
+	elif direction == "short" and tradable:
+		action = "sell"
+		reasons.append("Trend supports short and fusion grade is tradable")
+	else:
+		action = "hold"
+		reasons.append("No clear edge or grade too low")
+
+	return {
+		"action": action,
+		"confidence": confidence,
+		"fusion_grade": grade,
+		"fusion_score": adj,
+		"direction": direction,
+		"reasoning": "; ".join([r for r in reasons if r]).strip(),
+	}
+
+
+def strategy_signals(
+	symbol: str,
+	strategies: Sequence[StrategySpec],
+	limit: int = 600,
+	learner: str = "auto",
+	candles: Optional[CandleSet] = None,
+) -> List[Dict[str, Any]]:
+	"""
+	`get_signals` for several strategies on one symbol, in strategy order.
+	`candles` (fetched with `candle_limits(limit)`) is used instead of
+	fetching when given.
+
+	Candles, indicators and the learner are shared. Signals and heuristic
+	weights are computed once per distinct `detection_key`, with the volume
+	thresholds of all of them compared in one pass; only scoring runs per
+	strategy.
+	"""
+	specs = list(strategies)
+	try:
 		# Fetch OHLCV
-		df5 = pd.DataFrame(exchange.fetch_ohlcv(symbol, timeframe="5m", limit=limit),
-			columns=["timestamp", "open", "high", "low", "close", "volume"])
-		df15 = pd.DataFrame(exchange.fetch_ohlcv(symbol, timeframe="15m", limit=max(200, limit // 3)),
-			columns=["timestamp", "open", "high", "low", "close", "volume"])
+		if candles is None:
+			candles = load_candles(symbol, candle_limits(limit))
+		# One frame per timeframe shared by detection, scoring and learning
+		f5 = MarketFrame.from_rows(candles.timeframes["5m"], "5m")
+		f15 = MarketFrame.from_rows(candles.timeframes["15m"], "15m")
 
 		# Indicators and signals
-		df5_tr = compute_emas(df5.copy(), [20, 50, 200])
-		df15_tr = compute_emas(df15.copy(), [20, 50, 200])
-		trend_summary, trend_signals = detect_trend_and_signals(df5_tr, df15_tr)
-
-		df5_vol = compute_volume_features(df5.copy())
-		df15_vol = compute_volume_features(df15.copy())
-		vol_signals = detect_volume_signals(df5_vol, "5m") + detect_volume_signals(df15_vol, "15m")
-
-		# Simple on-the-fly "learning": reuse learning method to derive weights quickly
-		# We'll approximate by counting last N occurrences effectiveness with 12-bar forward return.
-		horizon = 12
-		def eff_weights() -> Dict[str, float]:
-			features = [
-				"trend_up", "trend_down", "confirm_5m",
-				"ema_cross_up", "ema_cross_down",
-				"bos_up", "bos_down",
-				"ignition_up", "ignition_down",
-				"climax", "accumulation", "distribution",
-			]
-			stats = {f: {"hits": 0, "wins": 0} for f in features}
-			def direction_from_alignment(row: pd.Series) -> str:
-				if row["ema20"] > row["ema50"] > row["ema200"]:
-					return "uptrend"
-				if row["ema20"] < row["ema50"] < row["ema200"]:
-					return "downtrend"
-				return "sideways"
-			def flags(i: int) -> Dict[str, int]:
-				row5 = df5_tr.iloc[i]
-				row15 = _latest_15(df15_tr, int(row5["timestamp"]))
-				fl = {f: 0 for f in features}
-				if row15 is not None:
-					t15 = direction_from_alignment(row15)
-					if t15 == "uptrend": fl["trend_up"] = 1
-					elif t15 == "downtrend": fl["trend_down"] = 1
-				t5 = direction_from_alignment(row5)
-				if t5 in ["uptrend", "downtrend"]:
-					fl["confirm_5m"] = 1
-				# ema crosses
-				if i >= 1:
-					prev = df5_tr.iloc[i-1]; curr = row5
-					for a, b in [(20,50),(50,200),(20,200)]:
-						prev_diff = prev[f"ema{a}"] - prev[f"ema{b}"]
-						curr_diff = curr[f"ema{a}"] - curr[f"ema{b}"]
-						if pd.notna(prev_diff) and pd.notna(curr_diff):
-							if prev_diff <= 0 and curr_diff > 0: fl["ema_cross_up"] = 1
-							if prev_diff >= 0 and curr_diff < 0: fl["ema_cross_down"] = 1
-				# BOS
-				if i >= 21:
-					window = df5_tr.iloc[i-21:i-1]
-					last = row5
-					if last["close"] > window["high"].max(): fl["bos_up"] = 1
-					if last["close"] < window["low"].min(): fl["bos_down"] = 1
-				# volume
-				row5v = df5_vol.iloc[i]
-				rv = row5v.get("rv"); body_pct = row5v.get("body_pct")
-				if pd.notna(rv) and rv is not None:
-					if rv >= 3.0: fl["climax"] = 1
-					if rv >= 2.0 and pd.notna(body_pct) and body_pct is not None and body_pct >= 0.6:
-						if row5v["close"] > row5v["open"]: fl["ignition_up"] = 1
-						elif row5v["close"] < row5v["open"]: fl["ignition_down"] = 1
-				win50 = df5_vol.iloc[max(0, i-50): i+1]
-				active = win50[win50["rv"] >= 1.5] if "rv" in win50 else pd.DataFrame()
-				if len(active) >= 5:
-					score = int((active["close"] > active["open"]).sum() - (active["close"] < active["open"]).sum())
-					if score > 0: fl["accumulation"] = 1
-					elif score < 0: fl["distribution"] = 1
-				return fl
-			for i in range(250, len(df5_tr) - horizon):
-				fl = flags(i)
-				entry = float(df5_tr.iloc[i]["close"])
-				exit = float(df5_tr.iloc[i + horizon]["close"])
-				win = 1 if (exit / entry - 1.0) >= 0 else 0
-				for k,v in fl.items():
-					if v:
-						stats[k]["hits"] += 1
-						stats[k]["wins"] += win
-			baseline = 0.5
-			eff = {k: ((s["wins"]/s["hits"]) - baseline) if s["hits"] > 20 else 0.0 for k,s in stats.items()}
-			max_abs = max((abs(v) for v in eff.values()), default=1.0) or 1.0
-			w = {k: (v / max_abs) for k,v in eff.items()}
-			weights = {
-				"trend_base": max(w.get("trend_up",0), w.get("trend_down",0)) * 30,
-				"confirm_5m": w.get("confirm_5m",0) * 15,
-				"ema_cross": max(w.get("ema_cross_up",0), w.get("ema_cross_down",0)) * 20,
-				"bos": max(w.get("bos_up",0), w.get("bos_down",0)) * 15,
-				"ignition": max(w.get("ignition_up",0), w.get("ignition_down",0)) * 12,
-				"climax": w.get("climax",0) * 6,
-				"accumulation": w.get("accumulation",0) * 10,
-				"distribution": w.get("distribution",0) * 10,
-			}
-			# Clamp non-negative
-			return {k: float(max(0.0, min(100.0, v))) for k,v in weights.items()}
-
-		weights = eff_weights()
-
-		# Fusion score (baseline)
-		fused = score_setup(trend_summary, trend_signals, vol_signals)
-
-		# Adjust fusion score using learned weights by emphasizing presence of signals in recent window
-		adj = fused["score"]
-		reasons = [fused.get("reasoning","")]
-		# Trend
-		adj += weights.get("trend_base", 0) * (1 if trend_summary.get("trend") in ["uptrend","downtrend"] else 0)
-		# 5m confirm
-		adj += weights.get("confirm_5m", 0) * (1 if trend_summary.get("trend_5m") in ["uptrend","downtrend"] else 0)
-		# EMA/BOS
-		last_trend_signals = trend_signals[-3:]
-		if any(s["type"] == "ema_cross_up" for s in last_trend_signals): adj += weights.get("ema_cross", 0)
-		if any(s["type"] == "ema_cross_down" for s in last_trend_signals): adj += weights.get("ema_cross", 0)
-		if any(s["type"] in ["bos_up","bos_down"] for s in last_trend_signals): adj += weights.get("bos", 0)
-		# Volume
-		last_vol = vol_signals[-3:]
-		if any(s["type"] == "ignition" for s in last_vol): adj += weights.get("ignition", 0)
-		if any(s["type"] == "climax" for s in last_vol): adj += weights.get("climax", 0)
-		if any(s["type"] == "accumulation" for s in last_vol): adj += weights.get("accumulation", 0)
-		if any(s["type"] == "distribution" for s in last_vol): adj += weights.get("distribution", 0)
-
-		adj = max(0, min(100, int(adj)))
-		grade = "A+" if adj >= 80 else "A" if adj >= 65 else "B" if adj >= 50 else "C" if adj >= 35 else "none"
-		direction = fused.get("direction","none")
-		confidence = min(100, int(60 + (adj / 5))) if direction in ["long","short"] else min(100, int(adj / 2))
-
-		# Map to actionable decision
-		if direction == "long" and grade in ["A+","A","B"]:
-			action = "buy"
-			reasons.append("Trend supports long and fusion grade is tradable")
-		elif direction == "short" and grade in ["A+","A","B"]:
-			action = "sell"
-			reasons.append("Trend supports short and fusion grade is tradable")
-		else:
-			action = "hold"
-			reasons.append("No clear edge or grade too low")
-
-		return {
-			"exchange": "coinbase",
-			"symbol": symbol,
-			"action": action,
-			"confidence": confidence,
-			"fusion_grade": grade,
-			"fusion_score": adj,
-			"direction": direction,
-			"reasoning": "; ".join([r for r in reasons if r]).strip(),
-			"weights": weights,
-			"meta": {
-				"generated_at": datetime.now(tz=timezone.utc).isoformat(),
-				"count_5m": int(len(df5)),
-				"count_15m": int(len(df15)),
-			},
-		}
+		with span("indicators"):
+			for frame in (f5, f15):
+				frame.trend()
+				frame.volume()
+
+		# One strategy per distinct set of detection thresholds
+		by_key: Dict[Any, StrategySpec] = {}
+		for spec in specs:
+			by_key.setdefault(spec.detection_key, spec)
+		detectors = list(by_key.values())
+		detected: Dict[Any, Any] = {}
+		with span("signals"):
+			vol5 = detect_volume_signals_multi(f5.df, "5m", detectors)
+			vol15 = detect_volume_signals_multi(f15.df, "15m", detectors)
+			# Stored trade flow, read once for the widest window (none unless ingested)
+			ts5 = f5.df["timestamp"].to_numpy(dtype=np.int64)
+			flow = recent_flow(symbol, ts5, max(spec.delta_window for spec in detectors))
+			for spec, v5, v15 in zip(detectors, vol5, vol15):
+				trend_summary, trend_signals = detect_trend_and_signals(f5.df, f15.df, spec)
+				detected[spec.detection_key] = (trend_summary, trend_signals, v5 + v15, detect_flow_signals(flow, spec))
+
+		# Trained model: predict only (the worker passes fold in new candles)
+		model = get_model(symbol) if learner in ("auto", "model") else None
+		if learner == "model" and model is None:
+			raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"No trained model for {symbol}; POST /learning/model first")
+		model_info: Optional[Dict[str, Any]] = None
+		feature_weights: Dict[Any, Dict[str, float]] = {}
+		with span("learning"):
+			if model is not None:
+				p_up = float(model.predict_up(feature_matrix(f5, f15)[-1])[0])
+				model_info = {
+					"p_up": round(p_up, 4),
+					"horizon_bars": model.horizon,
+					"samples": model.n_samples,
+					"last_trained_ts": model.last_trained_ts,
+				}
+			else:
+				for spec in detectors:
+					feature_weights[spec.detection_key] = heuristic_feature_weights(f5, f15, strategy=spec)
+
+		results: List[Dict[str, Any]] = []
+		generated_at = datetime.now(tz=timezone.utc).isoformat()
+		with span("scoring"):
+			for spec in specs:
+				if model is not None:
+					weights = model.component_weights(spec)
+				else:
+					weights = _clamped(component_weights(feature_weights[spec.detection_key], spec, digits=None))
+				signal = _adjusted_signal(spec, *detected[spec.detection_key], weights)
+				results.append({
+					"exchange": candles.exchange,
+					"symbol": symbol,
+					"normalized_symbol": candles.normalized_symbol,
+					**signal,
+					"weights": weights,
+					"learner": "model" if model is not None else "heuristic",
+					"strategy": spec.name,
+					"model": model_info,
+					"flow": flow_summary(flow, spec.delta_window),
+					"meta": {
+						"generated_at": generated_at,
+						"count_5m": int(len(f5)),
+						"count_15m": int(len(f15)),
+					},
+				})
+		return results
 	except HTTPException:
 		raise
 	except Exception as e:
 		raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to generate signal: {e}")
 
 
+@router.get("", summary="Realtime signal combining trend, volume, EMA/BOS, and learned weights")
+@profiled
+def get_signals(
+	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
+	limit: int = Query(SIGNALS_LIMIT, ge=200, le=3000, description="Number of 5m candles for learning context"),
+	learner: str = Query(SIGNALS_LEARNER, description="Weight source: auto (model if trained), model, or heuristic"),
+	strategy: str = Query("fusion", description="Strategy definition supplying thresholds, points and grade cutoffs (see /strategies)"),
+) -> Dict[str, Any]:
+	if learner not in ("auto", "model", "heuristic"):
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown learner: {learner}")
+	try:
+		spec = get_strategy(strategy)
+	except UnknownStrategy as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	# Watchlist symbols are usually pre-computed for the current candle
+	cache = get_warm_cache()
+	warmed = limit == SIGNALS_LIMIT and learner == SIGNALS_LEARNER and cache.warms(spec.name)
+	return cache.get(
+		"signals", symbol, (limit, learner, spec.name),
+		lambda: strategy_signals(symbol, [spec], limit=limit, learner=learner)[0],
+		warmed=warmed,
+		# A model saved by another process invalidates the entry
+		version=model_stamp(symbol) if warmed else None,
+	)
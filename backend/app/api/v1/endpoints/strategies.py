@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Any, Dict
+import json
+
+from ....core.strategy import DEFAULT_STRATEGY, StrategySpec
+from ....db import get_db
+from ....services.strategies import StrategyExists, UnknownStrategy, create_strategy, get_strategy, list_strategies
+
+router = APIRouter()
+
+
+def _strategy_out(spec: StrategySpec) -> Dict[str, Any]:
+	return {"name": spec.name, "overrides": spec.overrides(), "params": spec.to_dict()}
+
+
+@router.get("", summary="List strategy definitions")
+def get_strategies(db: Session = Depends(get_db)):
+	return {
+		"strategies": [_strategy_out(s) for s in list_strategies(db)],
+		"defaults": DEFAULT_STRATEGY.to_dict(),
+	}
+
+
+@router.get("/{name}", summary="One strategy definition")
+def get_strategy_definition(name: str, db: Session = Depends(get_db)):
+	try:
+		return _strategy_out(get_strategy(name, db))
+	except UnknownStrategy as e:
+		raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("", summary="Store a strategy variant")
+def create_strategy_definition(
+	name: str = Query(..., description="Name used by backtests, forward tests and signals"),
+	params: str = Query(..., description='JSON object of overrides of the stock parameters, e.g. {"take_profit": 0.03, "min_grade": "A"}'),
+	db: Session = Depends(get_db),
+):
+	try:
+		overrides = json.loads(params)
+	except ValueError:
+		overrides = None
+	if not isinstance(overrides, dict):
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="params must be a JSON object")
+	try:
+		spec = create_strategy(db, name, overrides)
+	except StrategyExists as e:
+		raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+	except ValueError as e:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+	return _strategy_out(spec)
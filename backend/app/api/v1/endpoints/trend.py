@@ -1,24 +1,38 @@
 from fastapi import APIRouter, Query, HTTPException, status
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timezone
-import ccxt
-import pandas as pd
+
+from ....core import kernels
+from ....core.metrics import span
+from ....core.profiling import profiled
+from ....core.lazy import lazy_import
+from ....core.market_frame import MarketFrame
+from ....core.strategy import DEFAULT_STRATEGY, StrategySpec
+from .ohlcv import load_candles  # type: ignore
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
 
-def compute_emas(df: pd.DataFrame, periods: List[int]) -> pd.DataFrame:
+def compute_emas(df: "pd.DataFrame", periods: List[int]) -> "pd.DataFrame":
+	close = df["close"].to_numpy(dtype=float)
 	for p in periods:
-		df[f"ema{p}"] = df["close"].ewm(span=p, adjust=False, min_periods=p).mean()
+		df[f"ema{p}"] = kernels.ema(close, span=p, min_periods=p)
 	return df
 
 
-def detect_trend_and_signals(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+def detect_trend_and_signals(
+	df5: "pd.DataFrame",
+	df15: "pd.DataFrame",
+	strategy: Optional[StrategySpec] = None,
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+	spec = strategy or DEFAULT_STRATEGY
 	signals: List[Dict[str, Any]] = []
 	summary: Dict[str, Any] = {}
 
 	# Determine trend direction by EMA alignment on 15m, fallback to 5m
-	def direction_from(df: pd.DataFrame) -> str:
+	def direction_from(df: "pd.DataFrame") -> str:
 		row = df.iloc[-1]
 		if row["ema20"] > row["ema50"] > row["ema200"]:
 			return "uptrend"
@@ -31,7 +45,7 @@ def detect_trend_and_signals(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[Dic
 	trend = trend_15 if trend_15 != "unknown" else trend_5
 
 	# EMA crosses (last two candles on 5m and 15m)
-	def ema_crosses(df: pd.DataFrame, tf: str):
+	def ema_crosses(df: "pd.DataFrame", tf: str):
 		if len(df) < 2:
 			return
 		prev = df.iloc[-2]
@@ -50,7 +64,7 @@ def detect_trend_and_signals(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[Dic
 	ema_crosses(df15, "15m")
 
 	# Basic break of structure: last close breaks previous swing high/low (lookback N)
-	def break_of_structure(df: pd.DataFrame, tf: str, lookback: int = 20):
+	def break_of_structure(df: "pd.DataFrame", tf: str, lookback: int = 20):
 		if len(df) < lookback + 2:
 			return
 		window = df.iloc[-(lookback + 1):-1]  # exclude last
@@ -62,11 +76,11 @@ def detect_trend_and_signals(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[Dic
 		if last["close"] < swing_low:
 			signals.append({"type": "bos_down", "timeframe": tf})
 
-	break_of_structure(df5, "5m")
-	break_of_structure(df15, "15m")
+	break_of_structure(df5, "5m", spec.bos_lookback)
+	break_of_structure(df15, "15m", spec.bos_lookback)
 
 	# Summary
-	def last_ts(df: pd.DataFrame) -> int:
+	def last_ts(df: "pd.DataFrame") -> int:
 		return int(df.iloc[-1]["timestamp"]) if len(df) else 0
 
 	summary = {
@@ -80,39 +94,26 @@ def detect_trend_and_signals(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[Dic
 	return summary, signals
 
 
-@router.get("", summary="Compute trend and signals from Coinbase OHLCV (5m & 15m)")
+@router.get("", summary="Compute trend and signals from exchange OHLCV (5m & 15m)")
+@profiled
 def get_trend(
 	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
 	limit: int = Query(200, ge=50, le=500, description="Candles per timeframe"),
 ):
 	try:
-		exchange = ccxt.coinbase({
-			"enableRateLimit": True,
-		})
-		markets = exchange.load_markets()
-		if symbol not in markets:
-			raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Symbol not available on Coinbase: {symbol}")
-
-		data5 = exchange.fetch_ohlcv(symbol, timeframe="5m", limit=limit)
-		data15 = exchange.fetch_ohlcv(symbol, timeframe="15m", limit=limit)
-
-		def to_df(rows: List[List[float]]) -> pd.DataFrame:
-			if not rows:
-				return pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])
-			df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
-			return df
-
-		df5 = to_df(data5)
-		df15 = to_df(data15)
+		candles = load_candles(symbol, {"5m": limit, "15m": limit})
 
-		df5 = compute_emas(df5, [20, 50, 200])
-		df15 = compute_emas(df15, [20, 50, 200])
+		with span("indicators"):
+			df5 = MarketFrame.from_rows(candles.timeframes["5m"], "5m").trend()
+			df15 = MarketFrame.from_rows(candles.timeframes["15m"], "15m").trend()
 
-		summary, signals = detect_trend_and_signals(df5, df15)
+		with span("signals"):
+			summary, signals = detect_trend_and_signals(df5, df15)
 
 		return {
-			"exchange": "coinbase",
+			"exchange": candles.exchange,
 			"symbol": symbol,
+			"normalized_symbol": candles.normalized_symbol,
 			"summary": summary,
 			"signals": signals,
 			"meta": {
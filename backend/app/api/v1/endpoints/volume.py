@@ -1,101 +1,127 @@
 from fastapi import APIRouter, Query, HTTPException, status
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Sequence
 from datetime import datetime, timezone
-import ccxt
-import pandas as pd
+
+import numpy as np
+
+from ....core import kernels
+from ....core.metrics import span
+from ....core.profiling import profiled
+from ....core.lazy import lazy_import
+from ....core.market_frame import MarketFrame
+from ....core.strategy import DEFAULT_STRATEGY, StrategySpec, compile_strategies
+from .ohlcv import load_candles  # type: ignore
+
+pd = lazy_import("pandas")
 
 router = APIRouter()
 
 
-def to_df(rows: List[List[float]]) -> pd.DataFrame:
+def to_df(rows: List[List[float]]) -> "pd.DataFrame":
 	if not rows:
 		return pd.DataFrame(columns=["timestamp", "open", "high", "low", "close", "volume"])
 	df = pd.DataFrame(rows, columns=["timestamp", "open", "high", "low", "close", "volume"])
 	return df
 
 
-def compute_volume_features(df: pd.DataFrame) -> pd.DataFrame:
+def compute_volume_features(df: "pd.DataFrame") -> "pd.DataFrame":
 	if df.empty:
 		return df
-	df["sma20_vol"] = df["volume"].rolling(window=20, min_periods=20).mean()
-	df["rv"] = df["volume"] / df["sma20_vol"]
-	df["body"] = (df["close"] - df["open"]).abs()
-	df["range"] = df["high"] - df["low"]
-	df["body_pct"] = df["body"] / df["range"].replace(0, pd.NA)
-	df["dir"] = (df["close"] > df["open"]).astype(int) - (df["close"] < df["open"]).astype(int)  # 1 up, -1 down, 0 flat
+	o = df["open"].to_numpy(dtype=float)
+	h = df["high"].to_numpy(dtype=float)
+	l = df["low"].to_numpy(dtype=float)
+	c = df["close"].to_numpy(dtype=float)
+	v = df["volume"].to_numpy(dtype=float)
+	df["sma20_vol"] = kernels.rolling_mean(v, 20)
+	df["rv"] = kernels.relative_volume(v, 20)
+	df["body"] = abs(c - o)
+	df["range"] = h - l
+	df["body_pct"] = kernels.body_pct(o, h, l, c)
+	df["dir"] = kernels.candle_dir(o, c).astype(int)  # 1 up, -1 down, 0 flat
 	return df
 
 
-def detect_volume_signals(df: pd.DataFrame, tf: str) -> List[Dict[str, Any]]:
-	signals: List[Dict[str, Any]] = []
-	if df.empty:
-		return signals
-
-	# Climax candles: relative volume >= 3.0
-	climax = df[(df["rv"] >= 3.0)]
-	for _, row in climax.tail(30).iterrows():
-		signals.append({
-			"type": "climax",
-			"timeframe": tf,
-			"ts": int(row["timestamp"]),
-			"rv": float(row["rv"]) if pd.notna(row["rv"]) else None,
-			"dir": "up" if row["dir"] > 0 else "down" if row["dir"] < 0 else "flat",
-		})
-
-	# Ignition candles: large body, high body_pct, rv >= 2.0
-	ignition = df[(df["rv"] >= 2.0) & (df["body_pct"] >= 0.6)]
-	for _, row in ignition.tail(30).iterrows():
-		signals.append({
-			"type": "ignition",
-			"timeframe": tf,
-			"ts": int(row["timestamp"]),
-			"rv": float(row["rv"]) if pd.notna(row["rv"]) else None,
-			"dir": "up" if row["dir"] > 0 else "down" if row["dir"] < 0 else "flat",
-		})
-
-	# Sustained accumulation/distribution over recent 50 bars where rv > 1.5
-	window = df.tail(50)
-	active = window[window["rv"] >= 1.5]
-	if len(active) >= 5:
-		score = (active["dir"]).sum()  # positive means more up closes
-		event_type = "accumulation" if score > 0 else "distribution" if score < 0 else "indeterminate"
-		if event_type != "indeterminate":
-			signals.append({
-				"type": event_type,
-				"timeframe": tf,
-				"ts": int(window.iloc[-1]["timestamp"]),
-				"count": int(len(active)),
-				"score": int(score),
-			})
+def detect_volume_signals(df: "pd.DataFrame", tf: str, strategy: Optional[StrategySpec] = None) -> List[Dict[str, Any]]:
+	return detect_volume_signals_multi(df, tf, (strategy or DEFAULT_STRATEGY,))[0]
 
-	return signals
 
-
-@router.get("", summary="Analyze volume spikes and events from Coinbase OHLCV (5m & 15m)")
+def detect_volume_signals_multi(df: "pd.DataFrame", tf: str, strategies: Sequence[StrategySpec]) -> List[List[Dict[str, Any]]]:
+	"""
+	`detect_volume_signals` for several strategies: every strategy's
+	thresholds are compared against the volume columns in one (k, n) pass.
+	"""
+	specs = tuple(strategies)
+	if df.empty:
+		return [[] for _ in specs]
+	a = compile_strategies(specs)
+	ts = df["timestamp"].to_numpy()
+	rv = df["rv"].to_numpy(dtype=float)
+	bp = df["body_pct"].to_numpy(dtype=float)
+	d = df["dir"].to_numpy()
+	labels = np.where(d > 0, "up", np.where(d < 0, "down", "flat"))
+	with np.errstate(invalid="ignore"):
+		# Climax candles: relative volume >= climax_rv (3.0)
+		climax = rv >= a.climax_rv
+		# Ignition candles: large body, high body_pct, rv >= ignition_rv (2.0)
+		ignition = (rv >= a.ignition_rv) & (bp >= a.ignition_body_pct)
+
+	def candles(kind: str, rows: np.ndarray) -> List[Dict[str, Any]]:
+		return [
+			{
+				"type": kind,
+				"timeframe": tf,
+				"ts": int(ts[i]),
+				"rv": float(rv[i]) if not np.isnan(rv[i]) else None,
+				"dir": str(labels[i]),
+			}
+			for i in rows
+		]
+
+	out: List[List[Dict[str, Any]]] = []
+	for j, spec in enumerate(specs):
+		signals = candles("climax", np.flatnonzero(climax[j])[-30:]) + candles("ignition", np.flatnonzero(ignition[j])[-30:])
+
+		# Sustained accumulation/distribution over the recent flow_window (50)
+		# bars where rv >= flow_rv (1.5)
+		window = slice(max(0, len(rv) - spec.flow_window), None)
+		with np.errstate(invalid="ignore"):
+			active = rv[window] >= spec.flow_rv
+		if int(active.sum()) >= spec.flow_min_active:
+			score = int(d[window][active].sum())  # positive means more up closes
+			event_type = "accumulation" if score > 0 else "distribution" if score < 0 else "indeterminate"
+			if event_type != "indeterminate":
+				signals.append({
+					"type": event_type,
+					"timeframe": tf,
+					"ts": int(ts[-1]),
+					"count": int(active.sum()),
+					"score": score,
+				})
+		out.append(signals)
+	return out
+
+
+@router.get("", summary="Analyze volume spikes and events from exchange OHLCV (5m & 15m)")
+@profiled
 def get_volume(
 	symbol: str = Query(..., description="Trading pair (e.g., BTC/USDT)"),
 	limit: int = Query(200, ge=50, le=500, description="Candles per timeframe"),
 ):
 	try:
-		exchange = ccxt.coinbase({
-			"enableRateLimit": True,
-		})
-		markets = exchange.load_markets()
-		if symbol not in markets:
-			raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Symbol not available on Coinbase: {symbol}")
-
-		data5 = exchange.fetch_ohlcv(symbol, timeframe="5m", limit=limit)
-		data15 = exchange.fetch_ohlcv(symbol, timeframe="15m", limit=limit)
+		candles = load_candles(symbol, {"5m": limit, "15m": limit})
 
-		df5 = compute_volume_features(to_df(data5))
-		df15 = compute_volume_features(to_df(data15))
+		with span("indicators"):
+			df5 = MarketFrame.from_rows(candles.timeframes["5m"], "5m").volume()
+			df15 = MarketFrame.from_rows(candles.timeframes["15m"], "15m").volume()
 
-		signals5 = detect_volume_signals(df5, "5m")
-		signals15 = detect_volume_signals(df15, "15m")
+		with span("signals"):
+			signals5 = detect_volume_signals(df5, "5m")
+			signals15 = detect_volume_signals(df15, "15m")
 
 		return {
-			"exchange": "coinbase",
+			"exchange": candles.exchange,
 			"symbol": symbol,
+			"normalized_symbol": candles.normalized_symbol,
 			"signals": signals5 + signals15,
 			"meta": {
 				"generated_at": datetime.now(tz=timezone.utc).isoformat(),
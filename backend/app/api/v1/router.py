@@ -9,6 +9,12 @@ from .endpoints import (
 	volume,
 	fusion,
 	forward_test,
+	profiles,
+	screener,
+	score_history,
+	alerts,
+	strategies,
+	order_flow,
 )
 
 api_router = APIRouter()
@@ -22,5 +28,9 @@ api_router.include_router(trend.router, prefix="/trend", tags=["trend"])
 api_router.include_router(volume.router, prefix="/volume", tags=["volume"])
 api_router.include_router(fusion.router, prefix="/fusion", tags=["fusion"])
 api_router.include_router(forward_test.router, prefix="/forward-test", tags=["forward-test"])
-
-
+api_router.include_router(profiles.router, prefix="/profiles", tags=["profiles"])
+api_router.include_router(screener.router, prefix="/screener", tags=["screener"])
+api_router.include_router(score_history.router, prefix="/score-history", tags=["score-history"])
+api_router.include_router(alerts.router, prefix="/alerts", tags=["alerts"])
+api_router.include_router(strategies.router, prefix="/strategies", tags=["strategies"])
+api_router.include_router(order_flow.router, prefix="/order-flow", tags=["order-flow"])
@@ -1,6 +1,6 @@
 from functools import lru_cache
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Any, Dict, List
 
 
 class Settings(BaseSettings):
@@ -8,6 +8,84 @@ class Settings(BaseSettings):
 	api_v1_prefix: str = "/api/v1"
 	allowed_origins: List[str] = ["*"]
 
+	# Market data sources, in fallback order (ccxt exchange ids)
+	exchanges: List[str] = ["coinbase", "kraken"]
+	exchange_timeout_ms: int = 7000
+	exchange_cooldown_seconds: int = 60
+	markets_ttl_seconds: int = 3600
+
+	# Forward-test stepping: "auto" elects one leader across worker processes
+	# through a DB lease row, "always" steps in every process, "off" disables it
+	forward_test_worker: str = "auto"
+	forward_test_interval_seconds: int = 300
+	leader_lease_seconds: int = 90
+	leader_heartbeat_seconds: int = 30
+
+	# SQLite file shared by all worker processes on a host for candle caching
+	# ("" disables); candle sets are reused for `candle_cache_ttl_seconds`
+	shared_cache_path: str = ""
+	candle_cache_ttl_seconds: int = 15
+
+	# Walk-forward learning: worker processes for folds (0 = one per CPU)
+	learning_workers: int = 0
+	# Backtests: worker processes for portfolio symbols and Monte Carlo chunks (0 = one per CPU)
+	backtest_workers: int = 0
+	# Persisted model-based learners (one file per symbol)
+	learner_model_dir: str = "/tmp/cryptotrendlab_models"
+
+	# Market screener: fusion scores for every listed spot pair in `screener_quotes`,
+	# refreshed in the background by one leader process when enabled. Passes
+	# start `screener_delay_seconds` after a 5m close; the interval is rounded
+	# up to whole bars
+	screener_enabled: bool = False
+	screener_interval_seconds: int = 300
+	screener_delay_seconds: float = 3.0
+	screener_quotes: List[str] = ["USD", "USDT", "USDC"]
+	screener_max_symbols: int = 300
+	screener_concurrency: int = 4
+	screener_candles: int = 300
+
+	# Alert rules run on each screener pass; with the screener off, the worker
+	# evaluates them on its own schedule without storing a screen
+	alerts_enabled: bool = False
+	alerts_webhook_timeout_seconds: float = 5.0
+	# Webhook URLs must resolve to public addresses unless this is set
+	alerts_webhook_allow_private: bool = False
+	alerts_stream_poll_seconds: float = 2.0
+
+	# Order flow: public trades of these symbols (and a book snapshot) are
+	# folded into 5m flow bars by one leader process every interval
+	order_flow_symbols: List[str] = []
+	order_flow_interval_seconds: int = 60
+	order_flow_book_depth: int = 20
+
+	# Warm cache: /fusion, /signals and /learning responses of these symbols
+	# (default parameters, each of `warm_cache_strategies`) are recomputed at
+	# startup and this many seconds after every 5m candle close
+	warm_cache_symbols: List[str] = []
+	warm_cache_strategies: List[str] = ["fusion"]
+	warm_cache_delay_seconds: float = 3.0
+
+	# Strategy variants by name, as overrides of the stock "fusion" parameters
+	# (core/strategy.py), e.g. STRATEGIES='{"tight": {"take_profit": 0.01}}';
+	# more can be stored through /strategies
+	strategies: Dict[str, Dict[str, Any]] = {}
+
+	# Import pandas/ccxt/sklearn in the background after startup (see core/lazy.py)
+	warm_up_imports: bool = True
+
+	# Per-stage timing histograms at /metrics; Server-Timing response headers
+	metrics_enabled: bool = True
+	server_timing_enabled: bool = False
+
+	# Opt-in request profiling (cProfile or stack sampling) with candle snapshots
+	profiling_enabled: bool = False
+	profiling_sample_rate: float = 0.0
+	profiling_mode: str = "cprofile"
+	profiling_allowed_clients: List[str] = ["127.0.0.1", "::1"]
+	profiling_dir: str = "/tmp/cryptotrendlab_profiles"
+	profiling_max_captures: int = 50
+
 	class Config:
 		env_file = ".env"
 		env_file_encoding = "utf-8"
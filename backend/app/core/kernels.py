@@ -0,0 +1,217 @@
+"""
+Array-in/array-out kernels for the indicator and signal primitives.
+
+Every kernel takes 1-D float64 NumPy arrays and returns arrays of the same
+length. Warm-up contract (mirrors pandas `min_periods`): a value is NaN
+until `min_periods` observations are available, and boolean signal kernels
+return False wherever one of their inputs is NaN or still warming up.
+Inputs are assumed to be finite candle data (no NaN gaps).
+
+When numba is installed the recursive/windowed kernels are JIT-compiled;
+otherwise they fall back to pure NumPy (scipy's `lfilter`, which ships with
+scikit-learn, for the EMA recursion).
+"""
+
+from typing import Optional, Tuple
+import numpy as np
+
+try:
+	from numba import njit
+	HAVE_NUMBA = True
+except ImportError:  # pragma: no cover - numba is optional
+	HAVE_NUMBA = False
+
+	def njit(*args, **kwargs):  # type: ignore
+		if args and callable(args[0]):
+			return args[0]
+		return lambda fn: fn
+
+
+def _as_f64(x) -> np.ndarray:
+	return np.ascontiguousarray(x, dtype=np.float64)
+
+
+@njit(cache=True)
+def _ema_loop(x: np.ndarray, alpha: float) -> np.ndarray:
+	out = np.empty_like(x)
+	acc = x[0]
+	out[0] = acc
+	for i in range(1, x.shape[0]):
+		acc = (1.0 - alpha) * acc + alpha * x[i]
+		out[i] = acc
+	return out
+
+
+def ema(x, span: int, min_periods: int = 0) -> np.ndarray:
+	"""
+	Exponential moving average, equivalent to
+	`Series.ewm(span=span, adjust=False, min_periods=min_periods).mean()`.
+	"""
+	x = _as_f64(x)
+	if x.size == 0:
+		return x.copy()
+	alpha = 2.0 / (span + 1.0)
+	if HAVE_NUMBA:
+		out = _ema_loop(x, alpha)
+	else:
+		from scipy.signal import lfilter
+		out, _ = lfilter([alpha], [1.0, alpha - 1.0], x, zi=[(1.0 - alpha) * x[0]])
+	if min_periods > 1:
+		out[: min_periods - 1] = np.nan
+	return out
+
+
+def rolling_mean(x, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+	"""
+	Trailing mean over `window` bars, equivalent to
+	`Series.rolling(window, min_periods=min_periods).mean()` for finite input.
+	"""
+	x = _as_f64(x)
+	n = x.size
+	min_periods = window if min_periods is None else min_periods
+	out = np.full(n, np.nan)
+	if n == 0:
+		return out
+	csum = np.concatenate(([0.0], np.cumsum(x)))
+	if n >= window:
+		out[window - 1:] = (csum[window:] - csum[: n - window + 1]) / window
+	# Partial windows only matter when min_periods < window
+	head = min(window - 1, n)
+	if min_periods < window and head > 0:
+		counts = np.arange(1, head + 1)
+		out[:head] = csum[1: head + 1] / counts
+		out[:head][counts < max(min_periods, 1)] = np.nan
+	return out
+
+
+def rolling_sum(x, window: int, min_periods: int = 1) -> np.ndarray:
+	"""
+	Trailing sum over `window` bars, equivalent to
+	`Series.rolling(window, min_periods=min_periods).sum()` for finite input.
+	"""
+	x = _as_f64(x)
+	n = x.size
+	csum = np.concatenate(([0.0], np.cumsum(x)))
+	idx = np.arange(1, n + 1)
+	start = np.maximum(idx - window, 0)
+	out = csum[idx] - csum[start]
+	out[(idx - start) < max(min_periods, 1)] = np.nan
+	return out
+
+
+def relative_volume(volume, window: int = 20) -> np.ndarray:
+	"""
+	Volume divided by its trailing `window`-bar SMA (NaN during warm-up).
+	"""
+	volume = _as_f64(volume)
+	sma = rolling_mean(volume, window)
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return volume / sma
+
+
+def body_pct(open_, high, low, close) -> np.ndarray:
+	"""
+	Candle body as a fraction of its high-low range; NaN for zero-range bars.
+	"""
+	rng = _as_f64(high) - _as_f64(low)
+	body = np.abs(_as_f64(close) - _as_f64(open_))
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return np.where(rng != 0, body / rng, np.nan)
+
+
+def candle_dir(open_, close) -> np.ndarray:
+	"""
+	1 for up candles, -1 for down candles, 0 for flat.
+	"""
+	open_ = _as_f64(open_)
+	close = _as_f64(close)
+	return (close > open_).astype(np.int8) - (close < open_).astype(np.int8)
+
+
+def trend_direction(ema_fast, ema_mid, ema_slow) -> np.ndarray:
+	"""
+	EMA alignment per bar: 1 uptrend (fast > mid > slow), -1 downtrend, 0 otherwise.
+	"""
+	f, m, s = _as_f64(ema_fast), _as_f64(ema_mid), _as_f64(ema_slow)
+	up = (f > m) & (m > s)
+	down = (f < m) & (m < s)
+	return up.astype(np.int8) - down.astype(np.int8)
+
+
+def crosses(fast, slow) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	Bars where `fast - slow` crosses zero: up (prev <= 0 < curr), down (prev >= 0 > curr).
+	"""
+	diff = _as_f64(fast) - _as_f64(slow)
+	up = np.zeros(diff.size, dtype=bool)
+	down = np.zeros(diff.size, dtype=bool)
+	if diff.size < 2:
+		return up, down
+	prev, curr = diff[:-1], diff[1:]
+	valid = ~np.isnan(prev) & ~np.isnan(curr)
+	up[1:] = valid & (prev <= 0) & (curr > 0)
+	down[1:] = valid & (prev >= 0) & (curr < 0)
+	return up, down
+
+
+@njit(cache=True)
+def _prior_extremes_loop(high: np.ndarray, low: np.ndarray, lookback: int) -> Tuple[np.ndarray, np.ndarray]:
+	n = high.shape[0]
+	hi = np.full(n, np.nan)
+	lo = np.full(n, np.nan)
+	for i in range(lookback, n):
+		h = high[i - lookback]
+		l = low[i - lookback]
+		for j in range(i - lookback + 1, i):
+			if high[j] > h:
+				h = high[j]
+			if low[j] < l:
+				l = low[j]
+		hi[i] = h
+		lo[i] = l
+	return hi, lo
+
+
+def _trailing_extreme(x: np.ndarray, window: int, op) -> np.ndarray:
+	"""
+	op-reduction (np.maximum/np.minimum) over the `window` bars ending at each
+	bar, by window doubling: O(n log window). Entries before `window - 1` are partial.
+	"""
+	out = x.copy()
+	w = 1
+	while w * 2 <= window:
+		out[w:] = op(out[w:], out[:-w])
+		w *= 2
+	if w < window:
+		rem = window - w
+		out[rem:] = op(out[rem:], out[:-rem])
+	return out
+
+
+def prior_extremes(high, low, lookback: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	Highest high / lowest low of the `lookback` bars before each bar (the bar
+	itself excluded). NaN for the first `lookback` bars.
+	"""
+	high = _as_f64(high)
+	low = _as_f64(low)
+	n = high.size
+	if HAVE_NUMBA:
+		return _prior_extremes_loop(high, low, lookback)
+	hi = np.full(n, np.nan)
+	lo = np.full(n, np.nan)
+	if n > lookback:
+		hi[lookback:] = _trailing_extreme(high, lookback, np.maximum)[lookback - 1: -1]
+		lo[lookback:] = _trailing_extreme(low, lookback, np.minimum)[lookback - 1: -1]
+	return hi, lo
+
+
+def break_of_structure(high, low, close, lookback: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	BOS flags per bar: close above the prior `lookback`-bar swing high (up) or
+	below the prior swing low (down).
+	"""
+	swing_high, swing_low = prior_extremes(high, low, lookback)
+	close = _as_f64(close)
+	with np.errstate(invalid="ignore"):
+		return close > swing_high, close < swing_low
@@ -0,0 +1,61 @@
+"""
+Deferred imports for heavy dependencies.
+
+`ccxt` (hundreds of exchange modules), `pandas` and scikit-learn dominate the
+API's import time. Modules on the startup path bind them through
+`lazy_import`, so `backend.app.main` imports quickly and `/health` answers
+before they load; `warm_up` then imports them in the background after startup
+so the first real request does not pay for it either.
+"""
+
+from typing import Any, Iterable, Optional
+from types import ModuleType
+import importlib
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Imported by `warm_up` after startup (sklearn pulls in scipy)
+WARM_UP_MODULES = ("pandas", "ccxt", "joblib", "sklearn.linear_model", "scipy.signal")
+
+
+class LazyModule:
+	"""
+	Stand-in for a module that imports it on first attribute access. The
+	import goes through `importlib`, so concurrent first uses are safe.
+	"""
+
+	__slots__ = ("_name", "_module")
+
+	def __init__(self, name: str) -> None:
+		self._name = name
+		self._module: Optional[ModuleType] = None
+
+	def __getattr__(self, attr: str) -> Any:
+		module = self._module
+		if module is None:
+			module = self._module = importlib.import_module(self._name)
+		return getattr(module, attr)
+
+	def __repr__(self) -> str:
+		state = "loaded" if self._module is not None else "not loaded"
+		return f"<lazy module {self._name!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+	return LazyModule(name)
+
+
+def warm_up(modules: Iterable[str] = WARM_UP_MODULES) -> None:
+	"""
+	Import heavy dependencies ahead of the first request (run in a thread).
+	"""
+	for name in modules:
+		started = time.perf_counter()
+		try:
+			importlib.import_module(name)
+		except ImportError:
+			logger.warning("Warm-up: module not available", extra={"module": name})
+			continue
+		logger.info("Warm-up: imported module", extra={"module": name, "ms": round((time.perf_counter() - started) * 1000.0, 1)})
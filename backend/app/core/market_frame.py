@@ -0,0 +1,151 @@
+"""
+Per-request candle frame with indicator columns computed once, on first use.
+
+Trend detection, volume detection, fusion scoring and the learning features
+all read the same EMA / relative-volume / candle-shape columns. A
+`MarketFrame` holds one DataFrame per timeframe and computes each column the
+first time anything asks for it, so a request keeps a single copy of its
+candles instead of one per consumer. Consumers that only need arrays read
+them with `values()`; a column is written into the DataFrame (a pandas
+insert, which costs more than most builders) only when it is asked for as a
+Series.
+"""
+
+from typing import Callable, Dict, Sequence, Union
+
+import numpy as np
+
+from . import kernels
+from .lazy import lazy_import
+
+pd = lazy_import("pandas")
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+EMA_PERIODS = (20, 50, 200)
+EMA_COLUMNS = tuple(f"ema{p}" for p in EMA_PERIODS)
+# Columns `compute_volume_features` adds, in the same order
+VOLUME_COLUMNS = ("sma20_vol", "rv", "body", "range", "body_pct", "dir")
+
+
+def _values(f: "MarketFrame", name: str) -> np.ndarray:
+	return np.asarray(f.values(name), dtype=float)
+
+
+def _relative_volume(f: "MarketFrame") -> np.ndarray:
+	sma = _values(f, "sma20_vol")
+	with np.errstate(divide="ignore", invalid="ignore"):
+		return _values(f, "volume") / sma
+
+
+# name -> builder; builders may read other columns through `f[...]`
+_BUILDERS: Dict[str, Callable[["MarketFrame"], np.ndarray]] = {
+	"sma20_vol": lambda f: kernels.rolling_mean(_values(f, "volume"), 20),
+	"rv": _relative_volume,
+	"body": lambda f: np.abs(_values(f, "close") - _values(f, "open")),
+	"range": lambda f: _values(f, "high") - _values(f, "low"),
+	"body_pct": lambda f: kernels.body_pct(_values(f, "open"), _values(f, "high"), _values(f, "low"), _values(f, "close")),
+	"dir": lambda f: kernels.candle_dir(_values(f, "open"), _values(f, "close")).astype(int),  # 1 up, -1 down, 0 flat
+}
+
+
+class MarketFrame:
+	"""
+	One timeframe's OHLCV. `frame["ema50"]` returns the column as a Series,
+	computing and storing it on the shared DataFrame the first time; OHLCV
+	columns are returned as-is. `ema<N>`, `swing_high<N>` and `swing_low<N>`
+	work for any period.
+	"""
+
+	__slots__ = ("df", "timeframe", "_arrays")
+
+	def __init__(self, df: "pd.DataFrame", timeframe: str = "5m") -> None:
+		self.df = df
+		self.timeframe = timeframe
+		self._arrays: Dict[str, np.ndarray] = {}
+
+	@classmethod
+	def from_rows(cls, rows: Union[Sequence[Sequence[float]], np.ndarray], timeframe: str = "5m") -> "MarketFrame":
+		if isinstance(rows, np.ndarray):
+			return cls.from_array(rows, timeframe)
+		return cls(pd.DataFrame(list(rows) if rows else [], columns=OHLCV_COLUMNS), timeframe)
+
+	@classmethod
+	def from_array(cls, rows: np.ndarray, timeframe: str = "5m") -> "MarketFrame":
+		"""
+		Frame over an (n, 6) OHLCV array such as a `CandleRing` view. The price
+		and volume columns reference the array instead of copying it (so the
+		frame must not outlive the array's next update); timestamps are
+		converted to int64.
+		"""
+		columns = {name: rows[:, k] for k, name in enumerate(OHLCV_COLUMNS)}
+		columns["timestamp"] = columns["timestamp"].astype(np.int64)
+		return cls(pd.DataFrame(columns, copy=False), timeframe)
+
+	@classmethod
+	def wrap(cls, frame: Union["MarketFrame", "pd.DataFrame"], timeframe: str = "5m") -> "MarketFrame":
+		"""
+		`frame` itself if it is already a MarketFrame, else a MarketFrame over
+		the DataFrame (indicator columns are then added to it in place).
+		"""
+		return frame if isinstance(frame, MarketFrame) else cls(frame, timeframe)
+
+	def __len__(self) -> int:
+		return len(self.df)
+
+	def __getitem__(self, name: str) -> "pd.Series":
+		if name not in self.df.columns:
+			self.df[name] = self.values(name)
+			# The insert copied it; keep only the DataFrame's copy
+			self._arrays.pop(name, None)
+		return self.df[name]
+
+	def values(self, name: str) -> np.ndarray:
+		"""
+		Column `name` as an array, computed (once) if missing, without adding
+		it to the DataFrame. DataFrame columns are read from it, not cached.
+		"""
+		if name in self.df.columns:
+			return self.df[name].to_numpy()
+		arr = self._arrays.get(name)
+		if arr is None:
+			arr = self._build(name)
+			self._arrays[name] = arr
+		return arr
+
+	def _build(self, name: str) -> np.ndarray:
+		if not len(self.df):
+			return np.empty(0)
+		if name.startswith("ema") and name[3:].isdigit():
+			p = int(name[3:])
+			return kernels.ema(_values(self, "close"), span=p, min_periods=p)
+		for prefix, side in (("swing_high", 0), ("swing_low", 1)):
+			if name.startswith(prefix) and name[len(prefix):].isdigit():
+				lookback = name[len(prefix):]
+				highs, lows = kernels.prior_extremes(_values(self, "high"), _values(self, "low"), int(lookback))
+				# One pass gives both sides; keep the other for its first read
+				self._arrays.setdefault(f"swing_low{lookback}" if side == 0 else f"swing_high{lookback}", lows if side == 0 else highs)
+				return (highs, lows)[side]
+		builder = _BUILDERS.get(name)
+		if builder is None:
+			raise KeyError(f"Unknown market frame column: {name}")
+		return builder(self)
+
+	def ensure(self, columns: Sequence[str]) -> "pd.DataFrame":
+		"""
+		The shared DataFrame with `columns` present (computed if missing).
+		"""
+		for name in columns:
+			self[name]
+		return self.df
+
+	def trend(self) -> "pd.DataFrame":
+		"""
+		Frame for `detect_trend_and_signals` (EMA 20/50/200).
+		"""
+		return self.ensure(EMA_COLUMNS)
+
+	def volume(self) -> "pd.DataFrame":
+		"""
+		Frame for `detect_volume_signals` (the `compute_volume_features` columns).
+		"""
+		return self.ensure(VOLUME_COLUMNS) if len(self.df) else self.df
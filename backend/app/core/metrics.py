@@ -0,0 +1,204 @@
+"""
+Lightweight per-stage timing.
+
+A *scope* is one unit of work (an HTTP request or a forward-test step);
+`span(stage)` times a stage inside the current scope. Durations feed
+in-process histograms rendered in Prometheus text format at `/metrics` and,
+optionally, a `Server-Timing` response header. When metrics are disabled, or
+when code runs outside any scope (scripts, benchmarks), `span()` returns a
+shared no-op context manager.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, MutableMapping, Optional, Tuple
+import threading
+import time
+
+# Upper bounds in seconds; +Inf is implicit
+BUCKETS: Tuple[float, ...] = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = True
+_NULL = nullcontext()
+
+
+class _Histogram:
+	__slots__ = ("counts", "total", "count")
+
+	def __init__(self) -> None:
+		self.counts = [0] * (len(BUCKETS) + 1)
+		self.total = 0.0
+		self.count = 0
+
+	def observe(self, seconds: float) -> None:
+		self.counts[bisect_left(BUCKETS, seconds)] += 1
+		self.total += seconds
+		self.count += 1
+
+
+class MetricsRegistry:
+	def __init__(self) -> None:
+		self._hists: Dict[Tuple[str, str], _Histogram] = {}
+		self._lock = threading.Lock()
+
+	def observe(self, scope: str, stage: str, seconds: float) -> None:
+		key = (scope, stage)
+		with self._lock:
+			hist = self._hists.get(key)
+			if hist is None:
+				hist = self._hists[key] = _Histogram()
+			hist.observe(seconds)
+
+	def reset(self) -> None:
+		with self._lock:
+			self._hists.clear()
+
+	def render(self) -> str:
+		"""
+		Prometheus text exposition format (cumulative buckets).
+		"""
+		name = "cryptotrendlab_stage_duration_seconds"
+		lines = [
+			f"# HELP {name} Time spent per stage of each endpoint / background job.",
+			f"# TYPE {name} histogram",
+		]
+		with self._lock:
+			items = sorted(self._hists.items())
+			for (scope, stage), h in items:
+				labels = f'scope="{_escape(scope)}",stage="{_escape(stage)}"'
+				cumulative = 0
+				for bound, n in zip(BUCKETS, h.counts):
+					cumulative += n
+					lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+				lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+				lines.append(f"{name}_sum{{{labels}}} {h.total:.6f}")
+				lines.append(f"{name}_count{{{labels}}} {h.count}")
+		return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+	return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _Scope:
+	__slots__ = ("_name", "asgi_scope", "stages")
+
+	def __init__(self, name: str, asgi_scope: Optional[MutableMapping[str, Any]] = None) -> None:
+		self._name = name
+		self.asgi_scope = asgi_scope
+		self.stages: List[Tuple[str, float]] = []
+
+	@property
+	def name(self) -> str:
+		# Label requests by route template (resolved once routing has run) to
+		# keep label cardinality bounded.
+		if self.asgi_scope is not None:
+			route = self.asgi_scope.get("route")
+			return getattr(route, "path", None) or "unmatched"
+		return self._name
+
+
+_current: ContextVar[Optional[_Scope]] = ContextVar("metrics_scope", default=None)
+
+
+class _Span:
+	__slots__ = ("stage", "scope", "started")
+
+	def __init__(self, stage: str, scope: _Scope) -> None:
+		self.stage = stage
+		self.scope = scope
+
+	def __enter__(self) -> "_Span":
+		self.started = time.perf_counter()
+		return self
+
+	def __exit__(self, *exc) -> None:
+		elapsed = time.perf_counter() - self.started
+		self.scope.stages.append((self.stage, elapsed))
+		REGISTRY.observe(self.scope.name, self.stage, elapsed)
+
+
+def configure(enabled: bool) -> None:
+	global _enabled
+	_enabled = enabled
+
+
+def is_enabled() -> bool:
+	return _enabled
+
+
+def span(stage: str):
+	"""
+	Time a stage of the current scope: `with span("fetch_ohlcv"): ...`
+	"""
+	if not _enabled:
+		return _NULL
+	scope = _current.get()
+	if scope is None:
+		return _NULL
+	return _Span(stage, scope)
+
+
+@contextmanager
+def scope(name: str, asgi_scope: Optional[MutableMapping[str, Any]] = None) -> Iterator[Optional[_Scope]]:
+	"""
+	Open a timing scope; records a `total` stage when it closes.
+	"""
+	if not _enabled:
+		yield None
+		return
+	current = _Scope(name, asgi_scope)
+	token = _current.set(current)
+	started = time.perf_counter()
+	try:
+		yield current
+	finally:
+		_current.reset(token)
+		REGISTRY.observe(current.name, "total", time.perf_counter() - started)
+
+
+def server_timing_header(current: _Scope, total_seconds: float) -> str:
+	"""
+	`Server-Timing` value; repeated stages (e.g. per-timeframe fetches) are summed.
+	"""
+	totals: Dict[str, float] = {}
+	for stage, seconds in current.stages:
+		totals[stage] = totals.get(stage, 0.0) + seconds
+	parts = [f"{_token(stage)};dur={seconds * 1000.0:.2f}" for stage, seconds in totals.items()]
+	parts.append(f"total;dur={total_seconds * 1000.0:.2f}")
+	return ", ".join(parts)
+
+
+def _token(stage: str) -> str:
+	return "".join(c if c.isalnum() or c in "-_" else "_" for c in stage)
+
+
+class TimingMiddleware:
+	"""
+	ASGI middleware opening a metrics scope per HTTP request and, when
+	enabled, adding a `Server-Timing` header with the stages recorded so far.
+	"""
+
+	def __init__(self, app, server_timing: bool = False) -> None:
+		self.app = app
+		self.server_timing = server_timing
+
+	async def __call__(self, asgi_scope, receive, send) -> None:
+		if asgi_scope["type"] != "http" or not _enabled:
+			await self.app(asgi_scope, receive, send)
+			return
+
+		with scope(asgi_scope.get("path", ""), asgi_scope) as current:
+			started = time.perf_counter()
+
+			async def send_with_timing(message) -> None:
+				if self.server_timing and current is not None and message["type"] == "http.response.start":
+					value = server_timing_header(current, time.perf_counter() - started)
+					message["headers"] = list(message.get("headers", [])) + [(b"server-timing", value.encode("latin-1"))]
+				await send(message)
+
+			await self.app(asgi_scope, receive, send_with_timing)
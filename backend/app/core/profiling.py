@@ -0,0 +1,392 @@
+"""
+Opt-in request profiling with offline replay.
+
+When `profiling_enabled` is set, `ProfilingMiddleware` marks requests for
+capture: a random sample (`profiling_sample_rate`) plus any request with
+`?profile=1` from an allowed client. The first `@profiled` handler that runs
+for a marked request is profiled (cProfile, or a low-overhead stack sampler),
+and every candle set it loads is snapshotted. Captures are written to
+`profiling_dir` and can be replayed offline against the captured candles:
+
+	python -m backend.benchmarks.replay_profile capture.json.gz
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+from urllib.parse import parse_qs
+import cProfile
+import gzip
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+
+from .config import get_settings
+
+logger = logging.getLogger(__name__)
+
+MODES = ("cprofile", "sampling")
+SAMPLING_INTERVAL_S = 0.002
+TOP_N = 30
+_ID_RE = re.compile(r"^[0-9a-f]{12}$")
+
+
+@dataclass
+class _Request:
+	path: str
+	query: str
+	client: Optional[str]
+	mode: str
+	reason: str
+	capture_id: Optional[str] = None
+
+
+@dataclass
+class Capture:
+	id: str
+	handler: str
+	kwargs: Dict[str, Any]
+	path: str
+	query: str
+	client: Optional[str]
+	mode: str
+	reason: str
+	created_at: str
+	duration_ms: float = 0.0
+	error: Optional[str] = None
+	candles: List[Dict[str, Any]] = field(default_factory=list)
+
+	def meta(self) -> Dict[str, Any]:
+		data = asdict(self)
+		data.pop("candles")
+		data["candle_sets"] = [
+			{"symbol": c["symbol"], "exchange": c["exchange"], "bars": {tf: len(rows) for tf, rows in c["timeframes"].items()}}
+			for c in self.candles
+		]
+		return data
+
+
+_request: ContextVar[Optional[_Request]] = ContextVar("profiling_request", default=None)
+_active: ContextVar[Optional[Capture]] = ContextVar("profiling_capture", default=None)
+_replay: ContextVar[Optional[List[Dict[str, Any]]]] = ContextVar("profiling_replay", default=None)
+
+
+# Profilers
+
+class _CProfiler:
+	suffix = ".prof"
+
+	def __init__(self) -> None:
+		self.profile = cProfile.Profile()
+
+	def __enter__(self) -> "_CProfiler":
+		self.profile.enable()
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self.profile.disable()
+
+	def write(self, path: str) -> None:
+		self.profile.dump_stats(path)
+
+	def top(self) -> str:
+		out = io.StringIO()
+		pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(TOP_N)
+		return out.getvalue()
+
+
+class _StackSampler:
+	"""
+	Samples the calling thread's stack from a background thread and keeps
+	collapsed stacks (`outer;inner count`, the flamegraph/speedscope format).
+	Much cheaper than cProfile on deep pandas/numpy call trees.
+	"""
+
+	suffix = ".folded"
+
+	def __init__(self, interval: float = SAMPLING_INTERVAL_S) -> None:
+		self.interval = interval
+		self.stacks: Dict[str, int] = {}
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def _run(self, target: int) -> None:
+		while not self._stop.wait(self.interval):
+			frame = sys._current_frames().get(target)
+			names: List[str] = []
+			while frame is not None:
+				code = frame.f_code
+				names.append(f"{frame.f_globals.get('__name__', '?')}:{code.co_name}")
+				frame = frame.f_back
+			if names:
+				key = ";".join(reversed(names))
+				self.stacks[key] = self.stacks.get(key, 0) + 1
+
+	def __enter__(self) -> "_StackSampler":
+		self._thread = threading.Thread(target=self._run, args=(threading.get_ident(),), daemon=True)
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc) -> None:
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+
+	def write(self, path: str) -> None:
+		with open(path, "w") as fh:
+			for stack, count in self.stacks.items():
+				fh.write(f"{stack} {count}\n")
+
+	def top(self) -> str:
+		# Self time per leaf function
+		leaves: Dict[str, int] = {}
+		for stack, count in self.stacks.items():
+			leaf = stack.rsplit(";", 1)[-1]
+			leaves[leaf] = leaves.get(leaf, 0) + count
+		total = sum(leaves.values()) or 1
+		lines = [f"{total} samples every {self.interval * 1000:.1f} ms"]
+		for leaf, count in sorted(leaves.items(), key=lambda kv: -kv[1])[:TOP_N]:
+			lines.append(f"{count:>8} {count / total:>7.1%}  {leaf}")
+		return "\n".join(lines) + "\n"
+
+
+def make_profiler(mode: str):
+	return _StackSampler() if mode == "sampling" else _CProfiler()
+
+
+# Storage
+
+class ProfileStore:
+	"""
+	One capture per id: `<id>.json.gz` (request + candles, self-contained for
+	replay), `<id>.meta.json` (listing) and `<id>.prof` / `<id>.folded`.
+	"""
+
+	def __init__(self, directory: str, max_captures: int = 50) -> None:
+		self.directory = directory
+		self.max_captures = max_captures
+
+	def _path(self, capture_id: str, suffix: str) -> str:
+		if not _ID_RE.match(capture_id):
+			raise KeyError(capture_id)
+		return os.path.join(self.directory, f"{capture_id}{suffix}")
+
+	def save(self, capture: Capture, profiler) -> None:
+		os.makedirs(self.directory, exist_ok=True)
+		profiler.write(self._path(capture.id, profiler.suffix))
+		with gzip.open(self._path(capture.id, ".json.gz"), "wt") as fh:
+			json.dump(asdict(capture), fh)
+		meta = capture.meta()
+		meta["profile_file"] = f"{capture.id}{profiler.suffix}"
+		meta["top"] = profiler.top()
+		with open(self._path(capture.id, ".meta.json"), "w") as fh:
+			json.dump(meta, fh)
+		self.prune()
+
+	def list(self) -> List[Dict[str, Any]]:
+		metas: List[Dict[str, Any]] = []
+		if not os.path.isdir(self.directory):
+			return metas
+		for name in os.listdir(self.directory):
+			if not name.endswith(".meta.json"):
+				continue
+			try:
+				with open(os.path.join(self.directory, name)) as fh:
+					metas.append(json.load(fh))
+			except (OSError, ValueError):
+				continue
+		metas.sort(key=lambda m: m.get("created_at", ""), reverse=True)
+		return metas
+
+	def get(self, capture_id: str) -> Optional[Dict[str, Any]]:
+		try:
+			with open(self._path(capture_id, ".meta.json")) as fh:
+				return json.load(fh)
+		except (KeyError, OSError):
+			return None
+
+	def file(self, capture_id: str, kind: str) -> Optional[str]:
+		"""
+		Path of the `capture` bundle or the `profile` output, if present.
+		"""
+		meta = self.get(capture_id)
+		if meta is None:
+			return None
+		path = os.path.join(self.directory, meta["profile_file"]) if kind == "profile" else self._path(capture_id, ".json.gz")
+		return path if os.path.exists(path) else None
+
+	def prune(self) -> None:
+		for meta in self.list()[self.max_captures:]:
+			for suffix in (".json.gz", ".meta.json", ".prof", ".folded"):
+				try:
+					os.remove(self._path(meta["id"], suffix))
+				except (KeyError, OSError):
+					pass
+
+
+@lru_cache
+def get_store() -> ProfileStore:
+	settings = get_settings()
+	return ProfileStore(settings.profiling_dir, settings.profiling_max_captures)
+
+
+# Capture hooks
+
+def _jsonable(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+	return {k: v if isinstance(v, (str, int, float, bool, type(None))) else repr(v) for k, v in kwargs.items()}
+
+
+def profiled(fn: Callable) -> Callable:
+	"""
+	Profile this endpoint when the current request was marked for capture.
+	Calls outside a marked request (internal calls, the forward-test worker,
+	benchmarks) pass straight through.
+	"""
+	handler = f"{fn.__module__}:{fn.__qualname__}"
+
+	@wraps(fn)
+	def wrapper(*args, **kwargs):
+		req = _request.get()
+		if req is None or req.capture_id is not None or _active.get() is not None:
+			return fn(*args, **kwargs)
+		capture = Capture(
+			id=uuid.uuid4().hex[:12],
+			handler=handler,
+			kwargs=_jsonable(kwargs),
+			path=req.path,
+			query=req.query,
+			client=req.client,
+			mode=req.mode,
+			reason=req.reason,
+			created_at=datetime.now(tz=timezone.utc).isoformat(),
+		)
+		req.capture_id = capture.id
+		profiler = make_profiler(req.mode)
+		token = _active.set(capture)
+		started = time.perf_counter()
+		try:
+			with profiler:
+				return fn(*args, **kwargs)
+		except Exception as e:
+			capture.error = repr(e)
+			raise
+		finally:
+			capture.duration_ms = round((time.perf_counter() - started) * 1000.0, 3)
+			_active.reset(token)
+			try:
+				get_store().save(capture, profiler)
+				logger.info("Profiling: captured request", extra={"capture_id": capture.id, "handler": handler})
+			except Exception:
+				logger.exception("Profiling: failed to store capture", extra={"capture_id": capture.id})
+
+	return wrapper
+
+
+def record_candles(symbol: str, limits: Dict[str, int], candles) -> None:
+	"""
+	Snapshot a loaded CandleSet into the capture in progress, if any.
+	"""
+	capture = _active.get()
+	if capture is None:
+		return
+	capture.candles.append({
+		"symbol": symbol,
+		"limits": dict(limits),
+		"exchange": candles.exchange,
+		"normalized_symbol": candles.normalized_symbol,
+		"timeframes": {tf: [list(r) for r in rows] for tf, rows in candles.timeframes.items()},
+	})
+
+
+@contextmanager
+def replaying(candle_sets: Sequence[Dict[str, Any]]) -> Iterator[None]:
+	"""
+	Serve candle loads from captured snapshots instead of the exchanges.
+	"""
+	token = _replay.set(list(candle_sets))
+	try:
+		yield
+	finally:
+		_replay.reset(token)
+
+
+def is_replaying() -> bool:
+	return _replay.get() is not None
+
+
+def replay_snapshot(symbol: str, limits: Dict[str, int]) -> Optional[Dict[str, Any]]:
+	"""
+	Captured candles for a load during replay (trimmed to `limits`); None when
+	not replaying.
+	"""
+	snapshots = _replay.get()
+	if snapshots is None:
+		return None
+	for snap in snapshots:
+		if snap["symbol"].upper() == symbol.upper() and all(tf in snap["timeframes"] for tf in limits):
+			return {
+				**snap,
+				"timeframes": {tf: snap["timeframes"][tf][-limit:] for tf, limit in limits.items()},
+			}
+	raise LookupError(f"Capture has no candles for {symbol} {sorted(limits)}")
+
+
+# Middleware
+
+class ProfilingMiddleware:
+	"""
+	Marks requests for capture: sampled at `sample_rate`, or explicitly with
+	`?profile=1` (optionally `&profile_mode=sampling`) from an allowed client.
+	Adds an `X-Profile-Id` response header when a capture was taken.
+	"""
+
+	def __init__(self, app, sample_rate: float = 0.0, allowed_clients: Sequence[str] = (), mode: str = "cprofile") -> None:
+		self.app = app
+		self.sample_rate = sample_rate
+		self.allowed_clients = set(allowed_clients)
+		self.mode = mode if mode in MODES else "cprofile"
+
+	def _mark(self, asgi_scope) -> Optional[_Request]:
+		query = asgi_scope.get("query_string", b"").decode("latin-1")
+		client = (asgi_scope.get("client") or (None,))[0]
+		mode = self.mode
+		reason = ""
+		if "profile=" in query:
+			params = parse_qs(query)
+			if params.get("profile", [""])[0] in ("1", "true") and client in self.allowed_clients:
+				reason = "requested"
+				requested_mode = params.get("profile_mode", [mode])[0]
+				mode = requested_mode if requested_mode in MODES else mode
+		if not reason and self.sample_rate > 0 and random.random() < self.sample_rate:
+			reason = "sampled"
+		if not reason:
+			return None
+		return _Request(path=asgi_scope.get("path", ""), query=query, client=client, mode=mode, reason=reason)
+
+	async def __call__(self, asgi_scope, receive, send) -> None:
+		req = self._mark(asgi_scope) if asgi_scope["type"] == "http" else None
+		if req is None:
+			await self.app(asgi_scope, receive, send)
+			return
+
+		async def send_with_id(message) -> None:
+			if message["type"] == "http.response.start" and req.capture_id is not None:
+				message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", req.capture_id.encode("latin-1"))]
+			await send(message)
+
+		token = _request.set(req)
+		try:
+			await self.app(asgi_scope, receive, send_with_id)
+		finally:
+			_request.reset(token)
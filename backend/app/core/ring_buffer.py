@@ -0,0 +1,109 @@
+"""
+Fixed-capacity candle buffer for long-running consumers.
+
+The forward-test worker reads the same few hundred candles of every symbol on
+each tick. A `CandleRing` keeps them in one array allocated up front and
+takes only the candles that are new since the last tick, so a process that
+runs for weeks holds the same memory per symbol as one that just started.
+
+Storage is column-major and every row is written twice (at slot `i` and
+`i + capacity`), so the latest rows are always one contiguous slice: `view()`
+and `column()` return views of the buffer, never copies. Views are read-only
+and reflect the buffer as it is when read; take them after the update they
+should see and do not hold them across the next `merge`.
+"""
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+OHLCV_WIDTH = 6  # timestamp (ms), open, high, low, close, volume
+
+
+class CandleRing:
+	__slots__ = ("capacity", "_buf", "_head", "_size")
+
+	def __init__(self, capacity: int, width: int = OHLCV_WIDTH) -> None:
+		if capacity < 1:
+			raise ValueError("capacity must be at least 1")
+		self.capacity = capacity
+		self._buf = np.empty((width, 2 * capacity), dtype=np.float64)
+		self._head = 0  # slot of the next write
+		self._size = 0
+
+	def __len__(self) -> int:
+		return self._size
+
+	@property
+	def nbytes(self) -> int:
+		return self._buf.nbytes
+
+	@property
+	def last_ts(self) -> Optional[int]:
+		return int(self._buf[0, self._head + self.capacity - 1]) if self._size else None
+
+	def clear(self) -> None:
+		self._head = 0
+		self._size = 0
+
+	def _write(self, rows: np.ndarray) -> None:
+		# rows: (m, width) with m <= capacity
+		slots = (self._head + np.arange(rows.shape[0])) % self.capacity
+		self._buf[:, slots] = rows.T
+		self._buf[:, slots + self.capacity] = rows.T
+		self._head = int(slots[-1] + 1) % self.capacity
+		self._size = min(self.capacity, self._size + rows.shape[0])
+
+	def extend(self, rows: Sequence[Sequence[float]]) -> None:
+		"""
+		Append rows as-is (no timestamp checks); only the last `capacity` are kept.
+		"""
+		arr = np.asarray(rows, dtype=np.float64).reshape(-1, self._buf.shape[0])
+		if arr.shape[0]:
+			self._write(arr[-self.capacity:])
+
+	def append(self, row: Sequence[float]) -> None:
+		self.extend([row])
+
+	def merge(self, rows: Sequence[Sequence[float]]) -> int:
+		"""
+		Take exchange candles sorted by timestamp: a candle at the latest stored
+		timestamp replaces it (the forming candle is revised until it closes),
+		newer ones are appended and older ones ignored. Returns the number of
+		candles appended.
+		"""
+		arr = np.asarray(rows, dtype=np.float64).reshape(-1, self._buf.shape[0])
+		last = self.last_ts
+		if last is not None:
+			same = arr[:, 0] == last
+			if same.any():
+				row = arr[np.flatnonzero(same)[-1]]
+				slot = (self._head - 1) % self.capacity
+				self._buf[:, slot] = row
+				self._buf[:, slot + self.capacity] = row
+			arr = arr[arr[:, 0] > last]
+		if arr.shape[0]:
+			self._write(arr[-self.capacity:])
+		return int(arr.shape[0])
+
+	def _span(self, n: Optional[int]) -> slice:
+		n = self._size if n is None else max(0, min(n, self._size))
+		end = self._head + self.capacity
+		return slice(end - n, end)
+
+	def view(self, n: Optional[int] = None) -> np.ndarray:
+		"""
+		The latest `n` rows (all by default), oldest first, as an (n, width)
+		read-only view.
+		"""
+		out = self._buf[:, self._span(n)].T
+		out.flags.writeable = False
+		return out
+
+	def column(self, index: int, n: Optional[int] = None) -> np.ndarray:
+		"""
+		One field of the latest `n` rows as a contiguous read-only view.
+		"""
+		out = self._buf[index, self._span(n)]
+		out.flags.writeable = False
+		return out
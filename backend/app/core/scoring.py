@@ -0,0 +1,349 @@
+"""
+Fusion setup scoring: trend alignment, structure and volume signals weighed
+into a 0-100 score, grade, direction and confidence.
+
+`score_setup` scores one bar from detected signal lists and builds the
+reasoning string. `score_strategies` / `score_setup_batch` score whole bar
+arrays (for one or many strategies at once) from per-bar signal counts, the
+form backtests, the screener and forward replays use.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .strategy import DEFAULT_STRATEGY, GRADES, StrategyArrays, StrategySpec, compile_strategies
+
+
+def score_setup(
+	trend_summary: Dict[str, Any],
+	trend_signals: List[Dict[str, Any]],
+	volume_signals: List[Dict[str, Any]],
+	strategy: Optional[StrategySpec] = None,
+	flow_signals: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+	"""
+	Scoring heuristic (0-100), grade, direction, and reasoning summary. Points
+	and grade cutoffs come from `strategy` (the stock fusion rules by default).
+	`flow_signals` (`detect_flow_signals`) score only for symbols with
+	ingested trade flow.
+	"""
+	spec = strategy or DEFAULT_STRATEGY
+	score = 0
+	reasons: List[str] = []
+
+	# Direction from trend
+	trend_dir = trend_summary.get("trend", "unknown")
+	if trend_dir == "uptrend":
+		direction = "long"
+		score += spec.trend_points
+		reasons.append(f"15m EMA alignment uptrend ({spec.trend_points:+d})")
+	elif trend_dir == "downtrend":
+		direction = "short"
+		score += spec.trend_points
+		reasons.append(f"15m EMA alignment downtrend ({spec.trend_points:+d})")
+	else:
+		direction = "none"
+		reasons.append("No clear 15m trend (0)")
+
+	# 5m confirmation
+	if trend_summary.get("trend_5m") == "uptrend" and direction == "long":
+		score += spec.confirm_5m_points
+		reasons.append(f"5m alignment confirms long ({spec.confirm_5m_points:+d})")
+	elif trend_summary.get("trend_5m") == "downtrend" and direction == "short":
+		score += spec.confirm_5m_points
+		reasons.append(f"5m alignment confirms short ({spec.confirm_5m_points:+d})")
+
+	# Recent signals weight: consider the last `recent_signals` (12) of each kind
+	recent_trend = trend_signals[-spec.recent_signals:]
+	recent_vol = volume_signals[-spec.recent_signals:]
+	cross, bos, flow = _pair(spec.ema_cross_points), _pair(spec.bos_points), _pair(spec.flow_points)
+
+	for s in recent_trend:
+		if s["type"] == "ema_cross_up":
+			score += spec.ema_cross_points[0 if direction == "long" else 1]
+			reasons.append(f"EMA cross up ({s['timeframe']}) ({cross})")
+		elif s["type"] == "ema_cross_down":
+			score += spec.ema_cross_points[0 if direction == "short" else 1]
+			reasons.append(f"EMA cross down ({s['timeframe']}) ({cross})")
+		elif s["type"] == "bos_up":
+			score += spec.bos_points[0 if direction == "long" else 1]
+			reasons.append(f"BOS up ({s['timeframe']}) ({bos})")
+		elif s["type"] == "bos_down":
+			score += spec.bos_points[0 if direction == "short" else 1]
+			reasons.append(f"BOS down ({s['timeframe']}) ({bos})")
+
+	for s in recent_vol:
+		if s["type"] == "ignition":
+			if direction == "long" and s.get("dir") == "up":
+				score += spec.ignition_points[0]
+				reasons.append(f"Ignition up ({s['timeframe']}) ({spec.ignition_points[0]:+d})")
+			elif direction == "short" and s.get("dir") == "down":
+				score += spec.ignition_points[0]
+				reasons.append(f"Ignition down ({s['timeframe']}) ({spec.ignition_points[0]:+d})")
+			else:
+				score += spec.ignition_points[1]
+				reasons.append(f"Ignition contra-trend ({s['timeframe']}) ({spec.ignition_points[1]:+d})")
+		elif s["type"] == "climax":
+			if s.get("dir") in ["up", "down"]:
+				score += spec.climax_points
+				reasons.append(f"Climax volume ({s['timeframe']}) ({spec.climax_points:+d})")
+		elif s["type"] == "accumulation":
+			score += spec.flow_points[0 if direction == "long" else 1]
+			reasons.append(f"Accumulation ({s['timeframe']}) ({flow})")
+		elif s["type"] == "distribution":
+			score += spec.flow_points[0 if direction == "short" else 1]
+			reasons.append(f"Distribution ({s['timeframe']}) ({flow})")
+
+	# Trade-flow pressure
+	delta = _pair(spec.delta_points)
+	for s in flow_signals or ():
+		if s["type"] == "buy_pressure":
+			score += spec.delta_points[0 if direction == "long" else 1]
+			reasons.append(f"Buy pressure ({s['timeframe']}) ({delta})")
+		elif s["type"] == "sell_pressure":
+			score += spec.delta_points[0 if direction == "short" else 1]
+			reasons.append(f"Sell pressure ({s['timeframe']}) ({delta})")
+
+	# Normalize and clamp
+	score = max(0, min(100, score))
+
+	# Grade
+	grade = spec.grade(score)
+
+	# Confidence based on clarity of direction and presence of signals
+	conf = 40
+	if direction in ["long", "short"]:
+		conf += 20
+	if recent_trend:
+		conf += 15
+	if recent_vol:
+		conf += 15
+	conf = max(0, min(100, conf))
+
+	return {
+		"score": int(score),
+		"grade": grade,
+		"direction": direction,
+		"confidence": int(conf),
+		"reasoning": "; ".join(reasons[:8]),
+	}
+
+
+def _pair(points: Tuple[int, int]) -> str:
+	"""
+	Aligned/contra points as shown in reasoning strings, e.g. "+20/-10".
+	"""
+	return f"{points[0]:+d}/{points[1]:+d}"
+
+
+# Per-bar signal counts accepted by `score_setup_batch`. Volume keys follow the
+# signal types of `detect_volume_signals`, split by candle direction where the
+# score depends on it.
+SETUP_SIGNAL_KEYS = (
+	"ema_cross_up", "ema_cross_down", "bos_up", "bos_down",
+	"climax", "climax_flat",
+	"ignition_up", "ignition_down", "ignition_flat",
+	"accumulation", "distribution",
+)
+TREND_SIGNAL_KEYS = SETUP_SIGNAL_KEYS[:4]
+VOLUME_SIGNAL_KEYS = SETUP_SIGNAL_KEYS[4:]
+GRADE_LABELS = GRADES
+GRADE_CUTOFFS = DEFAULT_STRATEGY.grade_cutoffs
+DIRECTION_LABELS = {1: "long", -1: "short", 0: "none"}
+# Trend summary labels as the 1 / -1 / 0 alignment codes `score_setup_batch` takes
+TREND_CODES = {"uptrend": 1, "downtrend": -1}
+
+
+def signal_counts(
+	trend_signals: List[Dict[str, Any]],
+	volume_signals: List[Dict[str, Any]],
+	recent: int = DEFAULT_STRATEGY.recent_signals,
+) -> Dict[str, int]:
+	"""
+	SETUP_SIGNAL_KEYS counts of the signals `score_setup` weighs (the last
+	`recent` trend and last `recent` volume signals), for `score_setup_batch`.
+	"""
+	counts = {k: 0 for k in SETUP_SIGNAL_KEYS}
+	for s in trend_signals[-recent:]:
+		if s["type"] in counts:
+			counts[s["type"]] += 1
+	for s in volume_signals[-recent:]:
+		kind = s["type"]
+		if kind in ("climax", "ignition"):
+			d = s.get("dir")
+			if kind == "climax":
+				counts["climax" if d in ("up", "down") else "climax_flat"] += 1
+			else:
+				counts[f"ignition_{d}" if d in ("up", "down") else "ignition_flat"] += 1
+		elif kind in ("accumulation", "distribution"):
+			counts[kind] += 1
+	return counts
+
+
+def cap_recent(counts: Dict[str, np.ndarray], keys: Tuple[str, ...], cap: Any) -> Dict[str, np.ndarray]:
+	"""
+	`counts` for `keys` trimmed to at most `cap` signals per bar, as
+	`score_setup` keeps only the last `recent_signals` of each list. Counts
+	carry no order, so the kept signals are the last in `keys` order (the
+	order `SetupBatch.reasoning` lists them). `cap` may be a (k, 1) column.
+	"""
+	total = sum(counts[k] for k in keys)
+	if int(np.max(total, initial=0)) <= int(np.min(cap)):
+		return counts
+	out = dict(counts)
+	room = cap
+	for key in reversed(keys):
+		out[key] = np.minimum(counts[key], room)
+		room = room - out[key]
+	return out
+
+
+@dataclass
+class SetupBatch:
+	"""
+	Vectorized `score_setup` output. `direction` is 1 long / -1 short / 0 none
+	and `grade` indexes GRADE_LABELS. Reasoning strings are only built by
+	`row(i)` for bars that are actually returned to the client.
+	"""
+	score: np.ndarray
+	grade: np.ndarray
+	direction: np.ndarray
+	confidence: np.ndarray
+	trend_5m: np.ndarray
+	counts: Dict[str, np.ndarray]
+	timeframe: str = "5m"
+	strategy: StrategySpec = DEFAULT_STRATEGY
+
+	def __len__(self) -> int:
+		return int(self.score.shape[0])
+
+	def reasoning(self, i: int) -> str:
+		tf = self.timeframe
+		spec = self.strategy
+		d = int(self.direction[i])
+		c = {k: int(v[i]) for k, v in self.counts.items()}
+		reasons: List[str] = []
+		if d == 1:
+			reasons.append(f"15m EMA alignment uptrend ({spec.trend_points:+d})")
+		elif d == -1:
+			reasons.append(f"15m EMA alignment downtrend ({spec.trend_points:+d})")
+		else:
+			reasons.append("No clear 15m trend (0)")
+		t5 = int(self.trend_5m[i])
+		if t5 == 1 and d == 1:
+			reasons.append(f"5m alignment confirms long ({spec.confirm_5m_points:+d})")
+		elif t5 == -1 and d == -1:
+			reasons.append(f"5m alignment confirms short ({spec.confirm_5m_points:+d})")
+		reasons += [f"EMA cross up ({tf}) ({_pair(spec.ema_cross_points)})"] * c["ema_cross_up"]
+		reasons += [f"EMA cross down ({tf}) ({_pair(spec.ema_cross_points)})"] * c["ema_cross_down"]
+		reasons += [f"BOS up ({tf}) ({_pair(spec.bos_points)})"] * c["bos_up"]
+		reasons += [f"BOS down ({tf}) ({_pair(spec.bos_points)})"] * c["bos_down"]
+		reasons += [f"Climax volume ({tf}) ({spec.climax_points:+d})"] * c["climax"]
+		for key, aligned, label in (("ignition_up", 1, "up"), ("ignition_down", -1, "down"), ("ignition_flat", None, "flat")):
+			if d != 0 and d == aligned:
+				reasons += [f"Ignition {label} ({tf}) ({spec.ignition_points[0]:+d})"] * c[key]
+			else:
+				reasons += [f"Ignition contra-trend ({tf}) ({spec.ignition_points[1]:+d})"] * c[key]
+		reasons += [f"Accumulation ({tf}) ({_pair(spec.flow_points)})"] * c["accumulation"]
+		reasons += [f"Distribution ({tf}) ({_pair(spec.flow_points)})"] * c["distribution"]
+		return "; ".join(reasons[:8])
+
+	def row(self, i: int) -> Dict[str, Any]:
+		"""
+		Bar `i` in the same shape `score_setup` returns.
+		"""
+		return {
+			"score": int(self.score[i]),
+			"grade": GRADE_LABELS[int(self.grade[i])],
+			"direction": DIRECTION_LABELS[int(self.direction[i])],
+			"confidence": int(self.confidence[i]),
+			"reasoning": self.reasoning(i),
+		}
+
+
+def score_strategies(
+	trend: np.ndarray,
+	trend_5m: np.ndarray,
+	counts: Dict[str, np.ndarray],
+	strategies: StrategyArrays,
+	timeframe: str = "5m",
+) -> List[SetupBatch]:
+	"""
+	`score_setup` for k compiled strategies over whole bar arrays in one pass.
+
+	`trend`/`trend_5m` are EMA alignments per bar (1 up, -1 down, 0 other) and
+	`counts` maps SETUP_SIGNAL_KEYS to per-bar signal counts (bool arrays are
+	fine), either shared (n,) or per strategy (k, n) when the strategies detect
+	signals differently. Points broadcast as (k, 1) columns, so bar i of batch j
+	scores exactly like `score_setup` with strategy j given the same signals.
+	Each strategy's `recent_signals` cap is applied here (see `cap_recent`),
+	so counts over the cap score like the last `recent_signals` signals.
+	"""
+	s = strategies
+	trend = np.asarray(trend)
+	n = trend.shape[-1]
+	zeros = np.zeros(n, dtype=np.int64)
+	c: Dict[str, np.ndarray] = {k: np.asarray(counts[k], dtype=np.int64) if k in counts else zeros for k in SETUP_SIGNAL_KEYS}
+	c = cap_recent(c, TREND_SIGNAL_KEYS, s.recent_signals)
+	c = cap_recent(c, VOLUME_SIGNAL_KEYS, s.recent_signals)
+	t5 = np.asarray(trend_5m)
+
+	direction = np.where(trend == 1, 1, np.where(trend == -1, -1, 0)).astype(np.int8)
+	long_ = direction == 1
+	short = direction == -1
+
+	def pick(aligned: np.ndarray, pair: str) -> np.ndarray:
+		return np.where(aligned, getattr(s, f"{pair}_aligned"), getattr(s, f"{pair}_contra"))
+
+	score = s.trend_points * (direction != 0) + s.confirm_5m_points * ((long_ & (t5 == 1)) | (short & (t5 == -1)))
+	score = score + c["ema_cross_up"] * pick(long_, "ema_cross_points") + c["ema_cross_down"] * pick(short, "ema_cross_points")
+	score = score + c["bos_up"] * pick(long_, "bos_points") + c["bos_down"] * pick(short, "bos_points")
+	score = score + c["ignition_up"] * pick(long_, "ignition_points") + c["ignition_down"] * pick(short, "ignition_points")
+	score = score + c["ignition_flat"] * s.ignition_points_contra + c["climax"] * s.climax_points
+	score = score + c["accumulation"] * pick(long_, "flow_points") + c["distribution"] * pick(short, "flow_points")
+	score = np.clip(score, 0, 100).astype(np.int64)
+
+	grade = (score[..., None] >= s.grade_cutoffs).sum(axis=-1).astype(np.int8)
+
+	n_trend = sum(c[k] for k in TREND_SIGNAL_KEYS)
+	n_vol = sum(c[k] for k in VOLUME_SIGNAL_KEYS)
+	confidence = 40 + 20 * (direction != 0) + 15 * (n_trend > 0) + 15 * (n_vol > 0)
+	confidence = np.clip(confidence, 0, 100).astype(np.int64)
+
+	# Per-strategy rows; outputs are owned (k, n) arrays so callers may mask
+	# them in place, inputs stay read-only broadcast views.
+	shape = (len(s), n)
+	score, grade, direction, confidence = (
+		a if a.shape == shape else np.broadcast_to(a, shape).copy() for a in (score, grade, direction, confidence)
+	)
+	t5 = np.broadcast_to(t5, shape)
+	c = {key: np.broadcast_to(v, shape) for key, v in c.items()}
+	return [
+		SetupBatch(
+			score=score[j],
+			grade=grade[j],
+			direction=direction[j],
+			confidence=confidence[j],
+			trend_5m=t5[j],
+			counts={key: v[j] for key, v in c.items()},
+			timeframe=timeframe,
+			strategy=spec,
+		)
+		for j, spec in enumerate(s.specs)
+	]
+
+
+def score_setup_batch(
+	trend: np.ndarray,
+	trend_5m: np.ndarray,
+	counts: Dict[str, np.ndarray],
+	timeframe: str = "5m",
+	strategy: Optional[StrategySpec] = None,
+) -> SetupBatch:
+	"""
+	`score_setup` over whole bar arrays in one pass, for a single strategy
+	(see `score_strategies`).
+	"""
+	return score_strategies(trend, trend_5m, counts, compile_strategies((strategy or DEFAULT_STRATEGY,)), timeframe)[0]
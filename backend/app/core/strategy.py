@@ -0,0 +1,160 @@
+"""
+Strategy definitions: every threshold and weight of the fusion pipeline.
+
+`StrategySpec()` is the stock "fusion" strategy; its defaults are the values
+the endpoints have always used. Variants override any field and are defined
+in settings (`STRATEGIES`) or the `strategies` table, see
+services/strategies.py. `compile_strategies` turns several specs into
+per-field arrays so the backtest can score every variant in one data pass.
+"""
+
+from dataclasses import asdict, dataclass, fields, replace
+from functools import lru_cache
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+GRADES = ("none", "C", "B", "A", "A+")
+# Fields that change which signals are detected (the rest only change scoring
+# and trading), so strategies sharing them share one detection pass
+DETECTION_FIELDS = (
+	"bos_lookback", "climax_rv", "ignition_rv", "ignition_body_pct", "flow_window", "flow_rv", "flow_min_active",
+	"delta_window", "delta_ratio",
+)
+
+
+@dataclass(frozen=True)
+class StrategySpec:
+	name: str = "fusion"
+
+	# Signal detection
+	bos_lookback: int = 20  # bars before the last one forming the swing high/low
+	climax_rv: float = 3.0  # relative volume of a climax candle
+	ignition_rv: float = 2.0
+	ignition_body_pct: float = 0.6
+	flow_window: int = 50  # bars scanned for accumulation/distribution
+	flow_rv: float = 1.5  # relative volume counting a bar as active
+	flow_min_active: int = 5
+	delta_window: int = 6  # latest 5m bars of trade flow summed for buy/sell pressure
+	delta_ratio: float = 0.25  # |buy - sell| / (buy + sell) volume marking pressure
+
+	# Fusion score: points for a signal aligned with the trend / against it
+	trend_points: int = 30
+	confirm_5m_points: int = 15
+	ema_cross_points: Tuple[int, int] = (20, -10)
+	bos_points: Tuple[int, int] = (15, -5)
+	ignition_points: Tuple[int, int] = (12, -5)
+	climax_points: int = 6
+	flow_points: Tuple[int, int] = (10, 3)
+	delta_points: Tuple[int, int] = (8, -4)  # trade-flow pressure; scored only where flow is ingested
+	recent_signals: int = 12  # most recent trend / volume signals scored
+	grade_cutoffs: Tuple[int, int, int, int] = (35, 50, 65, 80)  # C, B, A, A+
+
+	# Trading
+	min_grade: str = "B"  # lowest grade that opens a position
+	take_profit: float = 0.02  # fraction of entry price
+	stop_loss: float = 0.01
+	max_bars: int = 288  # backtest holding limit
+
+	def __post_init__(self) -> None:
+		if self.min_grade not in GRADES[1:]:
+			raise ValueError(f"min_grade must be one of {', '.join(GRADES[1:])}")
+		if list(self.grade_cutoffs) != sorted(self.grade_cutoffs) or len(self.grade_cutoffs) != 4:
+			raise ValueError("grade_cutoffs must be 4 ascending scores (C, B, A, A+)")
+		for name in ("bos_lookback", "flow_window", "delta_window", "recent_signals", "max_bars"):
+			if getattr(self, name) < 1:
+				raise ValueError(f"{name} must be at least 1")
+		if not 0 < self.delta_ratio <= 1:
+			raise ValueError("delta_ratio is a fraction of the bars' volume in (0, 1]")
+		if not (0 < self.take_profit < 1 and 0 < self.stop_loss < 1):
+			raise ValueError("take_profit and stop_loss are fractions of the entry price in (0, 1)")
+
+	@classmethod
+	def from_dict(cls, params: Dict[str, Any], name: Optional[str] = None) -> "StrategySpec":
+		"""
+		The stock strategy with `params` overridden; unknown keys are rejected.
+		"""
+		known = {f.name: f for f in fields(cls)}
+		unknown = sorted(set(params) - set(known))
+		if unknown:
+			raise ValueError(f"Unknown strategy parameters: {', '.join(unknown)}")
+		values: Dict[str, Any] = {}
+		for key, value in params.items():
+			default = getattr(DEFAULT_STRATEGY, key)
+			try:
+				if isinstance(default, tuple):
+					value = tuple(type(default[0])(v) for v in value)
+					if len(value) != len(default):
+						raise ValueError
+				elif not isinstance(default, str):
+					value = type(default)(value)
+			except (TypeError, ValueError):
+				raise ValueError(f"Bad value for {key}: {value!r}")
+			values[key] = value
+		if name is not None:
+			values["name"] = name
+		return replace(DEFAULT_STRATEGY, **values)
+
+	def to_dict(self) -> Dict[str, Any]:
+		return {k: list(v) if isinstance(v, tuple) else v for k, v in asdict(self).items()}
+
+	def overrides(self) -> Dict[str, Any]:
+		"""
+		Fields that differ from the stock strategy (name excluded).
+		"""
+		return {
+			k: v for k, v in self.to_dict().items()
+			if k != "name" and v != DEFAULT_STRATEGY.to_dict()[k]
+		}
+
+	@property
+	def detection_key(self) -> Tuple[Any, ...]:
+		return tuple(getattr(self, f) for f in DETECTION_FIELDS)
+
+	@property
+	def min_grade_index(self) -> int:
+		return GRADES.index(self.min_grade)
+
+	def grade(self, score: int) -> str:
+		return GRADES[sum(score >= c for c in self.grade_cutoffs)]
+
+
+DEFAULT_STRATEGY = StrategySpec()
+
+
+class StrategyArrays:
+	"""
+	Several specs compiled into per-field arrays shaped (k, 1), so they
+	broadcast against (n_bars,) data into (k, n_bars) results. Point pairs
+	are split into `<field>_aligned` / `<field>_contra`, and `grade_cutoffs`
+	is (k, 1, 4).
+	"""
+
+	def __init__(self, specs: Sequence[StrategySpec]) -> None:
+		if not specs:
+			raise ValueError("No strategies to compile")
+		self.specs = list(specs)
+		for f in fields(StrategySpec):
+			if f.name == "name" or f.name == "min_grade":
+				continue
+			values = [getattr(s, f.name) for s in self.specs]
+			if f.name == "grade_cutoffs":
+				setattr(self, f.name, np.array(values, dtype=np.int64)[:, None, :])
+			elif isinstance(values[0], tuple):
+				arr = np.array(values)
+				setattr(self, f"{f.name}_aligned", arr[:, 0:1])
+				setattr(self, f"{f.name}_contra", arr[:, 1:2])
+			else:
+				setattr(self, f.name, np.array(values)[:, None])
+		self.min_grade_index = np.array([s.min_grade_index for s in self.specs])[:, None]
+
+	def __len__(self) -> int:
+		return len(self.specs)
+
+
+@lru_cache(maxsize=64)
+def compile_strategies(specs: Tuple[StrategySpec, ...]) -> StrategyArrays:
+	"""
+	Compiled arrays for `specs` (a tuple, so repeat calls hit the cache).
+	"""
+	return StrategyArrays(specs)
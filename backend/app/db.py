@@ -1,8 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import sessionmaker, declarative_base
 from typing import Generator
 import os
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +26,47 @@ def init_db() -> None:
 	Errors are logged but do not crash the app so /health remains available.
 	"""
 	try:
-		from .models import forward_test  # noqa: F401
-		Base.metadata.create_all(bind=engine)
+		from .models import forward_test, forward_replay, candles, learning, worker_lease, screener, score_history, alerts, strategy, order_flow  # noqa: F401
+		# With several worker processes booting at once, another process may
+		# create a table between our existence check and CREATE; retry so the
+		# check sees it.
+		for attempt in range(3):
+			try:
+				Base.metadata.create_all(bind=engine)
+				break
+			except OperationalError:
+				if attempt == 2:
+					raise
+				time.sleep(0.2 * (attempt + 1))
+		_add_missing_columns()
 		logger.info("DB initialized successfully", extra={"database_url": DATABASE_URL})
 	except Exception:
 		logger.exception("Failed to initialize database", extra={"database_url": DATABASE_URL})
 
 
+def _add_missing_columns() -> None:
+	"""
+	`create_all` never alters existing tables: add nullable columns that models
+	gained since the table was created. Another process may add the same
+	column concurrently, so a failed ALTER is only logged.
+	"""
+	existing = inspect(engine)
+	for table in Base.metadata.sorted_tables:
+		if not existing.has_table(table.name):
+			continue
+		present = {c["name"] for c in existing.get_columns(table.name)}
+		for column in table.columns:
+			if column.name in present or not column.nullable:
+				continue
+			ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(engine.dialect)}'
+			try:
+				with engine.begin() as conn:
+					conn.execute(text(ddl))
+				logger.info("Added missing column", extra={"table": table.name, "column": column.name})
+			except OperationalError:
+				logger.warning("Could not add column", extra={"table": table.name, "column": column.name}, exc_info=True)
+
+
 def get_db() -> Generator:
 	db = SessionLocal()
 	try:
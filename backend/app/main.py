@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from .core import lazy, metrics, profiling
 from .core.config import get_settings
 from .api.v1.router import api_router
 from .db import init_db, SessionLocal
+from typing import Dict, List, Optional
 import asyncio
 import logging
+import time
 
 
 logging.basicConfig(level=logging.INFO)
@@ -13,6 +17,14 @@ logger = logging.getLogger("cryptotrendlab.main")
 # Load settings and create the FastAPI app at module import time so
 # `backend.app.main:app` works exactly as Railway expects.
 settings = get_settings()
+metrics.configure(settings.metrics_enabled)
+
+
+class TimedJSONResponse(JSONResponse):
+	def render(self, content) -> bytes:
+		with metrics.span("json_encode"):
+			return super().render(content)
+
 
 app = FastAPI(
 	title="CryptoTrendLab API",
@@ -20,6 +32,7 @@ app = FastAPI(
 	openapi_url=f"{settings.api_v1_prefix}/openapi.json",
 	docs_url="/docs",
 	redoc_url="/redoc",
+	default_response_class=TimedJSONResponse,
 )
 
 # CORS
@@ -29,8 +42,21 @@ app.add_middleware(
 	allow_credentials=True,
 	allow_methods=["*"],
 	allow_headers=["*"],
+	expose_headers=["Server-Timing", "X-Profile-Id"],
 )
 
+# Opt-in request profiling (see core/profiling.py)
+if settings.profiling_enabled:
+	app.add_middleware(
+		profiling.ProfilingMiddleware,
+		sample_rate=settings.profiling_sample_rate,
+		allowed_clients=settings.profiling_allowed_clients,
+		mode=settings.profiling_mode,
+	)
+
+# Per-stage timing (outermost so `total` covers CORS and routing)
+app.add_middleware(metrics.TimingMiddleware, server_timing=settings.server_timing_enabled)
+
 
 @app.get("/health", tags=["health"])
 def service_health() -> dict:
@@ -41,6 +67,14 @@ def service_health() -> dict:
 	return {"status": "ok"}
 
 
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def service_metrics() -> str:
+	"""
+	Per-stage latency histograms in Prometheus text format.
+	"""
+	return metrics.REGISTRY.render()
+
+
 # API v1 router (includes all feature endpoints under the configured prefix)
 app.include_router(api_router, prefix=settings.api_v1_prefix)
 
@@ -60,29 +94,178 @@ async def on_startup() -> None:
 	except Exception:
 		logger.exception("Startup: init_db failed")
 
+	# Heavy dependencies are imported lazily; load them off the event loop now so
+	# /health is up immediately and the first real request is not slowed down.
+	if settings.warm_up_imports:
+		asyncio.get_running_loop().run_in_executor(None, lazy.warm_up)
+
 	async def worker() -> None:
 		# Import inside worker to avoid impacting app startup or /health if something goes wrong.
 		from .models.forward_test import ForwardTestRun  # type: ignore
-		from .services.forward_test import step_run  # type: ignore
+		from .services.forward_test import step_symbol  # type: ignore
+		from .services.live_candles import get_live_candles  # type: ignore
+		from .services.leader import LeaderLease  # type: ignore
+
+		# With several API processes only the lease holder steps runs; the
+		# others keep polling so one takes over if the leader goes away.
+		lease = None
+		if settings.forward_test_worker == "auto":
+			lease = LeaderLease("forward_test", ttl_seconds=settings.leader_lease_seconds)
+			app.state.forward_test_lease = lease
+		poll_seconds = settings.leader_heartbeat_seconds if lease is not None else settings.forward_test_interval_seconds
+		last_step: Optional[float] = None
 
 		while True:
 			try:
 				db = SessionLocal()
-				active_runs = db.query(ForwardTestRun).filter(ForwardTestRun.is_active.is_(True)).all()
-				for run in active_runs:
-					try:
-						step_run(run, db)
-					except Exception:
-						logger.exception("Forward test worker: error in step_run", extra={"run_id": run.id})
-				db.close()
+				try:
+					is_leader = lease is None or lease.acquire(db)
+					due = last_step is None or time.monotonic() - last_step >= settings.forward_test_interval_seconds
+					if is_leader and due:
+						last_step = time.monotonic()
+						active_runs = db.query(ForwardTestRun).filter(ForwardTestRun.is_active.is_(True)).all()
+						# Runs on one symbol share candles and indicators: one pass per symbol
+						by_symbol: Dict[str, List[ForwardTestRun]] = {}
+						for run in active_runs:
+							by_symbol.setdefault(run.symbol, []).append(run)
+						# Candle buffers are kept only for symbols still being tested
+						get_live_candles().retain(by_symbol)
+						for symbol, runs in by_symbol.items():
+							# Renew between symbols so a long pass never outlives the lease
+							if lease is not None and not lease.acquire(db):
+								break
+							try:
+								step_symbol(db, symbol, runs)
+							except Exception:
+								db.rollback()
+								logger.exception("Forward test worker: error in step_symbol", extra={"symbol": symbol, "runs": len(runs)})
+				finally:
+					db.close()
 			except Exception:
 				logger.exception("Forward test worker: unexpected error")
-			await asyncio.sleep(300)  # 5 minutes
+			await asyncio.sleep(poll_seconds)
 
-	try:
-		asyncio.create_task(worker())
-	except Exception:
-		logger.exception("Startup: failed to schedule forward test worker")
+	if settings.forward_test_worker != "off":
+		try:
+			asyncio.create_task(worker())
+		except Exception:
+			logger.exception("Startup: failed to schedule forward test worker")
+
+	async def screener_worker() -> None:
+		from .services.screener import alert_pass, next_pass_at, refresh_snapshot, screener_lease  # type: ignore
+
+		lease = screener_lease()
+		app.state.screener_lease = lease
+		loop = asyncio.get_running_loop()
+		# First pass as soon as the lease is held, then right after each close
+		next_pass = time.time()
+
+		def step() -> None:
+			nonlocal next_pass
+			db = SessionLocal()
+			try:
+				if lease.acquire(db) and time.time() >= next_pass:
+					next_pass = next_pass_at(time.time(), settings.screener_interval_seconds, settings.screener_delay_seconds)
+					if settings.screener_enabled:
+						refresh_snapshot(db)
+					else:
+						# Alerts only: evaluate the rules without storing a screen
+						alert_pass(db)
+			finally:
+				db.close()
+
+		while True:
+			try:
+				# A pass fetches hundreds of symbols; keep it off the event loop
+				await loop.run_in_executor(None, step)
+			except Exception:
+				logger.exception("Screener worker: refresh failed")
+			# Wake for the next close, but keep renewing the lease in between
+			wait = settings.leader_heartbeat_seconds
+			if lease.is_leader:
+				wait = min(wait, max(0.5, next_pass - time.time()))
+			await asyncio.sleep(wait)
+
+	if settings.screener_enabled or settings.alerts_enabled:
+		try:
+			asyncio.create_task(screener_worker())
+		except Exception:
+			logger.exception("Startup: failed to schedule screener worker")
+
+	async def order_flow_worker() -> None:
+		from .services.leader import LeaderLease  # type: ignore
+		from .services.order_flow import IngestionInProgress, ingest_symbol  # type: ignore
+
+		lease = LeaderLease("order_flow", ttl_seconds=settings.leader_lease_seconds)
+		app.state.order_flow_lease = lease
+		loop = asyncio.get_running_loop()
+		last_ingest: Optional[float] = None
+
+		def step() -> None:
+			nonlocal last_ingest
+			db = SessionLocal()
+			try:
+				due = last_ingest is None or time.monotonic() - last_ingest >= settings.order_flow_interval_seconds
+				if lease.acquire(db) and due:
+					last_ingest = time.monotonic()
+					for symbol in settings.order_flow_symbols:
+						try:
+							ingest_symbol(db, symbol)
+						except IngestionInProgress:
+							logger.info("Order flow worker: symbol busy, skipped", extra={"symbol": symbol})
+						except Exception:
+							db.rollback()
+							logger.exception("Order flow worker: ingestion failed", extra={"symbol": symbol})
+			finally:
+				db.close()
+
+		while True:
+			try:
+				await loop.run_in_executor(None, step)
+			except Exception:
+				logger.exception("Order flow worker: unexpected error")
+			await asyncio.sleep(min(settings.leader_heartbeat_seconds, settings.order_flow_interval_seconds))
+
+	if settings.order_flow_symbols:
+		try:
+			asyncio.create_task(order_flow_worker())
+		except Exception:
+			logger.exception("Startup: failed to schedule order flow worker")
+
+	async def warm_cache_worker() -> None:
+		from .services.warm_cache import get_warm_cache, warm_all  # type: ignore
+
+		cache = get_warm_cache()
+		loop = asyncio.get_running_loop()
+		while True:
+			try:
+				await loop.run_in_executor(None, warm_all, cache)
+			except Exception:
+				logger.exception("Warm cache worker: refresh failed")
+			# Next pass right after the next candle close
+			await asyncio.sleep(max(1.0, cache.next_refresh() - time.time()))
+
+	if settings.warm_cache_symbols:
+		try:
+			asyncio.create_task(warm_cache_worker())
+		except Exception:
+			logger.exception("Startup: failed to schedule warm cache worker")
 
 	logger.info("API startup: CryptoTrendLab backend is ready to serve requests")
 
+
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+	"""
+	Hand the worker leases over immediately instead of letting them expire.
+	"""
+	from .services.learning_model import learning_lease  # type: ignore
+
+	leases = [getattr(app.state, name, None) for name in ("forward_test_lease", "screener_lease", "order_flow_lease")]
+	for lease in leases + [learning_lease()]:
+		if lease is not None and lease.is_leader:
+			db = SessionLocal()
+			try:
+				lease.release(db)
+			finally:
+				db.close()
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, BigInteger, ForeignKey, UniqueConstraint
+from datetime import datetime, timezone
+from ..db import Base
+
+
+class AlertRule(Base):
+	__tablename__ = "alert_rules"
+
+	id = Column(Integer, primary_key=True, index=True)
+	name = Column(String, nullable=False)
+	expression = Column(Text, nullable=False)  # e.g. "grade >= A+ and direction == long"
+	conditions_json = Column(Text, nullable=False)  # parsed [field, op, value] triples
+	symbols_json = Column(Text, nullable=True)  # watched symbols; null = every screened symbol
+	sinks_json = Column(Text, nullable=True)  # extra sinks besides the alert_events table
+	webhook_url = Column(String, nullable=True)
+	cooldown_minutes = Column(Integer, nullable=False, default=60)
+	is_active = Column(Boolean, nullable=False, default=True, index=True)
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
+	updated_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
+
+
+class AlertEvent(Base):
+	__tablename__ = "alert_events"
+	__table_args__ = (
+		UniqueConstraint("rule_id", "symbol", "candle_ts", name="uq_alert_events_rule_symbol_ts"),
+	)
+
+	id = Column(Integer, primary_key=True, index=True)
+	rule_id = Column(Integer, ForeignKey("alert_rules.id"), nullable=False, index=True)
+	symbol = Column(String, nullable=False)
+	candle_ts = Column(BigInteger, nullable=False)  # 5m candle the rule fired on, ms since epoch
+	payload_json = Column(Text, nullable=False)
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Float, BigInteger, UniqueConstraint
+from ..db import Base
+
+
+class Candle(Base):
+	__tablename__ = "candles"
+	__table_args__ = (
+		UniqueConstraint("symbol", "timeframe", "ts", name="uq_candles_symbol_tf_ts"),
+	)
+
+	id = Column(Integer, primary_key=True, index=True)
+	symbol = Column(String, nullable=False, index=True)  # requested symbol, e.g. BTC/USDT
+	timeframe = Column(String, nullable=False)  # 1m / 5m / 15m ...
+	ts = Column(BigInteger, nullable=False, index=True)  # candle open, ms since epoch
+	open = Column(Float, nullable=False)
+	high = Column(Float, nullable=False)
+	low = Column(Float, nullable=False)
+	close = Column(Float, nullable=False)
+	volume = Column(Float, nullable=False, default=0.0)
+	exchange = Column(String, nullable=True)  # source exchange for provenance
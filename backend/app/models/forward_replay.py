@@ -0,0 +1,49 @@
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, BigInteger
+from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+from ..db import Base
+
+
+class ReplayRun(Base):
+	"""
+	A forward-test run replayed over stored candles with a simulated clock.
+	Mirrors `ForwardTestRun`; kept in separate tables so replays never mix
+	with live runs. `start_time`/`end_time` are simulated times.
+	"""
+
+	__tablename__ = "replay_runs"
+
+	id = Column(Integer, primary_key=True, index=True)
+	symbol = Column(String, nullable=False, index=True)
+	strategy = Column(String, nullable=True)  # strategy definition name; null = "fusion"
+	start_time = Column(DateTime(timezone=True), nullable=False)
+	end_time = Column(DateTime(timezone=True), nullable=True)
+	is_active = Column(Boolean, default=True, index=True)
+	summary_json = Column(Text, nullable=True)
+	last_candle_ts = Column(BigInteger, nullable=True)  # ms since epoch
+	candles_processed = Column(Integer, nullable=False, default=0)
+	elapsed_ms = Column(Float, nullable=True)  # wall time of the replay
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
+
+	trades = relationship("ReplayTrade", back_populates="run", cascade="all, delete-orphan")
+
+
+class ReplayTrade(Base):
+	__tablename__ = "replay_trades"
+
+	id = Column(Integer, primary_key=True, index=True)
+	test_run_id = Column(Integer, ForeignKey("replay_runs.id"), nullable=False, index=True)
+	symbol = Column(String, nullable=False, index=True)
+	direction = Column(String, nullable=False)  # long / short
+	entry_price = Column(Float, nullable=False)
+	stop_loss = Column(Float, nullable=False)
+	take_profit = Column(Float, nullable=False)
+	exit_price = Column(Float, nullable=True)
+	exit_reason = Column(String, nullable=True)  # take_profit / stop_loss / signal_flip / session_end
+	r_multiple = Column(Float, nullable=True)
+	profit_loss = Column(Float, nullable=True)  # percent
+	drawdown = Column(Float, nullable=True)
+	candle_time = Column(DateTime(timezone=True), nullable=False)  # entry candle time
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
+
+	run = relationship("ReplayRun", back_populates="trades")
@@ -9,6 +9,8 @@ class ForwardTestRun(Base):
 
 	id = Column(Integer, primary_key=True, index=True)
 	symbol = Column(String, nullable=False, index=True)
+	strategy = Column(String, nullable=True)  # strategy definition name; null = "fusion"
+	strategy_params_json = Column(Text, nullable=True)  # the run's own overrides on top of `strategy`
 	start_time = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
 	end_time = Column(DateTime(timezone=True), nullable=True)
 	is_active = Column(Boolean, default=True, index=True)
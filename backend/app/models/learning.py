@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, BigInteger
+from datetime import datetime, timezone
+from ..db import Base
+
+
+class LearnedWeightSet(Base):
+	__tablename__ = "learned_weights"
+
+	id = Column(Integer, primary_key=True, index=True)
+	symbol = Column(String, nullable=False, index=True)
+	method = Column(String, nullable=False, default="walk_forward")
+	horizon_bars = Column(Integer, nullable=False)
+	weights_json = Column(Text, nullable=False)  # fusion component weights
+	metrics_json = Column(Text, nullable=True)  # out-of-sample metrics + per-fold timings
+	data_start_ts = Column(BigInteger, nullable=True)  # ms since epoch
+	data_end_ts = Column(BigInteger, nullable=True)
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc), index=True)
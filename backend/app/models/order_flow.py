@@ -0,0 +1,36 @@
+from sqlalchemy import Column, Integer, String, Float, BigInteger, UniqueConstraint
+from ..db import Base
+
+
+class FlowBar(Base):
+	"""
+	Trade flow of one 5m bar, aggregated from public trades at ingestion.
+	Volumes, notional and the trade count are sums, so a bar split across
+	ingestion passes is completed by adding to it.
+	"""
+
+	__tablename__ = "flow_bars"
+	__table_args__ = (
+		UniqueConstraint("symbol", "ts", name="uq_flow_bars_symbol_ts"),
+	)
+
+	id = Column(Integer, primary_key=True)
+	symbol = Column(String, nullable=False)  # requested symbol, e.g. BTC/USDT
+	ts = Column(BigInteger, nullable=False)  # bar open, ms since epoch (aligned with 5m candles)
+	buy_volume = Column(Float, nullable=False, default=0.0)  # base units taken by aggressive buyers
+	sell_volume = Column(Float, nullable=False, default=0.0)
+	notional = Column(Float, nullable=False, default=0.0)  # sum of price * amount (VWAP numerator)
+	trades = Column(Integer, nullable=False, default=0)
+	imbalance = Column(Float, nullable=True)  # (bid - ask) / (bid + ask) depth of the bar's last book snapshot
+
+
+class FlowCursor(Base):
+	"""
+	Where the next trade ingestion for a symbol resumes.
+	"""
+
+	__tablename__ = "flow_cursors"
+
+	symbol = Column(String, primary_key=True)
+	exchange = Column(String, nullable=False)
+	last_trade_ts = Column(BigInteger, nullable=False)  # trades at or before this ms are ingested
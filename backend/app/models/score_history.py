@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, SmallInteger, BigInteger, UniqueConstraint
+from ..db import Base
+
+
+class ScorePoint(Base):
+	"""
+	One scored 5m candle. Append-only; labels are stored as small integer
+	codes (see services/score_history.py) to keep rows narrow.
+	"""
+
+	__tablename__ = "score_history"
+	__table_args__ = (
+		UniqueConstraint("symbol", "source", "ts", name="uq_score_history_symbol_source_ts"),
+	)
+
+	id = Column(Integer, primary_key=True)
+	symbol = Column(String, nullable=False)  # requested symbol, e.g. BTC/USDT
+	source = Column(String, nullable=False)  # signals (forward-test worker) / fusion (screener)
+	ts = Column(BigInteger, nullable=False)  # candle open, ms since epoch
+	score = Column(SmallInteger, nullable=False)
+	grade = Column(SmallInteger, nullable=False)  # index into GRADE_LABELS
+	direction = Column(SmallInteger, nullable=False)  # 1 long / -1 short / 0 none
+	confidence = Column(SmallInteger, nullable=False)
+	action = Column(SmallInteger, nullable=True)  # 1 buy / -1 sell / 0 hold (signals only)
+	weights_version = Column(String(16), nullable=True)  # digest of the weights used (signals only)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text
+from datetime import datetime, timezone
+from ..db import Base
+
+
+class ScreenerSnapshot(Base):
+	"""
+	One screener pass over the market: per-symbol fusion scores stored
+	column-wise as JSON so every API process can load the latest pass.
+	"""
+
+	__tablename__ = "screener_snapshots"
+
+	id = Column(Integer, primary_key=True, index=True)
+	exchange = Column(String, nullable=False)
+	symbols = Column(Integer, nullable=False)
+	failed = Column(Integer, nullable=False, default=0)
+	elapsed_ms = Column(Float, nullable=True)
+	payload_json = Column(Text, nullable=False)
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc), index=True)
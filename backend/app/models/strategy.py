@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from datetime import datetime, timezone
+from ..db import Base
+
+
+class StrategyDefinition(Base):
+	"""
+	A named strategy variant: overrides of the stock fusion parameters (see
+	core/strategy.py). Definitions are immutable once stored, so runs and
+	backtests that name them stay reproducible.
+	"""
+
+	__tablename__ = "strategies"
+
+	id = Column(Integer, primary_key=True, index=True)
+	name = Column(String, nullable=False, unique=True, index=True)
+	params_json = Column(Text, nullable=False)
+	created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(tz=timezone.utc))
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, BigInteger
+from ..db import Base
+
+
+class WorkerLease(Base):
+	"""
+	Time-limited ownership of a singleton background job (e.g. forward-test
+	stepping) when the API runs as several processes or replicas.
+	"""
+
+	__tablename__ = "worker_leases"
+
+	name = Column(String, primary_key=True)
+	owner = Column(String, nullable=False)
+	expires_at_ms = Column(BigInteger, nullable=False)  # ms since epoch
@@ -0,0 +1,476 @@
+"""
+Alert rules evaluated in batch on every screener pass.
+
+A rule is a conjunction of conditions over per-symbol facts of the latest 5m
+candle, written as an expression:
+
+	grade >= A+ and direction == long
+	climax_15m
+	score >= 65 and rv_5m > 2 and not bos_down_5m
+
+Active rules are compiled once (until any rule changes) into flat condition
+arrays, so one pass evaluates every rule against every symbol with a handful
+of numpy comparisons. Fired alerts are recorded in `alert_events`, which both
+deduplicates them (one per rule, symbol and candle, then `cooldown_minutes`
+of silence) and feeds the SSE stream; rules may name extra sinks such as a
+webhook.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import ipaddress
+import json
+import logging
+import re
+import socket
+import threading
+import urllib.parse
+import urllib.request
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..models.alerts import AlertEvent, AlertRule
+from ..core.scoring import DIRECTION_LABELS, GRADE_LABELS, TREND_CODES
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_FIELDS = ("score", "confidence", "rv_5m", "rv_15m", "change_24h_pct", "quote_volume_24h", "last_close")
+EVENT_TYPES = (
+	"climax", "ignition_up", "ignition_down",
+	"ema_cross_up", "ema_cross_down", "bos_up", "bos_down",
+	"accumulation", "distribution",
+)
+EVENT_FIELDS = tuple(f"{e}_{tf}" for tf in ("5m", "15m") for e in EVENT_TYPES)
+# Labelled fields and the codes their labels compare as
+LABEL_FIELDS: Dict[str, Dict[str, int]] = {
+	"grade": {label: i for i, label in enumerate(GRADE_LABELS)},
+	"direction": {label: code for code, label in DIRECTION_LABELS.items()},
+	"trend": {**TREND_CODES, "sideways": 0},
+	"trend_5m": {**TREND_CODES, "sideways": 0},
+}
+FIELDS = NUMERIC_FIELDS + tuple(LABEL_FIELDS) + EVENT_FIELDS
+_FIELD_INDEX = {f: i for i, f in enumerate(FIELDS)}
+
+OPS = {
+	"==": np.equal,
+	"!=": np.not_equal,
+	">=": np.greater_equal,
+	"<=": np.less_equal,
+	">": np.greater,
+	"<": np.less,
+}
+_OP_CODES = {op: i for i, op in enumerate(OPS)}
+_CONDITION = re.compile(r"^\s*(?:(not)\s+)?([a-z0-9_]+)\s*(?:(==|!=|>=|<=|>|<)\s*(\S+))?\s*$", re.IGNORECASE)
+
+
+def parse_expression(expression: str) -> List[Tuple[str, str, float]]:
+	"""
+	`and`-joined conditions as (field, op, value) with labels resolved to
+	their codes. A bare event field means "fired on the last candle".
+	"""
+	conditions: List[Tuple[str, str, float]] = []
+	for part in re.split(r"\s+and\s+", expression.strip(), flags=re.IGNORECASE):
+		m = _CONDITION.match(part)
+		if not m:
+			raise ValueError(f"Cannot parse condition: {part!r}")
+		negate, field, op, raw = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+		if field not in _FIELD_INDEX:
+			raise ValueError(f"Unknown field {field!r}; expected one of {', '.join(FIELDS)}")
+		if op is None:
+			if field not in EVENT_FIELDS:
+				raise ValueError(f"{field} needs a comparison (e.g. {field} >= 1)")
+			conditions.append((field, "==", 0.0 if negate else 1.0))
+			continue
+		if negate:
+			raise ValueError(f"'not' only applies to bare event fields: {part!r}")
+		if field in LABEL_FIELDS:
+			codes = LABEL_FIELDS[field]
+			label = next((v for v in (raw, raw.lower(), raw.upper()) if v in codes), None)
+			if label is None:
+				raise ValueError(f"{field} must be one of {', '.join(codes)}")
+			value = float(codes[label])
+		else:
+			try:
+				value = float(raw)
+			except ValueError:
+				raise ValueError(f"{field} compares against a number, got {raw!r}")
+		conditions.append((field, op, value))
+	return conditions
+
+
+def candle_events(
+	trend_signals: List[Dict[str, Any]],
+	volume_signals: List[Dict[str, Any]],
+	last_ts: Dict[str, int],
+) -> Dict[str, int]:
+	"""
+	EVENT_FIELDS flags (1/0) for the last candle of each timeframe, which
+	must be the last closed one (`last_ts`; the screener drops the bar still
+	forming). Trend signals always describe the last candle; climax/ignition
+	count only when they are on it; accumulation/distribution describe the
+	recent window.
+	"""
+	events = {f: 0 for f in EVENT_FIELDS}
+	for s in trend_signals:
+		events[f"{s['type']}_{s['timeframe']}"] = 1
+	for s in volume_signals:
+		kind, tf = s["type"], s["timeframe"]
+		if kind in ("climax", "ignition"):
+			if s.get("ts") != last_ts.get(tf):
+				continue
+			if kind == "ignition":
+				if s.get("dir") not in ("up", "down"):
+					continue
+				kind = f"ignition_{s['dir']}"
+		events[f"{kind}_{tf}"] = 1
+	return events
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+	"""
+	Detached copy of an active rule (the compiled set outlives sessions).
+	"""
+	id: int
+	name: str
+	expression: str
+	conditions: Tuple[Tuple[str, str, float], ...]
+	symbols: Tuple[str, ...]
+	sinks: Tuple[str, ...]
+	webhook_url: Optional[str]
+	cooldown_minutes: int
+
+	@classmethod
+	def from_row(cls, rule: AlertRule) -> "RuleSpec":
+		return cls(
+			id=rule.id,
+			name=rule.name,
+			expression=rule.expression,
+			conditions=tuple(tuple(c) for c in json.loads(rule.conditions_json)),
+			symbols=tuple(json.loads(rule.symbols_json)) if rule.symbols_json else (),
+			sinks=tuple(json.loads(rule.sinks_json)) if rule.sinks_json else (),
+			webhook_url=rule.webhook_url,
+			cooldown_minutes=rule.cooldown_minutes or 0,
+		)
+
+
+class CompiledRules:
+	"""
+	Active rules as flat condition arrays. Conditions are grouped by rule, so
+	a rule holds for a symbol when every condition in its group does.
+	"""
+
+	__slots__ = ("version", "rules", "starts", "cond_field", "cond_op", "cond_value", "scoped_rows", "scope_pairs")
+
+	def __init__(self, rules: Sequence[RuleSpec], version: Any = None) -> None:
+		self.version = version
+		self.rules = list(rules)
+		fields: List[int] = []
+		ops: List[int] = []
+		values: List[float] = []
+		starts: List[int] = []
+		scoped_rows: List[int] = []
+		scope_pairs: List[Tuple[int, str]] = []
+		for r, rule in enumerate(self.rules):
+			starts.append(len(fields))
+			for field, op, value in rule.conditions:
+				fields.append(_FIELD_INDEX[field])
+				ops.append(_OP_CODES[op])
+				values.append(value)
+			if rule.symbols:
+				scoped_rows.append(r)
+				scope_pairs += [(r, s) for s in rule.symbols]
+		self.starts = np.asarray(starts, dtype=np.int64)
+		self.cond_field = np.asarray(fields, dtype=np.int64)
+		self.cond_op = np.asarray(ops, dtype=np.int64)
+		self.cond_value = np.asarray(values, dtype=float)
+		self.scoped_rows = np.asarray(scoped_rows, dtype=np.int64)
+		self.scope_pairs = scope_pairs
+
+	def __len__(self) -> int:
+		return len(self.rules)
+
+	def evaluate(self, facts: Dict[str, np.ndarray], symbols: Sequence[str]) -> np.ndarray:
+		"""
+		(rules, symbols) bool matrix of rules holding for each symbol. Missing
+		facts (NaN) fail every comparison.
+		"""
+		n = len(symbols)
+		if not self.rules or not n:
+			return np.zeros((len(self.rules), n), dtype=bool)
+		table = np.vstack([np.asarray(facts[f], dtype=float) if f in facts else np.full(n, np.nan) for f in FIELDS])
+		lhs = table[self.cond_field]
+		passed = np.empty(lhs.shape, dtype=bool)
+		for op, code in _OP_CODES.items():
+			rows = self.cond_op == code
+			if rows.any():
+				with np.errstate(invalid="ignore"):
+					passed[rows] = OPS[op](lhs[rows], self.cond_value[rows, None])
+		# NaN != x is true in numpy; a missing fact should never satisfy a rule
+		passed &= ~np.isnan(lhs)
+		held = np.logical_and.reduceat(passed, self.starts, axis=0)
+
+		if self.scope_pairs:
+			# Rules naming symbols only hold for those symbols
+			index = {s: i for i, s in enumerate(symbols)}
+			in_scope = np.zeros_like(held)
+			for r, s in self.scope_pairs:
+				i = index.get(s)
+				if i is not None:
+					in_scope[r, i] = True
+			held[self.scoped_rows] &= in_scope[self.scoped_rows]
+		return held
+
+
+class AlertSink:
+	"""
+	Delivery target for fired alerts besides the `alert_events` table.
+	"""
+
+	def deliver(self, rule: RuleSpec, alerts: List[Dict[str, Any]]) -> None:
+		raise NotImplementedError
+
+
+class LogSink(AlertSink):
+	def deliver(self, rule: RuleSpec, alerts: List[Dict[str, Any]]) -> None:
+		for alert in alerts:
+			logger.info("Alert fired", extra={"rule_id": rule.id, "symbol": alert["symbol"], "candle_ts": alert["candle_ts"]})
+
+
+def check_webhook_url(url: str) -> None:
+	"""
+	Raise ValueError unless `url` is http(s) and every address its host
+	resolves to is public, so a rule cannot make the server POST to itself
+	or the internal network. `alerts_webhook_allow_private` lifts the address
+	check for receivers on a private network.
+	"""
+	parts = urllib.parse.urlsplit(url)
+	if parts.scheme not in ("http", "https") or not parts.hostname:
+		raise ValueError("webhook_url must be an http(s) URL with a host")
+	if get_settings().alerts_webhook_allow_private:
+		return
+	try:
+		infos = socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == "https" else 80), proto=socket.IPPROTO_TCP)
+	except (socket.gaierror, UnicodeError, ValueError) as e:
+		raise ValueError(f"webhook_url host {parts.hostname!r} does not resolve: {e}")
+	for info in infos:
+		address = ipaddress.ip_address(info[4][0].split("%")[0])
+		if not address.is_global or address.is_multicast:
+			raise ValueError(f"webhook_url host {parts.hostname!r} resolves to a non-public address ({address})")
+
+
+class _CheckedRedirects(urllib.request.HTTPRedirectHandler):
+	"""
+	Follow a webhook receiver's redirect only to a URL that passes
+	`check_webhook_url` too.
+	"""
+
+	def redirect_request(self, req, fp, code, msg, headers, newurl):
+		check_webhook_url(newurl)
+		return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_webhook_opener = urllib.request.build_opener(_CheckedRedirects)
+
+
+class WebhookSink(AlertSink):
+	"""
+	POSTs `{"alerts": [...]}` to the rule's webhook URL from a small thread
+	pool, so a slow receiver never holds up the screener pass.
+	"""
+
+	def __init__(self, workers: int = 2) -> None:
+		self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="alert-webhook")
+
+	def deliver(self, rule: RuleSpec, alerts: List[Dict[str, Any]]) -> None:
+		if not rule.webhook_url:
+			return
+		self._pool.submit(self._post, rule.id, rule.webhook_url, alerts)
+
+	@staticmethod
+	def _post(rule_id: int, url: str, alerts: List[Dict[str, Any]]) -> None:
+		body = json.dumps({"alerts": alerts}).encode()
+		request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method="POST")
+		try:
+			# Checked again at send time: the host may resolve elsewhere by now
+			check_webhook_url(url)
+			with _webhook_opener.open(request, timeout=get_settings().alerts_webhook_timeout_seconds) as response:
+				response.read()
+		except Exception as e:
+			logger.warning("Alert webhook failed", extra={"rule_id": rule_id, "error": f"{type(e).__name__}: {e}"})
+
+
+SINKS: Dict[str, AlertSink] = {"log": LogSink(), "webhook": WebhookSink()}
+
+
+def register_sink(name: str, sink: AlertSink) -> None:
+	SINKS[name] = sink
+
+
+def create_rule(
+	db: Session,
+	name: str,
+	expression: str,
+	symbols: Optional[List[str]] = None,
+	sinks: Optional[List[str]] = None,
+	webhook_url: Optional[str] = None,
+	cooldown_minutes: int = 60,
+) -> AlertRule:
+	"""
+	Validate and store a rule; raises ValueError on a bad expression, sink
+	or webhook URL.
+	"""
+	conditions = parse_expression(expression)
+	for sink in sinks or []:
+		if sink not in SINKS:
+			raise ValueError(f"Unknown sink {sink!r}; expected one of {', '.join(SINKS)}")
+	if sinks and "webhook" in sinks and not webhook_url:
+		raise ValueError("The webhook sink needs webhook_url")
+	if webhook_url:
+		check_webhook_url(webhook_url)
+	rule = AlertRule(
+		name=name,
+		expression=expression.strip(),
+		conditions_json=json.dumps(conditions),
+		symbols_json=json.dumps([s.upper() for s in symbols]) if symbols else None,
+		sinks_json=json.dumps(sinks) if sinks else None,
+		webhook_url=webhook_url,
+		cooldown_minutes=cooldown_minutes,
+		is_active=True,
+	)
+	db.add(rule)
+	db.commit()
+	db.refresh(rule)
+	return rule
+
+
+def deactivate_rule(db: Session, rule: AlertRule) -> None:
+	rule.is_active = False
+	rule.updated_at = datetime.now(tz=timezone.utc)
+	db.add(rule)
+	db.commit()
+
+
+def watched_symbols(db: Session) -> List[str]:
+	"""
+	Symbols named by active rules.
+	"""
+	symbols = set()
+	for (raw,) in db.query(AlertRule.symbols_json).filter(AlertRule.is_active.is_(True), AlertRule.symbols_json.isnot(None)):
+		symbols.update(json.loads(raw))
+	return sorted(symbols)
+
+
+_compiled: Optional[CompiledRules] = None
+_compiled_lock = threading.Lock()
+
+
+def compiled_rules(db: Session) -> CompiledRules:
+	"""
+	Active rules compiled; recompiled only when a rule was added or changed.
+	"""
+	global _compiled
+	version = tuple(db.query(func.count(AlertRule.id), func.max(AlertRule.id), func.max(AlertRule.updated_at)).one())
+	compiled = _compiled
+	if compiled is not None and compiled.version == version:
+		return compiled
+	with _compiled_lock:
+		if _compiled is None or _compiled.version != version:
+			rules = db.query(AlertRule).filter(AlertRule.is_active.is_(True)).order_by(AlertRule.id).all()
+			_compiled = CompiledRules([RuleSpec.from_row(r) for r in rules], version)
+		return _compiled
+
+
+def evaluate_alerts(
+	db: Session,
+	symbols: Sequence[str],
+	facts: Dict[str, np.ndarray],
+	candle_ts: np.ndarray,
+) -> List[Dict[str, Any]]:
+	"""
+	Evaluate every active rule against every symbol's facts at `candle_ts`,
+	record the alerts that are not deduplicated away and hand them to the
+	rules' sinks. Returns the alerts fired.
+	"""
+	compiled = compiled_rules(db)
+	if not len(compiled):
+		return []
+	held = compiled.evaluate(facts, symbols)
+	rows, cols = np.nonzero(held)
+	if not rows.size:
+		return []
+
+	# Last alert per (rule, symbol) within the longest cooldown
+	rule_ids = sorted({compiled.rules[r].id for r in rows.tolist()})
+	horizon_ms = max(max(compiled.rules[r].cooldown_minutes for r in set(rows.tolist())) * 60_000, 1)
+	since = int(np.min(candle_ts[cols])) - horizon_ms
+	last_fired = {
+		(rule_id, symbol): ts for rule_id, symbol, ts in db.query(
+			AlertEvent.rule_id, AlertEvent.symbol, func.max(AlertEvent.candle_ts),
+		).filter(
+			AlertEvent.rule_id.in_(rule_ids),
+			AlertEvent.candle_ts > since,
+		).group_by(AlertEvent.rule_id, AlertEvent.symbol)
+	}
+
+	by_rule: Dict[int, List[Dict[str, Any]]] = {}
+	fired: List[Dict[str, Any]] = []
+	new_rows: List[Dict[str, Any]] = []
+	for r, c in zip(rows.tolist(), cols.tolist()):
+		rule = compiled.rules[r]
+		symbol = symbols[c]
+		ts = int(candle_ts[c])
+		previous = last_fired.get((rule.id, symbol))
+		if previous is not None and ts - previous < max(rule.cooldown_minutes * 60_000, 1):
+			continue
+		alert = {
+			"rule_id": rule.id,
+			"rule": rule.name,
+			"expression": rule.expression,
+			"symbol": symbol,
+			"candle_ts": ts,
+			"facts": _fact_row(facts, c),
+		}
+		new_rows.append({"rule_id": rule.id, "symbol": symbol, "candle_ts": ts, "payload_json": json.dumps(alert)})
+		by_rule.setdefault(r, []).append(alert)
+		fired.append(alert)
+	if not new_rows:
+		return []
+
+	try:
+		db.bulk_insert_mappings(AlertEvent, new_rows)
+		db.commit()
+	except IntegrityError:
+		# Another pass recorded the same candle first
+		db.rollback()
+		return []
+	for r, alerts in by_rule.items():
+		rule = compiled.rules[r]
+		for name in rule.sinks:
+			sink = SINKS.get(name)
+			if sink is None:
+				continue
+			try:
+				sink.deliver(rule, alerts)
+			except Exception:
+				logger.exception("Alert sink failed", extra={"rule_id": rule.id, "sink": name})
+	return fired
+
+
+def _fact_row(facts: Dict[str, np.ndarray], i: int) -> Dict[str, Any]:
+	row: Dict[str, Any] = {}
+	for field in NUMERIC_FIELDS:
+		v = float(facts[field][i]) if field in facts else float("nan")
+		row[field] = None if v != v else v
+	for field, codes in LABEL_FIELDS.items():
+		if field in facts:
+			labels = {code: label for label, code in codes.items()}
+			row[field] = labels.get(int(facts[field][i]))
+	row["events"] = [f for f in EVENT_FIELDS if f in facts and facts[f][i] == 1]
+	return row
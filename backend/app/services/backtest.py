@@ -0,0 +1,628 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+import math
+import os
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..core.scoring import SETUP_SIGNAL_KEYS, SetupBatch, score_strategies
+from ..core import kernels
+from ..core.config import get_settings
+from ..core.strategy import DEFAULT_STRATEGY, StrategySpec, compile_strategies
+from .candle_store import backfill, load_frame, timeframe_ms
+
+logger = logging.getLogger(__name__)
+
+SIDE_LABELS = {1: "long", -1: "short"}
+EXIT_MODELS = ("close", "high_low")
+TIE_BREAKS = ("stop_loss", "take_profit")
+EXIT_REASONS = ("take_profit", "stop_loss", "signal_flip", "grade_drop", "max_bars", "end_of_data")
+REASON_CODES = {reason: code for code, reason in enumerate(EXIT_REASONS)}
+
+# One symbol's trades as a per-symbol simulation hands them to the portfolio
+# merge: one buffer to pickle out of a worker instead of a tuple per trade
+TRADE_DTYPE = np.dtype([
+	("entry_ts", np.int64),
+	("exit_ts", np.int64),
+	("side", np.int8),
+	("entry", np.float64),
+	("exit", np.float64),
+	("ret", np.float64),
+	("reason", np.uint8),  # index into EXIT_REASONS
+])
+
+
+@dataclass
+class BacktestConfig:
+	"""
+	Exit/entry rules of the fusion backtest: enter on grade >= `min_grade`
+	in the setup direction, exit on TP/SL (fractions of entry price), a
+	direction flip, the grade dropping below `min_grade`, or `max_bars`.
+
+	`exit_model="close"` checks TP/SL against bar closes and exits at the
+	close. `"high_low"` checks them against each bar's high/low and fills at
+	the TP/SL price, like forward testing does. When one bar touches both
+	levels, `tie_break` decides which was hit first, unless 1m sub-bars
+	resolve it.
+	"""
+	take_profit: float = DEFAULT_STRATEGY.take_profit
+	stop_loss: float = DEFAULT_STRATEGY.stop_loss
+	max_bars: int = DEFAULT_STRATEGY.max_bars
+	warmup_bars: int = 250
+	min_grade: int = DEFAULT_STRATEGY.min_grade_index
+	exit_model: str = "close"
+	tie_break: str = "stop_loss"
+
+	def __post_init__(self) -> None:
+		if self.exit_model not in EXIT_MODELS:
+			raise ValueError(f"exit_model must be one of {', '.join(EXIT_MODELS)}")
+		if self.tie_break not in TIE_BREAKS:
+			raise ValueError(f"tie_break must be one of {', '.join(TIE_BREAKS)}")
+
+	@classmethod
+	def from_strategy(cls, spec: StrategySpec, **overrides: Any) -> "BacktestConfig":
+		"""
+		TP/SL, holding limit and entry grade of `spec`; `overrides` win.
+		"""
+		values: Dict[str, Any] = {
+			"take_profit": spec.take_profit,
+			"stop_loss": spec.stop_loss,
+			"max_bars": spec.max_bars,
+			"min_grade": spec.min_grade_index,
+		}
+		values.update(overrides)
+		return cls(**values)
+
+
+@dataclass(slots=True)
+class SimTrade:
+	side: int  # 1 long / -1 short
+	entry_index: int
+	exit_index: int
+	entry_price: float
+	exit_price: float
+	ret: float  # fractional return of the position
+	reason: str  # take_profit / stop_loss / signal_flip / grade_drop / max_bars / end_of_data
+	ambiguous: bool = False  # exit bar touched both TP and SL
+	refined: bool = False  # ...and 1m sub-bars decided which came first
+
+	def to_dict(self, ts: np.ndarray) -> Dict[str, Any]:
+		return {
+			"side": SIDE_LABELS[self.side],
+			"entry_ts": int(ts[self.entry_index]),
+			"exit_ts": int(ts[self.exit_index]),
+			"entry": self.entry_price,
+			"exit": self.exit_price,
+			"pl_pct": round(self.ret * 100, 2),
+			"exit_reason": self.reason,
+		}
+
+
+def trade_records(trades: Sequence[SimTrade], ts: np.ndarray) -> np.ndarray:
+	"""
+	`trades` as a TRADE_DTYPE array, bar indices resolved to timestamps.
+	"""
+	return np.array(
+		[(ts[t.entry_index], ts[t.exit_index], t.side, t.entry_price, t.exit_price, t.ret, REASON_CODES[t.reason]) for t in trades],
+		dtype=TRADE_DTYPE,
+	)
+
+
+def _unique_rows(
+	specs: Sequence[StrategySpec],
+	key: Callable[[StrategySpec], Any],
+	compute: Callable[[StrategySpec], Tuple[np.ndarray, ...]],
+) -> Tuple[np.ndarray, ...]:
+	"""
+	(k, n) stacks of `compute(spec)`, evaluated once per distinct `key(spec)`
+	so variants sharing a lookback share the rolling pass.
+	"""
+	done: Dict[Any, Tuple[np.ndarray, ...]] = {}
+	for spec in specs:
+		if key(spec) not in done:
+			done[key(spec)] = compute(spec)
+	return tuple(np.stack([done[key(spec)][i] for spec in specs]) for i in range(len(done[key(specs[0])])))
+
+
+def strategy_setups(
+	ts5: np.ndarray,
+	open_: np.ndarray,
+	high: np.ndarray,
+	low: np.ndarray,
+	close: np.ndarray,
+	volume: np.ndarray,
+	ts15: np.ndarray,
+	close15: np.ndarray,
+	strategies: Sequence[StrategySpec] = (DEFAULT_STRATEGY,),
+) -> List[SetupBatch]:
+	"""
+	The backtest's fusion setup for every 5m bar, for several strategies in
+	one pass over the data.
+
+	Bar i scores like the per-bar backtest did: 15m alignment from the last
+	15m bar opened at or before the bar (falling back to 5m when sideways),
+	EMA 20/50/200 crosses and `bos_lookback`-bar BOS at the bar,
+	climax/ignition from relative volume, and accumulation/distribution over
+	the trailing `flow_window + 1` bars. Bars with no 15m bar yet score 0
+	with no direction.
+
+	EMAs, relative volume, body % and candle direction are computed once;
+	each strategy's thresholds are (k, 1) columns compared against them, and
+	rolling windows run once per distinct lookback.
+	"""
+	specs = tuple(strategies)
+	arrays = compile_strategies(specs)
+	n = close.shape[0]
+	e20, e50, e200 = (kernels.ema(close, p, p) for p in (20, 50, 200))
+	t5 = kernels.trend_direction(e20, e50, e200)
+
+	if ts15.shape[0]:
+		t15_all = kernels.trend_direction(*(kernels.ema(close15, p, p) for p in (20, 50, 200)))
+		idx = np.searchsorted(ts15, ts5, side="right") - 1
+		has_15m = idx >= 0
+		t15 = np.where(has_15m, t15_all[np.clip(idx, 0, None)], 0)
+	else:
+		has_15m = np.zeros(n, dtype=bool)
+		t15 = np.zeros(n, dtype=np.int8)
+	trend = np.where(t15 != 0, t15, t5)
+
+	counts: Dict[str, np.ndarray] = {k: np.zeros(n, dtype=np.int64) for k in SETUP_SIGNAL_KEYS}
+	for fast, slow in ((e20, e50), (e50, e200), (e20, e200)):
+		up, down = kernels.crosses(fast, slow)
+		counts["ema_cross_up"] += up
+		counts["ema_cross_down"] += down
+	bos_up, bos_down = _unique_rows(
+		specs, lambda s: s.bos_lookback, lambda s: kernels.break_of_structure(high, low, close, s.bos_lookback),
+	)
+	counts["bos_up"] = counts["bos_up"] + bos_up
+	counts["bos_down"] = counts["bos_down"] + bos_down
+
+	rv = kernels.relative_volume(volume, 20)
+	bp = kernels.body_pct(open_, high, low, close)
+	d = kernels.candle_dir(open_, close)
+	climax = rv >= arrays.climax_rv
+	ignition = (rv >= arrays.ignition_rv) & (bp >= arrays.ignition_body_pct)
+	counts["climax"] = counts["climax"] + (climax & (d != 0))
+	counts["climax_flat"] = counts["climax_flat"] + (climax & (d == 0))
+	counts["ignition_up"] = counts["ignition_up"] + (ignition & (d > 0))
+	counts["ignition_down"] = counts["ignition_down"] + (ignition & (d < 0))
+	counts["ignition_flat"] = counts["ignition_flat"] + (ignition & (d == 0))
+
+	def flow(spec: StrategySpec) -> Tuple[np.ndarray, np.ndarray]:
+		active = rv >= spec.flow_rv
+		return kernels.rolling_sum(active, spec.flow_window + 1), kernels.rolling_sum(d * active, spec.flow_window + 1)
+
+	n_active, balance = _unique_rows(specs, lambda s: (s.flow_rv, s.flow_window), flow)
+	busy = n_active >= arrays.flow_min_active
+	counts["accumulation"] = counts["accumulation"] + (busy & (balance > 0))
+	counts["distribution"] = counts["distribution"] + (busy & (balance < 0))
+
+	batches = score_strategies(trend, t5, counts, arrays)
+	for setups in batches:
+		for arr in (setups.score, setups.grade, setups.direction, setups.confidence):
+			arr[~has_15m] = 0
+	return batches
+
+
+def setup_series_arrays(
+	ts5: np.ndarray,
+	open_: np.ndarray,
+	high: np.ndarray,
+	low: np.ndarray,
+	close: np.ndarray,
+	volume: np.ndarray,
+	ts15: np.ndarray,
+	close15: np.ndarray,
+	strategy: Optional[StrategySpec] = None,
+) -> SetupBatch:
+	"""
+	`strategy_setups` for a single strategy (the stock fusion rules by default).
+	"""
+	return strategy_setups(ts5, open_, high, low, close, volume, ts15, close15, (strategy or DEFAULT_STRATEGY,))[0]
+
+
+def setup_series(df5, df15, strategy: Optional[StrategySpec] = None) -> SetupBatch:
+	return setup_series_arrays(
+		df5["timestamp"].to_numpy(dtype=np.int64),
+		df5["open"].to_numpy(dtype=float),
+		df5["high"].to_numpy(dtype=float),
+		df5["low"].to_numpy(dtype=float),
+		df5["close"].to_numpy(dtype=float),
+		df5["volume"].to_numpy(dtype=float),
+		df15["timestamp"].to_numpy(dtype=np.int64),
+		df15["close"].to_numpy(dtype=float),
+		strategy,
+	)
+
+
+class SubBarRefiner:
+	"""
+	Resolves bars whose high/low touched both TP and SL from 1m candles:
+	the first 1m bar inside the 5m bar that reaches either level decides.
+	Returns None when the 1m data is missing or the same 1m bar touches both.
+	"""
+
+	def __init__(self, ts: np.ndarray, ts1: np.ndarray, high1: np.ndarray, low1: np.ndarray, bar_ms: int = 300_000) -> None:
+		self.ts = ts
+		self.ts1 = ts1
+		self.high1 = high1
+		self.low1 = low1
+		self.bar_ms = bar_ms
+
+	def __call__(self, k: int, side: int, tp_price: float, sl_price: float) -> Optional[str]:
+		start = int(self.ts[k])
+		a = int(np.searchsorted(self.ts1, start, side="left"))
+		b = int(np.searchsorted(self.ts1, start + self.bar_ms, side="left"))
+		if a >= b:
+			return None
+		hi = self.high1[a:b]
+		lo = self.low1[a:b]
+		tp = hi >= tp_price if side == 1 else lo <= tp_price
+		sl = lo <= sl_price if side == 1 else hi >= sl_price
+		hit = np.flatnonzero(tp | sl)
+		if not hit.size or (tp[hit[0]] and sl[hit[0]]):
+			return None
+		return "take_profit" if tp[hit[0]] else "stop_loss"
+
+
+def stored_refiner(db: Session, symbol: str, ts5: np.ndarray) -> SubBarRefiner:
+	"""
+	`SubBarRefiner` over the 1m candles stored for the span of `ts5`.
+	"""
+	start = int(ts5[0]) if ts5.shape[0] else None
+	end = int(ts5[-1]) + timeframe_ms("5m") if ts5.shape[0] else None
+	df1 = load_frame(db, symbol, "1m", start, end)
+	return SubBarRefiner(ts5, df1["timestamp"].to_numpy(dtype=np.int64), df1["high"].to_numpy(dtype=float), df1["low"].to_numpy(dtype=float))
+
+
+def simulate(
+	close: np.ndarray,
+	setups: SetupBatch,
+	cfg: Optional[BacktestConfig] = None,
+	high: Optional[np.ndarray] = None,
+	low: Optional[np.ndarray] = None,
+	refiner: Optional[Callable[[int, int, float, float], Optional[str]]] = None,
+) -> List[SimTrade]:
+	"""
+	One position at a time; entries at bar closes, exits per `cfg.exit_model`
+	(`high`/`low` are required for "high_low").
+
+	Instead of stepping bar by bar, jumps from each entry to the first bar
+	where any exit condition holds (a vectorized scan over at most
+	`max_bars` bars), then to the next eligible entry after the exit bar.
+	"""
+	cfg = cfg or BacktestConfig()
+	close = np.asarray(close, dtype=np.float64)
+	n = close.shape[0]
+	intrabar = cfg.exit_model == "high_low"
+	if intrabar:
+		if high is None or low is None:
+			raise ValueError("The high_low exit model needs high and low arrays")
+		high = np.asarray(high, dtype=np.float64)
+		low = np.asarray(low, dtype=np.float64)
+	direction = setups.direction
+	grade = setups.grade
+	entries = np.flatnonzero((grade >= cfg.min_grade) & (direction != 0))
+	trades: List[SimTrade] = []
+
+	i = cfg.warmup_bars
+	while True:
+		k = int(np.searchsorted(entries, i))
+		if k >= entries.shape[0]:
+			break
+		j = int(entries[k])
+		side = int(direction[j])
+		entry = float(close[j])
+		end = min(j + cfg.max_bars, n - 1)
+
+		seg = slice(j + 1, end + 1)
+		if intrabar:
+			tp_price = entry * (1.0 + cfg.take_profit * side)
+			sl_price = entry * (1.0 - cfg.stop_loss * side)
+			if side == 1:
+				tp = high[seg] >= tp_price
+				sl = low[seg] <= sl_price
+			else:
+				tp = low[seg] <= tp_price
+				sl = high[seg] >= sl_price
+		else:
+			move = (close[seg] / entry - 1.0) * side
+			tp = move >= cfg.take_profit
+			sl = move <= -cfg.stop_loss
+		flip = direction[seg] == -side
+		weak = grade[seg] < cfg.min_grade
+		hit = np.flatnonzero(tp | sl | flip | weak)
+
+		ambiguous = refined = False
+		if hit.size:
+			h = int(hit[0])
+			x = j + 1 + h
+			if tp[h] and sl[h] and intrabar:
+				ambiguous = True
+				reason = refiner(x, side, tp_price, sl_price) if refiner is not None else None
+				refined = reason is not None
+				reason = reason or cfg.tie_break
+			else:
+				reason = "take_profit" if tp[h] else "stop_loss" if sl[h] else "signal_flip" if flip[h] else "grade_drop"
+		elif end == j + cfg.max_bars:
+			x, reason = end, "max_bars"
+		else:
+			x, reason = n - 1, "end_of_data"
+
+		if intrabar and reason in ("take_profit", "stop_loss"):
+			exit_price = tp_price if reason == "take_profit" else sl_price
+		else:
+			exit_price = float(close[x])
+		trades.append(SimTrade(side, j, x, entry, exit_price, (exit_price / entry - 1.0) * side, reason, ambiguous, refined))
+		if reason == "end_of_data":
+			break
+		i = x + 1  # no re-entry on the exit bar
+	return trades
+
+
+def summarize(trades: List[SimTrade]) -> Dict[str, Any]:
+	"""
+	Stats of compounding every trade at full equity (the single-symbol
+	backtest's model).
+	"""
+	equity = 1.0
+	peak = 1.0
+	max_dd = 0.0
+	gross_profit = 0.0
+	gross_loss = 0.0
+	wins = 0
+	for t in trades:
+		equity *= (1.0 + t.ret)
+		peak = max(peak, equity)
+		max_dd = max(max_dd, (peak - equity) / peak if peak > 0 else 0)
+		if t.ret >= 0:
+			gross_profit += t.ret
+		else:
+			gross_loss += abs(t.ret)
+		if round(t.ret * 100, 2) > 0:
+			wins += 1
+	num_trades = len(trades)
+	profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float("inf") if gross_profit > 0 else 0.0
+	return {
+		"trades": num_trades,
+		"wins": wins,
+		"losses": num_trades - wins,
+		"win_rate": round((wins / num_trades * 100) if num_trades else 0.0, 2),
+		"pl_pct": round((equity - 1.0) * 100, 2),
+		"profit_factor": None if math.isinf(profit_factor) else round(profit_factor, 2),
+		"max_drawdown_pct": round(max_dd * 100, 2),
+	}
+
+
+# Portfolio
+
+@dataclass
+class PortfolioConfig:
+	position_size: float = 0.1  # fraction of equity committed to each new position
+	max_positions: int = 5
+	backtest: BacktestConfig = field(default_factory=BacktestConfig)
+	refine_1m: bool = False  # resolve TP/SL ties from stored 1m candles (high_low model)
+	strategy: StrategySpec = DEFAULT_STRATEGY  # setup scoring; exits come from `backtest`
+
+	def __post_init__(self) -> None:
+		# Every open position holds `position_size` of equity, so a full book
+		# must fit in the account: no leverage.
+		if self.position_size <= 0 or self.max_positions < 1:
+			raise ValueError("position_size must be positive and max_positions at least 1")
+		if self.position_size * self.max_positions > 1.0 + 1e-9:
+			raise ValueError(
+				f"position_size x max_positions commits {self.position_size * self.max_positions:.0%} of equity; "
+				"at most 100% can be open at once"
+			)
+
+
+def _simulate_symbol(payload: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Setups + trades for one symbol. Top-level so it pickles into worker processes.
+	"""
+	started = time.perf_counter()
+	a = payload["arrays"]
+	setups = setup_series_arrays(
+		a["ts5"], a["open"], a["high"], a["low"], a["close"], a["volume"], a["ts15"], a["close15"], payload["strategy"],
+	)
+	refiner = SubBarRefiner(a["ts5"], a["ts1"], a["high1"], a["low1"]) if "ts1" in a else None
+	trades = simulate(a["close"], setups, payload["config"], high=a["high"], low=a["low"], refiner=refiner)
+	return {
+		"symbol": payload["symbol"],
+		"bars": int(a["ts5"].shape[0]),
+		"trades": trade_records(trades, a["ts5"]),
+		"stats": summarize(trades),
+		"elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+	}
+
+
+def merge_portfolio(results: List[Dict[str, Any]], cfg: PortfolioConfig) -> Dict[str, Any]:
+	"""
+	Replay every symbol's trades in time order against one account: each
+	new position commits `position_size` of current equity, and entries are
+	skipped while `max_positions` are open (exits free capacity before
+	entries at the same timestamp). Symbols are simulated independently, so
+	a skipped trade does not let that symbol take a different one instead.
+	"""
+	EXIT, ENTRY = 0, 1
+	records = np.concatenate([r["trades"] for r in results]) if results else np.empty(0, dtype=TRADE_DTYPE)
+	owner = np.repeat(np.arange(len(results)), [r["trades"].shape[0] for r in results])
+	realized = records["exit_ts"] != records["entry_ts"]  # opened on the last bar, nothing realized
+	records, owner = records[realized], owner[realized]
+	m = records.shape[0]
+	# Events ordered by (timestamp, exits first, trade)
+	event_ts = np.concatenate([records["entry_ts"], records["exit_ts"]])
+	event_kind = np.repeat(np.array([ENTRY, EXIT]), m)
+	event_trade = np.tile(np.arange(m), 2)
+	order = np.lexsort((event_trade, event_kind, event_ts))
+	events = zip(event_ts[order].tolist(), event_kind[order].tolist(), event_trade[order].tolist())
+	trades = records.tolist()
+	symbols = [results[i]["symbol"] for i in owner.tolist()]
+
+	equity = 1.0
+	open_alloc: Dict[int, float] = {}
+	curve: List[Tuple[int, float]] = []
+	taken: List[Dict[str, Any]] = []
+	skipped = 0
+	max_open = 0
+	gross_profit = 0.0
+	gross_loss = 0.0
+	for ts, kind, k in events:
+		if kind == ENTRY:
+			if len(open_alloc) >= cfg.max_positions:
+				skipped += 1
+				continue
+			open_alloc[k] = equity * cfg.position_size
+			max_open = max(max_open, len(open_alloc))
+			continue
+		alloc = open_alloc.pop(k, None)
+		if alloc is None:
+			continue
+		entry_ts, exit_ts, side, entry, exit_price, ret, reason = trades[k]
+		pnl = alloc * ret
+		equity += pnl
+		if pnl >= 0:
+			gross_profit += pnl
+		else:
+			gross_loss += -pnl
+		curve.append((exit_ts, equity))
+		taken.append({
+			"symbol": symbols[k],
+			"side": SIDE_LABELS[side],
+			"entry_ts": entry_ts,
+			"exit_ts": exit_ts,
+			"entry": entry,
+			"exit": exit_price,
+			"pl_pct": round(ret * 100, 2),
+			"equity_pl_pct": round(pnl / (equity - pnl) * 100, 4) if equity != pnl else 0.0,
+			"exit_reason": EXIT_REASONS[reason],
+		})
+
+	peak = 1.0
+	max_dd = 0.0
+	for _, v in curve:
+		peak = max(peak, v)
+		max_dd = max(max_dd, (peak - v) / peak if peak > 0 else 0)
+	wins = sum(1 for t in taken if t["pl_pct"] > 0)
+	profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float("inf") if gross_profit > 0 else 0.0
+	return {
+		"stats": {
+			"trades": len(taken),
+			"skipped_max_positions": skipped,
+			"max_concurrent_positions": max_open,
+			"wins": wins,
+			"losses": len(taken) - wins,
+			"win_rate": round(wins / len(taken) * 100, 2) if taken else 0.0,
+			"pl_pct": round((equity - 1.0) * 100, 2),
+			"profit_factor": None if math.isinf(profit_factor) else round(profit_factor, 2),
+			"max_drawdown_pct": round(max_dd * 100, 2),
+		},
+		"equity_curve": [{"t": t, "equity": round(v, 6)} for t, v in curve],
+		"trades": taken,
+	}
+
+
+def run_portfolio_backtest(
+	db: Session,
+	symbols: List[str],
+	days: int = 30,
+	cfg: Optional[PortfolioConfig] = None,
+	fetch_missing: bool = True,
+	workers: Optional[int] = None,
+) -> Dict[str, Any]:
+	"""
+	Fusion backtest over a universe of symbols from stored candles: per-symbol
+	simulations run in a process pool, then merge into one portfolio.
+	"""
+	cfg = cfg or PortfolioConfig()
+	wall_start = time.perf_counter()
+	now_ms = int(datetime.now(tz=timezone.utc).timestamp() * 1000)
+	start_5m = int((datetime.now(tz=timezone.utc) - timedelta(days=days)).timestamp() * 1000) - cfg.backtest.warmup_bars * timeframe_ms("5m")
+	start_15m = start_5m - 200 * timeframe_ms("15m")
+
+	refine = cfg.refine_1m and cfg.backtest.exit_model == "high_low"
+	t0 = time.perf_counter()
+	payloads: List[Dict[str, Any]] = []
+	missing: List[str] = []
+	for symbol in symbols:
+		if fetch_missing:
+			backfill(db, symbol, "5m", start_5m, now_ms)
+			backfill(db, symbol, "15m", start_15m, now_ms)
+		df5 = load_frame(db, symbol, "5m", start_5m)
+		df15 = load_frame(db, symbol, "15m", start_15m)
+		if len(df5) <= cfg.backtest.warmup_bars:
+			missing.append(symbol)
+			continue
+		arrays = {
+			"ts5": df5["timestamp"].to_numpy(dtype=np.int64),
+			"open": df5["open"].to_numpy(dtype=float),
+			"high": df5["high"].to_numpy(dtype=float),
+			"low": df5["low"].to_numpy(dtype=float),
+			"close": df5["close"].to_numpy(dtype=float),
+			"volume": df5["volume"].to_numpy(dtype=float),
+			"ts15": df15["timestamp"].to_numpy(dtype=np.int64),
+			"close15": df15["close"].to_numpy(dtype=float),
+		}
+		if refine:
+			if fetch_missing:
+				backfill(db, symbol, "1m", start_5m, now_ms)
+			df1 = load_frame(db, symbol, "1m", start_5m)
+			arrays.update(
+				ts1=df1["timestamp"].to_numpy(dtype=np.int64),
+				high1=df1["high"].to_numpy(dtype=float),
+				low1=df1["low"].to_numpy(dtype=float),
+			)
+		payloads.append({"symbol": symbol.upper(), "config": cfg.backtest, "strategy": cfg.strategy, "arrays": arrays})
+	load_ms = (time.perf_counter() - t0) * 1000.0
+	if not payloads:
+		raise ValueError(f"Not enough stored candles for any of: {', '.join(symbols)}")
+
+	t0 = time.perf_counter()
+	workers = workers if workers is not None else (get_settings().backtest_workers or os.cpu_count() or 1)
+	workers = max(1, min(workers, len(payloads)))
+	if workers == 1:
+		results = [_simulate_symbol(p) for p in payloads]
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = list(pool.map(_simulate_symbol, payloads))
+	simulate_ms = (time.perf_counter() - t0) * 1000.0
+
+	t0 = time.perf_counter()
+	portfolio = merge_portfolio(results, cfg)
+	merge_ms = (time.perf_counter() - t0) * 1000.0
+
+	symbol_bars = sum(r["bars"] for r in results)
+	wall_ms = (time.perf_counter() - wall_start) * 1000.0
+	return {
+		"symbols": [r["symbol"] for r in results],
+		"skipped_symbols": missing,
+		"config": {
+			"days": days,
+			"strategy": cfg.strategy.name,
+			"position_size": cfg.position_size,
+			"max_positions": cfg.max_positions,
+			"take_profit": cfg.backtest.take_profit,
+			"stop_loss": cfg.backtest.stop_loss,
+			"max_bars": cfg.backtest.max_bars,
+			"exit_model": cfg.backtest.exit_model,
+			"tie_break": cfg.backtest.tie_break,
+			"refine_1m": refine,
+		},
+		**portfolio,
+		"per_symbol": {r["symbol"]: {**r["stats"], "bars": r["bars"]} for r in results},
+		"timing": {
+			"load_ms": round(load_ms, 2),
+			"simulate_ms": round(simulate_ms, 2),
+			"merge_ms": round(merge_ms, 2),
+			"wall_ms": round(wall_ms, 2),
+			"per_symbol_ms": {r["symbol"]: r["elapsed_ms"] for r in results},
+			"workers": workers,
+			"symbol_bars": symbol_bars,
+			"symbol_bars_per_second": round(symbol_bars / (simulate_ms / 1000.0)) if simulate_ms > 0 else None,
+		},
+	}
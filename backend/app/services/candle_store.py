@@ -0,0 +1,153 @@
+from typing import List, Optional, Sequence
+import logging
+import time
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.lazy import lazy_import
+from ..models.candles import Candle
+from .market_data import get_market_data
+
+ccxt = lazy_import("ccxt")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def timeframe_ms(timeframe: str) -> int:
+	return int(ccxt.Exchange.parse_timeframe(timeframe) * 1000)
+
+
+def closed_rows(rows: Sequence[Sequence[float]], timeframe: str, now_ms: int) -> Sequence[Sequence[float]]:
+	"""
+	`rows` (sorted OHLCV rows or an array of them) without trailing bars that
+	have not closed by `now_ms`: exchanges return the bar still forming last.
+	"""
+	step = timeframe_ms(timeframe)
+	end = len(rows)
+	while end and int(rows[end - 1][0]) + step > now_ms:
+		end -= 1
+	return rows[:end]
+
+
+def store_rows(db: Session, symbol: str, timeframe: str, rows: List[List[float]], exchange: Optional[str] = None) -> int:
+	"""
+	Insert OHLCV rows, skipping candles already stored except the newest
+	one, which is overwritten: a store written while that bar was still
+	forming heals on the next backfill. Returns rows inserted.
+	"""
+	if not rows:
+		return 0
+	symbol = symbol.upper()
+	ts_values = [int(r[0]) for r in rows]
+	newest = db.query(func.max(Candle.ts)).filter(Candle.symbol == symbol, Candle.timeframe == timeframe).scalar()
+	existing = {
+		ts for (ts,) in db.query(Candle.ts).filter(
+			Candle.symbol == symbol,
+			Candle.timeframe == timeframe,
+			Candle.ts >= min(ts_values),
+			Candle.ts <= max(ts_values),
+		)
+	}
+	new_rows = []
+	replaced = False
+	for r in rows:
+		ts = int(r[0])
+		values = {
+			"open": float(r[1]),
+			"high": float(r[2]),
+			"low": float(r[3]),
+			"close": float(r[4]),
+			"volume": float(r[5]) if len(r) > 5 and r[5] is not None else 0.0,
+			"exchange": exchange,
+		}
+		if ts == newest and not replaced:
+			db.query(Candle).filter(
+				Candle.symbol == symbol, Candle.timeframe == timeframe, Candle.ts == ts,
+			).update(values, synchronize_session=False)
+			replaced = True
+			continue
+		if ts in existing:
+			continue
+		existing.add(ts)
+		new_rows.append({"symbol": symbol, "timeframe": timeframe, "ts": ts, **values})
+	if new_rows:
+		db.bulk_insert_mappings(Candle, new_rows)
+	if new_rows or replaced:
+		db.commit()
+	return len(new_rows)
+
+
+def backfill(
+	db: Session,
+	symbol: str,
+	timeframe: str,
+	since_ms: int,
+	until_ms: Optional[int] = None,
+	page_limit: int = 300,
+) -> int:
+	"""
+	Page candles from the exchanges into the store for the parts of
+	[since_ms, until_ms) not covered yet: before the earliest stored candle
+	of the range and from the latest one on (refetched, in case it was
+	stored before it closed). An empty page (an exchange gap) skips ahead a
+	page instead of ending the backfill.
+
+	Only closed candles are stored: `until_ms` is clamped so a bar must have
+	closed (ts + step <= now), and the exchange's forming bar never reaches
+	the store.
+	"""
+	step = timeframe_ms(timeframe)
+	closed_end = int(time.time() * 1000) - step + 1
+	until_ms = min(until_ms or closed_end, closed_end)
+	earliest, latest = db.query(func.min(Candle.ts), func.max(Candle.ts)).filter(
+		Candle.symbol == symbol.upper(),
+		Candle.timeframe == timeframe,
+		Candle.ts >= since_ms,
+		Candle.ts < until_ms,
+	).one()
+	if earliest is None:
+		missing = [(since_ms, until_ms)]
+	else:
+		missing = [(since_ms, earliest), (latest, until_ms)]
+
+	inserted = 0
+	for cursor, end in missing:
+		while cursor < end:
+			page = get_market_data().fetch_candles(symbol, {timeframe: page_limit}, since=cursor)
+			rows = [r for r in page.timeframes[timeframe] if cursor <= int(r[0]) < end]
+			if not rows:
+				cursor += page_limit * step
+				continue
+			inserted += store_rows(db, symbol, timeframe, rows, exchange=page.exchange)
+			cursor = int(rows[-1][0]) + step
+	logger.info(
+		"Candle store: backfill complete",
+		extra={"symbol": symbol, "timeframe": timeframe, "inserted": inserted},
+	)
+	return inserted
+
+
+def load_frame(
+	db: Session,
+	symbol: str,
+	timeframe: str,
+	start_ms: Optional[int] = None,
+	end_ms: Optional[int] = None,
+) -> "pd.DataFrame":
+	"""
+	Stored candles as a DataFrame with the same columns the endpoints build
+	from `fetch_ohlcv`, sorted by timestamp.
+	"""
+	q = db.query(Candle.ts, Candle.open, Candle.high, Candle.low, Candle.close, Candle.volume).filter(
+		Candle.symbol == symbol.upper(),
+		Candle.timeframe == timeframe,
+	)
+	if start_ms is not None:
+		q = q.filter(Candle.ts >= start_ms)
+	if end_ms is not None:
+		q = q.filter(Candle.ts < end_ms)
+	return pd.DataFrame(q.order_by(Candle.ts.asc()).all(), columns=OHLCV_COLUMNS)
@@ -0,0 +1,135 @@
+"""
+Forward-test replay: the live run/trade state machine driven over stored
+candles with a simulated clock.
+
+Each 5m candle is processed when the simulated clock reaches its close, with
+the signal computed by `get_signals` on the candles available at that moment
+(5m bars up to and including the candle, 15m bars already closed). Candle
+loads are served through the same snapshot hook capture replays use, so no
+exchange is touched once history is stored. Runs and trades go to the
+`replay_runs`/`replay_trades` tables.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..core import metrics, profiling
+from ..core.strategy import DEFAULT_STRATEGY
+from ..models.forward_replay import ReplayRun, ReplayTrade
+from ..api.v1.endpoints.signals import get_signals  # type: ignore
+from .candle_store import backfill, load_frame, timeframe_ms
+from .forward_test import Candle, finish_run, process_candle
+from .strategies import get_strategy
+
+logger = logging.getLogger(__name__)
+
+# Candle windows requested per signal, as in live forward testing
+SIGNAL_LIMIT_5M = 600
+SIGNAL_LIMIT_15M = max(200, SIGNAL_LIMIT_5M // 3)
+
+
+def _rows(df) -> List[List[float]]:
+	rows = df.to_numpy(dtype=float).tolist()
+	for r in rows:
+		r[0] = int(r[0])
+	return rows
+
+
+def load_history(
+	db: Session,
+	symbol: str,
+	start_ms: int,
+	end_ms: int,
+	fetch_missing: bool = True,
+) -> Tuple[List[List[float]], List[List[float]]]:
+	"""
+	Stored 5m/15m rows covering the replay window plus the signal look-back.
+	"""
+	start_5m = start_ms - SIGNAL_LIMIT_5M * timeframe_ms("5m")
+	start_15m = start_ms - (SIGNAL_LIMIT_15M + 1) * timeframe_ms("15m")
+	if fetch_missing:
+		backfill(db, symbol, "5m", start_5m, end_ms)
+		backfill(db, symbol, "15m", start_15m, end_ms)
+	return (
+		_rows(load_frame(db, symbol, "5m", start_5m, end_ms)),
+		_rows(load_frame(db, symbol, "15m", start_15m, end_ms)),
+	)
+
+
+def replay_run(
+	db: Session,
+	symbol: str,
+	start: datetime,
+	days: float = 5.0,
+	fetch_missing: bool = True,
+	strategy: str = DEFAULT_STRATEGY.name,
+) -> Tuple[ReplayRun, Dict[str, Any]]:
+	"""
+	Replay a forward-test run of `days` starting at `start` (simulated time)
+	trading `strategy`. Returns the finished run and timing.
+	"""
+	spec = get_strategy(strategy, db)
+	end = start + timedelta(days=days)
+	start_ms = int(start.timestamp() * 1000)
+	end_ms = int(end.timestamp() * 1000)
+	bar_5m = timeframe_ms("5m")
+	bar_15m = timeframe_ms("15m")
+
+	t0 = time.perf_counter()
+	rows5, rows15 = load_history(db, symbol, start_ms, end_ms, fetch_missing)
+	load_ms = (time.perf_counter() - t0) * 1000.0
+
+	ts5 = np.array([r[0] for r in rows5], dtype=np.int64)
+	ts15 = np.array([r[0] for r in rows15], dtype=np.int64)
+	# Candles whose close falls inside the window
+	first = int(np.searchsorted(ts5, start_ms - bar_5m, side="left"))
+	last = int(np.searchsorted(ts5, end_ms - bar_5m, side="right"))
+	if first >= last:
+		raise ValueError(f"No stored 5m candles for {symbol} between {start.isoformat()} and {end.isoformat()}")
+
+	run = ReplayRun(symbol=symbol, strategy=spec.name, start_time=start, end_time=end, is_active=True, last_candle_ts=None)
+	db.add(run)
+	db.commit()
+	db.refresh(run)
+
+	t0 = time.perf_counter()
+	open_trade: Optional[ReplayTrade] = None
+	with metrics.scope("forward_test.replay"):
+		for i in range(first, last):
+			row = rows5[i]
+			now_ms = row[0] + bar_5m  # simulated clock: the candle just closed
+			n15 = int(np.searchsorted(ts15, now_ms - bar_15m, side="right"))
+			snapshot = {
+				"symbol": symbol,
+				"exchange": "replay",
+				"normalized_symbol": symbol,
+				"timeframes": {
+					"5m": rows5[max(0, i + 1 - SIGNAL_LIMIT_5M): i + 1],
+					"15m": rows15[max(0, n15 - SIGNAL_LIMIT_15M): n15],
+				},
+			}
+			with metrics.span("signals"), profiling.replaying([snapshot]):
+				signal = get_signals(symbol=symbol, limit=SIGNAL_LIMIT_5M, learner="heuristic", strategy=spec.name)  # type: ignore
+			open_trade = process_candle(db, run, Candle.from_row(row), signal.get("action", "hold"), open_trade, ReplayTrade, spec)
+
+		run.candles_processed = last - first
+		run.elapsed_ms = (time.perf_counter() - t0) * 1000.0
+		with metrics.span("db_commit"):
+			finish_run(db, run, rows5[last - 1][4], open_trade, ReplayTrade)
+	db.refresh(run)
+
+	simulated_s = (last - first) * bar_5m / 1000.0
+	timing = {
+		"load_ms": round(load_ms, 2),
+		"replay_ms": round(run.elapsed_ms, 2),
+		"candles": run.candles_processed,
+		"candles_per_second": round(run.candles_processed / (run.elapsed_ms / 1000.0), 1) if run.elapsed_ms else None,
+		"speedup_vs_realtime": round(simulated_s / (run.elapsed_ms / 1000.0)) if run.elapsed_ms else None,
+	}
+	logger.info("Forward-test replay finished", extra={"run_id": run.id, "symbol": symbol, **timing})
+	return run, timing
@@ -1,18 +1,64 @@
+from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Sequence, Tuple, Type
+import json
 
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 
+from ..core import metrics
+from ..core.strategy import DEFAULT_STRATEGY, StrategySpec
 from ..models.forward_test import ForwardTestRun, ForwardTestTrade
-from ..api.v1.endpoints.ohlcv import get_ohlcv  # type: ignore
-from ..api.v1.endpoints.signals import get_signals  # type: ignore
+from ..api.v1.endpoints.signals import candle_limits, strategy_signals  # type: ignore
+from .learning_model import refresh_model
+from .live_candles import get_live_candles
+from .score_history import record_points, signal_point
+from .strategies import get_strategy
 
+SIGNAL_LIMIT = 600  # 5m candles behind each signal
+STEP_CANDLES = 500  # latest 5m candles scanned for ones a run has not processed
 
-def start_test_run(db: Session, symbol: str) -> ForwardTestRun:
+
+@dataclass(slots=True)
+class Candle:
+	"""
+	One closed candle as the forward-test state machine reads it.
+	"""
+	t: int  # open time, epoch ms
+	o: float
+	h: float
+	l: float
+	c: float
+	v: float
+
+	@classmethod
+	def from_row(cls, row: Sequence[float]) -> "Candle":
+		"""
+		From an OHLCV row of Python floats (e.g. `ndarray.tolist()`).
+		"""
+		return cls(int(row[0]), row[1], row[2], row[3], row[4], row[5])
+
+
+def start_test_run(
+	db: Session,
+	symbol: str,
+	strategy: str = DEFAULT_STRATEGY.name,
+	params: Optional[Dict[str, Any]] = None,
+) -> ForwardTestRun:
+	"""
+	Start a 5-day run trading `strategy`, optionally with its own parameter
+	overrides; raises UnknownStrategy for a name with no definition and
+	ValueError for bad parameters.
+	"""
+	base = get_strategy(strategy, db)
+	if params:
+		StrategySpec.from_dict({**base.overrides(), **params}, name=base.name)
 	now = datetime.now(tz=timezone.utc)
 	end_time = now + timedelta(days=5)
 	run = ForwardTestRun(
 		symbol=symbol,
+		strategy=strategy,
+		strategy_params_json=json.dumps(params) if params else None,
 		start_time=now,
 		end_time=end_time,
 		is_active=True,
@@ -25,17 +71,33 @@ def start_test_run(db: Session, symbol: str) -> ForwardTestRun:
 	return run
 
 
-def _get_open_trade(db: Session, run_id: int) -> Optional[ForwardTestTrade]:
-	return db.query(ForwardTestTrade).filter(
-		ForwardTestTrade.test_run_id == run_id,
+def run_strategy(run: ForwardTestRun, db: Optional[Session] = None) -> StrategySpec:
+	"""
+	The run's strategy with its own parameter overrides applied.
+	"""
+	spec = get_strategy(run.strategy, db)
+	if run.strategy_params_json:
+		spec = StrategySpec.from_dict({**spec.overrides(), **json.loads(run.strategy_params_json)}, name=spec.name)
+	return spec
+
+
+def _get_open_trades(db: Session, run_ids: Sequence[int]) -> Dict[int, ForwardTestTrade]:
+	"""
+	The latest open trade of each run, in one query.
+	"""
+	trades: Dict[int, ForwardTestTrade] = {}
+	for trade in db.query(ForwardTestTrade).filter(
+		ForwardTestTrade.test_run_id.in_(list(run_ids)),
 		ForwardTestTrade.exit_price.is_(None),
-	).order_by(ForwardTestTrade.id.desc()).first()
+	).order_by(ForwardTestTrade.id.desc()):
+		trades.setdefault(trade.test_run_id, trade)
+	return trades
 
 
-def _compute_stats(db: Session, run: ForwardTestRun) -> Dict[str, Any]:
-	trades: List[ForwardTestTrade] = db.query(ForwardTestTrade).filter(
-		ForwardTestTrade.test_run_id == run.id
-	).order_by(ForwardTestTrade.id.asc()).all()
+def _compute_stats(db: Session, run: ForwardTestRun, trade_model: Type = ForwardTestTrade) -> Dict[str, Any]:
+	trades: List[ForwardTestTrade] = db.query(trade_model).filter(
+		trade_model.test_run_id == run.id
+	).order_by(trade_model.id.asc()).all()
 	if not trades:
 		return {
 			"trades": 0,
@@ -92,143 +154,268 @@ def _compute_stats(db: Session, run: ForwardTestRun) -> Dict[str, Any]:
 	}
 
 
+def list_runs(
+	db: Session,
+	symbol: Optional[str] = None,
+	active: Optional[bool] = None,
+	before_id: Optional[int] = None,
+	limit: int = 50,
+) -> Tuple[List[ForwardTestRun], Optional[int]]:
+	"""
+	Runs newest first, `limit` at a time, and the cursor of the next page
+	(None on the last). Pages are keyed on the run id, so a page costs the
+	same however deep it is and runs started meanwhile do not shift it.
+	"""
+	q = db.query(ForwardTestRun)
+	if symbol:
+		q = q.filter(ForwardTestRun.symbol == symbol)
+	if active is not None:
+		q = q.filter(ForwardTestRun.is_active.is_(active))
+	if before_id is not None:
+		q = q.filter(ForwardTestRun.id < before_id)
+	runs = q.order_by(ForwardTestRun.id.desc()).limit(limit + 1).all()
+	if len(runs) > limit:
+		return runs[:limit], runs[limit - 1].id
+	return runs, None
+
+
+def run_trade_stats(db: Session, run_ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+	"""
+	Trade counts, win rate and P/L of each run, aggregated in the database
+	in one grouped query. Counts follow `_compute_stats`: a closed trade
+	with P/L >= 0 is a win. `pl_sum_pct` adds the trades' P/L; the
+	compounded figure is in a finished run's summary.
+	"""
+	t = ForwardTestTrade
+	pl = t.profit_loss
+	rows = db.query(
+		t.test_run_id,
+		func.count(pl),
+		func.sum(case((t.exit_price.is_(None), 1), else_=0)),
+		func.sum(case((pl >= 0, 1), else_=0)),
+		func.sum(pl),
+		func.sum(case((pl > 0, pl), else_=0.0)),
+		func.sum(case((pl < 0, -pl), else_=0.0)),
+		func.max(t.candle_time),
+	).filter(t.test_run_id.in_(list(run_ids))).group_by(t.test_run_id).all()
+
+	stats: Dict[int, Dict[str, Any]] = {}
+	for run_id, closed, open_, wins, pl_sum, gross_profit, gross_loss, last_trade in rows:
+		stats[run_id] = {
+			"trades": closed,
+			"open_trades": int(open_ or 0),
+			"wins": int(wins or 0),
+			"losses": closed - int(wins or 0),
+			"win_rate": round(wins / closed * 100.0, 2) if closed else 0.0,
+			"pl_sum_pct": round(pl_sum or 0.0, 2),
+			"profit_factor": round(gross_profit / gross_loss, 2) if gross_loss else (None if gross_profit else 0.0),
+			"last_trade_time": last_trade,
+		}
+	return stats
+
+
+def open_pl(db: Session, run_ids: Sequence[int], marks: Dict[str, float]) -> Dict[int, float]:
+	"""
+	Unrealized P/L (percent) of each run's open trade at `marks[symbol]`.
+	"""
+	out: Dict[int, float] = {}
+	for run_id, trade in _get_open_trades(db, run_ids).items():
+		mark = marks.get(trade.symbol)
+		if mark is not None:
+			out[run_id] = round((mark / trade.entry_price - 1.0) * (100 if trade.direction == "long" else -100), 4)
+	return out
+
+
 def step_run(run: ForwardTestRun, db: Session) -> None:
 	"""
 	Process new closed 5m candles for a run using strictly forward-looking logic.
 	"""
-	if not run.is_active or run.end_time is None:
-		return
+	with metrics.scope("forward_test.step_run"):
+		_step_symbol(db, run.symbol, [run])
 
-	now = datetime.now(tz=timezone.utc)
 
-	# Pull OHLCV via existing endpoint logic (Coinbase, normalized) without HTTP
-	ohlcv = get_ohlcv(symbol=run.symbol, limit=500)  # type: ignore
-	candles_5m = ohlcv["timeframes"]["5m"]
+def step_symbol(db: Session, symbol: str, runs: Sequence[ForwardTestRun]) -> None:
+	"""
+	`step_run` for every run on `symbol` at once: candles are fetched and
+	signals computed once for all the runs' strategies (`strategy_signals`
+	shares indicators and applies each strategy's thresholds), then each run
+	trades its own action and TP/SL.
+	"""
+	with metrics.scope("forward_test.step_symbol"):
+		_step_symbol(db, symbol, runs)
 
-	if not candles_5m:
-		return
 
-	# Only process candles that are fully closed and newer than last_candle_ts
-	last_ts = run.last_candle_ts or 0
-	closed_cutoff_ms = int((now - timedelta(minutes=5)).timestamp() * 1000)
-	new_candles = [c for c in candles_5m if c["t"] > last_ts and c["t"] <= closed_cutoff_ms]
-	new_candles.sort(key=lambda c: c["t"])
+def _close_trade(trade: ForwardTestTrade, exit_price: float, exit_reason: str) -> None:
+	trade.exit_price = exit_price
+	trade.exit_reason = exit_reason
+	# Compute R multiple and P/L %
+	if trade.direction == "long":
+		risk = trade.entry_price - trade.stop_loss
+		r = (exit_price - trade.entry_price) / risk if risk else 0.0
+	else:
+		risk = trade.stop_loss - trade.entry_price
+		r = (trade.entry_price - exit_price) / risk if risk else 0.0
+	trade.r_multiple = float(r)
+	trade.profit_loss = float((exit_price / trade.entry_price - 1.0) * (100 if trade.direction == "long" else -100))
+	trade.drawdown = None  # detailed per-trade DD optional; summary DD computed separately
+
+
+def process_candle(
+	db: Session,
+	run: ForwardTestRun,
+	candle: Candle,
+	action: str,
+	open_trade: Optional[ForwardTestTrade],
+	trade_model: Type = ForwardTestTrade,
+	strategy: Optional[StrategySpec] = None,
+) -> Optional[ForwardTestTrade]:
+	"""
+	Advance a run's position by one closed 5m candle given the signal action
+	at that candle. Exits on SL/TP touched by the candle's range (SL first),
+	then on a signal flip at the close; enters on buy/sell when flat (not on
+	the candle that closed a position, as the backtest does), with TP/SL
+	from `strategy`. Adds changes to the session without committing and
+	returns the trade left open, if any.
+	"""
+	ts_ms = candle.t
+	close = candle.c
+	high = candle.h
+	low = candle.l
+
+	# Manage open position first
+	if open_trade:
+		exit_price: Optional[float] = None
+		exit_reason: Optional[str] = None
+
+		if open_trade.direction == "long":
+			if low <= open_trade.stop_loss:
+				exit_price = open_trade.stop_loss
+				exit_reason = "stop_loss"
+			elif high >= open_trade.take_profit:
+				exit_price = open_trade.take_profit
+				exit_reason = "take_profit"
+		elif open_trade.direction == "short":
+			if high >= open_trade.stop_loss:
+				exit_price = open_trade.stop_loss
+				exit_reason = "stop_loss"
+			elif low <= open_trade.take_profit:
+				exit_price = open_trade.take_profit
+				exit_reason = "take_profit"
+
+		# Signal flip exit
+		if exit_price is None and action in ("buy", "sell"):
+			if (open_trade.direction == "long" and action == "sell") or (
+				open_trade.direction == "short" and action == "buy"
+			):
+				exit_price = close
+				exit_reason = "signal_flip"
+
+		if exit_price is not None:
+			_close_trade(open_trade, exit_price, exit_reason)
+			db.add(open_trade)
+			run.last_candle_ts = ts_ms
+			db.add(run)
+			return None
+
+	# Decide on new entry using current action and only if no open trade
+	if not open_trade and action in ("buy", "sell"):
+		direction = "long" if action == "buy" else "short"
+		spec = strategy or DEFAULT_STRATEGY
+		if direction == "long":
+			sl = close * (1.0 - spec.stop_loss)
+			tp = close * (1.0 + spec.take_profit)
+		else:
+			sl = close * (1.0 + spec.stop_loss)
+			tp = close * (1.0 - spec.take_profit)
+		open_trade = trade_model(
+			test_run_id=run.id,
+			symbol=run.symbol,
+			direction=direction,
+			entry_price=close,
+			stop_loss=sl,
+			take_profit=tp,
+			exit_price=None,
+			exit_reason=None,
+			r_multiple=None,
+			profit_loss=None,
+			drawdown=None,
+			candle_time=datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc),
+		)
+		db.add(open_trade)
+
+	# update last processed candle timestamp
+	run.last_candle_ts = ts_ms
+	db.add(run)
+	return open_trade
+
+
+def finish_run(
+	db: Session,
+	run: ForwardTestRun,
+	last_close: float,
+	open_trade: Optional[ForwardTestTrade],
+	trade_model: Type = ForwardTestTrade,
+) -> None:
+	"""
+	End a run: close any open trade at the last known close ("session_end"),
+	store the summary stats and deactivate the run.
+	"""
+	if open_trade:
+		_close_trade(open_trade, float(last_close), "session_end")
+		db.add(open_trade)
+	db.flush()
+	stats = _compute_stats(db, run, trade_model)
+	run.summary_json = json.dumps(stats)
+	run.is_active = False
+	db.add(run)
+	db.commit()
 
-	if not new_candles:
+
+def _step_symbol(db: Session, symbol: str, runs: Sequence[ForwardTestRun]) -> None:
+	runs = [run for run in runs if run.is_active and run.end_time is not None]
+	if not runs:
 		return
 
-	for c in new_candles:
-		ts_ms = int(c["t"])
-		candle_time = datetime.fromtimestamp(ts_ms / 1000, tz=timezone.utc)
-		close = float(c["c"])
-		high = float(c["h"])
-		low = float(c["l"])
+	now = datetime.now(tz=timezone.utc)
 
-		# Compute signal using existing endpoint logic (no HTTP)
-		signal = get_signals(symbol=run.symbol, strategy="fusion", limit=600)  # type: ignore
-		action = signal.get("action", "hold")
+	# Latest candles from the symbol's ring buffers, topped up with the new ones
+	with metrics.span("ohlcv"):
+		candles = get_live_candles().candles(symbol, candle_limits(SIGNAL_LIMIT))
+	rows_5m = candles.timeframes["5m"][-STEP_CANDLES:]
 
-		open_trade = _get_open_trade(db, run.id)
-
-		# Manage open position first
-		if open_trade:
-			exit_price: Optional[float] = None
-			exit_reason: Optional[str] = None
-
-			if open_trade.direction == "long":
-				if low <= open_trade.stop_loss:
-					exit_price = open_trade.stop_loss
-					exit_reason = "stop_loss"
-				elif high >= open_trade.take_profit:
-					exit_price = open_trade.take_profit
-					exit_reason = "take_profit"
-			elif open_trade.direction == "short":
-				if high >= open_trade.stop_loss:
-					exit_price = open_trade.stop_loss
-					exit_reason = "stop_loss"
-				elif low <= open_trade.take_profit:
-					exit_price = open_trade.take_profit
-					exit_reason = "take_profit"
-
-			# Signal flip exit
-			if exit_price is None and action in ("buy", "sell"):
-				if (open_trade.direction == "long" and action == "sell") or (
-					open_trade.direction == "short" and action == "buy"
-				):
-					exit_price = close
-					exit_reason = "signal_flip"
-
-			if exit_price is not None:
-				open_trade.exit_price = exit_price
-				open_trade.exit_reason = exit_reason
-				# Compute R multiple and P/L %
-				if open_trade.direction == "long":
-					risk = open_trade.entry_price - open_trade.stop_loss
-					r = (exit_price - open_trade.entry_price) / risk if risk else 0.0
-				else:
-					risk = open_trade.stop_loss - open_trade.entry_price
-					r = (open_trade.entry_price - exit_price) / risk if risk else 0.0
-				open_trade.r_multiple = float(r)
-				open_trade.profit_loss = float((exit_price / open_trade.entry_price - 1.0) * (100 if open_trade.direction == "long" else -100))
-				open_trade.drawdown = None  # detailed per-trade DD optional; summary DD computed separately
-				db.add(open_trade)
-
-		# Decide on new entry using current action and only if no open trade
-		open_trade = _get_open_trade(db, run.id)
-		if not open_trade and action in ("buy", "sell"):
-			direction = "long" if action == "buy" else "short"
-			if direction == "long":
-				sl = close * 0.99
-				tp = close * 1.02
-			else:
-				sl = close * 1.01
-				tp = close * 0.98
-			new_trade = ForwardTestTrade(
-				test_run_id=run.id,
-				symbol=run.symbol,
-				direction=direction,
-				entry_price=close,
-				stop_loss=sl,
-				take_profit=tp,
-				exit_price=None,
-				exit_reason=None,
-				r_multiple=None,
-				profit_loss=None,
-				drawdown=None,
-				candle_time=candle_time,
-			)
-			db.add(new_trade)
-
-		# update last processed candle timestamp
-		run.last_candle_ts = ts_ms
-		db.add(run)
-		db.commit()
-
-	# finalize run if end time passed
-	if now >= run.end_time:
-		open_trade = _get_open_trade(db, run.id)
-		if open_trade:
-			# close at last known close
-			last_candle = new_candles[-1]
-			exit_price = float(last_candle["c"])
-			open_trade.exit_price = exit_price
-			if open_trade.direction == "long":
-				risk = open_trade.entry_price - open_trade.stop_loss
-				r = (exit_price - open_trade.entry_price) / risk if risk else 0.0
-			else:
-				risk = open_trade.stop_loss - open_trade.entry_price
-				r = (open_trade.entry_price - exit_price) / risk if risk else 0.0
-			open_trade.r_multiple = float(r)
-			open_trade.profit_loss = float(
-				(exit_price / open_trade.entry_price - 1.0) * (100 if open_trade.direction == "long" else -100)
-			)
-			open_trade.exit_reason = "session_end"
-			db.add(open_trade)
+	if not len(rows_5m):
+		return
+
+	# Only process candles that are fully closed and newer than each run's last_candle_ts
+	closed_cutoff_ms = int((now - timedelta(minutes=5)).timestamp() * 1000)
+	closed = rows_5m[rows_5m[:, 0] <= closed_cutoff_ms]
+	pending = [(run, [Candle.from_row(r) for r in closed[closed[:, 0] > (run.last_candle_ts or 0)].tolist()]) for run in runs]
+	pending = [(run, new_candles) for run, new_candles in pending if new_candles]
+	if not pending:
+		return
 
-		stats = _compute_stats(db, run)
-		run.summary_json = __import__("json").dumps(stats)
-		run.is_active = False
-		db.add(run)
-		db.commit()
+	# Fold newly labeled candles into the symbol's model before predicting
+	with metrics.span("learning"):
+		refresh_model(db, symbol, candles)
 
+	# Compute signals using existing endpoint logic (no HTTP), one pass for all strategies
+	specs = [run_strategy(run, db) for run, _ in pending]
+	with metrics.span("signals"):
+		signals = strategy_signals(symbol, specs, limit=SIGNAL_LIMIT, learner="auto", candles=candles)
+	open_trades = _get_open_trades(db, [run.id for run, _ in pending])
 
+	for (run, new_candles), spec, signal in zip(pending, specs, signals):
+		action = signal.get("action", "hold")
+		open_trade = open_trades.get(run.id)
+		for c in new_candles:
+			open_trade = process_candle(db, run, c, action, open_trade, strategy=spec)
+		# One history point per candle: the stock strategy's signal
+		if spec == DEFAULT_STRATEGY:
+			record_points(db, [signal_point(run.symbol, c.t, signal) for c in new_candles])
+		with metrics.span("db_commit"):
+			db.commit()
+
+		# finalize run if end time passed (SQLite hands back naive datetimes)
+		end_time = run.end_time if run.end_time.tzinfo else run.end_time.replace(tzinfo=timezone.utc)
+		if now >= end_time:
+			finish_run(db, run, new_candles[-1].c, open_trade)
@@ -0,0 +1,90 @@
+from typing import Optional
+import logging
+import os
+import socket
+import time
+import uuid
+
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..models.worker_lease import WorkerLease
+
+logger = logging.getLogger(__name__)
+
+
+def _now_ms() -> int:
+	return int(time.time() * 1000)
+
+
+class LeaderLease:
+	"""
+	Leader election through a lease row in the shared database.
+
+	Every process calls `acquire()` periodically; the holder renews its lease,
+	and anyone may take over a lease that has expired (its holder crashed or
+	was scaled down). Acquisition is a single conditional UPDATE, falling back
+	to an INSERT guarded by the primary key, so it is atomic on SQLite and
+	Postgres alike.
+	"""
+
+	def __init__(self, name: str, ttl_seconds: int = 90, owner: Optional[str] = None) -> None:
+		self.name = name
+		self.ttl_ms = ttl_seconds * 1000
+		self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+		self.is_leader = False
+
+	def acquire(self, db: Session) -> bool:
+		"""
+		Take or renew the lease; returns whether this process now holds it.
+		"""
+		now = _now_ms()
+		try:
+			updated = db.query(WorkerLease).filter(
+				WorkerLease.name == self.name,
+				or_(WorkerLease.owner == self.owner, WorkerLease.expires_at_ms < now),
+			).update(
+				{
+					WorkerLease.owner: self.owner,
+					WorkerLease.expires_at_ms: now + self.ttl_ms,
+				},
+				synchronize_session=False,
+			)
+			db.commit()
+			if not updated:
+				db.add(WorkerLease(name=self.name, owner=self.owner, expires_at_ms=now + self.ttl_ms))
+				db.commit()
+			leader = True
+		except IntegrityError:
+			# Row exists and is held by a live owner
+			db.rollback()
+			leader = False
+		except Exception:
+			db.rollback()
+			logger.exception("Leader lease: acquire failed", extra={"lease": self.name})
+			leader = False
+
+		if leader != self.is_leader:
+			logger.info(
+				"Leader lease: acquired" if leader else "Leader lease: lost",
+				extra={"lease": self.name, "owner": self.owner},
+			)
+		self.is_leader = leader
+		return leader
+
+	def release(self, db: Session) -> None:
+		"""
+		Give the lease up early (e.g. on shutdown) so another process can
+		take over without waiting for it to expire.
+		"""
+		try:
+			db.query(WorkerLease).filter(
+				WorkerLease.name == self.name,
+				WorkerLease.owner == self.owner,
+			).update({WorkerLease.expires_at_ms: 0}, synchronize_session=False)
+			db.commit()
+		except Exception:
+			db.rollback()
+			logger.exception("Leader lease: release failed", extra={"lease": self.name})
+		self.is_leader = False
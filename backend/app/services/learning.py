@@ -0,0 +1,399 @@
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
+import json
+import logging
+import os
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..core import kernels
+from ..core.config import get_settings
+from ..core.lazy import lazy_import
+from ..core.market_frame import EMA_COLUMNS, MarketFrame
+from ..core.strategy import DEFAULT_STRATEGY, StrategySpec
+from ..models.learning import LearnedWeightSet
+from .candle_store import backfill, load_frame, timeframe_ms
+
+pd = lazy_import("pandas")
+
+FrameLike = Union["pd.DataFrame", MarketFrame]
+
+logger = logging.getLogger(__name__)
+
+FEATURES = [
+	"trend_up", "trend_down", "confirm_5m",
+	"ema_cross_up", "ema_cross_down",
+	"bos_up", "bos_down",
+	"ignition_up", "ignition_down",
+	"climax", "accumulation", "distribution",
+]
+
+# Bars skipped at the start of a series so EMA200 is warmed up
+WARMUP_BARS = 250
+
+
+def feature_matrix(df5: "FrameLike", df15: "FrameLike", strategy: Optional[StrategySpec] = None) -> np.ndarray:
+	"""
+	Learning features for every 5m bar as an (n_bars, len(FEATURES)) 0/1 matrix.
+
+	Same definitions as the per-bar learner: 15m EMA alignment taken from the
+	last 15m bar opened at or before the 5m bar, 5m alignment, EMA 20/50/200
+	crosses, 20-bar break of structure, climax/ignition from relative volume
+	and accumulation/distribution over the trailing 51 bars (lookbacks and
+	thresholds from `strategy`). Indicator columns are read from the frames
+	as arrays, see `MarketFrame.values`.
+	"""
+	spec = strategy or DEFAULT_STRATEGY
+	f5 = MarketFrame.wrap(df5, "5m")
+	f15 = MarketFrame.wrap(df15, "15m")
+	n = len(f5)
+	X = np.zeros((n, len(FEATURES)), dtype=np.float64)
+	if n == 0:
+		return X
+	col = {f: i for i, f in enumerate(FEATURES)}
+	c = np.asarray(f5.values("close"), dtype=float)
+	ts5 = np.asarray(f5.values("timestamp"), dtype=np.int64)
+
+	e20, e50, e200 = (np.asarray(f5.values(name), dtype=float) for name in EMA_COLUMNS)
+	t5 = kernels.trend_direction(e20, e50, e200)
+	X[:, col["confirm_5m"]] = t5 != 0
+
+	if len(f15):
+		t15_all = kernels.trend_direction(*(np.asarray(f15.values(name), dtype=float) for name in EMA_COLUMNS))
+		idx = np.searchsorted(np.asarray(f15.values("timestamp"), dtype=np.int64), ts5, side="right") - 1
+		t15 = np.where(idx >= 0, t15_all[np.clip(idx, 0, None)], 0)
+		X[:, col["trend_up"]] = t15 == 1
+		X[:, col["trend_down"]] = t15 == -1
+
+	cross_up = np.zeros(n, dtype=bool)
+	cross_down = np.zeros(n, dtype=bool)
+	for fast, slow in ((e20, e50), (e50, e200), (e20, e200)):
+		up, down = kernels.crosses(fast, slow)
+		cross_up |= up
+		cross_down |= down
+	X[:, col["ema_cross_up"]] = cross_up
+	X[:, col["ema_cross_down"]] = cross_down
+
+	with np.errstate(invalid="ignore"):
+		X[:, col["bos_up"]] = c > f5.values(f"swing_high{spec.bos_lookback}")
+		X[:, col["bos_down"]] = c < f5.values(f"swing_low{spec.bos_lookback}")
+
+	rv = f5.values("rv")
+	bp = f5.values("body_pct")
+	d = f5.values("dir")
+	ignition = (rv >= spec.ignition_rv) & (bp >= spec.ignition_body_pct)
+	X[:, col["climax"]] = rv >= spec.climax_rv
+	X[:, col["ignition_up"]] = ignition & (d > 0)
+	X[:, col["ignition_down"]] = ignition & (d < 0)
+
+	active = rv >= spec.flow_rv
+	count = kernels.rolling_sum(active, spec.flow_window + 1)
+	score = kernels.rolling_sum(d * active, spec.flow_window + 1)
+	X[:, col["accumulation"]] = (count >= spec.flow_min_active) & (score > 0)
+	X[:, col["distribution"]] = (count >= spec.flow_min_active) & (score < 0)
+	return X
+
+
+def forward_returns(close: np.ndarray, horizons: List[int]) -> np.ndarray:
+	"""
+	(n_bars, len(horizons)) forward returns; NaN where the horizon runs past the data.
+	"""
+	close = np.asarray(close, dtype=float)
+	n = close.size
+	R = np.full((n, len(horizons)), np.nan)
+	for j, hz in enumerate(horizons):
+		if hz < n:
+			R[: n - hz, j] = close[hz:] / close[: n - hz] - 1.0
+	return R
+
+
+def feature_effectiveness(
+	X: np.ndarray,
+	R: np.ndarray,
+	baseline: Optional[float] = None,
+	min_hits: int = 20,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+	"""
+	Win rate minus baseline per (feature, horizon), all horizons in one pass.
+
+	A "win" is a non-negative forward return. With `baseline=None` the
+	unconditional win rate of the same bars is used instead of a fixed 0.5.
+	Returns (effectiveness, hits, baseline_per_horizon).
+	"""
+	valid = ~np.isnan(R)
+	wins = (R >= 0) & valid
+	hits = X.T @ valid
+	hit_wins = X.T @ wins
+	if baseline is None:
+		base = wins.sum(axis=0) / np.maximum(valid.sum(axis=0), 1)
+	else:
+		base = np.full(R.shape[1], float(baseline))
+	with np.errstate(divide="ignore", invalid="ignore"):
+		eff = np.where(hits > min_hits, hit_wins / hits - base, 0.0)
+	return eff, hits, base
+
+
+def normalized_weights(eff: np.ndarray) -> np.ndarray:
+	"""
+	Scale effectiveness so the strongest feature per horizon is +/-1.
+	"""
+	max_abs = np.abs(eff).max(axis=0)
+	max_abs = np.where(max_abs > 0, max_abs, 1.0)
+	return eff / max_abs
+
+
+def component_weights(w: Dict[str, float], strategy: Optional[StrategySpec] = None, digits: Optional[int] = 1) -> Dict[str, float]:
+	"""
+	Map per-feature weights onto the fusion score components, scaled by the
+	aligned points of `strategy` (rounded to `digits` unless None).
+	"""
+	spec = strategy or DEFAULT_STRATEGY
+	weights = {
+		"trend_base": max(w["trend_up"], w["trend_down"]) * spec.trend_points,
+		"confirm_5m": w["confirm_5m"] * spec.confirm_5m_points,
+		"ema_cross": max(w["ema_cross_up"], w["ema_cross_down"]) * spec.ema_cross_points[0],
+		"bos": max(w["bos_up"], w["bos_down"]) * spec.bos_points[0],
+		"ignition": max(w["ignition_up"], w["ignition_down"]) * spec.ignition_points[0],
+		"climax": w["climax"] * spec.climax_points,
+		"accumulation": w["accumulation"] * spec.flow_points[0],
+		"distribution": w["distribution"] * spec.flow_points[0],
+	}
+	return weights if digits is None else {k: round(v, digits) for k, v in weights.items()}
+
+
+@dataclass
+class WalkForwardConfig:
+	train_bars: int
+	test_bars: int
+	horizons: List[int] = field(default_factory=lambda: [6, 12, 24])
+	step_bars: Optional[int] = None  # defaults to test_bars (non-overlapping test windows)
+	min_hits: int = 20
+
+
+def make_folds(n: int, cfg: WalkForwardConfig) -> List[Tuple[int, int, int]]:
+	"""
+	(train_start, test_start, test_end) index triples sliding forward over n bars.
+	"""
+	step = cfg.step_bars or cfg.test_bars
+	folds: List[Tuple[int, int, int]] = []
+	start = WARMUP_BARS
+	while start + cfg.train_bars + cfg.test_bars <= n:
+		folds.append((start, start + cfg.train_bars, start + cfg.train_bars + cfg.test_bars))
+		start += step
+	return folds
+
+
+def _purge_labels(R: np.ndarray, horizons: List[int]) -> np.ndarray:
+	"""
+	Drop labels whose horizon reaches past the end of the window, so a fold
+	never trains or scores on returns realized in the next window.
+	"""
+	R = R.copy()
+	n = R.shape[0]
+	for j, hz in enumerate(horizons):
+		R[max(0, n - hz):, j] = np.nan
+	return R
+
+
+def _run_fold(payload: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	Train on one window, score the following window. Top-level so it pickles
+	into worker processes.
+	"""
+	started = time.perf_counter()
+	horizons: List[int] = payload["horizons"]
+	R_train = _purge_labels(payload["R_train"], horizons)
+	R_test = _purge_labels(payload["R_test"], horizons)
+	eff, _, base = feature_effectiveness(payload["X_train"], R_train, baseline=None, min_hits=payload["min_hits"])
+	W = normalized_weights(eff)
+	S = payload["X_test"] @ W  # (n_test, n_horizons)
+
+	metrics: Dict[str, Dict[str, Any]] = {}
+	for j, hz in enumerate(horizons):
+		r = R_test[:, j]
+		valid = ~np.isnan(r)
+		signal = valid & (S[:, j] > 0)
+		ic = 0.0
+		if valid.sum() > 2 and np.std(S[valid, j]) > 0 and np.std(r[valid]) > 0:
+			ic = float(np.corrcoef(S[valid, j], r[valid])[0, 1])
+		metrics[str(hz)] = {
+			"train_baseline": float(base[j]),
+			"valid": int(valid.sum()),
+			"valid_wins": int((r[valid] >= 0).sum()),
+			"signals": int(signal.sum()),
+			"signal_wins": int((r[signal] >= 0).sum()),
+			"signal_return_sum": float(r[signal].sum()),
+			"ic": ic,
+		}
+	return {
+		"fold": payload["fold"],
+		"train_start_ts": payload["train_start_ts"],
+		"test_start_ts": payload["test_start_ts"],
+		"test_end_ts": payload["test_end_ts"],
+		"elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2),
+		"metrics": metrics,
+	}
+
+
+def _pool_metrics(fold_metrics: List[Dict[str, Any]]) -> Dict[str, Any]:
+	valid = sum(m["valid"] for m in fold_metrics)
+	valid_wins = sum(m["valid_wins"] for m in fold_metrics)
+	signals = sum(m["signals"] for m in fold_metrics)
+	signal_wins = sum(m["signal_wins"] for m in fold_metrics)
+	base = valid_wins / valid if valid else 0.0
+	hit_rate = signal_wins / signals if signals else 0.0
+	return {
+		"folds": len(fold_metrics),
+		"signals": signals,
+		"hit_rate": round(hit_rate, 4),
+		"baseline": round(base, 4),
+		"edge": round(hit_rate - base, 4) if signals else 0.0,
+		"mean_signal_return_pct": round(sum(m["signal_return_sum"] for m in fold_metrics) / signals * 100, 4) if signals else 0.0,
+		"mean_ic": round(float(np.mean([m["ic"] for m in fold_metrics])), 4) if fold_metrics else 0.0,
+	}
+
+
+def run_walk_forward(
+	db: Session,
+	symbol: str,
+	days: int = 90,
+	train_days: int = 30,
+	test_days: int = 7,
+	horizons: Optional[List[int]] = None,
+	fetch_missing: bool = True,
+	workers: Optional[int] = None,
+) -> Dict[str, Any]:
+	"""
+	Walk-forward weight learning over stored 5m/15m candles.
+
+	Slides train/test windows over the last `days` of history, learns
+	feature weights on each train window, measures them out-of-sample on the
+	following test window (all horizons in one pass), runs folds in a process
+	pool and persists one weight set per horizon, trained on the most recent
+	window, together with the pooled out-of-sample metrics.
+	"""
+	wall_start = time.perf_counter()
+	horizons = sorted(set(horizons or [6, 12, 24]))
+	bars_per_day = 86_400_000 // timeframe_ms("5m")
+	cfg = WalkForwardConfig(train_bars=train_days * bars_per_day, test_bars=test_days * bars_per_day, horizons=horizons)
+
+	now_ms = int(datetime.now(tz=timezone.utc).timestamp() * 1000)
+	start_5m = int((datetime.now(tz=timezone.utc) - timedelta(days=days)).timestamp() * 1000) - WARMUP_BARS * timeframe_ms("5m")
+	start_15m = start_5m - 200 * timeframe_ms("15m")
+	if fetch_missing:
+		backfill(db, symbol, "5m", start_5m, now_ms)
+		backfill(db, symbol, "15m", start_15m, now_ms)
+
+	t0 = time.perf_counter()
+	df5 = load_frame(db, symbol, "5m", start_5m)
+	df15 = load_frame(db, symbol, "15m", start_15m)
+	load_ms = (time.perf_counter() - t0) * 1000.0
+
+	t0 = time.perf_counter()
+	X = feature_matrix(df5, df15)
+	R = forward_returns(df5["close"].to_numpy(dtype=float), horizons)
+	features_ms = (time.perf_counter() - t0) * 1000.0
+
+	folds = make_folds(len(df5), cfg)
+	if not folds:
+		raise ValueError(
+			f"Not enough stored candles for walk-forward: {len(df5)} 5m bars, "
+			f"need {WARMUP_BARS + cfg.train_bars + cfg.test_bars}"
+		)
+	ts = df5["timestamp"].to_numpy(dtype=np.int64)
+	payloads = [
+		{
+			"fold": k,
+			"horizons": horizons,
+			"min_hits": cfg.min_hits,
+			"X_train": X[a:b],
+			"R_train": R[a:b],
+			"X_test": X[b:e],
+			"R_test": R[b:e],
+			"train_start_ts": int(ts[a]),
+			"test_start_ts": int(ts[b]),
+			"test_end_ts": int(ts[e - 1]),
+		}
+		for k, (a, b, e) in enumerate(folds)
+	]
+
+	t0 = time.perf_counter()
+	workers = workers if workers is not None else (get_settings().learning_workers or os.cpu_count() or 1)
+	workers = max(1, min(workers, len(payloads)))
+	if workers == 1:
+		results = [_run_fold(p) for p in payloads]
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = list(pool.map(_run_fold, payloads))
+	folds_ms = (time.perf_counter() - t0) * 1000.0
+
+	# Production weights: the most recent train window with realized labels
+	recent = slice(max(WARMUP_BARS, len(df5) - cfg.train_bars), len(df5))
+	eff, hits, base = feature_effectiveness(X[recent], _purge_labels(R[recent], horizons), baseline=None, min_hits=cfg.min_hits)
+	W = normalized_weights(eff)
+
+	timing = {
+		"load_ms": round(load_ms, 2),
+		"features_ms": round(features_ms, 2),
+		"folds_ms": round(folds_ms, 2),
+		"per_fold_ms": [r["elapsed_ms"] for r in results],
+		"workers": workers,
+		# Everything up to here, so the stored records carry it too
+		"wall_ms": round((time.perf_counter() - wall_start) * 1000.0, 2),
+	}
+	weight_sets: List[Dict[str, Any]] = []
+	for j, hz in enumerate(horizons):
+		per_feature = {f: round(float(W[i, j]), 3) for i, f in enumerate(FEATURES)}
+		oos = _pool_metrics([r["metrics"][str(hz)] for r in results])
+		record = LearnedWeightSet(
+			symbol=symbol.upper(),
+			method="walk_forward",
+			horizon_bars=hz,
+			weights_json=json.dumps(component_weights(per_feature)),
+			metrics_json=json.dumps({
+				"oos": oos,
+				"train_baseline": round(float(base[j]), 4),
+				"feature_weights": per_feature,
+				"feature_hits": {f: int(hits[i, j]) for i, f in enumerate(FEATURES)},
+				"folds": [
+					{
+						"fold": r["fold"],
+						"train_start_ts": r["train_start_ts"],
+						"test_start_ts": r["test_start_ts"],
+						"test_end_ts": r["test_end_ts"],
+						"elapsed_ms": r["elapsed_ms"],
+						"metrics": r["metrics"][str(hz)],
+					}
+					for r in results
+				],
+				"timing": timing,
+			}),
+			data_start_ts=int(ts[0]),
+			data_end_ts=int(ts[-1]),
+		)
+		db.add(record)
+		db.flush()
+		weight_sets.append({
+			"id": record.id,
+			"horizon_bars": hz,
+			"weights": json.loads(record.weights_json),
+			"oos": oos,
+		})
+	db.commit()
+
+	logger.info(
+		"Walk-forward: complete",
+		extra={"symbol": symbol, "folds": len(results), "bars": len(df5), "wall_ms": timing["wall_ms"]},
+	)
+	return {
+		"symbol": symbol,
+		"bars_5m": int(len(df5)),
+		"bars_15m": int(len(df15)),
+		"folds": len(results),
+		"weight_sets": weight_sets,
+		"timing": timing,
+	}
@@ -0,0 +1,229 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import copy
+import logging
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.lazy import lazy_import
+from ..core.market_frame import MarketFrame
+from ..core.strategy import StrategySpec
+from .learning import FEATURES, WARMUP_BARS, FrameLike, component_weights, feature_matrix, forward_returns
+from .leader import LeaderLease
+from .market_data import CandleSet
+
+joblib = lazy_import("joblib")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+MODEL_VERSION = 1
+
+
+class SignalModel:
+	"""
+	L2-regularized logistic regression over the learning feature matrix,
+	predicting whether the `horizon`-bar forward return is non-negative.
+
+	Trained with SGD so new candles are folded in with `partial_fit` instead
+	of refitting on the whole history. (sklearn's gradient boosting models
+	have no incremental fit, so they are not offered here.)
+	"""
+
+	def __init__(self, symbol: str, horizon: int = 12, alpha: float = 1e-4) -> None:
+		# scikit-learn (and scipy behind it) costs ~1s to import; only pay for it
+		# once a model is actually trained or loaded.
+		from sklearn.linear_model import SGDClassifier
+
+		self.symbol = symbol.upper()
+		self.horizon = horizon
+		self.clf = SGDClassifier(loss="log_loss", penalty="l2", alpha=alpha, random_state=0)
+		self.last_trained_ts: Optional[int] = None
+		self.n_samples = 0
+		self.updated_at: Optional[str] = None
+		self.version = MODEL_VERSION
+
+	@property
+	def is_fitted(self) -> bool:
+		return hasattr(self.clf, "coef_")
+
+	def _labeled(self, df5: "FrameLike", df15: "FrameLike"):
+		X = feature_matrix(df5, df15)
+		R = forward_returns(df5["close"].to_numpy(dtype=float), [self.horizon])[:, 0]
+		ts = df5["timestamp"].to_numpy(dtype=np.int64)
+		mask = ~np.isnan(R)
+		mask[:WARMUP_BARS] = False
+		return X[mask], (R[mask] >= 0).astype(np.int8), ts[mask]
+
+	def fit(self, df5: "pd.DataFrame", df15: "pd.DataFrame") -> Dict[str, Any]:
+		X, y, ts = self._labeled(df5, df15)
+		if len(y) == 0 or len(np.unique(y)) < 2:
+			raise ValueError(f"Not enough labeled bars to train: {len(y)}")
+		self.clf.fit(X, y)
+		self.last_trained_ts = int(ts[-1])
+		self.n_samples = int(len(y))
+		self.updated_at = datetime.now(tz=timezone.utc).isoformat()
+		proba = self.clf.predict_proba(X)[:, 1]
+		return {
+			"samples": self.n_samples,
+			"in_sample_accuracy": round(float(((proba >= 0.5) == y).mean()), 4),
+			"base_rate": round(float(y.mean()), 4),
+		}
+
+	def partial_update(self, df5: "FrameLike", df15: "FrameLike") -> int:
+		"""
+		Fold in bars whose label became known since the last update. Returns
+		the number of new samples (0 means nothing changed).
+		"""
+		X, y, ts = self._labeled(df5, df15)
+		if self.last_trained_ts is not None:
+			new = ts > self.last_trained_ts
+			X, y, ts = X[new], y[new], ts[new]
+		if len(y) == 0:
+			return 0
+		self.clf.partial_fit(X, y, classes=np.array([0, 1], dtype=np.int8))
+		self.last_trained_ts = int(ts[-1])
+		self.n_samples += int(len(y))
+		self.updated_at = datetime.now(tz=timezone.utc).isoformat()
+		return int(len(y))
+
+	def predict_up(self, X: np.ndarray) -> np.ndarray:
+		return self.clf.predict_proba(np.atleast_2d(X))[:, 1]
+
+	def feature_weights(self) -> Dict[str, float]:
+		coef = self.clf.coef_[0]
+		max_abs = float(np.abs(coef).max()) or 1.0
+		return {f: round(float(c / max_abs), 3) for f, c in zip(FEATURES, coef)}
+
+	def component_weights(self, strategy: Optional[StrategySpec] = None) -> Dict[str, float]:
+		"""
+		Fusion component weights (same shape as the heuristic learner), clamped
+		non-negative like `/signals` does.
+		"""
+		return {k: float(max(0.0, min(100.0, v))) for k, v in component_weights(self.feature_weights(), strategy).items()}
+
+	def describe(self) -> Dict[str, Any]:
+		return {
+			"symbol": self.symbol,
+			"kind": "logistic_sgd",
+			"version": self.version,
+			"horizon_bars": self.horizon,
+			"samples": self.n_samples,
+			"last_trained_ts": self.last_trained_ts,
+			"updated_at": self.updated_at,
+			"feature_weights": self.feature_weights() if self.is_fitted else None,
+		}
+
+
+# Per process: (file mtime, model). Only lease holders write model files
+# (see `refresh_model`); other processes reload a file once it changes.
+_models: Dict[str, Tuple[int, SignalModel]] = {}
+_lock = threading.Lock()
+
+
+def _model_path(symbol: str) -> str:
+	safe = re.sub(r"[^A-Za-z0-9]+", "_", symbol.upper()).strip("_")
+	return os.path.join(get_settings().learner_model_dir, f"{safe}.joblib")
+
+
+def _mtime(path: str) -> Optional[int]:
+	try:
+		return os.stat(path).st_mtime_ns
+	except OSError:
+		return None
+
+
+def save_model(model: SignalModel) -> int:
+	"""
+	Write the model file atomically; returns its mtime.
+	"""
+	path = _model_path(model.symbol)
+	os.makedirs(os.path.dirname(path), exist_ok=True)
+	tmp = f"{path}.tmp"
+	joblib.dump(model, tmp)
+	os.replace(tmp, path)
+	return os.stat(path).st_mtime_ns
+
+
+def model_stamp(symbol: str) -> Optional[int]:
+	"""
+	Version of the stored model for `symbol` (its file mtime), None if untrained.
+	"""
+	return _mtime(_model_path(symbol))
+
+
+def get_model(symbol: str) -> Optional[SignalModel]:
+	"""
+	Model for `symbol` as last saved by any process, cached until its file
+	changes; None if untrained. Callers only predict with it.
+	"""
+	key = symbol.upper()
+	path = _model_path(key)
+	stamp = _mtime(path)
+	if stamp is None:
+		return None
+	cached = _models.get(key)
+	if cached is not None and cached[0] == stamp:
+		return cached[1]
+	with _lock:
+		cached = _models.get(key)
+		if cached is None or cached[0] != stamp:
+			try:
+				loaded = joblib.load(path)
+			except Exception:
+				logger.exception("Learning model: failed to load", extra={"path": path})
+				return None
+			if getattr(loaded, "version", None) != MODEL_VERSION:
+				logger.warning("Learning model: ignoring incompatible model", extra={"path": path})
+				return None
+			_models[key] = cached = (stamp, loaded)
+	return cached[1]
+
+
+def train_model(symbol: str, df5: "pd.DataFrame", df15: "pd.DataFrame", horizon: int = 12) -> Dict[str, Any]:
+	started = time.perf_counter()
+	model = SignalModel(symbol, horizon=horizon)
+	metrics = model.fit(df5, df15)
+	with _lock:
+		_models[model.symbol] = (save_model(model), model)
+	metrics["train_ms"] = round((time.perf_counter() - started) * 1000.0, 2)
+	return {**model.describe(), "metrics": metrics}
+
+
+@lru_cache
+def learning_lease() -> LeaderLease:
+	"""
+	Lease of the process allowed to write model files.
+	"""
+	return LeaderLease("learning", ttl_seconds=get_settings().leader_lease_seconds)
+
+
+def refresh_model(db: Session, symbol: str, candles: CandleSet) -> int:
+	"""
+	Fold candles labeled since the last update into `symbol`'s trained model
+	and save it when anything changed; returns the samples added (0 when
+	untrained or another process holds the `learning` lease). Called from
+	the worker passes, never from requests. The update runs on a copy, so
+	requests keep predicting with the previous model until the new one is
+	swapped in.
+	"""
+	model = get_model(symbol)
+	if model is None or not learning_lease().acquire(db):
+		return 0
+	updated = copy.deepcopy(model)
+	added = updated.partial_update(
+		MarketFrame.from_rows(candles.timeframes["5m"], "5m"),
+		MarketFrame.from_rows(candles.timeframes["15m"], "15m"),
+	)
+	if added:
+		with _lock:
+			_models[updated.symbol] = (save_model(updated), updated)
+		logger.info("Learning model: updated", extra={"symbol": updated.symbol, "added": added, "samples": updated.n_samples})
+	return added
@@ -0,0 +1,110 @@
+"""
+Latest candles per symbol for the forward-test worker, kept in `CandleRing`s.
+
+The worker steps the same symbols every few minutes. The first read of a
+symbol fetches full history, like `load_candles`; later reads page forward
+from the last stored candle (`since`) and merge the one or two new candles
+into fixed-capacity rings, instead of refetching and re-parsing hundreds of
+rows per tick. `candles` returns a `CandleSet` whose timeframes are
+read-only (n, 6) views of the rings, valid until the symbol's next read.
+"""
+
+from functools import lru_cache
+from typing import Callable, Dict, Iterable
+import logging
+import threading
+
+from ..core.ring_buffer import CandleRing
+from .market_data import CandleSet, MarketDataRouter, get_market_data
+
+logger = logging.getLogger(__name__)
+
+
+class _SymbolCandles:
+	__slots__ = ("exchange", "normalized_symbol", "rings")
+
+	def __init__(self, exchange: str, normalized_symbol: str, rings: Dict[str, CandleRing]) -> None:
+		self.exchange = exchange
+		self.normalized_symbol = normalized_symbol
+		self.rings = rings
+
+
+class LiveCandles:
+	def __init__(self, router: Callable[[], MarketDataRouter] = get_market_data) -> None:
+		self._router = router
+		self._symbols: Dict[str, _SymbolCandles] = {}
+		self._lock = threading.Lock()
+
+	def __len__(self) -> int:
+		return len(self._symbols)
+
+	@property
+	def nbytes(self) -> int:
+		return sum(ring.nbytes for entry in self._symbols.values() for ring in entry.rings.values())
+
+	def candles(self, symbol: str, limits: Dict[str, int]) -> CandleSet:
+		"""
+		The latest `limits[tf]` candles of each timeframe, fetched in full on
+		the first read (or when a timeframe or larger limit is new) and
+		incrementally afterwards.
+		"""
+		key = symbol.upper()
+		with self._lock:
+			entry = self._symbols.get(key)
+			fits = entry is not None and all(
+				tf in entry.rings and entry.rings[tf].capacity >= limit for tf, limit in limits.items()
+			)
+			if not fits or not self._top_up(symbol, entry, limits):
+				entry = self._load(symbol, limits)
+				self._symbols[key] = entry
+			return CandleSet(
+				exchange=entry.exchange,
+				symbol=symbol,
+				normalized_symbol=entry.normalized_symbol,
+				timeframes={tf: entry.rings[tf].view(limit) for tf, limit in limits.items()},
+			)
+
+	def retain(self, symbols: Iterable[str]) -> None:
+		"""
+		Drop the rings of every symbol not in `symbols`.
+		"""
+		keep = {s.upper() for s in symbols}
+		with self._lock:
+			for key in [k for k in self._symbols if k not in keep]:
+				del self._symbols[key]
+
+	def _load(self, symbol: str, limits: Dict[str, int]) -> _SymbolCandles:
+		fetched = self._router().fetch_candles(symbol, limits)
+		rings: Dict[str, CandleRing] = {}
+		for tf, limit in limits.items():
+			rings[tf] = CandleRing(limit)
+			rings[tf].merge(fetched.timeframes[tf])
+		return _SymbolCandles(fetched.exchange, fetched.normalized_symbol, rings)
+
+	def _top_up(self, symbol: str, entry: _SymbolCandles, limits: Dict[str, int]) -> bool:
+		"""
+		Merge candles newer than each ring's last one. False when the rings
+		must be reloaded: a timeframe was served by another exchange, or more
+		candles are new than one page holds.
+		"""
+		router = self._router()
+		for tf in limits:
+			ring = entry.rings[tf]
+			if ring.last_ts is None:
+				return False
+			page = router.fetch_candles(symbol, {tf: ring.capacity}, since=ring.last_ts)
+			rows = page.timeframes[tf]
+			if page.exchange != entry.exchange or len(rows) >= ring.capacity:
+				logger.info(
+					"Live candles: reloading",
+					extra={"symbol": symbol, "timeframe": tf, "exchange_id": page.exchange},
+				)
+				return False
+			if rows:
+				ring.merge(rows)
+		return True
+
+
+@lru_cache
+def get_live_candles() -> LiveCandles:
+	return LiveCandles()
@@ -0,0 +1,356 @@
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+import threading
+import time
+
+
+from ..core.config import get_settings
+from ..core.metrics import span
+from ..core.lazy import lazy_import
+from .shared_cache import SharedCache, get_shared_cache
+
+ccxt = lazy_import("ccxt")
+
+logger = logging.getLogger(__name__)
+
+# Stablecoin/fiat quotes that are treated as interchangeable when a pair is not
+# listed with the exact quote the caller asked for. Order = preference.
+DEFAULT_QUOTE_ALIASES: Dict[str, List[str]] = {
+	"USDT": ["USDT", "USD", "USDC"],
+	"USD": ["USD", "USDT", "USDC"],
+	"USDC": ["USDC", "USD", "USDT"],
+}
+
+# Per-exchange overrides. Coinbase USDT books are thin, so USDT requests are
+# served from the USD book when one exists (matches the historical behaviour).
+EXCHANGE_QUOTE_ALIASES: Dict[str, Dict[str, List[str]]] = {
+	"coinbase": {
+		"USDT": ["USD", "USDT", "USDC"],
+	},
+}
+
+
+class SymbolNotSupported(Exception):
+	"""Raised when no configured exchange lists the requested symbol."""
+
+
+class DataSourceUnavailable(Exception):
+	"""Raised when every exchange listing the symbol failed to serve it."""
+
+
+@dataclass
+class CandleSet:
+	exchange: str
+	symbol: str
+	normalized_symbol: str
+	timeframes: Dict[str, List[List[float]]] = field(default_factory=dict)
+
+
+def _split_symbol(raw: str, quotes: List[str]) -> Optional[Tuple[str, str]]:
+	"""
+	Split a user symbol (BTC/USDT, BTC-USDT, btc_usdt, BTCUSDT) into base/quote.
+	"""
+	raw = raw.strip().upper().split(":")[0]
+	for sep in ("/", "-", "_"):
+		if sep in raw:
+			base, _, quote = raw.partition(sep)
+			return (base, quote) if base and quote else None
+	# No separator: match the longest known quote suffix (quotes sorted by length)
+	for quote in quotes:
+		if raw.endswith(quote) and len(raw) > len(quote):
+			return raw[: -len(quote)], quote
+	return None
+
+
+class ExchangeSource:
+	"""
+	A single ccxt exchange with a cached markets table and symbol index.
+
+	The index is built once per markets load (refreshed after `markets_ttl`
+	seconds) and resolved symbols are memoized, so normalization is a dict
+	lookup on the hot path.
+	"""
+
+	def __init__(self, exchange_id: str, timeout_ms: int, markets_ttl: int) -> None:
+		self.id = exchange_id
+		self.timeout_ms = timeout_ms
+		self.markets_ttl = markets_ttl
+		self.quote_aliases = {**DEFAULT_QUOTE_ALIASES, **EXCHANGE_QUOTE_ALIASES.get(exchange_id, {})}
+		self._exchange: Optional["ccxt.Exchange"] = None
+		self._markets: Optional[Dict[str, dict]] = None
+		self._markets_loaded_at = 0.0
+		self._pairs: Dict[Tuple[str, str], str] = {}
+		self._ids: Dict[str, str] = {}
+		self._quotes: List[str] = []
+		self._resolved: Dict[str, Optional[str]] = {}
+		self._lock = threading.Lock()
+
+	@property
+	def exchange(self) -> "ccxt.Exchange":
+		if self._exchange is None:
+			klass = getattr(ccxt, self.id)
+			self._exchange = klass({
+				"enableRateLimit": True,
+				"timeout": self.timeout_ms,
+			})
+		return self._exchange
+
+	def markets(self) -> Dict[str, dict]:
+		expired = (time.monotonic() - self._markets_loaded_at) > self.markets_ttl
+		if self._markets is None or expired:
+			with self._lock:
+				expired = (time.monotonic() - self._markets_loaded_at) > self.markets_ttl
+				if self._markets is None or expired:
+					with span("load_markets"):
+						markets = self.exchange.load_markets(reload=self._markets is not None)
+					self._build_index(markets)
+					self._markets = markets
+					self._markets_loaded_at = time.monotonic()
+		return self._markets
+
+	def _build_index(self, markets: Dict[str, dict]) -> None:
+		pairs: Dict[Tuple[str, str], str] = {}
+		ids: Dict[str, str] = {}
+		for symbol, m in markets.items():
+			if m.get("active") is False:
+				continue
+			# Only spot books feed the OHLCV endpoints
+			if m.get("spot") is False or m.get("contract"):
+				continue
+			base = (m.get("base") or "").upper()
+			quote = (m.get("quote") or "").upper()
+			if base and quote:
+				pairs.setdefault((base, quote), symbol)
+			if m.get("id"):
+				ids[str(m["id"]).upper()] = symbol
+		self._pairs = pairs
+		self._ids = ids
+		self._quotes = sorted({q for _, q in pairs}, key=len, reverse=True)
+		self._resolved = {}
+		logger.info("Market data: indexed markets", extra={"exchange_id": self.id, "pairs": len(pairs)})
+
+	def normalize(self, symbol: str) -> Optional[str]:
+		"""
+		Map a user symbol to this exchange's unified symbol, or None if unlisted.
+		"""
+		markets = self.markets()
+		key = symbol.strip().upper()
+		if key in self._resolved:
+			return self._resolved[key]
+
+		resolved: Optional[str] = None
+		parts = _split_symbol(key, self._quotes)
+		if parts is not None:
+			base, quote = parts
+			for alt in self.quote_aliases.get(quote, [quote]):
+				if (base, alt) in self._pairs:
+					resolved = self._pairs[(base, alt)]
+					break
+		if resolved is None and key in markets:
+			resolved = key
+		if resolved is None:
+			resolved = self._ids.get(key)
+
+		self._resolved[key] = resolved
+		return resolved
+
+	def spot_symbols(self, quotes: List[str]) -> List[str]:
+		"""
+		Unified symbols of the active spot markets quoted in `quotes`, one per
+		base asset (earlier quotes win).
+		"""
+		self.markets()
+		rank = {q.upper(): i for i, q in enumerate(quotes)}
+		best: Dict[str, Tuple[int, str]] = {}
+		for (base, quote), symbol in self._pairs.items():
+			r = rank.get(quote)
+			if r is not None and (base not in best or r < best[base][0]):
+				best[base] = (r, symbol)
+		return sorted(symbol for _, symbol in best.values())
+
+	def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int, since: Optional[int] = None) -> List[List[float]]:
+		with span(f"fetch_ohlcv:{timeframe}"):
+			return self.exchange.fetch_ohlcv(symbol, timeframe=timeframe, since=since, limit=limit)
+
+	def fetch_trades(self, symbol: str, limit: int, since: Optional[int] = None) -> List[Dict[str, Any]]:
+		with span("fetch_trades"):
+			return self.exchange.fetch_trades(symbol, since=since, limit=limit)
+
+	def fetch_order_book(self, symbol: str, limit: int) -> Dict[str, Any]:
+		with span("fetch_order_book"):
+			return self.exchange.fetch_order_book(symbol, limit=limit)
+
+
+class MarketDataRouter:
+	"""
+	Serves OHLCV from the fastest healthy exchange that lists the symbol.
+
+	Sources are ordered by (in cooldown, smoothed latency, configured order).
+	A source that errors or exceeds its network timeout is put in cooldown
+	and the request falls through to the next source.
+	"""
+
+	def __init__(
+		self,
+		exchange_ids: List[str],
+		timeout_ms: int = 7000,
+		markets_ttl: int = 3600,
+		cooldown_seconds: int = 60,
+		cache: Optional[SharedCache] = None,
+		cache_ttl: int = 0,
+	) -> None:
+		self.sources = [ExchangeSource(eid, timeout_ms, markets_ttl) for eid in exchange_ids]
+		self.cooldown_seconds = cooldown_seconds
+		self.cache = cache if cache_ttl > 0 else None
+		self.cache_ttl = cache_ttl
+		self._latency_ms: Dict[str, float] = {}
+		self._down_until: Dict[str, float] = {}
+
+	def _ordered(self) -> List[ExchangeSource]:
+		now = time.monotonic()
+
+		def key(item: Tuple[int, ExchangeSource]):
+			idx, src = item
+			down = self._down_until.get(src.id, 0.0) > now
+			return (down, self._latency_ms.get(src.id, float("inf")), idx)
+
+		return [src for _, src in sorted(enumerate(self.sources), key=key)]
+
+	def _record_success(self, source_id: str, elapsed_ms: float) -> None:
+		prev = self._latency_ms.get(source_id)
+		self._latency_ms[source_id] = elapsed_ms if prev is None else 0.8 * prev + 0.2 * elapsed_ms
+		self._down_until.pop(source_id, None)
+
+	def _record_failure(self, source_id: str) -> None:
+		self._down_until[source_id] = time.monotonic() + self.cooldown_seconds
+
+	def health(self) -> List[Dict[str, object]]:
+		now = time.monotonic()
+		return [
+			{
+				"exchange": src.id,
+				"latency_ms": round(self._latency_ms[src.id], 1) if src.id in self._latency_ms else None,
+				"healthy": self._down_until.get(src.id, 0.0) <= now,
+			}
+			for src in self.sources
+		]
+
+	def list_markets(self, quotes: List[str]) -> Tuple[str, List[str]]:
+		"""
+		(exchange id, spot symbols quoted in `quotes`) from the preferred
+		source whose markets table loads.
+		"""
+		last_error: Optional[Exception] = None
+		for src in self._ordered():
+			try:
+				return src.id, src.spot_symbols(quotes)
+			except Exception as e:
+				last_error = e
+				self._record_failure(src.id)
+				logger.warning(
+					"Market data: markets load failed, falling back",
+					extra={"exchange_id": src.id, "error": f"{type(e).__name__}: {e}"},
+				)
+		raise DataSourceUnavailable(f"No exchange markets available: {type(last_error).__name__}: {last_error}")
+
+	def fetch_candles(self, symbol: str, limits: Dict[str, int], since: Optional[int] = None) -> CandleSet:
+		"""
+		Fetch every requested timeframe from a single exchange so 5m/15m
+		frames always come from the same order book. `since` (ms) pages
+		forward from a point in history instead of returning the latest bars.
+		Latest-bar requests are served from the shared cache when configured.
+		"""
+		cache_key = None
+		if self.cache is not None and since is None:
+			cache_key = "candles:" + symbol.upper() + ":" + ",".join(f"{tf}={limits[tf]}" for tf in sorted(limits))
+			with span("candle_cache"):
+				cached = self.cache.get(cache_key)
+			if cached is not None:
+				return CandleSet(**cached)
+
+		candles = self._fetch_candles(symbol, limits, since)
+		if cache_key is not None:
+			self.cache.set(cache_key, vars(candles), self.cache_ttl)
+		return candles
+
+	def _fetch_candles(self, symbol: str, limits: Dict[str, int], since: Optional[int]) -> CandleSet:
+		listed = False
+		last_error: Optional[Exception] = None
+		for src in self._ordered():
+			try:
+				normalized = src.normalize(symbol)
+				if normalized is None:
+					continue
+				listed = True
+				started = time.perf_counter()
+				timeframes = {tf: src.fetch_ohlcv(normalized, tf, limit, since) for tf, limit in limits.items()}
+			except Exception as e:
+				last_error = e
+				self._record_failure(src.id)
+				logger.warning(
+					"Market data: source failed, falling back",
+					extra={"exchange_id": src.id, "symbol": symbol, "error": f"{type(e).__name__}: {e}"},
+				)
+				continue
+			self._record_success(src.id, (time.perf_counter() - started) * 1000.0)
+			return CandleSet(exchange=src.id, symbol=symbol, normalized_symbol=normalized, timeframes=timeframes)
+
+		if not listed and last_error is None:
+			raise SymbolNotSupported(f"Symbol not available on {', '.join(s.id for s in self.sources)}: {symbol}")
+		raise DataSourceUnavailable(f"All exchanges failed for {symbol}: {type(last_error).__name__}: {last_error}")
+
+	def fetch_flow(
+		self,
+		symbol: str,
+		since: Optional[int] = None,
+		limit: int = 1000,
+		book_depth: int = 0,
+		prefer: Optional[str] = None,
+	) -> Tuple[str, List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+		"""
+		(exchange id, public trades, order book or None) from one exchange,
+		trying `prefer` first so a symbol's trade history stays on one venue.
+		The book is only fetched when `book_depth` > 0.
+		"""
+		sources = self._ordered()
+		sources.sort(key=lambda src: src.id != prefer)
+		listed = False
+		last_error: Optional[Exception] = None
+		for src in sources:
+			try:
+				normalized = src.normalize(symbol)
+				if normalized is None:
+					continue
+				listed = True
+				started = time.perf_counter()
+				trades = src.fetch_trades(normalized, limit, since)
+				book = src.fetch_order_book(normalized, book_depth) if book_depth > 0 else None
+			except Exception as e:
+				last_error = e
+				self._record_failure(src.id)
+				logger.warning(
+					"Market data: trade source failed, falling back",
+					extra={"exchange_id": src.id, "symbol": symbol, "error": f"{type(e).__name__}: {e}"},
+				)
+				continue
+			self._record_success(src.id, (time.perf_counter() - started) * 1000.0)
+			return src.id, trades, book
+
+		if not listed and last_error is None:
+			raise SymbolNotSupported(f"Symbol not available on {', '.join(s.id for s in self.sources)}: {symbol}")
+		raise DataSourceUnavailable(f"All exchanges failed for {symbol} trades: {type(last_error).__name__}: {last_error}")
+
+
+@lru_cache
+def get_market_data() -> MarketDataRouter:
+	settings = get_settings()
+	return MarketDataRouter(
+		settings.exchanges,
+		timeout_ms=settings.exchange_timeout_ms,
+		markets_ttl=settings.markets_ttl_seconds,
+		cooldown_seconds=settings.exchange_cooldown_seconds,
+		cache=get_shared_cache(),
+		cache_ttl=settings.candle_cache_ttl_seconds,
+	)
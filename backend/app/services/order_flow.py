@@ -0,0 +1,405 @@
+"""
+Order flow: per-bar buy/sell volume, VWAP and book imbalance from public
+trades, stored next to the 5m candles.
+
+Raw trades are only touched at ingestion. `ingest_symbol` pages the
+exchange's public trades forward from the symbol's cursor, folds them into
+5m bars with `aggregate_trades` (one `reduceat` per field) and adds the sums
+to `flow_bars`. An order book snapshot taken in the same pass sets the
+bar's depth imbalance. Requests read the stored bars for their candles with
+`load_flow`, one indexed range query, as arrays aligned with the candles.
+Trades the exchange reports without a side are skipped.
+
+One pass per symbol runs at a time, whether the leader's worker or
+`POST /order-flow/ingest` started it: a pass holds the symbol's
+`order_flow:<symbol>` lease, and its commit only goes through if the
+cursor is still where the pass read it, so bar sums are never added twice.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import logging
+
+import numpy as np
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.strategy import DEFAULT_STRATEGY, StrategySpec
+from ..db import SessionLocal
+from ..models.order_flow import FlowBar, FlowCursor
+from .leader import LeaderLease
+from .market_data import MarketDataRouter, get_market_data
+
+logger = logging.getLogger(__name__)
+
+BAR_MS = 300_000
+TRADE_PAGE = 1000
+MAX_PAGES = 20  # per ingestion pass; the rest is picked up by the next one
+
+
+class IngestionInProgress(Exception):
+	"""Raised when another pass is already ingesting the symbol's trades."""
+
+
+@dataclass
+class FlowBars:
+	"""
+	Per-bar flow arrays. From `aggregate_trades` they hold only bars with
+	trades; from `load_flow` they are aligned with the candles, with zeros
+	(and NaN imbalance) where nothing is stored.
+	"""
+	ts: np.ndarray
+	buy_volume: np.ndarray
+	sell_volume: np.ndarray
+	notional: np.ndarray
+	trades: np.ndarray
+	imbalance: np.ndarray
+
+	def __len__(self) -> int:
+		return int(self.ts.shape[0])
+
+	@property
+	def delta(self) -> np.ndarray:
+		return self.buy_volume - self.sell_volume
+
+	@property
+	def vwap(self) -> np.ndarray:
+		volume = self.buy_volume + self.sell_volume
+		with np.errstate(divide="ignore", invalid="ignore"):
+			return np.where(volume > 0, self.notional / volume, np.nan)
+
+
+def trade_arrays(trades: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+	"""
+	(ts, price, amount, side) of ccxt trade dicts; side is 1 buy, -1 sell,
+	0 unknown.
+	"""
+	n = len(trades)
+	ts = np.fromiter((t["timestamp"] for t in trades), dtype=np.int64, count=n)
+	price = np.fromiter((t["price"] for t in trades), dtype=np.float64, count=n)
+	amount = np.fromiter((t["amount"] for t in trades), dtype=np.float64, count=n)
+	side = np.fromiter((1 if t.get("side") == "buy" else -1 if t.get("side") == "sell" else 0 for t in trades), dtype=np.int8, count=n)
+	return ts, price, amount, side
+
+
+def aggregate_trades(
+	ts: np.ndarray,
+	price: np.ndarray,
+	amount: np.ndarray,
+	side: np.ndarray,
+	bar_ms: int = BAR_MS,
+) -> FlowBars:
+	"""
+	Sum trades into the bars they fall in (bar open = ts rounded down to
+	`bar_ms`). Trades without a side are dropped.
+	"""
+	known = side != 0
+	ts, price, amount, side = ts[known], price[known], amount[known], side[known]
+	if ts.shape[0] and np.any(ts[1:] < ts[:-1]):
+		order = np.argsort(ts, kind="stable")
+		ts, price, amount, side = ts[order], price[order], amount[order], side[order]
+	bar = ts - ts % bar_ms
+	if not bar.shape[0]:
+		empty = np.empty(0)
+		return FlowBars(bar, empty, empty, empty, np.empty(0, dtype=np.int64), empty)
+	starts = np.flatnonzero(np.concatenate(([True], bar[1:] != bar[:-1])))
+	buy = side > 0
+	return FlowBars(
+		ts=bar[starts],
+		buy_volume=np.add.reduceat(np.where(buy, amount, 0.0), starts),
+		sell_volume=np.add.reduceat(np.where(buy, 0.0, amount), starts),
+		notional=np.add.reduceat(price * amount, starts),
+		trades=np.diff(np.append(starts, bar.shape[0])),
+		imbalance=np.full(starts.shape[0], np.nan),
+	)
+
+
+def book_imbalance(book: Dict[str, Any], depth: int) -> Optional[float]:
+	"""
+	(bid - ask) / (bid + ask) quantity over the top `depth` levels.
+	"""
+	bid = sum(float(level[1]) for level in (book.get("bids") or [])[:depth])
+	ask = sum(float(level[1]) for level in (book.get("asks") or [])[:depth])
+	return (bid - ask) / (bid + ask) if bid + ask > 0 else None
+
+
+def _store(db: Session, symbol: str, bars: FlowBars) -> int:
+	"""
+	Add bar sums to stored bars (inserting new ones); returns bars inserted.
+	"""
+	if not len(bars):
+		return 0
+	existing = {
+		row.ts: row for row in db.query(FlowBar).filter(
+			FlowBar.symbol == symbol,
+			FlowBar.ts >= int(bars.ts[0]),
+			FlowBar.ts <= int(bars.ts[-1]),
+		)
+	}
+	new_rows = []
+	for i, ts in enumerate(bars.ts.tolist()):
+		row = existing.get(ts)
+		if row is not None:
+			row.buy_volume += float(bars.buy_volume[i])
+			row.sell_volume += float(bars.sell_volume[i])
+			row.notional += float(bars.notional[i])
+			row.trades += int(bars.trades[i])
+			continue
+		new_rows.append({
+			"symbol": symbol,
+			"ts": ts,
+			"buy_volume": float(bars.buy_volume[i]),
+			"sell_volume": float(bars.sell_volume[i]),
+			"notional": float(bars.notional[i]),
+			"trades": int(bars.trades[i]),
+		})
+	if new_rows:
+		db.bulk_insert_mappings(FlowBar, new_rows)
+	return len(new_rows)
+
+
+def _store_imbalance(db: Session, symbol: str, ts: int, imbalance: float) -> None:
+	db.flush()
+	row = db.query(FlowBar).filter(FlowBar.symbol == symbol, FlowBar.ts == ts).first()
+	if row is None:
+		db.add(FlowBar(symbol=symbol, ts=ts, buy_volume=0.0, sell_volume=0.0, notional=0.0, trades=0, imbalance=imbalance))
+	else:
+		row.imbalance = imbalance
+
+
+def ingest_symbol(
+	db: Session,
+	symbol: str,
+	router: Optional[MarketDataRouter] = None,
+	book_depth: Optional[int] = None,
+) -> Dict[str, Any]:
+	"""
+	Fetch the symbol's public trades since the last pass (the latest page on
+	the first pass, dropping its partial first bar) and a book snapshot,
+	and add them to the stored flow bars. Trades sharing the last
+	millisecond of a full page are left for the next page, so none are
+	counted twice or skipped. Raises IngestionInProgress when another pass
+	holds the symbol.
+	"""
+	key = symbol.upper()
+	lease = LeaderLease(f"order_flow:{key}", ttl_seconds=get_settings().leader_lease_seconds)
+	if not lease.acquire(db):
+		raise IngestionInProgress(f"Order flow for {symbol} is being ingested by another pass")
+	try:
+		return _ingest(db, symbol, key, router or get_market_data(), book_depth)
+	finally:
+		lease.release(db)
+
+
+def _ingest(db: Session, symbol: str, key: str, router: MarketDataRouter, book_depth: Optional[int]) -> Dict[str, Any]:
+	book_depth = get_settings().order_flow_book_depth if book_depth is None else book_depth
+	cursor: Optional[FlowCursor] = db.get(FlowCursor, key)
+	read_ts = cursor.last_trade_ts if cursor is not None else None
+	since = cursor.last_trade_ts + 1 if cursor is not None else None
+	exchange, trades, book = router.fetch_flow(
+		symbol, since=since, limit=TRADE_PAGE, book_depth=book_depth,
+		prefer=cursor.exchange if cursor is not None else None,
+	)
+	if cursor is not None and exchange != cursor.exchange:
+		# Another venue's trades do not continue our history: start over there
+		logger.warning("Order flow: trade source changed", extra={"symbol": symbol, "from": cursor.exchange, "to": exchange})
+		since = None
+		_, trades, _ = router.fetch_flow(symbol, limit=TRADE_PAGE, prefer=exchange)
+
+	pages: List[Tuple[np.ndarray, ...]] = []
+	for page_no in range(MAX_PAGES):
+		if page_no:
+			source, trades, _ = router.fetch_flow(symbol, since=since, limit=TRADE_PAGE, prefer=exchange)
+			if source != exchange:
+				break
+		arrays = trade_arrays(trades)
+		ts = arrays[0]
+		if since is None or len(trades) < TRADE_PAGE:
+			pages.append(arrays)
+			break  # caught up (or the first pass, which takes only the latest page)
+		if ts[0] == ts[-1]:
+			pages.append(arrays)  # a whole page in one ms: nothing to hold back
+			since = int(ts[-1]) + 1
+			continue
+		keep = ts < ts[-1]
+		pages.append(tuple(a[keep] for a in arrays))
+		since = int(ts[-1])
+
+	ts, price, amount, side = (np.concatenate(parts) for parts in zip(*pages))
+	if cursor is None or exchange != cursor.exchange:
+		if ts.shape[0]:
+			# The latest page starts mid-bar; keep whole bars only
+			keep = ts >= ts.min() - ts.min() % BAR_MS + BAR_MS
+			ts, price, amount, side = ts[keep], price[keep], amount[keep], side[keep]
+	bars = aggregate_trades(ts, price, amount, side)
+	imbalance = book_imbalance(book, book_depth) if book else None
+	try:
+		if ts.shape[0]:
+			# Advance the cursor first, and only from where this pass read it:
+			# a pass that outlived its lease must not add its bars on top of a
+			# newer pass's
+			if cursor is None:
+				db.add(FlowCursor(symbol=key, exchange=exchange, last_trade_ts=int(ts.max())))
+				db.flush()
+			elif not db.query(FlowCursor).filter(
+				FlowCursor.symbol == key,
+				FlowCursor.last_trade_ts == read_ts,
+			).update(
+				{FlowCursor.exchange: exchange, FlowCursor.last_trade_ts: int(ts.max())},
+				synchronize_session=False,
+			):
+				raise IngestionInProgress(f"Order flow for {symbol} was ingested by another pass meanwhile")
+		inserted = _store(db, key, bars)
+		if imbalance is not None:
+			book_ts = int(book.get("timestamp") or datetime.now(tz=timezone.utc).timestamp() * 1000)
+			_store_imbalance(db, key, book_ts - book_ts % BAR_MS, imbalance)
+		db.flush()
+	except IntegrityError:
+		db.rollback()
+		raise IngestionInProgress(f"Order flow for {symbol} was ingested by another pass meanwhile")
+	except IngestionInProgress:
+		db.rollback()
+		raise
+	db.commit()
+	return {
+		"symbol": symbol,
+		"exchange": exchange,
+		"trades": int(ts.shape[0]),
+		"bars": len(bars),
+		"new_bars": inserted,
+		"imbalance": None if imbalance is None else round(imbalance, 4),
+	}
+
+
+def load_flow(db: Session, symbol: str, ts5: np.ndarray) -> Optional[FlowBars]:
+	"""
+	Stored flow bars aligned with candle timestamps `ts5` (sorted); None
+	when none of them has flow data.
+	"""
+	n = ts5.shape[0]
+	if not n:
+		return None
+	rows = db.query(
+		FlowBar.ts, FlowBar.buy_volume, FlowBar.sell_volume, FlowBar.notional, FlowBar.trades, FlowBar.imbalance,
+	).filter(
+		FlowBar.symbol == symbol.upper(),
+		FlowBar.ts >= int(ts5[0]),
+		FlowBar.ts <= int(ts5[-1]),
+	).all()
+	if not rows:
+		return None
+	cols = list(zip(*rows))
+	stored_ts = np.asarray(cols[0], dtype=np.int64)
+	idx = np.searchsorted(ts5, stored_ts)
+	hit = (idx < n) & (ts5[np.minimum(idx, n - 1)] == stored_ts)
+	idx = idx[hit]
+
+	def aligned(values: Sequence[Any], fill: float, dtype: Any = np.float64) -> np.ndarray:
+		out = np.full(n, fill, dtype=dtype)
+		out[idx] = np.asarray([fill if v is None else v for v in values], dtype=dtype)[hit]
+		return out
+
+	return FlowBars(
+		ts=np.asarray(ts5, dtype=np.int64),
+		buy_volume=aligned(cols[1], 0.0),
+		sell_volume=aligned(cols[2], 0.0),
+		notional=aligned(cols[3], 0.0),
+		trades=aligned(cols[4], 0, np.int64),
+		imbalance=aligned(cols[5], np.nan),
+	)
+
+
+def recent_flow(symbol: str, ts5: np.ndarray, window: int, db: Optional[Session] = None) -> Optional[FlowBars]:
+	"""
+	`load_flow` for the last `window` candles, in a session of its own
+	unless `db` is given. Unreadable flow tables count as no flow data.
+	"""
+	own = db is None
+	session = db or SessionLocal()
+	try:
+		return load_flow(session, symbol, ts5[-window:])
+	except SQLAlchemyError:
+		logger.warning("Order flow: stored bars unavailable", exc_info=True, extra={"symbol": symbol})
+		return None
+	finally:
+		if own:
+			session.close()
+
+
+def flow_summary(flow: Optional[FlowBars], window: int) -> Optional[Dict[str, Any]]:
+	"""
+	Buy/sell volume, delta ratio and VWAP over the last `window` bars, plus
+	the latest book imbalance; None without flow data.
+	"""
+	if flow is None:
+		return None
+	w = slice(-window, None)
+	buy = float(flow.buy_volume[w].sum())
+	sell = float(flow.sell_volume[w].sum())
+	total = buy + sell
+	imbalance = flow.imbalance[w][~np.isnan(flow.imbalance[w])]
+	return {
+		"bars": int(min(window, len(flow))),
+		"covered_bars": int((flow.trades[w] > 0).sum()),
+		"trades": int(flow.trades[w].sum()),
+		"buy_volume": buy,
+		"sell_volume": sell,
+		"delta_ratio": round((buy - sell) / total, 4) if total > 0 else None,
+		"vwap": float(flow.notional[w].sum()) / total if total > 0 else None,
+		"imbalance": round(float(imbalance[-1]), 4) if imbalance.shape[0] else None,
+	}
+
+
+def detect_flow_signals(flow: Optional[FlowBars], strategy: Optional[StrategySpec] = None) -> List[Dict[str, Any]]:
+	"""
+	Buy or sell pressure when trades over the last `delta_window` bars lean
+	at least `delta_ratio` to one side and at least half of those bars have
+	flow data; [] otherwise.
+	"""
+	spec = strategy or DEFAULT_STRATEGY
+	summary = flow_summary(flow, spec.delta_window)
+	if summary is None or summary["delta_ratio"] is None or summary["covered_bars"] * 2 < summary["bars"]:
+		return []
+	ratio = summary["delta_ratio"]
+	if abs(ratio) < spec.delta_ratio:
+		return []
+	return [{
+		"type": "buy_pressure" if ratio > 0 else "sell_pressure",
+		"timeframe": "5m",
+		"ts": int(flow.ts[-1]),
+		"delta_ratio": ratio,
+		"imbalance": summary["imbalance"],
+	}]
+
+
+def flow_series(db: Session, symbol: str, limit: int = 288, end_ms: Optional[int] = None) -> Dict[str, List[Any]]:
+	"""
+	The latest `limit` stored bars (up to `end_ms`) as parallel arrays.
+	"""
+	q = db.query(
+		FlowBar.ts, FlowBar.buy_volume, FlowBar.sell_volume, FlowBar.notional, FlowBar.trades, FlowBar.imbalance,
+	).filter(FlowBar.symbol == symbol.upper())
+	if end_ms is not None:
+		q = q.filter(FlowBar.ts <= end_ms)
+	rows = q.order_by(FlowBar.ts.desc()).limit(limit).all()[::-1]
+	ts, buy, sell, notional, trades, imbalance = (list(c) for c in zip(*rows)) if rows else ([],) * 6
+	bars = FlowBars(
+		np.asarray(ts, dtype=np.int64), np.asarray(buy, dtype=float), np.asarray(sell, dtype=float),
+		np.asarray(notional, dtype=float), np.asarray(trades, dtype=np.int64),
+		np.asarray([np.nan if v is None else v for v in imbalance], dtype=float),
+	)
+
+	def floats(a: np.ndarray) -> List[Optional[float]]:
+		return [None if v != v else v for v in a.tolist()]
+
+	return {
+		"ts": bars.ts.tolist(),
+		"buy_volume": bars.buy_volume.tolist(),
+		"sell_volume": bars.sell_volume.tolist(),
+		"delta": bars.delta.tolist(),
+		"vwap": floats(bars.vwap),
+		"trades": bars.trades.tolist(),
+		"imbalance": floats(bars.imbalance),
+	}
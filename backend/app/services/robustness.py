@@ -0,0 +1,155 @@
+"""
+Monte Carlo robustness of a backtest: how its return and drawdown hold up
+when the same trades come in another order or another mix.
+
+A backtest yields one equity path. `monte_carlo` builds thousands of
+alternatives from its trade returns, either by resampling them with
+replacement (`bootstrap`: return and drawdown both vary) or by shuffling
+their order (`permutation`: the compounded return is fixed, drawdown
+varies). It then reports the distribution of final return and max drawdown
+with confidence intervals. Each path compounds every trade at full equity,
+like `summarize`.
+
+Paths are simulated as (paths, trades) matrices in chunks sized to
+`CHUNK_BYTES`. Each chunk has its own seed from one SeedSequence, so the
+result depends on `seed` only, not on how chunks are spread across worker
+processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import math
+import os
+import time
+
+import numpy as np
+
+from ..core.config import get_settings
+
+METHODS = ("bootstrap", "permutation")
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+CHUNK_BYTES = 32 * 2**20  # working set of one chunk (~3 float64 matrices)
+PARALLEL_MIN_CELLS = 2_000_000  # paths x trades below which a process pool costs more than it saves
+
+
+def draw_returns(rng: np.random.Generator, returns: np.ndarray, method: str, paths: int) -> np.ndarray:
+	"""
+	(paths, trades) matrix of trade returns for `paths` simulated paths.
+	"""
+	if method == "bootstrap":
+		return returns[rng.integers(0, returns.shape[0], size=(paths, returns.shape[0]))]
+	return rng.permuted(np.broadcast_to(returns, (paths, returns.shape[0])), axis=1)
+
+
+def path_stats(returns: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	Final return and max drawdown (fractions) of each row of a (paths,
+	trades) return matrix; overwrites it.
+	"""
+	equity = returns
+	equity += 1.0
+	np.cumprod(equity, axis=1, out=equity)
+	final = equity[:, -1] - 1.0
+	peak = np.maximum.accumulate(equity, axis=1)
+	np.maximum(peak, 1.0, out=peak)  # starting equity counts as a peak
+	np.subtract(peak, equity, out=equity)
+	np.divide(equity, peak, out=equity)
+	return final, equity.max(axis=1)
+
+
+def _simulate_chunk(payload: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+	"""
+	One chunk of paths. Top-level so it pickles into worker processes.
+	"""
+	rng = np.random.default_rng(payload["seed"])
+	return path_stats(draw_returns(rng, payload["returns"], payload["method"], payload["paths"]))
+
+
+def chunk_plan(simulations: int, trades: int, seed: int) -> List[Tuple[int, np.random.SeedSequence]]:
+	"""
+	(paths, seed) per chunk; depends only on the arguments.
+	"""
+	size = max(1, CHUNK_BYTES // (3 * 8 * trades))
+	sizes = [min(size, simulations - start) for start in range(0, simulations, size)]
+	return list(zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))))
+
+
+def _distribution(values: np.ndarray, confidence: float) -> Dict[str, Any]:
+	tail = (1.0 - confidence) / 2.0 * 100.0
+	lo, hi = np.percentile(values, [tail, 100.0 - tail])
+	return {
+		"mean": round(float(values.mean()) * 100, 2),
+		"std": round(float(values.std()) * 100, 2),
+		"percentiles": {f"p{p}": round(float(v) * 100, 2) for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES))},
+		"ci": [round(float(lo) * 100, 2), round(float(hi) * 100, 2)],
+	}
+
+
+def monte_carlo(
+	returns: Sequence[float],
+	simulations: int = 10_000,
+	method: str = "bootstrap",
+	confidence: float = 0.95,
+	seed: Optional[int] = None,
+	workers: Optional[int] = None,
+) -> Dict[str, Any]:
+	"""
+	Distribution of final return and max drawdown (percent) over
+	`simulations` paths built from the fractional trade `returns`, with the
+	original path's values for comparison. `seed=None` draws one; it is
+	returned so the run can be repeated.
+	"""
+	if method not in METHODS:
+		raise ValueError(f"method must be one of {', '.join(METHODS)}")
+	if not 0 < confidence < 1:
+		raise ValueError("confidence must be between 0 and 1")
+	if simulations < 1:
+		raise ValueError("simulations must be at least 1")
+	r = np.asarray(returns, dtype=np.float64)
+	if r.shape[0] < 2:
+		raise ValueError("Monte Carlo needs at least 2 trades")
+	seed = int(np.random.SeedSequence().entropy % 2**63) if seed is None else seed
+
+	started = time.perf_counter()
+	payloads = [
+		{"returns": r, "method": method, "paths": paths, "seed": child}
+		for paths, child in chunk_plan(simulations, r.shape[0], seed)
+	]
+	workers = workers if workers is not None else (get_settings().backtest_workers or os.cpu_count() or 1)
+	workers = max(1, min(workers, len(payloads)))
+	if simulations * r.shape[0] < PARALLEL_MIN_CELLS:
+		workers = 1
+	if workers == 1:
+		results = [_simulate_chunk(p) for p in payloads]
+	else:
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = list(pool.map(_simulate_chunk, payloads))
+	final = np.concatenate([f for f, _ in results])
+	drawdown = np.concatenate([d for _, d in results])
+	simulate_ms = (time.perf_counter() - started) * 1000.0
+
+	observed_final, observed_dd = path_stats(r[None, :].copy())
+	worst = np.sort(final)[: max(1, int(math.ceil(simulations * (1.0 - confidence))))]
+	return {
+		"method": method,
+		"simulations": simulations,
+		"trades": int(r.shape[0]),
+		"confidence": confidence,
+		"seed": seed,
+		"observed": {
+			"pl_pct": round(float(observed_final[0]) * 100, 2),
+			"max_drawdown_pct": round(float(observed_dd[0]) * 100, 2),
+		},
+		"return_pct": {
+			**_distribution(final, confidence),
+			"expected_shortfall": round(float(worst.mean()) * 100, 2),  # mean of the worst (1 - confidence) of paths
+		},
+		"max_drawdown_pct": _distribution(drawdown, confidence),
+		"prob_loss": round(float((final < 0).mean()), 4),
+		"prob_drawdown_above_observed": round(float((drawdown > observed_dd[0]).mean()), 4),
+		"timing": {
+			"simulate_ms": round(simulate_ms, 2),
+			"chunks": len(payloads),
+			"workers": workers,
+		},
+	}
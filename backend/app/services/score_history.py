@@ -0,0 +1,189 @@
+"""
+Score history: per-candle fusion/signal scores kept per symbol for charting.
+
+Writers append one point per scored 5m candle (the forward-test worker from
+`get_signals`, the screener from the plain fusion score); points already
+stored are skipped, so re-processing a candle is harmless. Reads return a
+column-per-field series, downsampled into fixed time buckets when the range
+holds more points than the chart needs.
+"""
+
+from typing import Any, Dict, List, Optional
+import hashlib
+import json
+
+import numpy as np
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+from ..models.score_history import ScorePoint
+from ..core.scoring import DIRECTION_LABELS, GRADE_LABELS
+
+SOURCES = ("signals", "fusion")
+BUCKET_MS = {
+	"5m": 300_000,
+	"15m": 900_000,
+	"1h": 3_600_000,
+	"4h": 14_400_000,
+	"1d": 86_400_000,
+}
+ACTION_LABELS = {1: "buy", -1: "sell", 0: "hold"}
+_ACTION_CODES = {label: code for code, label in ACTION_LABELS.items()}
+_DIRECTION_CODES = {label: code for code, label in DIRECTION_LABELS.items()}
+
+
+def weights_version(weights: Dict[str, float]) -> str:
+	"""
+	Short digest identifying a set of learned weights; changes whenever any
+	weight does.
+	"""
+	blob = json.dumps({k: round(float(v), 6) for k, v in sorted(weights.items())}, separators=(",", ":"))
+	return hashlib.sha1(blob.encode()).hexdigest()[:12]
+
+
+def signal_point(symbol: str, ts: int, signal: Dict[str, Any]) -> Dict[str, Any]:
+	"""
+	History point for a `get_signals` result scored at candle `ts`.
+	"""
+	return {
+		"symbol": symbol.upper(),
+		"source": "signals",
+		"ts": int(ts),
+		"score": int(signal["fusion_score"]),
+		"grade": GRADE_LABELS.index(signal["fusion_grade"]),
+		"direction": _DIRECTION_CODES.get(signal.get("direction", "none"), 0),
+		"confidence": int(signal["confidence"]),
+		"action": _ACTION_CODES.get(signal.get("action", "hold"), 0),
+		"weights_version": weights_version(signal.get("weights") or {}),
+	}
+
+
+def fusion_point(symbol: str, ts: int, score: int, grade: int, direction: int, confidence: int) -> Dict[str, Any]:
+	"""
+	History point for a plain fusion score (grade/direction as codes).
+	"""
+	return {
+		"symbol": symbol.upper(),
+		"source": "fusion",
+		"ts": int(ts),
+		"score": int(score),
+		"grade": int(grade),
+		"direction": int(direction),
+		"confidence": int(confidence),
+		"action": None,
+		"weights_version": None,
+	}
+
+
+def record_points(db: Session, points: List[Dict[str, Any]]) -> int:
+	"""
+	Append points, skipping (symbol, source, ts) already stored. Adds them to
+	the session without committing; returns the number added.
+	"""
+	if not points:
+		return 0
+	keys = {(p["symbol"], p["source"], p["ts"]) for p in points}
+	ts_values = [k[2] for k in keys]
+	existing = set(
+		db.query(ScorePoint.symbol, ScorePoint.source, ScorePoint.ts).filter(
+			tuple_(ScorePoint.symbol, ScorePoint.source).in_({(k[0], k[1]) for k in keys}),
+			ScorePoint.ts >= min(ts_values),
+			ScorePoint.ts <= max(ts_values),
+		)
+	)
+	new_rows = []
+	for p in points:
+		key = (p["symbol"], p["source"], p["ts"])
+		if key in existing:
+			continue
+		existing.add(key)
+		new_rows.append(p)
+	if new_rows:
+		db.bulk_insert_mappings(ScorePoint, new_rows)
+	return len(new_rows)
+
+
+def pick_bucket(span_ms: int, max_points: int) -> Optional[str]:
+	"""
+	Smallest bucket that fits `span_ms` into `max_points`; None when raw 5m
+	points already fit.
+	"""
+	for name, ms in BUCKET_MS.items():
+		if span_ms // ms < max_points:
+			return None if name == "5m" else name
+	return "1d"
+
+
+def load_series(
+	db: Session,
+	symbol: str,
+	source: str = "signals",
+	start_ms: Optional[int] = None,
+	end_ms: Optional[int] = None,
+	bucket: Optional[str] = None,
+	max_points: int = 1000,
+) -> Dict[str, Any]:
+	"""
+	Points in [start_ms, end_ms) as parallel arrays. With a bucket (given, or
+	picked from `max_points`), each bucket reports the mean/min/max score and
+	the last grade, direction, confidence, action and weights version in it.
+	"""
+	if source not in SOURCES:
+		raise ValueError(f"source must be one of {', '.join(SOURCES)}")
+	if bucket is not None and bucket not in BUCKET_MS:
+		raise ValueError(f"bucket must be one of {', '.join(BUCKET_MS)}")
+
+	q = db.query(
+		ScorePoint.ts, ScorePoint.score, ScorePoint.grade, ScorePoint.direction,
+		ScorePoint.confidence, ScorePoint.action, ScorePoint.weights_version,
+	).filter(ScorePoint.symbol == symbol.upper(), ScorePoint.source == source)
+	if start_ms is not None:
+		q = q.filter(ScorePoint.ts >= start_ms)
+	if end_ms is not None:
+		q = q.filter(ScorePoint.ts < end_ms)
+	rows = q.order_by(ScorePoint.ts.asc()).all()
+
+	if bucket is None and rows:
+		bucket = pick_bucket(int(rows[-1][0]) - int(rows[0][0]), max_points)
+
+	cols = list(zip(*rows)) if rows else [()] * 7
+	ts = np.asarray(cols[0], dtype=np.int64)
+	score = np.asarray(cols[1], dtype=np.int64)
+	last = np.arange(len(rows))
+	score_min = score_max = score_mean = score
+	if bucket is not None and len(rows):
+		ms = BUCKET_MS[bucket]
+		keys = ts // ms
+		starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+		last = np.r_[starts[1:], len(rows)] - 1
+		sizes = last - starts + 1
+		score_mean = np.round(np.add.reduceat(score, starts) / sizes, 2)
+		score_min = np.minimum.reduceat(score, starts)
+		score_max = np.maximum.reduceat(score, starts)
+		ts = keys[starts] * ms
+
+	def pick(col: int) -> List[Any]:
+		values = cols[col]
+		return [values[i] for i in last.tolist()]
+
+	series: Dict[str, Any] = {
+		"t": ts.tolist(),
+		"score": score_mean.tolist(),
+		"grade": [GRADE_LABELS[g] for g in pick(2)],
+		"direction": [DIRECTION_LABELS[d] for d in pick(3)],
+		"confidence": pick(4),
+	}
+	if bucket is not None:
+		series["score_min"] = score_min.tolist()
+		series["score_max"] = score_max.tolist()
+	if source == "signals":
+		series["action"] = [ACTION_LABELS.get(a) for a in pick(5)]
+		series["weights_version"] = pick(6)
+	return {
+		"symbol": symbol.upper(),
+		"source": source,
+		"bucket": bucket or "5m",
+		"points": len(series["t"]),
+		"raw_points": len(rows),
+		"series": series,
+	}
@@ -0,0 +1,489 @@
+"""
+Market screener: fusion scores for every listed spot pair.
+
+A refresh lists the preferred exchange's active spot markets, fetches their
+5m/15m candles concurrently, runs the fusion trend/volume detection per symbol
+and scores all of them with one `score_setup_batch` call. The result is kept
+column-wise (one array per field) in `screener_snapshots`, so any API process
+can load the latest pass and answer filtered/sorted queries with a numpy mask
+and a single argsort instead of re-running the pipeline.
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import json
+import logging
+import math
+import threading
+import time
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from ..core import metrics
+from ..core.config import get_settings
+from ..core.market_frame import MarketFrame
+from ..core.scoring import (
+	DIRECTION_LABELS,
+	GRADE_LABELS,
+	SETUP_SIGNAL_KEYS,
+	TREND_CODES,
+	score_setup_batch,
+	signal_counts,
+)
+from ..models.screener import ScreenerSnapshot
+from ..api.v1.endpoints.trend import detect_trend_and_signals  # type: ignore
+from ..api.v1.endpoints.volume import detect_volume_signals  # type: ignore
+from .alerts import EVENT_FIELDS, candle_events, compiled_rules, evaluate_alerts, watched_symbols
+from .candle_store import closed_rows
+from .leader import LeaderLease
+from .market_data import MarketDataRouter, get_market_data
+from .score_history import fusion_point, record_points
+from .warm_cache import BAR_SECONDS
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOTS_KEPT = 5
+BARS_PER_DAY_5M = 288
+SORT_KEYS = ("score", "confidence", "volume", "change")
+DIRECTIONS = ("any", "long", "short", "none")
+_DIRECTION_CODES = {label: code for code, label in DIRECTION_LABELS.items()}
+
+
+def evaluate_symbol(router: MarketDataRouter, symbol: str, limit: int, now_ms: Optional[int] = None) -> Dict[str, Any]:
+	"""
+	Fusion inputs (trend codes and signal counts) plus 24h market stats for
+	one symbol, computed the way `get_fusion` does over the candles closed by
+	`now_ms` (now by default). The bar still forming is dropped, so events,
+	`last_ts` and the alert dedup key all describe the candle that just closed.
+	"""
+	now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+	candles = router.fetch_candles(symbol, {"5m": limit, "15m": limit})
+	f5 = MarketFrame.from_rows(closed_rows(candles.timeframes["5m"], "5m", now_ms), "5m")
+	f15 = MarketFrame.from_rows(closed_rows(candles.timeframes["15m"], "15m", now_ms), "15m")
+	summary, trend_signals = detect_trend_and_signals(f5.trend(), f15.trend())
+	volume_signals = detect_volume_signals(f5.volume(), "5m") + detect_volume_signals(f15.volume(), "15m")
+
+	close = f5.df["close"].to_numpy(dtype=float)
+	day = f5.df.iloc[-BARS_PER_DAY_5M:]
+	quote_volume = float((day["close"] * day["volume"]).sum()) if len(day) else 0.0
+	change = (close[-1] / close[-min(len(close), BARS_PER_DAY_5M + 1)] - 1.0) * 100.0 if len(close) else 0.0
+	rv = f5["rv"].iloc[-1] if len(f5) else float("nan")
+	rv15 = f15["rv"].iloc[-1] if len(f15) else float("nan")
+	last_ts = {tf: int(f.df["timestamp"].iloc[-1]) for tf, f in (("5m", f5), ("15m", f15)) if len(f)}
+	return {
+		"trend": TREND_CODES.get(summary["trend"], 0),
+		"trend_5m": TREND_CODES.get(summary["trend_5m"], 0),
+		"counts": signal_counts(trend_signals, volume_signals),
+		"last_close": float(close[-1]) if len(close) else None,
+		"change_24h_pct": float(change),
+		"quote_volume_24h": quote_volume,
+		"rv": None if rv != rv else float(rv),
+		"rv_15m": None if rv15 != rv15 else float(rv15),
+		"last_ts": last_ts.get("5m"),
+		"exchange": candles.exchange,
+		"events": candle_events(trend_signals, volume_signals, last_ts),
+	}
+
+
+class Snapshot:
+	"""
+	One screener pass, column-wise. `query` filters and ranks without
+	touching per-symbol Python objects until the page is built.
+	"""
+
+	__slots__ = (
+		"id", "created_at", "exchange", "elapsed_ms", "failed",
+		"symbol", "quote", "score", "grade", "direction", "confidence",
+		"quote_volume_24h", "change_24h_pct", "last_close", "rv", "counts",
+	)
+
+	def __init__(self, payload: Dict[str, Any], **meta: Any) -> None:
+		self.id: Optional[int] = meta.get("id")
+		self.created_at: Optional[datetime] = meta.get("created_at")
+		self.exchange: str = meta.get("exchange", "")
+		self.elapsed_ms: Optional[float] = meta.get("elapsed_ms")
+		self.failed: int = meta.get("failed", 0)
+		self.symbol = np.asarray(payload["symbol"], dtype=object)
+		self.quote = np.asarray([s.split("/")[-1] for s in payload["symbol"]], dtype=object)
+		self.score = np.asarray(payload["score"], dtype=np.int64)
+		self.grade = np.asarray(payload["grade"], dtype=np.int8)
+		self.direction = np.asarray(payload["direction"], dtype=np.int8)
+		self.confidence = np.asarray(payload["confidence"], dtype=np.int64)
+		# Missing values are stored as null and read back as NaN
+		self.quote_volume_24h = np.asarray(payload["quote_volume_24h"], dtype=float)
+		self.change_24h_pct = np.asarray(payload["change_24h_pct"], dtype=float)
+		self.last_close = np.asarray(payload["last_close"], dtype=float)
+		self.rv = np.asarray(payload["rv"], dtype=float)
+		self.counts = {k: np.asarray(payload["counts"][k], dtype=np.int64) for k in SETUP_SIGNAL_KEYS}
+
+	def __len__(self) -> int:
+		return int(self.score.shape[0])
+
+	def payload(self) -> Dict[str, Any]:
+		def floats(a: np.ndarray) -> List[Optional[float]]:
+			return [None if v != v else v for v in a.tolist()]
+
+		return {
+			"symbol": self.symbol.tolist(),
+			"score": self.score.tolist(),
+			"grade": self.grade.tolist(),
+			"direction": self.direction.tolist(),
+			"confidence": self.confidence.tolist(),
+			"quote_volume_24h": floats(self.quote_volume_24h),
+			"change_24h_pct": floats(self.change_24h_pct),
+			"last_close": floats(self.last_close),
+			"rv": floats(self.rv),
+			"counts": {k: v.tolist() for k, v in self.counts.items()},
+		}
+
+	def query(
+		self,
+		min_grade: str = "none",
+		direction: str = "any",
+		min_volume: float = 0.0,
+		quote: Optional[str] = None,
+		sort: str = "score",
+		limit: int = 50,
+	) -> List[Dict[str, Any]]:
+		"""
+		Rows passing every filter, best first. Ties on the sort key are broken
+		by 24h quote volume, then symbol.
+		"""
+		if min_grade not in GRADE_LABELS:
+			raise ValueError(f"min_grade must be one of {', '.join(GRADE_LABELS)}")
+		if direction not in DIRECTIONS:
+			raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+		if sort not in SORT_KEYS:
+			raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+
+		mask = self.grade >= GRADE_LABELS.index(min_grade)
+		if direction != "any":
+			mask &= self.direction == _DIRECTION_CODES[direction]
+		if min_volume > 0:
+			mask &= self.quote_volume_24h >= min_volume
+		if quote:
+			mask &= self.quote == quote.upper()
+		idx = np.flatnonzero(mask)
+
+		key = {
+			"score": self.score,
+			"confidence": self.confidence,
+			"volume": self.quote_volume_24h,
+			"change": self.change_24h_pct,
+		}[sort][idx].astype(float)
+		volume = self.quote_volume_24h[idx]
+		# lexsort: last key is primary; NaN volumes/changes sink to the bottom
+		order = np.lexsort((self.symbol[idx], -np.nan_to_num(volume, nan=-np.inf), -np.nan_to_num(key, nan=-np.inf)))
+		return [self.row(int(i)) for i in idx[order[:limit]]]
+
+	def row(self, i: int) -> Dict[str, Any]:
+		def opt(v: float) -> Optional[float]:
+			return None if v != v else float(v)
+
+		return {
+			"symbol": self.symbol[i],
+			"score": int(self.score[i]),
+			"grade": GRADE_LABELS[int(self.grade[i])],
+			"direction": DIRECTION_LABELS[int(self.direction[i])],
+			"confidence": int(self.confidence[i]),
+			"last_close": opt(self.last_close[i]),
+			"change_24h_pct": opt(self.change_24h_pct[i]),
+			"quote_volume_24h": opt(self.quote_volume_24h[i]),
+			"rv": opt(self.rv[i]),
+			"signals": {k: int(v[i]) for k, v in self.counts.items() if v[i]},
+		}
+
+
+def score_symbols(results: Dict[str, Dict[str, Any]]) -> Snapshot:
+	"""
+	Score every evaluated symbol in one vectorized pass.
+	"""
+	symbols = sorted(results)
+	rows = [results[s] for s in symbols]
+	batch = score_setup_batch(
+		np.array([r["trend"] for r in rows], dtype=np.int8),
+		np.array([r["trend_5m"] for r in rows], dtype=np.int8),
+		{k: np.array([r["counts"][k] for r in rows], dtype=np.int64) for k in SETUP_SIGNAL_KEYS},
+	)
+	return Snapshot({
+		"symbol": symbols,
+		"score": batch.score,
+		"grade": batch.grade,
+		"direction": batch.direction,
+		"confidence": batch.confidence,
+		"quote_volume_24h": [r["quote_volume_24h"] for r in rows],
+		"change_24h_pct": [r["change_24h_pct"] for r in rows],
+		"last_close": [np.nan if r["last_close"] is None else r["last_close"] for r in rows],
+		"rv": [np.nan if r["rv"] is None else r["rv"] for r in rows],
+		"counts": batch.counts,
+	})
+
+
+def alert_facts(results: Dict[str, Dict[str, Any]], snapshot: Snapshot) -> Dict[str, np.ndarray]:
+	"""
+	Per-symbol fact columns the alert rules are evaluated against, aligned
+	with `snapshot.symbol`.
+	"""
+	rows = [results[s] for s in snapshot.symbol.tolist()]
+	facts: Dict[str, np.ndarray] = {
+		"score": snapshot.score,
+		"confidence": snapshot.confidence,
+		"grade": snapshot.grade,
+		"direction": snapshot.direction,
+		"rv_5m": snapshot.rv,
+		"rv_15m": np.array([np.nan if r["rv_15m"] is None else r["rv_15m"] for r in rows], dtype=float),
+		"change_24h_pct": snapshot.change_24h_pct,
+		"quote_volume_24h": snapshot.quote_volume_24h,
+		"last_close": snapshot.last_close,
+		"trend": np.array([r["trend"] for r in rows], dtype=np.int8),
+		"trend_5m": np.array([r["trend_5m"] for r in rows], dtype=np.int8),
+	}
+	for field in EVENT_FIELDS:
+		facts[field] = np.array([r["events"][field] for r in rows], dtype=np.int8)
+	return facts
+
+
+class ScreenerBusy(Exception):
+	"""Raised when a screener pass is already running, here or in the `screener` lease holder."""
+
+
+@lru_cache
+def screener_lease() -> LeaderLease:
+	"""
+	Lease of the process that runs screener and alert passes.
+	"""
+	return LeaderLease("screener", ttl_seconds=get_settings().leader_lease_seconds)
+
+
+# One pass at a time per process (the worker's and on-demand ones)
+_pass_lock = threading.Lock()
+
+
+def next_pass_at(now: float, interval_seconds: float, delay_seconds: float) -> float:
+	"""
+	Epoch seconds of the next scheduled pass: `delay_seconds` after the next
+	5m close that falls on a multiple of `interval_seconds` (rounded up to
+	whole bars), so each pass sees the candle that just closed.
+	"""
+	every = max(1, math.ceil(interval_seconds / BAR_SECONDS)) * BAR_SECONDS
+	return ((now - delay_seconds) // every + 1) * every + delay_seconds
+
+
+def _screen(router: MarketDataRouter, listed: Sequence[str]) -> Tuple[Dict[str, Dict[str, Any]], int]:
+	"""
+	`evaluate_symbol` for every listed symbol, `screener_concurrency` at a
+	time: (results by symbol, symbols skipped because their candles could
+	not be loaded).
+	"""
+	settings = get_settings()
+	results: Dict[str, Dict[str, Any]] = {}
+	failed = 0
+	now_ms = int(time.time() * 1000)  # one cutoff for the whole pass
+	with metrics.span("evaluate"), ThreadPoolExecutor(max_workers=max(1, settings.screener_concurrency)) as pool:
+		futures = {s: pool.submit(evaluate_symbol, router, s, settings.screener_candles, now_ms) for s in listed}
+		for symbol, future in futures.items():
+			try:
+				results[symbol] = future.result()
+			except Exception as e:
+				failed += 1
+				logger.warning("Screener: symbol skipped", extra={"symbol": symbol, "error": f"{type(e).__name__}: {e}"})
+	return results, failed
+
+
+def _run_alerts(db: Session, results: Dict[str, Dict[str, Any]], snapshot: Snapshot) -> int:
+	"""
+	Active rules evaluated against a scored screen; the number of alerts fired.
+	"""
+	if not len(snapshot):
+		return 0
+	candle_ts = np.array([results[s]["last_ts"] or 0 for s in snapshot.symbol.tolist()], dtype=np.int64)
+	with metrics.span("alerts"):
+		return len(evaluate_alerts(db, snapshot.symbol.tolist(), alert_facts(results, snapshot), candle_ts))
+
+
+def refresh_snapshot(
+	db: Session,
+	router: Optional[MarketDataRouter] = None,
+	symbols: Optional[Sequence[str]] = None,
+) -> ScreenerSnapshot:
+	"""
+	Evaluate the market (or `symbols`) and store a new snapshot, pruning
+	older ones, then run the alert rules on it. Symbols whose candles cannot
+	be loaded are skipped and counted. Symbols named by alert rules are always
+	included.
+	"""
+	with _pass_lock:
+		return _refresh_snapshot(db, router, symbols)
+
+
+def refresh_now(db: Session) -> ScreenerSnapshot:
+	"""
+	`refresh_snapshot` on demand, under the `screener` lease like the
+	worker's passes. It runs in the lease holder, or in any process while
+	nobody holds the lease (the lease is then released again). Raises
+	ScreenerBusy when another process holds it or a pass is running here,
+	instead of screening the market a second time.
+	"""
+	lease = screener_lease()
+	held = lease.is_leader
+	if not lease.acquire(db):
+		raise ScreenerBusy("Another process holds the screener lease and re-screens after every candle close")
+	try:
+		if _pass_lock.locked():
+			raise ScreenerBusy("A screener pass is already running")
+		return refresh_snapshot(db)
+	finally:
+		if not held:
+			lease.release(db)
+
+
+def _refresh_snapshot(
+	db: Session,
+	router: Optional[MarketDataRouter],
+	symbols: Optional[Sequence[str]],
+) -> ScreenerSnapshot:
+	settings = get_settings()
+	router = router or get_market_data()
+	t0 = time.perf_counter()
+	with metrics.scope("screener.refresh"):
+		exchange = None
+		if symbols is None:
+			with metrics.span("load_markets"):
+				exchange, listed = router.list_markets(settings.screener_quotes)
+		else:
+			listed = list(symbols)
+		listed = listed[: settings.screener_max_symbols]
+		seen = set(listed)
+		listed += [s for s in watched_symbols(db) if s not in seen]
+
+		results, failed = _screen(router, listed)
+		if exchange is None:
+			# Explicit symbols: label the snapshot with the exchange most of them came from
+			exchange = Counter(r["exchange"] for r in results.values()).most_common(1)[0][0] if results else ""
+
+		with metrics.span("scoring"):
+			snapshot = score_symbols(results)
+
+		with metrics.span("db_commit"):
+			# Each screen also extends the symbols' fusion score history
+			record_points(db, [
+				fusion_point(s, results[s]["last_ts"], snapshot.score[i], snapshot.grade[i], snapshot.direction[i], snapshot.confidence[i])
+				for i, s in enumerate(snapshot.symbol.tolist())
+				if results[s]["last_ts"] is not None
+			])
+			row = ScreenerSnapshot(
+				exchange=exchange,
+				symbols=len(snapshot),
+				failed=failed,
+				elapsed_ms=(time.perf_counter() - t0) * 1000.0,
+				payload_json=json.dumps(snapshot.payload(), separators=(",", ":")),
+			)
+			db.add(row)
+			db.commit()
+			db.refresh(row)
+			stale = [
+				sid for (sid,) in db.query(ScreenerSnapshot.id)
+				.order_by(ScreenerSnapshot.id.desc())
+				.offset(SNAPSHOTS_KEPT)
+				.all()
+			]
+			if stale:
+				db.query(ScreenerSnapshot).filter(ScreenerSnapshot.id.in_(stale)).delete(synchronize_session=False)
+				db.commit()
+
+		fired = 0
+		if settings.alerts_enabled:
+			try:
+				fired = _run_alerts(db, results, snapshot)
+			except Exception:
+				db.rollback()
+				logger.exception("Screener: alert evaluation failed", extra={"snapshot_id": row.id})
+
+	logger.info(
+		"Screener refreshed",
+		extra={"snapshot_id": row.id, "exchange": exchange, "symbols": row.symbols, "failed": failed, "alerts": fired, "elapsed_ms": round(row.elapsed_ms, 1)},
+	)
+	return row
+
+
+def alert_pass(db: Session, router: Optional[MarketDataRouter] = None) -> int:
+	"""
+	Alert rules without the screener: evaluate the symbols the active rules
+	name, or the whole market (as a screen would list it) when a rule names
+	none. Nothing but the alerts is stored, so `/screener` keeps serving the
+	last full screen. Returns the number of alerts fired.
+	"""
+	with _pass_lock:
+		return _alert_pass(db, router)
+
+
+def _alert_pass(db: Session, router: Optional[MarketDataRouter]) -> int:
+	settings = get_settings()
+	compiled = compiled_rules(db)
+	if not len(compiled):
+		return 0
+	router = router or get_market_data()
+	t0 = time.perf_counter()
+	with metrics.scope("alerts.pass"):
+		listed = watched_symbols(db)
+		if any(not rule.symbols for rule in compiled.rules):
+			with metrics.span("load_markets"):
+				_, market = router.list_markets(settings.screener_quotes)
+			seen = set(listed)
+			listed += [s for s in market[: settings.screener_max_symbols] if s not in seen]
+
+		results, failed = _screen(router, listed)
+		with metrics.span("scoring"):
+			snapshot = score_symbols(results)
+		try:
+			fired = _run_alerts(db, results, snapshot)
+		except Exception:
+			db.rollback()
+			logger.exception("Alerts: rule evaluation failed")
+			fired = 0
+
+	logger.info(
+		"Alert rules evaluated",
+		extra={"symbols": len(snapshot), "failed": failed, "alerts": fired, "elapsed_ms": round((time.perf_counter() - t0) * 1000.0, 1)},
+	)
+	return fired
+
+
+_cache: Optional[Snapshot] = None
+_cache_lock = threading.Lock()
+
+
+def latest_snapshot(db: Session) -> Optional[Snapshot]:
+	"""
+	The newest stored snapshot; decoded once per process and reused until a
+	newer one appears.
+	"""
+	global _cache
+	latest_id = db.query(ScreenerSnapshot.id).order_by(ScreenerSnapshot.id.desc()).limit(1).scalar()
+	if latest_id is None:
+		return None
+	cached = _cache
+	if cached is not None and cached.id == latest_id:
+		return cached
+	with _cache_lock:
+		if _cache is not None and _cache.id == latest_id:
+			return _cache
+		row = db.query(ScreenerSnapshot).filter(ScreenerSnapshot.id == latest_id).first()
+		if row is None:
+			return _cache
+		created_at = row.created_at
+		if created_at is not None and created_at.tzinfo is None:
+			created_at = created_at.replace(tzinfo=timezone.utc)
+		_cache = Snapshot(
+			json.loads(row.payload_json),
+			id=row.id,
+			created_at=created_at,
+			exchange=row.exchange,
+			elapsed_ms=row.elapsed_ms,
+			failed=row.failed,
+		)
+		return _cache
@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import Any, Optional
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL_SECONDS = 60.0
+
+
+class SharedCache:
+	"""
+	Small SQLite-backed key/value cache with per-key TTL.
+
+	One file on local disk is shared by every worker process on the host
+	(WAL mode lets readers and a writer proceed concurrently), so N uvicorn
+	workers fetch a symbol's candles from the exchange once instead of N times.
+	Values are JSON-encoded; errors are logged and treated as misses so the
+	cache can never take a request down. Writers delete expired rows at most
+	every `PURGE_INTERVAL_SECONDS`, so the file stays the size of the live
+	entries. (The cache is per host, which a database-wide leader lease is
+	not, so every process purges its own file rather than one leader.)
+
+	Only what goes through this cache (candle fetches) is shared; computed
+	responses such as the warm cache stay per process.
+	"""
+
+	def __init__(self, path: str) -> None:
+		self.path = path
+		self._local = threading.local()
+		self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+
+	def _conn(self) -> sqlite3.Connection:
+		conn = getattr(self._local, "conn", None)
+		if conn is None:
+			os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+			conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+			conn.execute("PRAGMA journal_mode=WAL")
+			conn.execute("PRAGMA synchronous=NORMAL")
+			conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)")
+			self._local.conn = conn
+		return conn
+
+	def get(self, key: str) -> Optional[Any]:
+		try:
+			row = self._conn().execute(
+				"SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+			).fetchone()
+		except sqlite3.Error:
+			logger.exception("Shared cache: read failed", extra={"key": key})
+			return None
+		return json.loads(row[0]) if row else None
+
+	def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+		try:
+			self._conn().execute(
+				"INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+				(key, json.dumps(value, separators=(",", ":")), time.time() + ttl_seconds),
+			)
+		except sqlite3.Error:
+			logger.exception("Shared cache: write failed", extra={"key": key})
+		if time.monotonic() >= self._next_purge:
+			self._next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+			self.purge_expired()
+
+	def purge_expired(self) -> int:
+		try:
+			return self._conn().execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),)).rowcount
+		except sqlite3.Error:
+			logger.exception("Shared cache: purge failed")
+			return 0
+
+
+@lru_cache
+def get_shared_cache() -> Optional[SharedCache]:
+	"""
+	The host-wide cache, or None when `shared_cache_path` is not configured.
+	"""
+	path = get_settings().shared_cache_path
+	return SharedCache(path) if path else None
@@ -0,0 +1,92 @@
+"""
+Strategy registry: resolves a strategy name to its `StrategySpec`.
+
+Names are looked up in order among the builtin "fusion" strategy, the
+`STRATEGIES` setting and the `strategies` table. Stored definitions are
+immutable, so a resolved spec is cached for the life of the process.
+"""
+
+from typing import Dict, List, Optional
+import json
+import threading
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from ..core.config import get_settings
+from ..core.strategy import DEFAULT_STRATEGY, StrategySpec
+from ..db import SessionLocal
+from ..models.strategy import StrategyDefinition
+
+_cache: Dict[str, StrategySpec] = {}
+_lock = threading.Lock()
+
+
+class UnknownStrategy(LookupError):
+	pass
+
+
+class StrategyExists(Exception):
+	pass
+
+
+def _configured() -> Dict[str, StrategySpec]:
+	specs = {DEFAULT_STRATEGY.name: DEFAULT_STRATEGY}
+	for name, params in get_settings().strategies.items():
+		specs[name] = StrategySpec.from_dict(params, name=name)
+	return specs
+
+
+def get_strategy(name: Optional[str] = None, db: Optional[Session] = None) -> StrategySpec:
+	"""
+	The spec called `name` (the stock strategy when empty); raises
+	UnknownStrategy when no definition has that name.
+	"""
+	name = name or DEFAULT_STRATEGY.name
+	spec = _cache.get(name)
+	if spec is not None:
+		return spec
+	spec = _configured().get(name)
+	if spec is None:
+		own = db is None
+		session = db or SessionLocal()
+		try:
+			row = session.query(StrategyDefinition).filter(StrategyDefinition.name == name).first()
+			params = json.loads(row.params_json) if row else None
+		finally:
+			if own:
+				session.close()
+		if params is None:
+			raise UnknownStrategy(f"Unknown strategy {name!r}")
+		spec = StrategySpec.from_dict(params, name=name)
+	with _lock:
+		_cache[name] = spec
+	return spec
+
+
+def list_strategies(db: Session) -> List[StrategySpec]:
+	specs = _configured()
+	for row in db.query(StrategyDefinition).order_by(StrategyDefinition.id.asc()).all():
+		if row.name not in specs:
+			specs[row.name] = StrategySpec.from_dict(json.loads(row.params_json), name=row.name)
+	return list(specs.values())
+
+
+def create_strategy(db: Session, name: str, params: Dict) -> StrategySpec:
+	"""
+	Validate and store a strategy; raises ValueError on bad parameters and
+	StrategyExists when the name is taken.
+	"""
+	name = name.strip()
+	if not name:
+		raise ValueError("Strategy name must not be empty")
+	spec = StrategySpec.from_dict(params, name=name)
+	if name in _configured():
+		raise StrategyExists(f"Strategy {name!r} already exists")
+	db.add(StrategyDefinition(name=name, params_json=json.dumps(spec.overrides())))
+	try:
+		db.commit()
+	except IntegrityError:
+		db.rollback()
+		raise StrategyExists(f"Strategy {name!r} already exists")
+	return spec
@@ -0,0 +1,207 @@
+"""
+Pre-computed `/fusion`, `/signals` and `/learning` responses for the
+`warm_cache_symbols` watchlist.
+
+Responses for watched symbols are kept per 5m candle: an entry computed
+after a close is served until the next one. The warm-up worker recomputes
+every watched symbol right after startup and `warm_cache_delay_seconds`
+after each close (the delay gives exchanges time to publish the closed
+candle, and the old entries stay valid until then). Requests therefore find
+the response already computed, and a request that does miss waits for an
+in-flight computation of the same response instead of starting its own,
+so a close no longer sends every client to the exchange at once.
+
+Only the responses the warm-up pass computes (default parameters, each of
+`warm_cache_strategies`) are stored, one entry per symbol, kind and
+parameter set, replaced each period; other parameters compute per request.
+`/signals` entries also carry the model file stamp they were computed with,
+so a model retrained or updated by another process is picked up on the next
+request instead of at the next close.
+
+Entries are per process. With several workers, set `shared_cache_path` so
+their warm-up passes share one candle fetch per symbol.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+import logging
+import threading
+import time
+
+from ..core import profiling
+from ..core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+BAR_SECONDS = 300
+
+Key = Tuple[str, str, Hashable]
+
+
+class WarmCache:
+	"""
+	Responses of watched symbols keyed by (kind, symbol, params), each valid
+	for the candle period (and version) it was computed in.
+	"""
+
+	def __init__(
+		self,
+		symbols: Iterable[str],
+		strategies: Iterable[str] = ("fusion",),
+		delay_seconds: float = 3.0,
+		clock: Callable[[], float] = time.time,
+	) -> None:
+		self._watched = {s.upper(): s for s in symbols}
+		self.strategies = frozenset(strategies)
+		self.delay_seconds = delay_seconds
+		self._clock = clock
+		self._entries: Dict[Key, Tuple[int, Hashable, Any]] = {}
+		self._locks: Dict[Key, threading.Lock] = {}
+		self._lock = threading.Lock()
+		self.hits = 0
+		self.misses = 0
+
+	def __len__(self) -> int:
+		return len(self._entries)
+
+	@property
+	def symbols(self) -> List[str]:
+		return list(self._watched.values())
+
+	def period(self, now: Optional[float] = None) -> int:
+		"""
+		Index of the candle period entries belong to; it turns over
+		`delay_seconds` after each close.
+		"""
+		return int(((self._clock() if now is None else now) - self.delay_seconds) // BAR_SECONDS)
+
+	def next_refresh(self, now: Optional[float] = None) -> float:
+		"""
+		Epoch seconds when the current period's entries go stale.
+		"""
+		return (self.period(now) + 1) * BAR_SECONDS + self.delay_seconds
+
+	def watches(self, symbol: str) -> bool:
+		return symbol.upper() in self._watched
+
+	def _key_lock(self, key: Key) -> threading.Lock:
+		with self._lock:
+			return self._locks.setdefault(key, threading.Lock())
+
+	def warms(self, strategy: str) -> bool:
+		return strategy in self.strategies
+
+	def get(
+		self,
+		kind: str,
+		symbol: str,
+		params: Hashable,
+		compute: Callable[[], Any],
+		warmed: bool = False,
+		version: Hashable = None,
+	) -> Any:
+		"""
+		The stored response for this period and `version`, else `compute()`.
+		Only responses the warm-up pass pre-computes (`warmed`) for watched
+		symbols are stored; anything else always computes. Exceptions from
+		`compute` are not stored. Replays (simulated clocks, captured candles)
+		always compute.
+		"""
+		if not warmed or not self.watches(symbol) or profiling.is_replaying():
+			return compute()
+		key = (kind, symbol.upper(), params)
+		period = self.period()
+		entry = self._entries.get(key)
+		if entry is not None and entry[:2] == (period, version):
+			self.hits += 1
+			return entry[2]
+		with self._key_lock(key):
+			# Another request may have computed it while we waited
+			entry = self._entries.get(key)
+			if entry is not None and entry[:2] == (period, version):
+				self.hits += 1
+				return entry[2]
+			self.misses += 1
+			value = compute()
+			self._entries[key] = (period, version, value)
+			return value
+
+	def put(self, kind: str, symbol: str, params: Hashable, compute: Callable[[], Any], version: Hashable = None) -> Any:
+		"""
+		Recompute and store a response, whatever is stored for it.
+		"""
+		key = (kind, symbol.upper(), params)
+		with self._key_lock(key):
+			period = self.period()
+			value = compute()
+			self._entries[key] = (period, version, value)
+			return value
+
+	def invalidate(self, symbol: str) -> None:
+		"""
+		Drop a symbol's responses in this process (e.g. after its model is
+		retrained here; other processes notice the new model stamp).
+		"""
+		symbol = symbol.upper()
+		with self._lock:
+			for key in [k for k in self._entries if k[1] == symbol]:
+				del self._entries[key]
+
+
+@lru_cache
+def get_warm_cache() -> WarmCache:
+	settings = get_settings()
+	return WarmCache(settings.warm_cache_symbols, settings.warm_cache_strategies, delay_seconds=settings.warm_cache_delay_seconds)
+
+
+def warm_symbol(symbol: str, cache: Optional[WarmCache] = None) -> None:
+	"""
+	Recompute a symbol's `/fusion`, `/signals` and `/learning` responses for
+	their default parameters and each of `warm_cache_strategies`. Newly
+	labeled candles are folded into the symbol's trained model first (by
+	the `learning` lease holder only).
+	"""
+	# Endpoints import this module; import them only when warming
+	from ..api.v1.endpoints.fusion import FUSION_LIMIT, fusion_result  # type: ignore
+	from ..api.v1.endpoints.learning import LEARNING_LIMIT, learn_weights  # type: ignore
+	from ..api.v1.endpoints.ohlcv import load_candles  # type: ignore
+	from ..api.v1.endpoints.signals import SIGNALS_LEARNER, SIGNALS_LIMIT, candle_limits, strategy_signals  # type: ignore
+	from ..db import SessionLocal
+	from .learning_model import model_stamp, refresh_model
+	from .strategies import get_strategy
+
+	cache = cache or get_warm_cache()
+	specs = [get_strategy(name) for name in get_settings().warm_cache_strategies]
+	for spec in specs:
+		cache.put("fusion", symbol, (FUSION_LIMIT, spec.name), lambda: fusion_result(symbol, FUSION_LIMIT, spec))
+	# All strategies' signals share one fetch and one set of indicators
+	candles = load_candles(symbol, candle_limits(SIGNALS_LIMIT))
+	db = SessionLocal()
+	try:
+		refresh_model(db, symbol, candles)
+	finally:
+		db.close()
+	stamp = model_stamp(symbol)
+	results = strategy_signals(symbol, specs, limit=SIGNALS_LIMIT, learner=SIGNALS_LEARNER, candles=candles)
+	for spec, result in zip(specs, results):
+		cache.put("signals", symbol, (SIGNALS_LIMIT, SIGNALS_LEARNER, spec.name), lambda: result, version=stamp)
+	cache.put("learning", symbol, LEARNING_LIMIT, lambda: learn_weights(symbol, LEARNING_LIMIT))
+
+
+def warm_all(cache: Optional[WarmCache] = None) -> Dict[str, Any]:
+	"""
+	`warm_symbol` for every watched symbol; a failing symbol is logged and
+	skipped (its requests compute on demand).
+	"""
+	cache = cache or get_warm_cache()
+	started = time.perf_counter()
+	failed = []
+	for symbol in cache.symbols:
+		try:
+			warm_symbol(symbol, cache)
+		except Exception:
+			failed.append(symbol)
+			logger.exception("Warm cache: warm-up failed", extra={"symbol": symbol})
+	elapsed_ms = (time.perf_counter() - started) * 1000.0
+	logger.info("Warm cache: refreshed", extra={"symbols": len(cache.symbols), "failed": len(failed), "elapsed_ms": round(elapsed_ms, 1)})
+	return {"symbols": len(cache.symbols), "failed": failed, "elapsed_ms": round(elapsed_ms, 1)}
@@ -0,0 +1,261 @@
+"""
+Alert rule engine: batch evaluation of thousands of rules over a market pass.
+
+	python -m backend.benchmarks.bench_alerts [--rules 5000] [--symbols 300] [--market-symbols 40]
+
+1. Random rules against random per-symbol facts: the compiled evaluation must
+   match a per-rule, per-symbol Python loop exactly.
+2. End to end: rules stored in a temporary SQLite database, evaluated by a
+   screener pass over the fake exchange; a second pass on the same candles
+   must fire nothing (deduplicated).
+3. A live-style feed whose newest 5m/15m bars are still forming, with a
+   volume climax on the 5m candle that just closed: the screener must score
+   the closed candle, fire a `climax_5m` rule on it (keyed by its timestamp)
+   and not fire it again on the next pass.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+import argparse
+import json
+import math
+import operator
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+PY_OPS = {"==": operator.eq, "!=": operator.ne, ">=": operator.ge, "<=": operator.le, ">": operator.gt, "<": operator.lt}
+
+
+def random_expression(rng: np.random.Generator) -> str:
+	from backend.app.services.alerts import EVENT_FIELDS
+
+	templates = [
+		lambda: f"grade >= {rng.choice(['C', 'B', 'A', 'A+'])}",
+		lambda: f"direction == {rng.choice(['long', 'short', 'none'])}",
+		lambda: f"score >= {int(rng.integers(20, 90))}",
+		lambda: f"confidence > {int(rng.integers(40, 90))}",
+		lambda: f"rv_5m > {rng.uniform(0.5, 3.0):.2f}",
+		lambda: f"rv_15m <= {rng.uniform(0.5, 3.0):.2f}",
+		lambda: f"change_24h_pct < {rng.uniform(-3, 3):.2f}",
+		lambda: f"quote_volume_24h >= {rng.uniform(1e3, 1e5):.0f}",
+		lambda: f"trend != {rng.choice(['uptrend', 'downtrend', 'sideways'])}",
+		lambda: str(rng.choice(EVENT_FIELDS)),
+		lambda: f"not {rng.choice(EVENT_FIELDS)}",
+	]
+	k = int(rng.integers(1, 4))
+	return " and ".join(templates[int(i)]() for i in rng.choice(len(templates), k, replace=False))
+
+
+def random_facts(symbols: Sequence[str], rng: np.random.Generator) -> Dict[str, np.ndarray]:
+	from backend.app.services.alerts import EVENT_FIELDS
+
+	n = len(symbols)
+	rv = rng.lognormal(0.0, 0.6, n)
+	rv[rng.random(n) < 0.05] = np.nan  # short histories
+	facts = {
+		"score": rng.integers(0, 101, n),
+		"confidence": rng.integers(40, 101, n),
+		"grade": rng.integers(0, 5, n),
+		"direction": rng.integers(-1, 2, n),
+		"trend": rng.integers(-1, 2, n),
+		"trend_5m": rng.integers(-1, 2, n),
+		"rv_5m": rv,
+		"rv_15m": rng.lognormal(0.0, 0.6, n),
+		"change_24h_pct": rng.normal(0, 2, n),
+		"quote_volume_24h": rng.lognormal(9, 1.5, n),
+		"last_close": rng.lognormal(3, 1, n),
+	}
+	for f in EVENT_FIELDS:
+		facts[f] = (rng.random(n) < 0.08).astype(np.int8)
+	return facts
+
+
+def reference(rules: Sequence, facts: Dict[str, np.ndarray], symbols: Sequence[str]) -> np.ndarray:
+	out = np.zeros((len(rules), len(symbols)), dtype=bool)
+	for r, rule in enumerate(rules):
+		for s, symbol in enumerate(symbols):
+			if rule.symbols and symbol not in rule.symbols:
+				continue
+			ok = True
+			for field, op, value in rule.conditions:
+				v = float(facts[field][s])
+				if math.isnan(v) or not PY_OPS[op](v, value):
+					ok = False
+					break
+			out[r, s] = ok
+	return out
+
+
+def check_engine(n_rules: int, n_symbols: int, rounds: int) -> None:
+	from backend.app.services.alerts import CompiledRules, RuleSpec, parse_expression
+
+	rng = np.random.default_rng(7)
+	symbols = [f"C{k:03d}/USD" for k in range(n_symbols)]
+	specs: List[RuleSpec] = []
+	for i in range(n_rules):
+		expression = random_expression(rng)
+		scoped = tuple(rng.choice(symbols, int(rng.integers(1, 4)), replace=False).tolist()) if rng.random() < 0.3 else ()
+		specs.append(RuleSpec(
+			id=i + 1, name=f"r{i}", expression=expression,
+			conditions=tuple(parse_expression(expression)), symbols=scoped, sinks=(),
+			webhook_url=None, cooldown_minutes=60,
+		))
+
+	t0 = time.perf_counter()
+	compiled = CompiledRules(specs)
+	compile_ms = (time.perf_counter() - t0) * 1000.0
+
+	vec_ms: List[float] = []
+	loop_ms: List[float] = []
+	fired = 0
+	for k in range(rounds):
+		facts = random_facts(symbols, np.random.default_rng(100 + k))
+		t0 = time.perf_counter()
+		got = compiled.evaluate(facts, symbols)
+		vec_ms.append((time.perf_counter() - t0) * 1000.0)
+		t0 = time.perf_counter()
+		expected = reference(specs, facts, symbols)
+		loop_ms.append((time.perf_counter() - t0) * 1000.0)
+		if not np.array_equal(got, expected):
+			bad = np.argwhere(got != expected)[0]
+			raise AssertionError(f"round {k}: rule {specs[bad[0]].expression!r} on {symbols[bad[1]]} differs")
+		fired += int(got.sum())
+	print(
+		f"engine: {n_rules} rules x {n_symbols} symbols, compile {compile_ms:.0f} ms, "
+		f"evaluate median {statistics.median(vec_ms):.1f} ms vs loop {statistics.median(loop_ms):.0f} ms "
+		f"({statistics.median(loop_ms) / statistics.median(vec_ms):.0f}x); "
+		f"{fired / rounds:.0f} rule/symbol matches per pass, identical over {rounds} passes"
+	)
+
+
+def end_to_end(n_rules: int, n_symbols: int) -> None:
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_alerts_"), "alerts.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	from backend.app.core.config import get_settings
+	from backend.app.db import SessionLocal, init_db
+	from backend.app.models.alerts import AlertEvent, AlertRule
+	from backend.app.services.alerts import parse_expression
+	from backend.app.services.screener import refresh_snapshot
+	from .fake_exchange import FakeMarketData, fake_market_data
+
+	init_db()
+	settings = get_settings()
+	settings.alerts_enabled = True
+	settings.screener_max_symbols = n_symbols
+	rng = np.random.default_rng(11)
+	symbols = [f"M{k:03d}/USD" for k in range(n_symbols)]
+
+	db = SessionLocal()
+	try:
+		rows = []
+		for i in range(n_rules):
+			expression = random_expression(rng)
+			rows.append({
+				"name": f"rule {i}",
+				"expression": expression,
+				"conditions_json": json.dumps(parse_expression(expression)),
+				"symbols_json": json.dumps([str(rng.choice(symbols))]) if i % 4 == 0 else None,
+				"cooldown_minutes": 60,
+				"is_active": True,
+			})
+		db.bulk_insert_mappings(AlertRule, rows)
+		db.commit()
+
+		with fake_market_data(FakeMarketData(symbols=symbols, bars=600)):
+			counts: List[Tuple[int, float]] = []
+			for _ in range(2):
+				before = db.query(AlertEvent).count()
+				t0 = time.perf_counter()
+				refresh_snapshot(db)
+				ms = (time.perf_counter() - t0) * 1000.0
+				counts.append((db.query(AlertEvent).count() - before, ms))
+		print(
+			f"screener pass with {n_rules} stored rules over {n_symbols} symbols: "
+			f"{counts[0][0]} alerts in {counts[0][1]:.0f} ms; repeat pass {counts[1][0]} alerts in {counts[1][1]:.0f} ms"
+		)
+		if counts[1][0]:
+			raise AssertionError("the repeat pass on the same candles fired duplicate alerts")
+		print("repeat pass deduplicated")
+	finally:
+		db.close()
+
+
+def forming_candle() -> None:
+	"""
+	Runs after `end_to_end`, in its database.
+	"""
+	from backend.app.core.config import get_settings
+	from backend.app.db import SessionLocal
+	from backend.app.models.alerts import AlertEvent, AlertRule
+	from backend.app.services.alerts import parse_expression
+	from backend.app.services.market_data import get_market_data
+	from backend.app.services.screener import evaluate_symbol, refresh_snapshot
+	from .fake_exchange import FakeMarketData, fake_market_data, resample
+
+	symbols = ["LIVE0/USD", "LIVE1/USD"]
+	data = FakeMarketData(symbols=symbols, bars=600)
+	now_ms = int(time.time() * 1000)
+	for symbol in symbols:
+		rows5 = data.series[symbol]["5m"].copy()
+		rows5[:, 0] += now_ms - 60_000 - rows5[-1, 0]  # the last bar opened a minute ago
+		rows5[:, 5] = 100.0
+		rows5[-1, 5] = 1.0  # a minute into the bar, little has traded
+		if symbol == symbols[0]:
+			rows5[-2, 5] = 5_000.0  # climax on the candle that just closed
+		data.series[symbol] = {"5m": rows5, "15m": resample(rows5, 3), "1h": resample(rows5, 12)}
+	closed_ts = {s: int(data.series[s]["5m"][-2, 0]) for s in symbols}
+
+	settings = get_settings()
+	settings.screener_max_symbols = len(symbols)
+	db = SessionLocal()
+	try:
+		db.query(AlertEvent).delete()
+		db.query(AlertRule).delete()
+		db.add(AlertRule(
+			name="closed climax",
+			expression="climax_5m",
+			conditions_json=json.dumps(parse_expression("climax_5m")),
+			cooldown_minutes=0,
+			is_active=True,
+		))
+		db.commit()
+		with fake_market_data(data):
+			router = get_market_data()
+			# Read as if the forming bar had closed: the climax is not on it
+			partial = evaluate_symbol(router, symbols[0], settings.screener_candles, now_ms + 300_000)
+			closed = evaluate_symbol(router, symbols[0], settings.screener_candles, now_ms)
+			if closed["last_ts"] != closed_ts[symbols[0]] or not closed["events"]["climax_5m"]:
+				raise AssertionError(f"closed candle not screened: last_ts {closed['last_ts']}, events {closed['events']}")
+			fired = []
+			for _ in range(2):
+				refresh_snapshot(db)
+				fired.append([(e.symbol, e.candle_ts) for e in db.query(AlertEvent).order_by(AlertEvent.id)])
+		if fired[0] != [(symbols[0], closed_ts[symbols[0]])]:
+			raise AssertionError(f"expected one climax_5m alert on the closed candle, got {fired[0]}")
+		if fired[1] != fired[0]:
+			raise AssertionError("the next pass fired the closed candle's alert again")
+		print(
+			f"forming candle: climax_5m {partial['events']['climax_5m']} on the forming bar, "
+			f"{closed['events']['climax_5m']} on the closed one; alert keyed on the closed candle, not repeated"
+		)
+	finally:
+		db.close()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--rules", type=int, default=5000)
+	parser.add_argument("--symbols", type=int, default=300)
+	parser.add_argument("--rounds", type=int, default=3)
+	parser.add_argument("--market-symbols", type=int, default=40)
+	args = parser.parse_args()
+	check_engine(args.rules, args.symbols, args.rounds)
+	end_to_end(args.rules, args.market_symbols)
+	forming_candle()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,430 @@
+"""
+Vectorized backtest engine vs. the original bar-by-bar loop, the high/low
+exit model vs. close-only, plus portfolio throughput.
+
+	python -m backend.benchmarks.bench_backtest [--sizes 1500 20000] [--symbols 8 --portfolio-bars 50000]
+
+Every size is checked for identical trades and stats before timing is reported.
+The high/low exit model is checked against a bar-by-bar loop with forward
+testing's exit rules, on 5m bars resampled from 1m so sub-bar refinement
+has real data.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import argparse
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.app.core.scoring import score_setup
+from backend.app.api.v1.endpoints.trend import compute_emas
+from backend.app.api.v1.endpoints.volume import compute_volume_features
+from backend.app.core.strategy import DEFAULT_STRATEGY
+from backend.app.services.backtest import (
+	BacktestConfig,
+	PortfolioConfig,
+	SimTrade,
+	SubBarRefiner,
+	_simulate_symbol,
+	merge_portfolio,
+	setup_series,
+	simulate,
+	summarize,
+)
+from .fake_exchange import resample, synthetic_ohlcv
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def _direction_from_alignment(row: "pd.Series") -> str:
+	if row["ema20"] > row["ema50"] > row["ema200"]:
+		return "uptrend"
+	if row["ema20"] < row["ema50"] < row["ema200"]:
+		return "downtrend"
+	return "sideways"
+
+
+def _align_to_15m(ts_ms: int, df15: "pd.DataFrame") -> Optional["pd.Series"]:
+	if df15.empty:
+		return None
+	# pick last 15m bar with timestamp <= ts_ms
+	row = df15[df15["timestamp"] <= ts_ms].tail(1)
+	return row.iloc[0] if len(row) else None
+
+
+def reference_backtest(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+	"""
+	The original bar-by-bar `run_backtest` loop (pandas row access per bar).
+	"""
+	# Indicators
+	df5 = compute_emas(df5, [20, 50, 200])
+	df15 = compute_emas(df15, [20, 50, 200])
+	df5 = compute_volume_features(df5)
+	df15 = compute_volume_features(df15)
+
+	# Simulate
+	trades: List[Dict[str, Any]] = []
+	position: Optional[Dict[str, Any]] = None
+	equity = 1.0
+	highwater = equity
+	equity_curve: List[float] = [equity]
+	gross_profit = 0.0
+	gross_loss = 0.0
+
+	def fusion_at_idx(i: int) -> Dict[str, Any]:
+		row5 = df5.iloc[i]
+		row15 = _align_to_15m(int(row5["timestamp"]), df15)
+		if row15 is None:
+			return {"score": 0, "grade": "none", "direction": "none", "confidence": 0, "reasoning": ""}
+		# Trend summaries
+		trend_5 = _direction_from_alignment(row5)
+		trend_15 = _direction_from_alignment(row15)
+		trend = trend_15 if trend_15 != "sideways" else trend_5
+		trend_summary = {
+			"trend": trend,
+			"trend_5m": trend_5,
+			"trend_15m": trend_15,
+			"last_ts_5m": int(row5["timestamp"]),
+			"last_ts_15m": int(row15["timestamp"]),
+		}
+		# Trend signals (local, last 20 bars)
+		win5 = df5.iloc[max(0, i - 20): i + 1]
+		def ema_crosses_local(df: "pd.DataFrame", tf: str) -> List[Dict[str, Any]]:
+			signals: List[Dict[str, Any]] = []
+			if len(df) >= 2:
+				prev = df.iloc[-2]; curr = df.iloc[-1]
+				for a, b in [(20, 50), (50, 200), (20, 200)]:
+					prev_diff = prev[f"ema{a}"] - prev[f"ema{b}"]
+					curr_diff = curr[f"ema{a}"] - curr[f"ema{b}"]
+					if pd.notna(prev_diff) and pd.notna(curr_diff):
+						if prev_diff <= 0 and curr_diff > 0:
+							signals.append({"type": "ema_cross_up", "timeframe": tf})
+						if prev_diff >= 0 and curr_diff < 0:
+							signals.append({"type": "ema_cross_down", "timeframe": tf})
+			# BOS
+			if len(df) >= 21:
+				window = df.iloc[-21:-1]
+				last = df.iloc[-1]
+				if last["close"] > window["high"].max():
+					signals.append({"type": "bos_up", "timeframe": tf})
+				if last["close"] < window["low"].min():
+					signals.append({"type": "bos_down", "timeframe": tf})
+			return signals
+		trend_signals = ema_crosses_local(win5, "5m")
+		# Volume signals at i (and accumulation window)
+		vol_signals: List[Dict[str, Any]] = []
+		rv = row5.get("rv")
+		body_pct = row5.get("body_pct")
+		dir = "up" if row5["close"] > row5["open"] else "down" if row5["close"] < row5["open"] else "flat"
+		if pd.notna(rv) and rv is not None:
+			if rv >= 3.0:
+				vol_signals.append({"type": "climax", "timeframe": "5m", "dir": dir})
+			if rv >= 2.0 and pd.notna(body_pct) and body_pct is not None and body_pct >= 0.6:
+				vol_signals.append({"type": "ignition", "timeframe": "5m", "dir": dir})
+		win50 = df5.iloc[max(0, i - 50): i + 1]
+		active = win50[win50["rv"] >= 1.5] if "rv" in win50 else pd.DataFrame()
+		if len(active) >= 5:
+			score = int((active["close"] > active["open"]).sum() - (active["close"] < active["open"]).sum())
+			if score > 0:
+				vol_signals.append({"type": "accumulation", "timeframe": "5m"})
+			elif score < 0:
+				vol_signals.append({"type": "distribution", "timeframe": "5m"})
+		# Score
+		return score_setup(trend_summary, trend_signals, vol_signals)
+
+	def grade_from_score(score: int) -> str:
+		if score >= 80:
+			return "A+"
+		if score >= 65:
+			return "A"
+		if score >= 50:
+			return "B"
+		if score >= 35:
+			return "C"
+		return "none"
+
+	for i in range(250, len(df5)):  # ensure indicators warmed up
+		close = float(df5.iloc[i]["close"])
+		ts = int(df5.iloc[i]["timestamp"])
+		fused = fusion_at_idx(i)
+		grade = grade_from_score(int(fused.get("score", 0)))
+		direction = fused.get("direction", "none")
+
+		# Manage open position
+		if position:
+			# update floating pl
+			pct_chg = (close / position["entry_price"] - 1.0) * (1 if position["side"] == "long" else -1)
+			# exits: TP 2%, SL 1%, or direction flip/grade deterioration
+			take_profit = pct_chg >= 0.02
+			stop_loss = pct_chg <= -0.01
+			direction_flip = (direction == "short" and position["side"] == "long") or (direction == "long" and position["side"] == "short")
+			grade_bad = grade in ["none", "C"]
+			max_bars = (i - position["entry_index"]) >= 288
+			if take_profit or stop_loss or direction_flip or grade_bad or max_bars:
+				exit_price = close
+				pl_pct = (exit_price / position["entry_price"] - 1.0) * (1 if position["side"] == "long" else -1)
+				equity *= (1.0 + pl_pct)
+				equity_curve.append(equity)
+				if pl_pct >= 0:
+					gross_profit += pl_pct
+				else:
+					gross_loss += abs(pl_pct)
+				trades.append({
+					"side": position["side"],
+					"entry_ts": position["entry_ts"],
+					"exit_ts": ts,
+					"entry": position["entry_price"],
+					"exit": exit_price,
+					"pl_pct": round(pl_pct * 100, 2),
+				})
+				position = None
+				highwater = max(highwater, equity)
+				continue
+
+		# Entry logic: grades A+, A, B in direction
+		if not position and grade in ["A+", "A", "B"]:
+			if direction in ["long", "short"]:
+				position = {
+					"side": direction,
+					"entry_price": close,
+					"entry_ts": ts,
+					"entry_index": i,
+				}
+
+		# track drawdown
+		highwater = max(highwater, equity)
+		equity_curve.append(equity)
+
+	# finalize open position (close at last price)
+	if position:
+		close = float(df5.iloc[-1]["close"])
+		ts = int(df5.iloc[-1]["timestamp"])
+		pl_pct = (close / position["entry_price"] - 1.0) * (1 if position["side"] == "long" else -1)
+		equity *= (1.0 + pl_pct)
+		equity_curve.append(equity)
+		if pl_pct >= 0:
+			gross_profit += pl_pct
+		else:
+			gross_loss += abs(pl_pct)
+		trades.append({
+			"side": position["side"],
+			"entry_ts": position["entry_ts"],
+			"exit_ts": ts,
+			"entry": position["entry_price"],
+			"exit": close,
+			"pl_pct": round(pl_pct * 100, 2),
+		})
+		position = None
+
+	# Stats
+	num_trades = len(trades)
+	wins = sum(1 for t in trades if t["pl_pct"] > 0)
+	losses = num_trades - wins
+	win_rate = (wins / num_trades * 100) if num_trades else 0.0
+	total_pl_pct = (equity - 1.0) * 100
+	profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float("inf") if gross_profit > 0 else 0.0
+	# max drawdown from equity curve
+	peak = -math.inf
+	max_dd = 0.0
+	for v in equity_curve:
+		if v > peak:
+			peak = v
+		dd = (peak - v) / peak if peak > 0 else 0
+		max_dd = max(max_dd, dd)
+
+	return trades, {
+		"trades": num_trades,
+		"wins": wins,
+		"losses": losses,
+		"win_rate": round(win_rate, 2),
+		"pl_pct": round(total_pl_pct, 2),
+		"profit_factor": None if math.isinf(profit_factor) else round(profit_factor, 2),
+		"max_drawdown_pct": round(max_dd * 100, 2),
+	}
+
+
+def frames(n: int, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+	rows5 = synthetic_ohlcv(n, "5m", seed)
+	return pd.DataFrame(rows5, columns=COLUMNS), pd.DataFrame(resample(rows5, 3), columns=COLUMNS)
+
+
+def vectorized_backtest(df5: pd.DataFrame, df15: pd.DataFrame) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+	setups = setup_series(df5, df15)
+	trades = simulate(df5["close"].to_numpy(dtype=float), setups)
+	ts = df5["timestamp"].to_numpy()
+	return [t.to_dict(ts) for t in trades], summarize(trades)
+
+
+def check_equal(n: int, seed: int) -> Tuple[float, float, int]:
+	df5, df15 = frames(n, seed)
+	t0 = time.perf_counter()
+	expected_trades, expected_stats = reference_backtest(df5.copy(), df15.copy())
+	loop_s = time.perf_counter() - t0
+	t0 = time.perf_counter()
+	trades, stats = vectorized_backtest(df5, df15)
+	vec_s = time.perf_counter() - t0
+	got = [{k: v for k, v in t.items() if k != "exit_reason"} for t in trades]
+	if got != expected_trades or stats != expected_stats:
+		for i, (a, b) in enumerate(zip(got, expected_trades)):
+			if a != b:
+				raise AssertionError(f"trade {i} differs: {a} != {b}")
+		raise AssertionError(f"stats/trade count differ: {stats} != {expected_stats}")
+	return loop_s, vec_s, len(trades)
+
+
+def reference_intrabar(
+	close: np.ndarray,
+	high: np.ndarray,
+	low: np.ndarray,
+	setups: Any,
+	cfg: BacktestConfig,
+	refiner: Optional[SubBarRefiner] = None,
+) -> List[SimTrade]:
+	"""
+	Bar-by-bar high/low exits: SL/TP levels against each bar's range (filled
+	at the level), then flip / grade drop / max bars at the close.
+	"""
+	trades: List[SimTrade] = []
+	pos: Optional[Tuple[int, int, float]] = None
+	for i in range(cfg.warmup_bars, len(close)):
+		d = int(setups.direction[i])
+		g = int(setups.grade[i])
+		if pos is not None:
+			side, j, entry = pos
+			tp_price = entry * (1.0 + cfg.take_profit * side)
+			sl_price = entry * (1.0 - cfg.stop_loss * side)
+			tp = high[i] >= tp_price if side == 1 else low[i] <= tp_price
+			sl = low[i] <= sl_price if side == 1 else high[i] >= sl_price
+			reason, price, ambiguous, refined = None, float(close[i]), False, False
+			if tp and sl:
+				ambiguous = True
+				reason = refiner(i, side, tp_price, sl_price) if refiner else None
+				refined = reason is not None
+				reason = reason or cfg.tie_break
+			elif tp or sl:
+				reason = "take_profit" if tp else "stop_loss"
+			elif d == -side:
+				reason = "signal_flip"
+			elif g < cfg.min_grade:
+				reason = "grade_drop"
+			elif i - j >= cfg.max_bars:
+				reason = "max_bars"
+			if reason in ("take_profit", "stop_loss"):
+				price = tp_price if reason == "take_profit" else sl_price
+			if reason:
+				trades.append(SimTrade(side, j, i, entry, price, (price / entry - 1.0) * side, reason, ambiguous, refined))
+				pos = None
+			continue
+		if g >= cfg.min_grade and d != 0:
+			pos = (d, i, float(close[i]))
+	if pos is not None:
+		side, j, entry = pos
+		x = len(close) - 1
+		trades.append(SimTrade(side, j, x, entry, float(close[x]), (float(close[x]) / entry - 1.0) * side, "end_of_data"))
+	return trades
+
+
+def check_intrabar(n: int, seed: int) -> Dict[str, Any]:
+	rows1 = synthetic_ohlcv(n * 5, "1m", seed)
+	rows5 = resample(rows1, 5)
+	df5 = pd.DataFrame(rows5, columns=COLUMNS)
+	df15 = pd.DataFrame(resample(rows5, 3), columns=COLUMNS)
+	close, high, low = (df5[c].to_numpy(dtype=float) for c in ("close", "high", "low"))
+	setups = setup_series(df5, df15)
+	refiner = SubBarRefiner(df5["timestamp"].to_numpy(dtype=np.int64), rows1[:, 0].astype(np.int64), rows1[:, 2], rows1[:, 3])
+
+	timings: Dict[str, float] = {}
+	results: Dict[str, List[SimTrade]] = {}
+	# Tight levels so bars touching both TP and SL actually occur
+	levels = {"take_profit": 0.004, "stop_loss": 0.003}
+	for label, cfg, ref in (
+		("close", BacktestConfig(**levels), None),
+		("high_low", BacktestConfig(exit_model="high_low", **levels), None),
+		("high_low+1m", BacktestConfig(exit_model="high_low", **levels), refiner),
+	):
+		t0 = time.perf_counter()
+		results[label] = simulate(close, setups, cfg, high=high, low=low, refiner=ref)
+		timings[label] = time.perf_counter() - t0
+		if label != "close":
+			expected = reference_intrabar(close, high, low, setups, cfg, ref)
+			if results[label] != expected:
+				raise AssertionError(f"{label}: vectorized trades differ from the bar-by-bar loop")
+	return {
+		"timings": timings,
+		"trades": {k: len(v) for k, v in results.items()},
+		"ambiguous": sum(t.ambiguous for t in results["high_low"]),
+		"refined": sum(t.refined for t in results["high_low+1m"]),
+	}
+
+
+def portfolio_throughput(symbols: int, bars: int, workers: Optional[int]) -> Dict[str, Any]:
+	payloads = []
+	for k in range(symbols):
+		rows5 = synthetic_ohlcv(bars, "5m", seed=100 + k)
+		rows15 = resample(rows5, 3)
+		payloads.append({
+			"symbol": f"SYM{k}/USD",
+			"config": BacktestConfig(),
+			"strategy": DEFAULT_STRATEGY,
+			"arrays": {
+				"ts5": rows5[:, 0].astype(np.int64),
+				"open": rows5[:, 1], "high": rows5[:, 2], "low": rows5[:, 3], "close": rows5[:, 4], "volume": rows5[:, 5],
+				"ts15": rows15[:, 0].astype(np.int64),
+				"close15": rows15[:, 4],
+			},
+		})
+	workers = workers or os.cpu_count() or 1
+	t0 = time.perf_counter()
+	if workers == 1:
+		results = [_simulate_symbol(p) for p in payloads]
+	else:
+		from concurrent.futures import ProcessPoolExecutor
+		with ProcessPoolExecutor(max_workers=workers) as pool:
+			results = list(pool.map(_simulate_symbol, payloads))
+	sim_s = time.perf_counter() - t0
+	portfolio = merge_portfolio(results, PortfolioConfig())
+	return {
+		"workers": workers,
+		"symbol_bars": symbols * bars,
+		"seconds": sim_s,
+		"symbol_bars_per_second": symbols * bars / sim_s,
+		"trades": portfolio["stats"]["trades"],
+		"skipped": portfolio["stats"]["skipped_max_positions"],
+	}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1_500, 5_000])
+	parser.add_argument("--seeds", type=int, default=3, help="Synthetic series checked per size")
+	parser.add_argument("--symbols", type=int, default=8)
+	parser.add_argument("--portfolio-bars", type=int, default=50_000)
+	parser.add_argument("--workers", type=int, nargs="+", default=[1, 0], help="0 = one per CPU")
+	args = parser.parse_args()
+
+	print(f"{'bars':>8}{'loop ms':>12}{'vectorized ms':>16}{'speedup':>10}{'trades':>8}")
+	for n in args.sizes:
+		for seed in range(args.seeds):
+			loop_s, vec_s, n_trades = check_equal(n, seed)
+			print(f"{n:>8}{loop_s * 1000:>12.1f}{vec_s * 1000:>16.2f}{loop_s / vec_s:>9.1f}x{n_trades:>8}")
+	print("trades and stats identical")
+
+	print(f"\nexit models (simulation only){'':>4}{'close ms':>10}{'high_low ms':>13}{'+1m ms':>9}{'trades':>8}{'ties':>6}{'refined':>9}")
+	for n in args.sizes:
+		for seed in range(args.seeds):
+			r = check_intrabar(n, seed)
+			t = r["timings"]
+			print(f"{n:>8} bars, seed {seed}{'':>11}{t['close'] * 1000:>10.2f}{t['high_low'] * 1000:>13.2f}{t['high_low+1m'] * 1000:>9.2f}{r['trades']['high_low']:>8}{r['ambiguous']:>6}{r['refined']:>9}")
+	print("high/low exits identical to the bar-by-bar loop")
+
+	print(f"\nportfolio: {args.symbols} symbols x {args.portfolio_bars} bars")
+	for w in args.workers:
+		r = portfolio_throughput(args.symbols, args.portfolio_bars, w or None)
+		print(f"  workers={r['workers']:<3} {r['seconds'] * 1000:>9.1f} ms  {r['symbol_bars_per_second']:>12,.0f} symbol-bars/s  ({r['trades']} trades, {r['skipped']} skipped)")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,92 @@
+"""
+Forward-test worker: every run on a symbol stepped in one signal pass.
+
+	python -m backend.benchmarks.bench_forward_batch [--symbols 4] [--runs 16] [--candles 6]
+
+Two identical sets of runs (random strategy variants passed as per-run
+params) are created per symbol in a temporary SQLite store, each a few
+candles behind the fake exchange. One set is stepped run by run with
+`step_run`, the other symbol by symbol with `step_symbol`; both must leave
+identical trades.
+"""
+
+from typing import Dict, List, Tuple
+import argparse
+import os
+import tempfile
+import time
+
+TRADE_FIELDS = ("direction", "candle_time", "entry_price", "stop_loss", "take_profit", "exit_price", "exit_reason")
+
+
+def _trades(db, run_id: int) -> List[Tuple]:
+	from backend.app.models.forward_test import ForwardTestTrade
+
+	rows = db.query(ForwardTestTrade).filter(ForwardTestTrade.test_run_id == run_id).order_by(ForwardTestTrade.id.asc())
+	return [tuple(getattr(t, f) for f in TRADE_FIELDS) for t in rows]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--symbols", type=int, default=4)
+	parser.add_argument("--runs", type=int, default=16, help="runs per symbol in each set")
+	parser.add_argument("--candles", type=int, default=6, help="closed candles each run is behind")
+	args = parser.parse_args()
+
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_forward_batch_"), "forward.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	from backend.app.db import SessionLocal, init_db
+	from backend.app.services.forward_test import start_test_run, step_run, step_symbol
+	from .bench_strategies import random_variants
+	from .fake_exchange import FakeMarketData, fake_market_data
+
+	init_db()
+	symbols = [f"F{k:02d}/USD" for k in range(args.symbols)]
+	data = FakeMarketData(symbols=symbols, bars=600)
+	variants = random_variants(args.runs, seed=4)
+	db = SessionLocal()
+	try:
+		sets: Dict[str, Dict[str, list]] = {"run": {}, "symbol": {}}
+		for symbol in symbols:
+			last_ts = int(data.rows(symbol, "5m")[-1 - args.candles, 0])
+			for name in sets:
+				runs = []
+				for spec in variants:
+					run = start_test_run(db, symbol, params=spec.overrides() or None)
+					run.last_candle_ts = last_ts
+					runs.append(run)
+				sets[name][symbol] = runs
+		db.commit()
+
+		with fake_market_data(data):
+			t0 = time.perf_counter()
+			for runs in sets["run"].values():
+				for run in runs:
+					step_run(run, db)
+			per_run_ms = (time.perf_counter() - t0) * 1000.0
+			t0 = time.perf_counter()
+			for symbol, runs in sets["symbol"].items():
+				step_symbol(db, symbol, runs)
+			per_symbol_ms = (time.perf_counter() - t0) * 1000.0
+
+		trades = 0
+		for symbol in symbols:
+			for one, batched in zip(sets["run"][symbol], sets["symbol"][symbol]):
+				expected, got = _trades(db, one.id), _trades(db, batched.id)
+				if expected != got:
+					raise AssertionError(f"{symbol} run {one.id}: step_symbol trades {got} != step_run {expected}")
+				if one.last_candle_ts != batched.last_candle_ts:
+					raise AssertionError(f"{symbol} run {one.id}: runs stopped at different candles")
+				trades += len(got)
+		n = args.symbols * args.runs
+		print(
+			f"{n} runs over {args.symbols} symbols, {args.candles} candles each: "
+			f"step_run {per_run_ms:.0f} ms, step_symbol {per_symbol_ms:.0f} ms "
+			f"({per_run_ms / per_symbol_ms:.1f}x); {trades} trades, identical"
+		)
+	finally:
+		db.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,184 @@
+"""
+Forward-test replay throughput, plus the vectorized heuristic signal weights
+it depends on vs. the original per-bar loop.
+
+	python -m backend.benchmarks.bench_forward_replay [--days 2] [--windows 5]
+
+The replay runs twice against a temporary SQLite store filled from the fake
+exchange; both runs must produce identical trades.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+SYMBOL = "BTC/USD"
+
+
+def reference_weights(df5: pd.DataFrame, df15: pd.DataFrame) -> Dict[str, float]:
+	"""
+	The original per-bar `eff_weights` from `get_signals`.
+	"""
+	from backend.app.api.v1.endpoints.trend import compute_emas
+	from backend.app.api.v1.endpoints.volume import compute_volume_features
+
+	df5_tr = compute_emas(df5.copy(), [20, 50, 200])
+	df15_tr = compute_emas(df15.copy(), [20, 50, 200])
+	df5_vol = compute_volume_features(df5.copy())
+	horizon = 12
+	features = [
+		"trend_up", "trend_down", "confirm_5m",
+		"ema_cross_up", "ema_cross_down",
+		"bos_up", "bos_down",
+		"ignition_up", "ignition_down",
+		"climax", "accumulation", "distribution",
+	]
+	stats = {f: {"hits": 0, "wins": 0} for f in features}
+
+	def direction_from_alignment(row: pd.Series) -> str:
+		if row["ema20"] > row["ema50"] > row["ema200"]:
+			return "uptrend"
+		if row["ema20"] < row["ema50"] < row["ema200"]:
+			return "downtrend"
+		return "sideways"
+
+	def flags(i: int) -> Dict[str, int]:
+		row5 = df5_tr.iloc[i]
+		rows15 = df15_tr[df15_tr["timestamp"] <= int(row5["timestamp"])].tail(1)
+		row15 = rows15.iloc[0] if len(rows15) else None
+		fl = {f: 0 for f in features}
+		if row15 is not None:
+			t15 = direction_from_alignment(row15)
+			if t15 == "uptrend": fl["trend_up"] = 1
+			elif t15 == "downtrend": fl["trend_down"] = 1
+		t5 = direction_from_alignment(row5)
+		if t5 in ["uptrend", "downtrend"]:
+			fl["confirm_5m"] = 1
+		if i >= 1:
+			prev = df5_tr.iloc[i - 1]; curr = row5
+			for a, b in [(20, 50), (50, 200), (20, 200)]:
+				prev_diff = prev[f"ema{a}"] - prev[f"ema{b}"]
+				curr_diff = curr[f"ema{a}"] - curr[f"ema{b}"]
+				if pd.notna(prev_diff) and pd.notna(curr_diff):
+					if prev_diff <= 0 and curr_diff > 0: fl["ema_cross_up"] = 1
+					if prev_diff >= 0 and curr_diff < 0: fl["ema_cross_down"] = 1
+		if i >= 21:
+			window = df5_tr.iloc[i - 21:i - 1]
+			last = row5
+			if last["close"] > window["high"].max(): fl["bos_up"] = 1
+			if last["close"] < window["low"].min(): fl["bos_down"] = 1
+		row5v = df5_vol.iloc[i]
+		rv = row5v.get("rv"); body_pct = row5v.get("body_pct")
+		if pd.notna(rv) and rv is not None:
+			if rv >= 3.0: fl["climax"] = 1
+			if rv >= 2.0 and pd.notna(body_pct) and body_pct is not None and body_pct >= 0.6:
+				if row5v["close"] > row5v["open"]: fl["ignition_up"] = 1
+				elif row5v["close"] < row5v["open"]: fl["ignition_down"] = 1
+		win50 = df5_vol.iloc[max(0, i - 50): i + 1]
+		active = win50[win50["rv"] >= 1.5] if "rv" in win50 else pd.DataFrame()
+		if len(active) >= 5:
+			score = int((active["close"] > active["open"]).sum() - (active["close"] < active["open"]).sum())
+			if score > 0: fl["accumulation"] = 1
+			elif score < 0: fl["distribution"] = 1
+		return fl
+
+	for i in range(250, len(df5_tr) - horizon):
+		fl = flags(i)
+		entry = float(df5_tr.iloc[i]["close"])
+		exit = float(df5_tr.iloc[i + horizon]["close"])
+		win = 1 if (exit / entry - 1.0) >= 0 else 0
+		for k, v in fl.items():
+			if v:
+				stats[k]["hits"] += 1
+				stats[k]["wins"] += win
+	baseline = 0.5
+	eff = {k: ((s["wins"] / s["hits"]) - baseline) if s["hits"] > 20 else 0.0 for k, s in stats.items()}
+	max_abs = max((abs(v) for v in eff.values()), default=1.0) or 1.0
+	w = {k: (v / max_abs) for k, v in eff.items()}
+	weights = {
+		"trend_base": max(w.get("trend_up", 0), w.get("trend_down", 0)) * 30,
+		"confirm_5m": w.get("confirm_5m", 0) * 15,
+		"ema_cross": max(w.get("ema_cross_up", 0), w.get("ema_cross_down", 0)) * 20,
+		"bos": max(w.get("bos_up", 0), w.get("bos_down", 0)) * 15,
+		"ignition": max(w.get("ignition_up", 0), w.get("ignition_down", 0)) * 12,
+		"climax": w.get("climax", 0) * 6,
+		"accumulation": w.get("accumulation", 0) * 10,
+		"distribution": w.get("distribution", 0) * 10,
+	}
+	return {k: float(max(0.0, min(100.0, v))) for k, v in weights.items()}
+
+
+def check_weights(windows: int) -> None:
+	from backend.app.api.v1.endpoints.signals import heuristic_weights
+	from .fake_exchange import resample, synthetic_ohlcv
+
+	loop_ms: List[float] = []
+	vec_ms: List[float] = []
+	for seed in range(windows):
+		rows5 = synthetic_ohlcv(600, "5m", seed)
+		df5 = pd.DataFrame(rows5, columns=COLUMNS)
+		df15 = pd.DataFrame(resample(synthetic_ohlcv(600, "5m", seed), 3), columns=COLUMNS)
+		t0 = time.perf_counter()
+		expected = reference_weights(df5, df15)
+		loop_ms.append((time.perf_counter() - t0) * 1000.0)
+		t0 = time.perf_counter()
+		got = heuristic_weights(df5, df15)
+		vec_ms.append((time.perf_counter() - t0) * 1000.0)
+		for k, v in expected.items():
+			if abs(got[k] - v) > 1e-9:
+				raise AssertionError(f"seed {seed}: weight {k} differs: {got[k]} != {v}")
+	print(
+		f"heuristic weights (600 bars): loop median {statistics.median(loop_ms):.1f} ms, "
+		f"vectorized {statistics.median(vec_ms):.2f} ms; identical over {windows} windows"
+	)
+
+
+def replay(days: float) -> None:
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_replay_"), "replay.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	from backend.app.db import SessionLocal, init_db
+	from backend.app.models.forward_replay import ReplayTrade
+	from backend.app.services.forward_replay import replay_run
+	from .fake_exchange import START_TS, FakeMarketData, fake_market_data
+
+	init_db()
+	bars = 700 + int(days * 288) + 50
+	start = datetime.fromtimestamp((START_TS + 700 * 300_000) / 1000, tz=timezone.utc)
+	runs: List[List[Any]] = []
+	with fake_market_data(FakeMarketData(symbols=(SYMBOL,), bars=bars)):
+		for label in ("cold (backfill)", "warm (stored)"):
+			db = SessionLocal()
+			try:
+				run, timing = replay_run(db, SYMBOL, start, days=days)
+				trades = db.query(ReplayTrade).filter(ReplayTrade.test_run_id == run.id).order_by(ReplayTrade.id).all()
+				runs.append([(t.direction, t.entry_price, t.exit_price, t.exit_reason, t.candle_time) for t in trades])
+				print(
+					f"replay {days:g} days, {label}: load {timing['load_ms']:.0f} ms, replay {timing['replay_ms']:.0f} ms, "
+					f"{timing['candles_per_second']:.0f} candles/s ({timing['speedup_vs_realtime']:,}x real time), "
+					f"{len(trades)} trades, summary {run.summary_json}"
+				)
+			finally:
+				db.close()
+	if runs[0] != runs[1]:
+		raise AssertionError("replays of the same window produced different trades")
+	print("replayed trades identical across runs")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--days", type=float, default=2.0)
+	parser.add_argument("--windows", type=int, default=5, help="Synthetic windows checked for the weights")
+	args = parser.parse_args()
+	check_weights(args.windows)
+	replay(args.days)
+
+
+if __name__ == "__main__":
+	main()
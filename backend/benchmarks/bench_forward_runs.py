@@ -0,0 +1,166 @@
+"""
+Forward-test run listing over thousands of runs and millions of trades.
+
+	python -m backend.benchmarks.bench_forward_runs [--runs 2000] [--trades 2000000] [--page 50]
+
+Runs and trades are bulk-loaded into a temporary SQLite store. Then:
+
+1. `run_trade_stats` (one grouped query) must agree with `_compute_stats`
+   for a sample of runs, and `pl_sum_pct` with the sum of their trades' P/L.
+2. Walking every page of `/forward-test/runs`, unfiltered and filtered by
+   symbol and activity, must visit each matching run exactly once.
+3. A page of `/runs` is timed against the `/status` calls an overview
+   page needed before (one per run), and against computing the same stats
+   per run from loaded trades (`_compute_stats`); the first page is timed
+   against the last.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+SYMBOLS = ("BTC/USD", "ETH/USD", "SOL/USD", "XRP/USD", "ADA/USD", "DOGE/USD", "AVAX/USD", "LINK/USD")
+STATS = ("trades", "wins", "losses", "win_rate", "profit_factor")
+
+
+def populate(engine, runs: int, trades: int, seed: int = 0) -> None:
+	rng = np.random.default_rng(seed)
+	start = datetime(2024, 1, 1)
+	symbols = rng.integers(0, len(SYMBOLS), runs)
+	active = rng.random(runs) < 0.2
+	conn = engine.raw_connection()
+	try:
+		cur = conn.cursor()
+		cur.executemany(
+			"INSERT INTO test_runs (id, symbol, strategy, start_time, end_time, is_active, last_candle_ts) VALUES (?, ?, ?, ?, ?, ?, ?)",
+			[
+				(i + 1, SYMBOLS[symbols[i]], "fusion", str(start + timedelta(hours=i)), str(start + timedelta(hours=i, days=5)), bool(active[i]), None)
+				for i in range(runs)
+			],
+		)
+		# Trades spread unevenly over runs; the newest trade of an active run stays open
+		run_of = np.sort(rng.integers(1, runs + 1, trades))
+		pl = np.round(rng.normal(0.1, 1.5, trades), 4)
+		entry = rng.uniform(10.0, 100.0, trades)
+		last_of_run = np.append(run_of[1:] != run_of[:-1], True)
+		is_open = last_of_run & active[run_of - 1]
+		chunk = 200_000
+		for lo in range(0, trades, chunk):
+			rows = []
+			for k in range(lo, min(trades, lo + chunk)):
+				open_ = bool(is_open[k])
+				exit_price = None if open_ else float(entry[k] * (1 + pl[k] / 100))
+				rows.append((
+					int(run_of[k]), SYMBOLS[symbols[run_of[k] - 1]], "long", float(entry[k]), float(entry[k] * 0.99), float(entry[k] * 1.02),
+					exit_price, None if open_ else "take_profit", None if open_ else float(pl[k]),
+					str(start + timedelta(minutes=5 * k)), str(start),
+				))
+			cur.executemany(
+				"INSERT INTO forward_tests (test_run_id, symbol, direction, entry_price, stop_loss, take_profit, exit_price, exit_reason, profit_loss, candle_time, created_at) "
+				"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+				rows,
+			)
+		conn.commit()
+	finally:
+		conn.close()
+
+
+def walk(list_runs, db, **filters) -> List[int]:
+	ids: List[int] = []
+	cursor: Optional[int] = None
+	while True:
+		page = list_runs(db=db, cursor=cursor, limit=97, mark=False, **filters)
+		ids += [r["id"] for r in page["runs"]]
+		cursor = page["next_cursor"]
+		if cursor is None:
+			return ids
+
+
+def best_ms(fn, rounds: int = 5) -> float:
+	best = float("inf")
+	for _ in range(rounds):
+		t0 = time.perf_counter()
+		fn()
+		best = min(best, (time.perf_counter() - t0) * 1000.0)
+	return best
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--runs", type=int, default=2000)
+	parser.add_argument("--trades", type=int, default=2_000_000)
+	parser.add_argument("--page", type=int, default=50)
+	args = parser.parse_args()
+
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_forward_runs_"), "forward.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	from backend.app.db import SessionLocal, engine, init_db
+	from backend.app.api.v1.endpoints.forward_test import get_forward_test_status, list_forward_test_runs
+	from backend.app.models.forward_test import ForwardTestRun
+	from backend.app.services.forward_test import _compute_stats, run_trade_stats
+
+	init_db()
+	t0 = time.perf_counter()
+	populate(engine, args.runs, args.trades)
+	print(f"loaded {args.runs} runs, {args.trades} trades in {time.perf_counter() - t0:.1f} s")
+
+	db = SessionLocal()
+	try:
+		sample = [r.id for r in db.query(ForwardTestRun).order_by(ForwardTestRun.id.desc()).limit(args.page)]
+		stats = run_trade_stats(db, sample)
+		for run in db.query(ForwardTestRun).filter(ForwardTestRun.id.in_(sample)):
+			expected: Dict[str, Any] = _compute_stats(db, run)
+			got = stats.get(run.id)
+			if got is None:
+				if expected["trades"]:
+					raise AssertionError(f"run {run.id}: no aggregate for a run with trades")
+				continue
+			if {k: got[k] for k in STATS} != {k: expected[k] for k in STATS}:
+				raise AssertionError(f"run {run.id}: aggregate {got} != _compute_stats {expected}")
+			pl_sum = sum(t.profit_loss for t in run.trades if t.profit_loss is not None)
+			if abs(got["pl_sum_pct"] - round(pl_sum, 2)) > 0.011:
+				raise AssertionError(f"run {run.id}: pl_sum_pct {got['pl_sum_pct']} != {pl_sum:.2f}")
+		print(f"stats: {len(sample)} runs identical to _compute_stats")
+
+		for filters in ({}, {"symbol": "ETH/USD"}, {"active": True}, {"symbol": "SOL/USD", "active": False}):
+			q = db.query(ForwardTestRun.id)
+			if "symbol" in filters:
+				q = q.filter(ForwardTestRun.symbol == filters["symbol"])
+			if "active" in filters:
+				q = q.filter(ForwardTestRun.is_active.is_(filters["active"]))
+			expected_ids = sorted((r[0] for r in q), reverse=True)
+			full = {"symbol": None, "active": None, **filters}
+			ids = walk(list_forward_test_runs, db, **full)
+			if ids != expected_ids:
+				raise AssertionError(f"pagination {filters}: visited {len(ids)} runs, expected {len(expected_ids)} once each")
+		print("pagination: every run visited exactly once, unfiltered and filtered")
+
+		def overview() -> None:
+			for run_id in sample:
+				get_forward_test_status(test_run_id=run_id, db=db)
+
+		def listing(cursor: Optional[int] = None) -> None:
+			list_forward_test_runs(symbol=None, active=None, cursor=cursor, limit=args.page, mark=False, db=db)
+
+		runs = db.query(ForwardTestRun).filter(ForwardTestRun.id.in_(sample)).all()
+		loaded = best_ms(lambda: [_compute_stats(db, run) for run in runs], rounds=3)
+		last_cursor = args.page * 3 + 1
+		per_run = best_ms(overview, rounds=3)
+		first = best_ms(listing)
+		deep = best_ms(lambda: listing(last_cursor))
+		print(
+			f"overview of {args.page} runs: {args.page} /status calls {per_run:.1f} ms, one /runs page {first:.1f} ms "
+			f"({per_run / first:.1f}x); stats from loaded trades {loaded:.1f} ms ({loaded / first:.1f}x); "
+			f"last pages (cursor {last_cursor}) {deep:.1f} ms"
+		)
+	finally:
+		db.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,112 @@
+"""
+Batch fusion scoring vs. per-bar `score_setup`, with a full equality check.
+
+	python -m backend.benchmarks.bench_fusion [--sizes 1000 100000]
+
+Bars crowded past the `recent_signals` cap must score the same in both, for
+the stock cap and a tighter one.
+"""
+
+from dataclasses import replace
+from typing import Any, Dict, List, Tuple
+import argparse
+import time
+
+import numpy as np
+
+from backend.app.core.scoring import (
+	SETUP_SIGNAL_KEYS,
+	TREND_SIGNAL_KEYS,
+	VOLUME_SIGNAL_KEYS,
+	score_setup,
+	score_setup_batch,
+)
+from backend.app.core.strategy import DEFAULT_STRATEGY
+
+_LABELS = {1: "uptrend", -1: "downtrend", 0: "sideways"}
+
+
+def random_setups(n: int, seed: int = 0) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+	rng = np.random.default_rng(seed)
+	trend = rng.integers(-1, 2, n).astype(np.int8)
+	trend_5m = rng.integers(-1, 2, n).astype(np.int8)
+	# Sparse signals, at most a couple of each per bar (well under the 12 cap)
+	counts = {k: rng.binomial(2, 0.15, n) for k in SETUP_SIGNAL_KEYS}
+	return trend, trend_5m, counts
+
+
+def signal_lists(counts: Dict[str, np.ndarray], i: int, tf: str) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+	"""
+	Per-bar signal dicts in the canonical order `SetupBatch.reasoning` uses.
+	"""
+	c = {k: int(v[i]) for k, v in counts.items()}
+	trend_signals: List[Dict[str, Any]] = []
+	for key in ("ema_cross_up", "ema_cross_down", "bos_up", "bos_down"):
+		trend_signals += [{"type": key, "timeframe": tf}] * c[key]
+	vol: List[Dict[str, Any]] = []
+	vol += [{"type": "climax", "timeframe": tf, "dir": "up"}] * c["climax"]
+	vol += [{"type": "climax", "timeframe": tf, "dir": "flat"}] * c["climax_flat"]
+	for key, d in (("ignition_up", "up"), ("ignition_down", "down"), ("ignition_flat", "flat")):
+		vol += [{"type": "ignition", "timeframe": tf, "dir": d}] * c[key]
+	vol += [{"type": "accumulation", "timeframe": tf}] * c["accumulation"]
+	vol += [{"type": "distribution", "timeframe": tf}] * c["distribution"]
+	return trend_signals, vol
+
+
+def check_cap(n: int = 2_000) -> None:
+	"""
+	Dense signals, so most bars carry more than `recent_signals` of a kind.
+	"""
+	rng = np.random.default_rng(1)
+	trend = rng.integers(-1, 2, n).astype(np.int8)
+	trend_5m = rng.integers(-1, 2, n).astype(np.int8)
+	counts = {k: rng.integers(0, 6, n) for k in SETUP_SIGNAL_KEYS}
+	for spec in (DEFAULT_STRATEGY, replace(DEFAULT_STRATEGY, recent_signals=3)):
+		cap = spec.recent_signals
+		over = (sum(counts[k] for k in TREND_SIGNAL_KEYS) > cap) | (sum(counts[k] for k in VOLUME_SIGNAL_KEYS) > cap)
+		if not over.any():
+			raise AssertionError(f"no bar over the cap of {cap}")
+		batch = score_setup_batch(trend, trend_5m, counts, timeframe="5m", strategy=spec)
+		for keys in (TREND_SIGNAL_KEYS, VOLUME_SIGNAL_KEYS):
+			if int(sum(batch.counts[k] for k in keys).max()) > cap:
+				raise AssertionError(f"batch kept more than {cap} signals")
+		for i in range(n):
+			summary = {"trend": _LABELS[int(trend[i])], "trend_5m": _LABELS[int(trend_5m[i])]}
+			exp = score_setup(summary, *signal_lists(counts, i, "5m"), spec)
+			got = batch.row(i)
+			if got != exp:
+				raise AssertionError(f"recent_signals={cap}, bar {i}: batch {got} != score_setup {exp}")
+		print(f"recent_signals={cap}: {int(over.sum())} of {n} bars over the cap, identical to score_setup")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000])
+	args = parser.parse_args()
+
+	print(f"{'bars':>10}{'score_setup ms':>16}{'batch ms':>12}{'speedup':>10}")
+	for n in args.sizes:
+		trend, trend_5m, counts = random_setups(n)
+		inputs = []
+		for i in range(n):
+			summary = {"trend": _LABELS[int(trend[i])], "trend_5m": _LABELS[int(trend_5m[i])]}
+			inputs.append((summary, *signal_lists(counts, i, "5m")))
+
+		t0 = time.perf_counter()
+		expected = [score_setup(*args_i) for args_i in inputs]
+		loop_s = time.perf_counter() - t0
+
+		t0 = time.perf_counter()
+		batch = score_setup_batch(trend, trend_5m, counts, timeframe="5m")
+		batch_s = time.perf_counter() - t0
+
+		for i, exp in enumerate(expected):
+			got = batch.row(i)
+			if got != exp:
+				raise AssertionError(f"bar {i}: batch {got} != score_setup {exp}")
+		print(f"{n:>10}{loop_s * 1e3:>16.2f}{batch_s * 1e3:>12.2f}{loop_s / batch_s:>9.1f}x")
+	check_cap()
+
+
+if __name__ == "__main__":
+	main()
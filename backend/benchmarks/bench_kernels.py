@@ -0,0 +1,117 @@
+"""
+Micro-benchmarks for `backend.app.core.kernels` against the pandas reference
+implementations they replace.
+
+	python -m backend.benchmarks.bench_kernels [--sizes 1000 100000 1000000]
+"""
+
+from typing import Callable, Dict, List, Tuple
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.app.core import kernels
+
+
+def synthetic_ohlcv(n: int, seed: int = 0) -> Dict[str, np.ndarray]:
+	rng = np.random.default_rng(seed)
+	close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.003, n)))
+	open_ = np.concatenate(([close[0]], close[:-1]))
+	high = np.maximum(open_, close) * (1.0 + rng.uniform(0.0, 0.002, n))
+	low = np.minimum(open_, close) * (1.0 - rng.uniform(0.0, 0.002, n))
+	volume = rng.lognormal(3.0, 0.8, n)
+	return {"open": open_, "high": high, "low": low, "close": close, "volume": volume}
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> Tuple[float, object]:
+	best = float("inf")
+	result = None
+	for _ in range(repeat):
+		t0 = time.perf_counter()
+		result = fn()
+		best = min(best, time.perf_counter() - t0)
+	return best, result
+
+
+def _pandas_bos(df: pd.DataFrame, lookback: int) -> Tuple[np.ndarray, np.ndarray]:
+	swing_high = df["high"].shift(1).rolling(lookback, min_periods=lookback).max()
+	swing_low = df["low"].shift(1).rolling(lookback, min_periods=lookback).min()
+	return (df["close"] > swing_high).to_numpy(), (df["close"] < swing_low).to_numpy()
+
+
+def _pandas_crosses(fast: pd.Series, slow: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+	diff = fast - slow
+	prev = diff.shift(1)
+	valid = prev.notna() & diff.notna()
+	return (valid & (prev <= 0) & (diff > 0)).to_numpy(), (valid & (prev >= 0) & (diff < 0)).to_numpy()
+
+
+def cases(data: Dict[str, np.ndarray]) -> List[Tuple[str, Callable[[], object], Callable[[], object]]]:
+	df = pd.DataFrame(data)
+	ema20 = kernels.ema(data["close"], 20, 20)
+	ema50 = kernels.ema(data["close"], 50, 50)
+	s20, s50 = pd.Series(ema20), pd.Series(ema50)
+	return [
+		(
+			"ema200",
+			lambda: kernels.ema(data["close"], 200, 200),
+			lambda: df["close"].ewm(span=200, adjust=False, min_periods=200).mean().to_numpy(),
+		),
+		(
+			"sma20_vol",
+			lambda: kernels.rolling_mean(data["volume"], 20),
+			lambda: df["volume"].rolling(window=20, min_periods=20).mean().to_numpy(),
+		),
+		(
+			"relative_volume",
+			lambda: kernels.relative_volume(data["volume"], 20),
+			lambda: (df["volume"] / df["volume"].rolling(window=20, min_periods=20).mean()).to_numpy(),
+		),
+		(
+			"body_pct",
+			lambda: kernels.body_pct(data["open"], data["high"], data["low"], data["close"]),
+			lambda: ((df["close"] - df["open"]).abs() / (df["high"] - df["low"]).replace(0, np.nan)).to_numpy(),
+		),
+		(
+			"break_of_structure",
+			lambda: kernels.break_of_structure(data["high"], data["low"], data["close"], 20),
+			lambda: _pandas_bos(df, 20),
+		),
+		(
+			"ema_cross",
+			lambda: kernels.crosses(ema20, ema50),
+			lambda: _pandas_crosses(s20, s50),
+		),
+	]
+
+
+def _check(name: str, got: object, ref: object) -> None:
+	got_t = got if isinstance(got, tuple) else (got,)
+	ref_t = ref if isinstance(ref, tuple) else (ref,)
+	for g, r in zip(got_t, ref_t):
+		if not np.allclose(np.asarray(g, dtype=float), np.asarray(r, dtype=float), rtol=1e-9, equal_nan=True):
+			raise AssertionError(f"kernel {name} diverges from pandas reference")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+	parser.add_argument("--repeat", type=int, default=5)
+	args = parser.parse_args()
+
+	print(f"numba: {'yes' if kernels.HAVE_NUMBA else 'no (NumPy fallback)'}")
+	print(f"{'kernel':<20}{'bars':>10}{'kernel ms':>12}{'pandas ms':>12}{'speedup':>10}")
+	for n in args.sizes:
+		data = synthetic_ohlcv(n)
+		for name, kernel_fn, ref_fn in cases(data):
+			kernel_fn()  # warm-up (JIT compile)
+			k_s, got = _best_of(kernel_fn, args.repeat)
+			p_s, ref = _best_of(ref_fn, args.repeat)
+			_check(name, got, ref)
+			print(f"{name:<20}{n:>10}{k_s * 1e3:>12.3f}{p_s * 1e3:>12.3f}{p_s / k_s:>9.1f}x")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,157 @@
+"""
+Ring-buffered live candles over a simulated week of 5m ticks.
+
+	python -m backend.benchmarks.bench_live_candles [--symbols 2] [--days 7] [--check-every 144]
+
+The fake exchange's clock advances one 5m candle per tick. Each tick every
+symbol is read the way the forward-test worker reads it and its indicators
+are computed, first by refetching and rebuilding the frames in full, then
+through `LiveCandles` (ring buffers topped up with the new candles). Every
+`--check-every` ticks the ring views must equal a full fetch and
+`strategy_signals` on them must equal a fetching call. Resident memory is
+sampled at the end of each simulated day; the ring path must stay flat.
+"""
+
+from typing import Dict, List, Optional
+import argparse
+import resource
+import time
+
+import numpy as np
+
+from backend.app.api.v1.endpoints.signals import candle_limits, strategy_signals
+from backend.app.core.market_frame import MarketFrame
+from backend.app.core.strategy import DEFAULT_STRATEGY
+from backend.app.services.live_candles import LiveCandles
+from backend.app.services.market_data import CandleSet, get_market_data
+from .fake_exchange import FakeMarketData, fake_market_data
+
+SIGNAL_LIMIT = 600
+TICKS_PER_DAY = 288
+MAX_GROWTH_MB = 8.0
+
+
+class ClockedMarketData(FakeMarketData):
+	"""
+	Fake market data that only serves candles opened at or before `now_ts`.
+	"""
+
+	def __init__(self, *args, **kwargs) -> None:
+		super().__init__(*args, **kwargs)
+		self.now_ts = 0
+
+	def rows(self, symbol: str, timeframe: str) -> np.ndarray:
+		rows = super().rows(symbol, timeframe)
+		return rows[: int(np.searchsorted(rows[:, 0], self.now_ts, side="right"))]
+
+
+class CountingRouter:
+	"""
+	The market data router, counting the candles it returns.
+	"""
+
+	def __init__(self) -> None:
+		self.rows = 0
+
+	def fetch_candles(self, symbol: str, limits: Dict[str, int], since: Optional[int] = None) -> CandleSet:
+		candles = get_market_data().fetch_candles(symbol, limits, since=since)
+		self.rows += sum(len(rows) for rows in candles.timeframes.values())
+		return candles
+
+
+def rss_mb() -> float:
+	try:
+		with open("/proc/self/statm") as fh:
+			return int(fh.read().split()[1]) * resource.getpagesize() / 2**20
+	except OSError:  # not Linux: peak RSS is the closest available
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def frames(timeframes: Dict[str, object]) -> List[MarketFrame]:
+	return [MarketFrame.from_rows(rows, tf) for tf, rows in timeframes.items()]
+
+
+def indicators(frames: List[MarketFrame]) -> None:
+	for frame in frames:
+		frame.trend()
+		frame.volume()
+
+
+def check(live: LiveCandles, symbol: str) -> None:
+	limits = candle_limits(SIGNAL_LIMIT)
+	ring = live.candles(symbol, limits)
+	fresh = get_market_data().fetch_candles(symbol, limits)
+	for tf in limits:
+		if not np.array_equal(ring.timeframes[tf], np.asarray(fresh.timeframes[tf], dtype=float)):
+			raise AssertionError(f"{symbol} {tf}: ring buffer differs from a full fetch")
+	got = strategy_signals(symbol, [DEFAULT_STRATEGY], limit=SIGNAL_LIMIT, learner="heuristic", candles=ring)[0]
+	expected = strategy_signals(symbol, [DEFAULT_STRATEGY], limit=SIGNAL_LIMIT, learner="heuristic")[0]
+	for out in (got, expected):
+		out["meta"].pop("generated_at")
+	if got != expected:
+		raise AssertionError(f"{symbol}: signals on ring candles differ from fetched candles")
+
+
+def simulate(data: ClockedMarketData, symbols: List[str], days: int, start_ts: int, mode: str, check_every: int) -> None:
+	router = CountingRouter()
+	live = LiveCandles(router=lambda: router)
+	limits = candle_limits(SIGNAL_LIMIT)
+	data.now_ts = start_ts
+	daily: List[float] = []
+	load_ms: List[float] = []
+	tick_ms: List[float] = []
+	checks = 0
+	for tick in range(days * TICKS_PER_DAY):
+		data.now_ts += 300_000
+		load = 0.0
+		t0 = time.perf_counter()
+		for symbol in symbols:
+			t1 = time.perf_counter()
+			if mode == "ring":
+				candles = live.candles(symbol, limits)
+			else:
+				candles = router.fetch_candles(symbol, limits)
+			built = frames(candles.timeframes)
+			load += time.perf_counter() - t1
+			indicators(built)
+		load_ms.append(load * 1000.0)
+		tick_ms.append((time.perf_counter() - t0) * 1000.0)
+		fetched = router.rows
+		if mode == "ring" and check_every and tick % check_every == 0:
+			for symbol in symbols:
+				check(live, symbol)
+			checks += 1
+		router.rows = fetched  # checks excluded
+		if (tick + 1) % TICKS_PER_DAY == 0:
+			daily.append(rss_mb())
+
+	growth = daily[-1] - daily[0]
+	print(
+		f"{mode:>7}: {days * TICKS_PER_DAY} ticks x {len(symbols)} symbols, median tick {np.median(tick_ms):.1f} ms "
+		f"(candles + frames {np.median(load_ms):.2f} ms), {router.rows / len(tick_ms):.0f} candles fetched per tick; "
+		f"RSS by day (MB) {' '.join(f'{v:.1f}' for v in daily)}; day 1 -> {days}: {growth:+.1f} MB"
+	)
+	if mode == "ring":
+		print(f"ring buffers: {live.nbytes / 1024:.0f} KB for {len(live)} symbols; {checks * len(symbols)} checks identical to full fetches")
+		if growth > MAX_GROWTH_MB:
+			raise AssertionError(f"RSS grew {growth:.1f} MB over the simulated week")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--symbols", type=int, default=2)
+	parser.add_argument("--days", type=int, default=7)
+	parser.add_argument("--check-every", type=int, default=144, help="ticks between equality checks (0 = none)")
+	args = parser.parse_args()
+
+	symbols = [f"L{k:02d}/USD" for k in range(args.symbols)]
+	warmup = 3 * SIGNAL_LIMIT  # the 15m history needs 3x the 5m bars
+	data = ClockedMarketData(symbols=symbols, bars=warmup + args.days * TICKS_PER_DAY + 1)
+	start_ts = int(data.series[symbols[0]]["5m"][warmup, 0])
+	with fake_market_data(data):
+		simulate(data, symbols, args.days, start_ts, "refetch", 0)
+		simulate(data, symbols, args.days, start_ts, "ring", args.check_every)
+
+
+if __name__ == "__main__":
+	main()
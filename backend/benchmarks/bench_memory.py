@@ -0,0 +1,110 @@
+"""
+Peak allocation of the fusion and signals indicator pipelines: one frame
+copy per consumer (how the endpoints used to work) vs. a shared MarketFrame.
+
+	python -m backend.benchmarks.bench_memory [--bars 500 3000]
+
+Both pipelines must produce identical trend/volume signals, fusion scores and
+heuristic weights. Peaks are measured with tracemalloc (numpy reports its
+buffers to it), starting from the raw candle rows.
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from backend.app.core.scoring import score_setup
+from backend.app.api.v1.endpoints.signals import heuristic_weights
+from backend.app.api.v1.endpoints.trend import compute_emas, detect_trend_and_signals
+from backend.app.api.v1.endpoints.volume import compute_volume_features, detect_volume_signals
+from backend.app.core.market_frame import MarketFrame
+from .fake_exchange import resample, synthetic_ohlcv
+
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+def copied_fusion(rows5: List[List[float]], rows15: List[List[float]]) -> Tuple[Any, ...]:
+	df5 = pd.DataFrame(rows5, columns=COLUMNS)
+	df15 = pd.DataFrame(rows15, columns=COLUMNS)
+	df5_trend = compute_emas(df5.copy(), [20, 50, 200])
+	df15_trend = compute_emas(df15.copy(), [20, 50, 200])
+	df5_vol = compute_volume_features(df5.copy())
+	df15_vol = compute_volume_features(df15.copy())
+	summary, trend_signals = detect_trend_and_signals(df5_trend, df15_trend)
+	vol_signals = detect_volume_signals(df5_vol, "5m") + detect_volume_signals(df15_vol, "15m")
+	return summary, trend_signals, vol_signals, score_setup(summary, trend_signals, vol_signals)
+
+
+def shared_fusion(rows5: List[List[float]], rows15: List[List[float]]) -> Tuple[Any, ...]:
+	f5 = MarketFrame.from_rows(rows5, "5m")
+	f15 = MarketFrame.from_rows(rows15, "15m")
+	summary, trend_signals = detect_trend_and_signals(f5.trend(), f15.trend())
+	vol_signals = detect_volume_signals(f5.volume(), "5m") + detect_volume_signals(f15.volume(), "15m")
+	return summary, trend_signals, vol_signals, score_setup(summary, trend_signals, vol_signals)
+
+
+def copied_signals(rows5: List[List[float]], rows15: List[List[float]]) -> Tuple[Any, ...]:
+	df5 = pd.DataFrame(rows5, columns=COLUMNS)
+	df15 = pd.DataFrame(rows15, columns=COLUMNS)
+	*fusion, _ = copied_fusion(rows5, rows15)
+	# Learning read its own copies of the candles
+	return (*fusion, heuristic_weights(df5.copy(), df15.copy()))
+
+
+def shared_signals(rows5: List[List[float]], rows15: List[List[float]]) -> Tuple[Any, ...]:
+	f5 = MarketFrame.from_rows(rows5, "5m")
+	f15 = MarketFrame.from_rows(rows15, "15m")
+	summary, trend_signals = detect_trend_and_signals(f5.trend(), f15.trend())
+	vol_signals = detect_volume_signals(f5.volume(), "5m") + detect_volume_signals(f15.volume(), "15m")
+	return summary, trend_signals, vol_signals, heuristic_weights(f5, f15)
+
+
+def peak(fn: Callable[[], Any]) -> Tuple[Any, int, float]:
+	"""
+	(result, peak bytes allocated during the call, ms).
+	"""
+	tracemalloc.start()
+	try:
+		base = tracemalloc.get_traced_memory()[0]
+		tracemalloc.reset_peak()
+		t0 = time.perf_counter()
+		out = fn()
+		ms = (time.perf_counter() - t0) * 1000.0
+		return out, tracemalloc.get_traced_memory()[1] - base, ms
+	finally:
+		tracemalloc.stop()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--bars", type=int, nargs="+", default=[500, 3000])
+	args = parser.parse_args()
+
+	pipelines: Dict[str, Tuple[Callable, Callable]] = {
+		"fusion": (copied_fusion, shared_fusion),
+		"signals": (copied_signals, shared_signals),
+	}
+	print(f"{'pipeline':<10}{'bars':>7}{'copies peak':>14}{'shared peak':>14}{'reduction':>11}{'copies ms':>11}{'shared ms':>11}")
+	for n in args.bars:
+		rows5 = synthetic_ohlcv(n, "5m", seed=n).tolist()
+		rows15 = resample(synthetic_ohlcv(n * 3, "5m", seed=n), 3)[-n:].tolist()
+		for name, (copied, shared) in pipelines.items():
+			# Warm-up (imports, numba)
+			copied(rows5, rows15)
+			shared(rows5, rows15)
+			expected, copied_peak, copied_ms = peak(lambda: copied(rows5, rows15))
+			got, shared_peak, shared_ms = peak(lambda: shared(rows5, rows15))
+			if got != expected:
+				raise AssertionError(f"{name}[{n}]: shared frame results differ from the copied pipeline")
+			print(
+				f"{name:<10}{n:>7}{copied_peak / 1024:>11.0f} KB{shared_peak / 1024:>11.0f} KB"
+				f"{(1 - shared_peak / copied_peak) * 100:>10.0f}%{copied_ms:>11.1f}{shared_ms:>11.1f}"
+			)
+	print("results identical")
+
+
+if __name__ == "__main__":
+	main()
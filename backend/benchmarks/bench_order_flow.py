@@ -0,0 +1,215 @@
+"""
+Order flow: trade aggregation, incremental ingestion and its cost to fusion.
+
+	python -m backend.benchmarks.bench_order_flow [--trades 1000000] [--hours 48]
+
+1. `aggregate_trades` is timed against a pandas groupby and a per-trade
+   Python loop over ccxt trade dicts; all three must give the same bars.
+2. The fake exchange's clock advances a minute per tick (with one gap of
+   several hours, so ingestion pages) and `ingest_symbol` runs every tick
+   into a temporary SQLite store. Trade timestamps are whole seconds, so a
+   page can end inside a millisecond shared with the next page. For the
+   last `RACE_TICKS` ticks two sessions ingest at once, as the leader's
+   worker and `POST /order-flow/ingest` can. The stored bars must equal one
+   aggregation of every trade since the first whole bar.
+3. The per-request cost of reading and scoring stored flow is compared
+   with a whole `get_fusion` call.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .fake_exchange import START_TS, FakeMarketData
+
+BAR_MS = 300_000
+GAP_MINUTES = 600  # ~2400 trades: ingestion pages through them
+RACE_TICKS = 120
+FIELDS = ("ts", "buy_volume", "sell_volume", "notional", "trades")
+
+
+class ClockedFlowData(FakeMarketData):
+	"""
+	Fake market data serving candles opened and trades made at or before
+	`now_ts`, with trades on whole seconds. (Like bench_live_candles'
+	ClockedMarketData, which cannot be imported before the bench picks its
+	database.) Candles are moved onto 5m boundaries, where exchanges put
+	them and flow bars are keyed.
+	"""
+
+	def __init__(self, *args, **kwargs) -> None:
+		super().__init__(*args, **kwargs)
+		self.now_ts = 0
+		for by_tf in self.series.values():
+			for rows in by_tf.values():
+				rows[:, 0] -= START_TS % BAR_MS
+
+	def rows(self, symbol: str, timeframe: str) -> np.ndarray:
+		rows = super().rows(symbol, timeframe)
+		return rows[: int(np.searchsorted(rows[:, 0], self.now_ts, side="right"))]
+
+	def trades(self, symbol: str) -> np.ndarray:
+		if symbol not in self._trades:
+			super().trades(symbol)[:, 0] //= 1000
+			self._trades[symbol][:, 0] *= 1000
+		rows = self._trades[symbol]
+		return rows[: int(np.searchsorted(rows[:, 0], self.now_ts, side="right"))]
+
+
+def loop_aggregate(trades: List[dict]) -> Dict[str, np.ndarray]:
+	bars: Dict[int, List[float]] = {}
+	for t in trades:
+		bar = bars.setdefault(t["timestamp"] - t["timestamp"] % BAR_MS, [0.0, 0.0, 0.0, 0])
+		bar[0 if t["side"] == "buy" else 1] += t["amount"]
+		bar[2] += t["price"] * t["amount"]
+		bar[3] += 1
+	keys = sorted(bars)
+	cols = list(zip(*(bars[k] for k in keys)))
+	return dict(zip(FIELDS, [np.array(keys)] + [np.array(c) for c in cols]))
+
+
+def pandas_aggregate(ts: np.ndarray, price: np.ndarray, amount: np.ndarray, side: np.ndarray) -> Dict[str, np.ndarray]:
+	import pandas as pd
+
+	df = pd.DataFrame({
+		"bar": ts - ts % BAR_MS,
+		"buy": np.where(side > 0, amount, 0.0),
+		"sell": np.where(side < 0, amount, 0.0),
+		"notional": price * amount,
+	})
+	g = df.groupby("bar", sort=True).agg(buy=("buy", "sum"), sell=("sell", "sum"), notional=("notional", "sum"), trades=("buy", "size"))
+	return dict(zip(FIELDS, [g.index.to_numpy(), g["buy"].to_numpy(), g["sell"].to_numpy(), g["notional"].to_numpy(), g["trades"].to_numpy()]))
+
+
+def same_bars(a: Dict[str, np.ndarray], b: Dict[str, np.ndarray], label: str) -> None:
+	for name in FIELDS:
+		if a[name].shape != b[name].shape or not np.allclose(a[name], b[name], rtol=1e-9, atol=1e-9):
+			raise AssertionError(f"{label}: {name} differs")
+
+
+def bars_dict(bars) -> Dict[str, np.ndarray]:
+	return {name: getattr(bars, name) for name in FIELDS}
+
+
+def best_ms(fn, rounds: int = 3) -> float:
+	best = float("inf")
+	for _ in range(rounds):
+		t0 = time.perf_counter()
+		fn()
+		best = min(best, (time.perf_counter() - t0) * 1000.0)
+	return best
+
+
+def check_aggregation(n: int) -> None:
+	from backend.app.services.order_flow import aggregate_trades, trade_arrays
+	from .fake_exchange import synthetic_ohlcv, synthetic_trades
+
+	rows = synthetic_trades(synthetic_ohlcv(n // 20 + 1), per_bar=20)[:n]
+	ts, price, amount, side = rows[:, 0].astype(np.int64), rows[:, 1], rows[:, 2], rows[:, 3].astype(np.int8)
+	dicts = [
+		{"timestamp": int(t), "side": "buy" if s > 0 else "sell", "price": p, "amount": a}
+		for t, p, a, s in rows[: n // 10].tolist()
+	]
+
+	ours = bars_dict(aggregate_trades(ts, price, amount, side))
+	same_bars(ours, pandas_aggregate(ts, price, amount, side), "pandas groupby")
+	same_bars(bars_dict(aggregate_trades(*trade_arrays(dicts))), loop_aggregate(dicts), "python loop")
+
+	kernel = best_ms(lambda: aggregate_trades(ts, price, amount, side))
+	grouped = best_ms(lambda: pandas_aggregate(ts, price, amount, side))
+	looped = best_ms(lambda: loop_aggregate(dicts), rounds=1) * 10  # run on a tenth
+	parsed = best_ms(lambda: trade_arrays(dicts), rounds=1) * 10
+	print(
+		f"aggregation: {n} trades -> {ours['ts'].shape[0]} bars; reduceat {kernel:.1f} ms, "
+		f"pandas groupby {grouped:.1f} ms, python loop ~{looped:.0f} ms (ccxt dicts -> arrays ~{parsed:.0f} ms); identical bars"
+	)
+
+
+def check_ingestion(hours: int) -> None:
+	from backend.app.db import SessionLocal, init_db
+	from backend.app.api.v1.endpoints.fusion import get_fusion
+	from backend.app.models.order_flow import FlowBar
+	from backend.app.services.order_flow import IngestionInProgress, aggregate_trades, detect_flow_signals, ingest_symbol, recent_flow
+	from .fake_exchange import fake_market_data
+
+	init_db()
+	symbol = "OF/USD"
+	data = ClockedFlowData(symbols=[symbol, "NOFLOW/USD"], bars=600 + hours * 12 + GAP_MINUTES // 5 + 10)
+	data.now_ts = int(data.series[symbol]["5m"][600, 0]) + 123_000
+	gap_tick = hours * 60 // 2
+	db = SessionLocal()
+	try:
+		with fake_market_data(data):
+			ticks: List[float] = []
+			trades = 0
+			for tick in range(hours * 60):
+				data.now_ts += 60_000 * (GAP_MINUTES if tick == gap_tick else 1)
+				t0 = time.perf_counter()
+				trades += ingest_symbol(db, symbol)["trades"]
+				ticks.append((time.perf_counter() - t0) * 1000.0)
+
+			def racer() -> int:
+				session = SessionLocal()
+				try:
+					return ingest_symbol(session, symbol)["trades"]
+				except IngestionInProgress:
+					return -1
+				finally:
+					session.close()
+
+			busy = 0
+			with ThreadPoolExecutor(max_workers=2) as pool:
+				for _ in range(RACE_TICKS):
+					data.now_ts += 60_000
+					for got in list(pool.map(lambda _: racer(), range(2))):
+						busy += got < 0
+						trades += max(got, 0)
+
+			rows = data.trades(symbol)
+			first = db.query(FlowBar.ts).filter(FlowBar.symbol == symbol, FlowBar.trades > 0).order_by(FlowBar.ts.asc()).first()[0]
+			kept = rows[rows[:, 0] >= first]
+			expected = bars_dict(aggregate_trades(kept[:, 0].astype(np.int64), kept[:, 1], kept[:, 2], kept[:, 3].astype(np.int8)))
+			stored = db.query(FlowBar).filter(FlowBar.symbol == symbol, FlowBar.trades > 0).order_by(FlowBar.ts.asc()).all()
+			got = {name: np.array([getattr(r, name) for r in stored]) for name in FIELDS}
+			same_bars(got, expected, "incremental ingestion")
+			books = db.query(FlowBar).filter(FlowBar.symbol == symbol, FlowBar.imbalance.isnot(None)).count()
+			print(
+				f"ingestion: {len(ticks)} ticks ({trades} trades, one {GAP_MINUTES} minute gap), median {np.median(ticks):.1f} ms, "
+				f"max {max(ticks):.1f} ms; {len(stored)} bars identical to one aggregation, {books} with book imbalance"
+			)
+			print(f"  then {RACE_TICKS} ticks of two concurrent passes: {busy} turned away, no trade counted twice")
+
+			ts5 = data.rows(symbol, "5m")[:, 0].astype(np.int64)
+			read = best_ms(lambda: [detect_flow_signals(recent_flow(symbol, ts5, 6)) for _ in range(100)]) / 100
+			fusion: Dict[str, float] = {}
+			for name in (symbol, "NOFLOW/USD"):
+				get_fusion(name, limit=200, strategy="fusion")
+				fusion[name] = best_ms(lambda: [get_fusion(name, limit=200, strategy="fusion") for _ in range(10)]) / 10
+			out = get_fusion(symbol, limit=200, strategy="fusion")
+			print(
+				f"per request: flow read + detection {read:.2f} ms; get_fusion {fusion[symbol]:.1f} ms with flow, "
+				f"{fusion['NOFLOW/USD']:.1f} ms without; flow {out['flow']}"
+			)
+	finally:
+		db.close()
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--trades", type=int, default=1_000_000)
+	parser.add_argument("--hours", type=int, default=48, help="simulated hours of one-minute ingestion ticks")
+	args = parser.parse_args()
+
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_order_flow_"), "flow.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	check_aggregation(args.trades)
+	check_ingestion(args.hours)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,281 @@
+"""
+Compact records in the simulation and forward-test loops: allocations and
+throughput before/after.
+
+	python -m backend.benchmarks.bench_records [--symbols 8] [--bars 50000] [--candles 200000]
+
+1. Trades: `SimTrade` (slotted) against the same dataclass without slots,
+   built from one portfolio's simulated trades, a symbol at a time, and
+   summarized.
+2. Candles: `Candle.from_row` over `ndarray.tolist()` rows against the
+   per-row dicts (with float()/int() per field) forward testing built
+   before, read the way `process_candle` reads them, `STEP_CANDLES` rows
+   per worker tick.
+3. Per-symbol portfolio results: TRADE_DTYPE arrays against a tuple per
+   trade, pickled out of a worker and merged. `merge_portfolio` must give
+   the same portfolio as the tuple merge.
+
+Allocations are the objects (memory blocks) and bytes still held once the
+records are built, from sys.getallocatedblocks and tracemalloc.
+"""
+
+from dataclasses import astuple, fields, make_dataclass
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import math
+import pickle
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from backend.app.core.strategy import DEFAULT_STRATEGY
+from backend.app.services.backtest import (
+	EXIT_REASONS,
+	SIDE_LABELS,
+	BacktestConfig,
+	PortfolioConfig,
+	SimTrade,
+	_simulate_symbol,
+	merge_portfolio,
+	setup_series_arrays,
+	simulate,
+	summarize,
+)
+from backend.app.services.forward_test import STEP_CANDLES, Candle
+from .fake_exchange import resample, synthetic_ohlcv
+
+# SimTrade as it was: a plain dataclass with a __dict__ per trade
+DictTrade = make_dataclass("DictTrade", [(f.name, f.type, f) for f in fields(SimTrade)])
+
+
+def dict_candle(row) -> Dict[str, Any]:
+	return {"t": int(row[0]), "o": float(row[1]), "h": float(row[2]), "l": float(row[3]), "c": float(row[4]), "v": float(row[5])}
+
+
+def tuple_trades(records: np.ndarray) -> List[tuple]:
+	return [(t[0], t[1], t[2], t[3], t[4], t[5], EXIT_REASONS[t[6]]) for t in records.tolist()]
+
+
+def tuple_merge(results: List[Dict[str, Any]], cfg: PortfolioConfig) -> Dict[str, Any]:
+	"""
+	`merge_portfolio` over a list of (entry_ts, exit_ts, side, entry, exit,
+	ret, reason) tuples per symbol, as it was.
+	"""
+	EXIT, ENTRY = 0, 1
+	events: List[Tuple[int, int, int]] = []
+	trades: List[Tuple[str, tuple]] = []
+	for r in results:
+		for t in r["trades"]:
+			if t[1] == t[0]:
+				continue
+			k = len(trades)
+			trades.append((r["symbol"], t))
+			events.append((t[0], ENTRY, k))
+			events.append((t[1], EXIT, k))
+	events.sort()
+
+	equity = 1.0
+	open_alloc: Dict[int, float] = {}
+	curve: List[Tuple[int, float]] = []
+	taken: List[Dict[str, Any]] = []
+	skipped = 0
+	max_open = 0
+	gross_profit = 0.0
+	gross_loss = 0.0
+	for ts, kind, k in events:
+		if kind == ENTRY:
+			if len(open_alloc) >= cfg.max_positions:
+				skipped += 1
+				continue
+			open_alloc[k] = equity * cfg.position_size
+			max_open = max(max_open, len(open_alloc))
+			continue
+		alloc = open_alloc.pop(k, None)
+		if alloc is None:
+			continue
+		symbol, (entry_ts, exit_ts, side, entry, exit_price, ret, reason) = trades[k]
+		pnl = alloc * ret
+		equity += pnl
+		if pnl >= 0:
+			gross_profit += pnl
+		else:
+			gross_loss += -pnl
+		curve.append((exit_ts, equity))
+		taken.append({
+			"symbol": symbol,
+			"side": SIDE_LABELS[side],
+			"entry_ts": entry_ts,
+			"exit_ts": exit_ts,
+			"entry": entry,
+			"exit": exit_price,
+			"pl_pct": round(ret * 100, 2),
+			"equity_pl_pct": round(pnl / (equity - pnl) * 100, 4) if equity != pnl else 0.0,
+			"exit_reason": reason,
+		})
+
+	peak = 1.0
+	max_dd = 0.0
+	for _, v in curve:
+		peak = max(peak, v)
+		max_dd = max(max_dd, (peak - v) / peak if peak > 0 else 0)
+	wins = sum(1 for t in taken if t["pl_pct"] > 0)
+	profit_factor = (gross_profit / gross_loss) if gross_loss > 0 else float("inf") if gross_profit > 0 else 0.0
+	return {
+		"stats": {
+			"trades": len(taken),
+			"skipped_max_positions": skipped,
+			"max_concurrent_positions": max_open,
+			"wins": wins,
+			"losses": len(taken) - wins,
+			"win_rate": round(wins / len(taken) * 100, 2) if taken else 0.0,
+			"pl_pct": round((equity - 1.0) * 100, 2),
+			"profit_factor": None if math.isinf(profit_factor) else round(profit_factor, 2),
+			"max_drawdown_pct": round(max_dd * 100, 2),
+		},
+		"equity_curve": [{"t": t, "equity": round(v, 6)} for t, v in curve],
+		"trades": taken,
+	}
+
+
+def held(build: Callable[[], Any]) -> Tuple[Any, int, int]:
+	"""
+	`build()`, and the memory blocks and bytes its result still holds.
+	"""
+	tracemalloc.start()
+	try:
+		blocks, (before, _) = sys.getallocatedblocks(), tracemalloc.get_traced_memory()
+		out = build()
+		return out, sys.getallocatedblocks() - blocks, tracemalloc.get_traced_memory()[0] - before
+	finally:
+		tracemalloc.stop()
+
+
+def best_ms(fn: Callable[[], Any], rounds: int = 5) -> float:
+	best = float("inf")
+	for _ in range(rounds):
+		t0 = time.perf_counter()
+		fn()
+		best = min(best, (time.perf_counter() - t0) * 1000.0)
+	return best
+
+
+def report(label: str, n: int, before: Tuple[int, int, float], after: Tuple[int, int, float]) -> None:
+	(b_blocks, b_bytes, b_ms), (a_blocks, a_bytes, a_ms) = before, after
+	print(
+		f"{label}: {n:,} records; before {b_blocks / n:.1f} objects, {b_bytes / n:.0f} B each, {b_ms:.1f} ms; "
+		f"after {a_blocks / n:.1f} objects, {a_bytes / n:.0f} B each, {a_ms:.1f} ms ({b_ms / a_ms:.1f}x)"
+	)
+
+
+def portfolio_payloads(symbols: int, bars: int) -> List[Dict[str, Any]]:
+	payloads = []
+	for k in range(symbols):
+		rows5 = synthetic_ohlcv(bars, "5m", seed=200 + k)
+		rows15 = resample(rows5, 3)
+		payloads.append({
+			"symbol": f"REC{k}/USD",
+			"config": BacktestConfig(),
+			"strategy": DEFAULT_STRATEGY,
+			"arrays": {
+				"ts5": rows5[:, 0].astype(np.int64),
+				"open": rows5[:, 1], "high": rows5[:, 2], "low": rows5[:, 3], "close": rows5[:, 4], "volume": rows5[:, 5],
+				"ts15": rows15[:, 0].astype(np.int64),
+				"close15": rows15[:, 4],
+			},
+		})
+	return payloads
+
+
+def check_trades(payloads: List[Dict[str, Any]]) -> None:
+	sims: List[SimTrade] = []
+	for p in payloads:
+		a = p["arrays"]
+		setups = setup_series_arrays(a["ts5"], a["open"], a["high"], a["low"], a["close"], a["volume"], a["ts15"], a["close15"])
+		sims += simulate(a["close"], setups, p["config"])
+	values = [astuple(t) for t in sims]
+	# One simulation's worth of trades at a time, as `simulate` builds them
+	batches = [values[k: k + len(values) // len(payloads)] for k in range(0, len(values), len(values) // len(payloads))] * 8
+	timings = {}
+	for cls in (DictTrade, SimTrade):
+		trades, blocks, size = held(lambda: [cls(*v) for v in values])
+		if summarize(trades) != summarize(sims):
+			raise AssertionError(f"{cls.__name__}: stats differ")
+		del trades
+		timings[cls] = (blocks, size, best_ms(lambda: [summarize([cls(*v) for v in batch]) for batch in batches]))
+	report("trades (build + summarize)", len(values), timings[DictTrade], timings[SimTrade])
+
+
+def check_candles(n: int) -> None:
+	rows = synthetic_ohlcv(n)
+
+	def dicts(batch: np.ndarray = rows) -> List[Dict[str, Any]]:
+		return [dict_candle(r) for r in batch]
+
+	def records(batch: np.ndarray = rows) -> List[Candle]:
+		return [Candle.from_row(r) for r in batch.tolist()]
+
+	def read_dicts(candles: List[Dict[str, Any]]) -> float:
+		total = 0.0
+		for c in candles:
+			ts_ms, close, high, low = int(c["t"]), float(c["c"]), float(c["h"]), float(c["l"])
+			total += close + high - low + ts_ms
+		return total
+
+	def read_records(candles: List[Candle]) -> float:
+		total = 0.0
+		for c in candles:
+			ts_ms, close, high, low = c.t, c.c, c.h, c.l
+			total += close + high - low + ts_ms
+		return total
+
+	before, b_blocks, b_bytes = held(dicts)
+	after, a_blocks, a_bytes = held(records)
+	if [dict_candle(r) for r in rows] != [{"t": c.t, "o": c.o, "h": c.h, "l": c.l, "c": c.c, "v": c.v} for c in after]:
+		raise AssertionError("candle records differ from the dicts")
+	if read_dicts(before) != read_records(after):
+		raise AssertionError("candle reads differ")
+	del before, after
+	ticks = [rows[k: k + STEP_CANDLES] for k in range(0, n, STEP_CANDLES)]
+	b_ms = best_ms(lambda: [read_dicts(dicts(batch)) for batch in ticks])
+	a_ms = best_ms(lambda: [read_records(records(batch)) for batch in ticks])
+	report("candles (build + read)", n, (b_blocks, b_bytes, b_ms), (a_blocks, a_bytes, a_ms))
+
+
+def check_portfolio(payloads: List[Dict[str, Any]]) -> None:
+	results = [_simulate_symbol(p) for p in payloads]
+	as_tuples = [{**r, "trades": tuple_trades(r["trades"])} for r in results]
+	cfg = PortfolioConfig(max_positions=3)
+	if merge_portfolio(results, cfg) != tuple_merge(as_tuples, cfg):
+		raise AssertionError("merge_portfolio differs from the tuple merge")
+	n = sum(r["trades"].shape[0] for r in results)
+
+	def shipped(rs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+		return [pickle.loads(pickle.dumps(r["trades"])) for r in rs]
+
+	_, b_blocks, b_bytes = held(lambda: shipped(as_tuples))
+	_, a_blocks, a_bytes = held(lambda: shipped(results))
+	b_pickled = sum(len(pickle.dumps(r["trades"])) for r in as_tuples)
+	a_pickled = sum(len(pickle.dumps(r["trades"])) for r in results)
+	b_ms = best_ms(lambda: shipped(as_tuples)) + best_ms(lambda: tuple_merge(as_tuples, cfg))
+	a_ms = best_ms(lambda: shipped(results)) + best_ms(lambda: merge_portfolio(results, cfg))
+	report("portfolio trades (pickle round trip + merge)", n, (b_blocks, b_bytes, b_ms), (a_blocks, a_bytes, a_ms))
+	print(f"  pickled {b_pickled / n:.0f} -> {a_pickled / n:.0f} B per trade; merged portfolios identical")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--symbols", type=int, default=8)
+	parser.add_argument("--bars", type=int, default=50_000)
+	parser.add_argument("--candles", type=int, default=200_000)
+	args = parser.parse_args()
+
+	payloads = portfolio_payloads(args.symbols, args.bars)
+	check_trades(payloads)
+	check_candles(args.candles)
+	check_portfolio(payloads)
+
+
+if __name__ == "__main__":
+	main()
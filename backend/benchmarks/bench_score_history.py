@@ -0,0 +1,138 @@
+"""
+Score history: append throughput and chart-range read latency.
+
+	python -m backend.benchmarks.bench_score_history [--symbols 20] [--days 30]
+
+Fills a temporary SQLite store with one point per 5m candle per symbol,
+re-appends a slice (must be skipped), then reads ranges raw and downsampled.
+Bucketed mean/min/max scores and last-in-bucket labels must match a pandas
+groupby over the raw points.
+"""
+
+from typing import Any, Dict, List
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from .fake_exchange import START_TS
+
+BAR_MS = 300_000
+READS = [
+	("1 day raw", 1, None),
+	("7 days, auto bucket", 7, None),
+	("30 days, 1h", 30, "1h"),
+	("30 days, 1d", 30, "1d"),
+]
+
+
+def synthetic_points(symbol: str, n: int, seed: int) -> List[Dict[str, Any]]:
+	from backend.app.services.score_history import signal_point
+
+	rng = np.random.default_rng(seed)
+	score = np.clip(np.cumsum(rng.integers(-6, 7, n)) % 140 - 20, 0, 100)
+	grades = np.digitize(score, (35, 50, 65, 80))
+	labels = ("none", "C", "B", "A", "A+")
+	trend = rng.choice(["long", "short", "none"], n)
+	weights = {"trend_base": 30.0}
+	out = []
+	for i in range(n):
+		if i % 288 == 0:
+			weights = {"trend_base": float(rng.uniform(0, 30))}
+		out.append(signal_point(symbol, START_TS + i * BAR_MS, {
+			"fusion_score": int(score[i]),
+			"fusion_grade": labels[grades[i]],
+			"direction": trend[i],
+			"confidence": int(40 + score[i] // 2),
+			"action": "buy" if grades[i] >= 2 and trend[i] == "long" else "hold",
+			"weights": weights,
+		}))
+	return out
+
+
+def reference(points: List[Dict[str, Any]], start_ms: int, end_ms: int, bucket_ms: int) -> pd.DataFrame:
+	df = pd.DataFrame(points)
+	df = df[(df["ts"] >= start_ms) & (df["ts"] < end_ms)].sort_values("ts")
+	g = df.groupby(df["ts"] // bucket_ms)
+	return pd.DataFrame({
+		"t": g["ts"].first() // bucket_ms * bucket_ms,
+		"score": g["score"].mean().round(2),
+		"score_min": g["score"].min(),
+		"score_max": g["score"].max(),
+		"grade": g["grade"].last(),
+		"confidence": g["confidence"].last(),
+		"weights_version": g["weights_version"].last(),
+	}).reset_index(drop=True)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--symbols", type=int, default=20)
+	parser.add_argument("--days", type=int, default=30)
+	parser.add_argument("--reads", type=int, default=20)
+	args = parser.parse_args()
+
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_score_history_"), "history.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	from backend.app.core.scoring import GRADE_LABELS
+	from backend.app.db import SessionLocal, init_db
+	from backend.app.services.score_history import BUCKET_MS, load_series, record_points
+
+	init_db()
+	n = args.days * 288
+	symbols = [f"C{k:03d}/USD" for k in range(args.symbols)]
+	points = {s: synthetic_points(s, n, seed=k) for k, s in enumerate(symbols)}
+
+	db = SessionLocal()
+	try:
+		t0 = time.perf_counter()
+		for s in symbols:
+			# Appended a day at a time, as the worker would after an outage
+			for d in range(0, n, 288):
+				record_points(db, points[s][d: d + 288])
+			db.commit()
+		ms = (time.perf_counter() - t0) * 1000.0
+		total = n * len(symbols)
+		print(f"append: {total:,} points in {ms:.0f} ms ({total / (ms / 1000.0):,.0f} points/s), {os.path.getsize(db_path) / total:.0f} bytes/point on disk")
+
+		again = record_points(db, points[symbols[0]][-500:])
+		db.commit()
+		if again:
+			raise AssertionError(f"{again} duplicate points were appended")
+
+		end_ms = START_TS + n * BAR_MS
+		symbol = symbols[len(symbols) // 2]
+		for label, days, bucket in READS:
+			start_ms = end_ms - days * 86_400_000
+			timings: List[float] = []
+			for _ in range(args.reads):
+				t0 = time.perf_counter()
+				got = load_series(db, symbol, "signals", start_ms, end_ms, bucket=bucket, max_points=500)
+				timings.append((time.perf_counter() - t0) * 1000.0)
+			series = got["series"]
+			if got["bucket"] != "5m":
+				expected = reference(points[symbol], start_ms, end_ms, BUCKET_MS[got["bucket"]])
+				checks = {
+					"t": expected["t"].tolist(),
+					"score": expected["score"].tolist(),
+					"score_min": expected["score_min"].tolist(),
+					"score_max": expected["score_max"].tolist(),
+					"grade": [GRADE_LABELS[g] for g in expected["grade"]],
+					"confidence": expected["confidence"].tolist(),
+					"weights_version": expected["weights_version"].tolist(),
+				}
+				for key, values in checks.items():
+					if series[key] != values:
+						raise AssertionError(f"{label}: {key} differs from the pandas reference")
+			print(f"read {label}: {got['raw_points']} points -> {got['points']} ({got['bucket']}), median {statistics.median(timings):.1f} ms")
+		print("downsampled series identical to pandas groupby")
+	finally:
+		db.close()
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,94 @@
+"""
+Screener refresh over a large fake market, and query latency on the stored
+snapshot.
+
+	python -m backend.benchmarks.bench_screener [--symbols 300] [--bars 600] [--latency-ms 0]
+
+Every symbol's score, grade, direction and confidence must match `score_setup`
+run on the same candles (what `/fusion` returns).
+"""
+
+from typing import List
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+QUERIES = [
+	{},
+	{"min_grade": "B"},
+	{"direction": "long", "sort": "volume"},
+	{"min_grade": "C", "direction": "short", "min_volume": 1000.0, "quote": "USDT"},
+	{"sort": "change", "limit": 500},
+]
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--symbols", type=int, default=300)
+	parser.add_argument("--bars", type=int, default=600)
+	parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated exchange round trip")
+	parser.add_argument("--queries", type=int, default=200)
+	args = parser.parse_args()
+
+	db_path = os.path.join(tempfile.mkdtemp(prefix="bench_screener_"), "screener.db")
+	os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+	from backend.app.core.scoring import score_setup
+	from backend.app.api.v1.endpoints.trend import detect_trend_and_signals
+	from backend.app.api.v1.endpoints.volume import detect_volume_signals
+	from backend.app.core.config import get_settings
+	from backend.app.core.market_frame import MarketFrame
+	from backend.app.db import SessionLocal, init_db
+	from backend.app.services.market_data import get_market_data
+	from backend.app.services.screener import latest_snapshot, refresh_snapshot
+	from .fake_exchange import FakeMarketData, fake_market_data
+
+	init_db()
+	settings = get_settings()
+	settings.screener_max_symbols = args.symbols
+	quotes = ("USD", "USDT")
+	symbols = [f"C{k:03d}/{quotes[k % 2]}" for k in range(args.symbols)]
+	data = FakeMarketData(symbols=symbols, bars=args.bars)
+
+	with fake_market_data(data, latency_ms=args.latency_ms):
+		db = SessionLocal()
+		try:
+			t0 = time.perf_counter()
+			row = refresh_snapshot(db)
+			refresh_ms = (time.perf_counter() - t0) * 1000.0
+			print(
+				f"refresh: {row.symbols} symbols ({row.failed} failed) in {refresh_ms:.0f} ms "
+				f"({refresh_ms / max(1, row.symbols):.1f} ms/symbol, concurrency {settings.screener_concurrency})"
+			)
+
+			snapshot = latest_snapshot(db)
+			n = settings.screener_candles
+			router = get_market_data()
+			for i, symbol in enumerate(snapshot.symbol.tolist()):
+				candles = router.fetch_candles(symbol, {"5m": n, "15m": n})
+				f5 = MarketFrame.from_rows(candles.timeframes["5m"], "5m")
+				f15 = MarketFrame.from_rows(candles.timeframes["15m"], "15m")
+				summary, trend_signals = detect_trend_and_signals(f5.trend(), f15.trend())
+				volume_signals = detect_volume_signals(f5.volume(), "5m") + detect_volume_signals(f15.volume(), "15m")
+				expected = score_setup(summary, trend_signals, volume_signals)
+				got = snapshot.row(i)
+				for key in ("score", "grade", "direction", "confidence"):
+					if got[key] != expected[key]:
+						raise AssertionError(f"{symbol}: {key} {got[key]!r} != {expected[key]!r}")
+			print(f"scores identical to score_setup for {len(snapshot)} symbols")
+
+			for q in QUERIES:
+				ms: List[float] = []
+				for _ in range(args.queries):
+					t0 = time.perf_counter()
+					# Includes the latest-id check a request makes
+					rows = latest_snapshot(db).query(**q)
+					ms.append((time.perf_counter() - t0) * 1000.0)
+				print(f"query {q or 'default'}: {len(rows)} rows, median {statistics.median(ms):.2f} ms")
+		finally:
+			db.close()
+
+
+if __name__ == "__main__":
+	main()
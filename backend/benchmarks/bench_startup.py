@@ -0,0 +1,130 @@
+"""
+Cold-start benchmark: import time of the API and time to the first `/health`.
+
+	python -m backend.benchmarks.bench_startup                    # report
+	python -m backend.benchmarks.bench_startup --fail-over-target # exit 1 above target
+
+Import time is measured with `python -X importtime` in a fresh interpreter.
+Time-to-health starts a real uvicorn process and polls `/health` until it
+answers. The targets are for the API on a Railway container. Heavy
+dependencies (ccxt, pandas, scikit-learn) must not be imported before the
+first request (see backend/app/core/lazy.py).
+"""
+
+from typing import Dict, List, Tuple
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+APP_MODULE = "backend.app.main"
+HEAVY_MODULES = ("ccxt", "pandas", "sklearn", "joblib", "scipy")
+TARGET_IMPORT_MS = 800.0
+TARGET_HEALTH_MS = 1000.0
+
+
+def _env() -> Dict[str, str]:
+	env = dict(os.environ)
+	env.setdefault("DATABASE_URL", f"sqlite:///{tempfile.gettempdir()}/bench_startup.db")
+	return env
+
+
+def import_profile() -> Tuple[float, List[Tuple[str, float]]]:
+	"""
+	(cumulative ms for the app module, [(top-level package, cumulative ms)]).
+	"""
+	proc = subprocess.run(
+		[sys.executable, "-X", "importtime", "-c", f"import {APP_MODULE}"],
+		capture_output=True, text=True, env=_env(), check=True,
+	)
+	total = 0.0
+	packages: Dict[str, float] = {}
+	for line in proc.stderr.splitlines():
+		if not line.startswith("import time:") or "|" not in line:
+			continue
+		_, cumulative, name = line.split("|", 2)
+		try:
+			us = float(cumulative.strip())
+		except ValueError:
+			continue  # header line
+		name = name.strip()
+		if name == APP_MODULE:
+			total = us / 1000.0
+		if "." not in name:
+			packages[name] = max(packages.get(name, 0.0), us / 1000.0)
+	top = sorted(packages.items(), key=lambda kv: -kv[1])[:12]
+	return total, top
+
+
+def heavy_modules_loaded() -> List[str]:
+	code = f"import sys, {APP_MODULE}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+	out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=_env(), check=True).stdout.strip()
+	return [m for m in out.split(",") if m]
+
+
+def _free_port() -> int:
+	with socket.socket() as s:
+		s.bind(("127.0.0.1", 0))
+		return s.getsockname()[1]
+
+
+def time_to_health(timeout: float = 60.0) -> float:
+	port = _free_port()
+	url = f"http://127.0.0.1:{port}/health"
+	started = time.perf_counter()
+	proc = subprocess.Popen(
+		[sys.executable, "-m", "uvicorn", f"{APP_MODULE}:app", "--port", str(port), "--log-level", "warning"],
+		env=_env(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+	)
+	try:
+		while time.perf_counter() - started < timeout:
+			try:
+				with urllib.request.urlopen(url, timeout=1.0) as resp:
+					if resp.status == 200:
+						return (time.perf_counter() - started) * 1000.0
+			except (urllib.error.URLError, ConnectionError, OSError):
+				time.sleep(0.01)
+		raise TimeoutError(f"/health did not answer within {timeout}s")
+	finally:
+		proc.terminate()
+		proc.wait(timeout=10)
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--rounds", type=int, default=3)
+	parser.add_argument("--target-import-ms", type=float, default=TARGET_IMPORT_MS)
+	parser.add_argument("--target-health-ms", type=float, default=TARGET_HEALTH_MS)
+	parser.add_argument("--fail-over-target", action="store_true")
+	args = parser.parse_args()
+
+	imports = []
+	top: List[Tuple[str, float]] = []
+	for _ in range(args.rounds):
+		total, top = import_profile()
+		imports.append(total)
+	import_ms = statistics.median(imports)
+	print(f"import {APP_MODULE}: median {import_ms:.0f} ms (target {args.target_import_ms:.0f} ms)")
+	for name, ms in top:
+		print(f"  {name:<28}{ms:>9.1f} ms")
+
+	loaded = heavy_modules_loaded()
+	print(f"heavy modules loaded at import: {', '.join(loaded) or 'none'}")
+
+	health_ms = statistics.median(time_to_health() for _ in range(args.rounds))
+	print(f"time to first /health: median {health_ms:.0f} ms (target {args.target_health_ms:.0f} ms)")
+
+	over = import_ms > args.target_import_ms or health_ms > args.target_health_ms or bool(loaded)
+	if over:
+		print("over target")
+	return 1 if over and args.fail_over_target else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Strategy definitions: many variants evaluated side by side in one data pass.
+
+	python -m backend.benchmarks.bench_strategies [--variants 32] [--bars 20000]
+
+1. Random variants scored with `score_strategies` must match per-bar
+   `score_setup` with the same spec, reasoning strings included.
+2. `strategy_setups` over all variants at once must give the same setups and
+   trades as one `setup_series_arrays` pass per variant; both are timed.
+"""
+
+from typing import List
+import argparse
+import time
+
+import numpy as np
+
+from backend.app.core.scoring import score_setup, score_strategies
+from backend.app.core.strategy import DEFAULT_STRATEGY, StrategySpec, compile_strategies
+from backend.app.services.backtest import BacktestConfig, setup_series_arrays, simulate, strategy_setups, summarize
+from .bench_fusion import _LABELS, random_setups, signal_lists
+from .fake_exchange import resample, synthetic_ohlcv
+
+
+def random_variants(k: int, seed: int = 0) -> List[StrategySpec]:
+	rng = np.random.default_rng(seed)
+	specs = [DEFAULT_STRATEGY]
+	for j in range(1, k):
+		cutoffs = np.sort(rng.choice(np.arange(20, 95), 4, replace=False))
+		specs.append(StrategySpec.from_dict({
+			"bos_lookback": int(rng.choice([10, 20, 30])),
+			"climax_rv": float(rng.uniform(2.0, 4.0)),
+			"ignition_rv": float(rng.uniform(1.5, 3.0)),
+			"ignition_body_pct": float(rng.uniform(0.4, 0.8)),
+			"flow_window": int(rng.choice([30, 50])),
+			"flow_rv": float(rng.choice([1.2, 1.5])),
+			"flow_min_active": int(rng.integers(3, 8)),
+			"trend_points": int(rng.integers(10, 40)),
+			"confirm_5m_points": int(rng.integers(0, 25)),
+			"ema_cross_points": [int(rng.integers(5, 30)), -int(rng.integers(0, 15))],
+			"bos_points": [int(rng.integers(5, 25)), -int(rng.integers(0, 10))],
+			"ignition_points": [int(rng.integers(5, 20)), -int(rng.integers(0, 10))],
+			"climax_points": int(rng.integers(0, 12)),
+			"flow_points": [int(rng.integers(0, 15)), int(rng.integers(-5, 6))],
+			"grade_cutoffs": cutoffs.tolist(),
+			"min_grade": str(rng.choice(["C", "B", "A"])),
+			"take_profit": float(rng.uniform(0.005, 0.04)),
+			"stop_loss": float(rng.uniform(0.005, 0.03)),
+		}, name=f"variant{j}"))
+	return specs
+
+
+def check_scoring(specs: List[StrategySpec], n: int) -> None:
+	trend, trend_5m, counts = random_setups(n, seed=3)
+	batches = score_strategies(trend, trend_5m, counts, compile_strategies(tuple(specs)))
+	for spec, batch in zip(specs, batches):
+		for i in range(n):
+			summary = {"trend": _LABELS[int(trend[i])], "trend_5m": _LABELS[int(trend_5m[i])]}
+			exp = score_setup(summary, *signal_lists(counts, i, "5m"), spec)
+			got = batch.row(i)
+			if got != exp:
+				raise AssertionError(f"{spec.name} bar {i}: batch {got} != score_setup {exp}")
+	print(f"scoring: {len(specs)} variants x {n} bars identical to score_setup")
+
+
+def check_pass(specs: List[StrategySpec], bars: int, rounds: int) -> None:
+	rows5 = synthetic_ohlcv(bars, "5m", seed=5)
+	rows15 = resample(rows5, 3)
+	a = (
+		rows5[:, 0].astype(np.int64), rows5[:, 1], rows5[:, 2], rows5[:, 3], rows5[:, 4], rows5[:, 5],
+		rows15[:, 0].astype(np.int64), rows15[:, 4],
+	)
+
+	single_ms: List[float] = []
+	multi_ms: List[float] = []
+	for _ in range(rounds):
+		t0 = time.perf_counter()
+		separate = [setup_series_arrays(*a, spec) for spec in specs]
+		single_ms.append((time.perf_counter() - t0) * 1000.0)
+		t0 = time.perf_counter()
+		together = strategy_setups(*a, specs)
+		multi_ms.append((time.perf_counter() - t0) * 1000.0)
+
+	close, high, low = rows5[:, 4], rows5[:, 2], rows5[:, 3]
+	trades = 0
+	for spec, one, many in zip(specs, separate, together):
+		for field in ("score", "grade", "direction", "confidence"):
+			if not np.array_equal(getattr(one, field), getattr(many, field)):
+				raise AssertionError(f"{spec.name}: {field} differs between the single and multi-strategy pass")
+		cfg = BacktestConfig.from_strategy(spec, exit_model="high_low")
+		t_one = simulate(close, one, cfg, high=high, low=low)
+		t_many = simulate(close, many, cfg, high=high, low=low)
+		if summarize(t_one) != summarize(t_many):
+			raise AssertionError(f"{spec.name}: trades differ between the single and multi-strategy pass")
+		trades += len(t_many)
+	single, multi = min(single_ms), min(multi_ms)
+	print(
+		f"setups: {len(specs)} variants x {bars} bars, one pass per variant {single:.0f} ms, "
+		f"single pass {multi:.0f} ms ({single / multi:.1f}x); {trades} trades, identical"
+	)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--variants", type=int, default=32)
+	parser.add_argument("--bars", type=int, default=20_000)
+	parser.add_argument("--score-bars", type=int, default=2_000)
+	parser.add_argument("--rounds", type=int, default=3)
+	args = parser.parse_args()
+	specs = random_variants(args.variants)
+	check_scoring(specs, args.score_bars)
+	check_pass(specs, args.bars, args.rounds)
+
+
+if __name__ == "__main__":
+	main()
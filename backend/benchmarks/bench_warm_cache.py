@@ -0,0 +1,147 @@
+"""
+Warm cache: a burst of requests right after a candle close.
+
+	python -m backend.benchmarks.bench_warm_cache [--symbols 4] [--clients 16] [--latency-ms 50]
+
+`--clients` concurrent clients each request `/fusion`, `/signals` and
+`/learning` for every watchlist symbol at once, against a fake exchange with
+`--latency-ms` per call, in three setups:
+
+- off: no watchlist; every request computes (and fetches) on its own.
+- cold: watchlist set but not yet warmed; concurrent misses of one response
+  share a single computation.
+- warm: `warm_all` ran after the close; every request is a hit.
+
+Warmed responses must equal freshly computed ones.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from .fake_exchange import FakeExchange, FakeMarketData, fake_market_data
+
+
+class FetchCounter:
+	"""
+	Counts `fetch_ohlcv` calls on every FakeExchange.
+	"""
+
+	def __init__(self) -> None:
+		self.calls = 0
+		self._lock = threading.Lock()
+		self._original = FakeExchange.fetch_ohlcv
+
+	def __enter__(self) -> "FetchCounter":
+		counter, original = self, self._original
+
+		def fetch_ohlcv(exchange, *args, **kwargs):
+			with counter._lock:
+				counter.calls += 1
+			return original(exchange, *args, **kwargs)
+
+		FakeExchange.fetch_ohlcv = fetch_ohlcv
+		return self
+
+	def __exit__(self, *exc) -> None:
+		FakeExchange.fetch_ohlcv = self._original
+
+
+def configure(symbols: List[str]) -> Any:
+	from backend.app.core.config import get_settings
+	from backend.app.services.warm_cache import get_warm_cache
+
+	os.environ["WARM_CACHE_SYMBOLS"] = json.dumps(symbols)
+	get_settings.cache_clear()
+	get_warm_cache.cache_clear()
+	return get_warm_cache()
+
+
+def requests_for(symbols: List[str]) -> List[Tuple[str, Callable[[], Dict[str, Any]]]]:
+	from backend.app.api.v1.endpoints.fusion import FUSION_LIMIT, get_fusion
+	from backend.app.api.v1.endpoints.learning import LEARNING_LIMIT, learning_task
+	from backend.app.api.v1.endpoints.signals import SIGNALS_LEARNER, SIGNALS_LIMIT, get_signals
+
+	out = []
+	for symbol in symbols:
+		out.append((f"fusion {symbol}", lambda s=symbol: get_fusion(symbol=s, limit=FUSION_LIMIT, strategy="fusion")))
+		out.append((f"signals {symbol}", lambda s=symbol: get_signals(symbol=s, limit=SIGNALS_LIMIT, learner=SIGNALS_LEARNER, strategy="fusion")))
+		out.append((f"learning {symbol}", lambda s=symbol: learning_task(symbol=s, limit=LEARNING_LIMIT)))
+	return out
+
+
+def burst(requests: List[Tuple[str, Callable[[], Dict[str, Any]]]], clients: int) -> Tuple[List[float], float]:
+	"""
+	Every client sends every request at the same moment; per-request
+	latencies (ms) and wall time (ms).
+	"""
+	start = threading.Barrier(clients * len(requests))
+
+	def one(fn: Callable[[], Dict[str, Any]]) -> float:
+		start.wait()
+		t0 = time.perf_counter()
+		fn()
+		return (time.perf_counter() - t0) * 1000.0
+
+	t0 = time.perf_counter()
+	with ThreadPoolExecutor(max_workers=clients * len(requests)) as pool:
+		latencies = list(pool.map(one, [fn for _ in range(clients) for _, fn in requests]))
+	return latencies, (time.perf_counter() - t0) * 1000.0
+
+
+def comparable(response: Dict[str, Any]) -> Dict[str, Any]:
+	return {**response, "meta": {k: v for k, v in response["meta"].items() if k != "generated_at"}}
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--symbols", type=int, default=4)
+	parser.add_argument("--clients", type=int, default=16)
+	parser.add_argument("--latency-ms", type=float, default=50.0)
+	args = parser.parse_args()
+
+	symbols = [f"W{k:02d}/USD" for k in range(args.symbols)]
+	data = FakeMarketData(symbols=symbols, bars=3000)
+	with fake_market_data(data, latency_ms=args.latency_ms):
+		from backend.app.services.warm_cache import warm_all
+
+		requests = requests_for(symbols)
+		configure([])
+		for _, fn in requests:  # imports, markets and JIT out of the way
+			fn()
+		print(f"{args.clients} clients x {len(requests)} requests ({len(symbols)} symbols), {args.latency_ms:.0f} ms exchange latency")
+		for setup in ("off", "cold", "warm"):
+			cache = configure(symbols if setup != "off" else [])
+			warm_ms = 0.0
+			with FetchCounter() as fetches:
+				if setup == "warm":
+					t0 = time.perf_counter()
+					warm_all(cache)
+					warm_ms = (time.perf_counter() - t0) * 1000.0
+					warm_fetches = fetches.calls
+				latencies, wall = burst(requests, args.clients)
+			burst_fetches = fetches.calls - (warm_fetches if setup == "warm" else 0)
+			print(
+				f"{setup:>5}: p50 {np.percentile(latencies, 50):7.1f} ms, p99 {np.percentile(latencies, 99):7.1f} ms, "
+				f"burst {wall:7.1f} ms, {burst_fetches:4d} exchange calls during the burst"
+				+ (f"; warm-up {warm_ms:.0f} ms, {warm_fetches} calls" if setup == "warm" else "")
+				+ (f"; hits {cache.hits}, misses {cache.misses}" if setup != "off" else "")
+			)
+
+		warmed = {name: comparable(fn()) for name, fn in requests}
+		configure([])
+		fresh = {name: comparable(fn()) for name, fn in requests}
+		for name in warmed:
+			if warmed[name] != fresh[name]:
+				raise AssertionError(f"{name}: warmed response differs from a fresh one")
+		print(f"{len(warmed)} warmed responses identical to freshly computed ones")
+
+
+if __name__ == "__main__":
+	main()
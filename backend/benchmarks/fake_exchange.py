@@ -0,0 +1,244 @@
+"""
+Deterministic in-process stand-in for a ccxt exchange.
+
+Serves synthetic (seeded random walk) or recorded OHLCV so endpoints and
+internal functions can be benchmarked without touching a live exchange.
+Recorded fixtures are CSV files (optionally gzipped) with the ccxt column
+order: timestamp, open, high, low, close, volume. Public trades are
+synthesized from the candles (or replayed from a trade fixture: timestamp,
+price, amount, side as 1 buy / -1 sell).
+"""
+
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+import gzip
+import time
+
+import ccxt
+import numpy as np
+
+from backend.app.services.market_data import get_market_data
+
+START_TS = 1_700_000_000_000
+TIMEFRAME_MS = {"1m": 60_000, "5m": 300_000, "15m": 900_000, "1h": 3_600_000}
+
+
+def synthetic_ohlcv(n: int, timeframe: str = "5m", seed: int = 0, start_ts: int = START_TS) -> np.ndarray:
+	"""
+	(n, 6) float64 array of random-walk candles with lognormal volume.
+	"""
+	rng = np.random.default_rng(seed)
+	close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.003, n)))
+	open_ = np.concatenate(([close[0]], close[:-1]))
+	high = np.maximum(open_, close) * (1.0 + rng.uniform(0.0, 0.002, n))
+	low = np.minimum(open_, close) * (1.0 - rng.uniform(0.0, 0.002, n))
+	volume = rng.lognormal(3.0, 0.8, n)
+	# Occasional volume spikes so climax/ignition signals fire
+	spikes = rng.random(n) < 0.01
+	volume[spikes] *= rng.uniform(3.0, 6.0, spikes.sum())
+	ts = start_ts + np.arange(n, dtype=np.int64) * TIMEFRAME_MS[timeframe]
+	return np.column_stack([ts.astype(np.float64), open_, high, low, close, volume])
+
+
+def resample(rows: np.ndarray, factor: int) -> np.ndarray:
+	"""
+	Aggregate consecutive groups of `factor` candles (e.g. 5m -> 15m).
+	"""
+	n = (rows.shape[0] // factor) * factor
+	g = rows[:n].reshape(-1, factor, 6)
+	return np.column_stack([
+		g[:, 0, 0],
+		g[:, 0, 1],
+		g[:, :, 2].max(axis=1),
+		g[:, :, 3].min(axis=1),
+		g[:, -1, 4],
+		g[:, :, 5].sum(axis=1),
+	])
+
+
+def load_fixture(path: str) -> np.ndarray:
+	opener = gzip.open if path.endswith(".gz") else open
+	with opener(path, "rt") as fh:
+		return np.loadtxt(fh, delimiter=",", ndmin=2, comments="#", usecols=range(6))
+
+
+def save_fixture(path: str, rows: Sequence[Sequence[float]]) -> None:
+	"""
+	Record OHLCV rows (e.g. from a live `fetch_ohlcv`) as a replayable fixture.
+	"""
+	opener = gzip.open if path.endswith(".gz") else open
+	with opener(path, "wt") as fh:
+		fh.write("# timestamp,open,high,low,close,volume\n")
+		np.savetxt(fh, np.asarray(rows, dtype=np.float64), delimiter=",", fmt="%.10g")
+
+
+def synthetic_trades(candles: np.ndarray, per_bar: int = 20, seed: int = 0) -> np.ndarray:
+	"""
+	(n, 4) float64 array of trades (timestamp, price, amount, side) inside
+	each 5m candle: prices within its range, amounts summing to its volume,
+	buyers more likely on up candles. Timestamps repeat now and then, as
+	they do on busy venues.
+	"""
+	rng = np.random.default_rng(seed)
+	bars = candles.shape[0]
+	offsets = np.sort(rng.integers(0, TIMEFRAME_MS["5m"], size=(bars, per_bar)), axis=1)
+	ts = candles[:, :1] + offsets
+	price = candles[:, 3:4] + rng.random((bars, per_bar)) * (candles[:, 2:3] - candles[:, 3:4])
+	weights = rng.random((bars, per_bar))
+	amount = weights / weights.sum(axis=1, keepdims=True) * candles[:, 5:6]
+	p_buy = 0.5 + 0.3 * np.sign(candles[:, 4:5] - candles[:, 1:2])
+	side = np.where(rng.random((bars, per_bar)) < p_buy, 1.0, -1.0)
+	return np.column_stack([ts.ravel(), price.ravel(), amount.ravel(), side.ravel()])
+
+
+def load_trade_fixture(path: str) -> np.ndarray:
+	opener = gzip.open if path.endswith(".gz") else open
+	with opener(path, "rt") as fh:
+		return np.loadtxt(fh, delimiter=",", ndmin=2, comments="#", usecols=range(4))
+
+
+def save_trade_fixture(path: str, trades: Sequence[dict]) -> None:
+	"""
+	Record ccxt trades (e.g. from a live `fetch_trades`) as a replayable fixture.
+	"""
+	rows = [[t["timestamp"], t["price"], t["amount"], 1 if t["side"] == "buy" else -1] for t in trades if t.get("side")]
+	opener = gzip.open if path.endswith(".gz") else open
+	with opener(path, "wt") as fh:
+		fh.write("# timestamp,price,amount,side\n")
+		np.savetxt(fh, np.asarray(rows, dtype=np.float64).reshape(-1, 4), delimiter=",", fmt="%.10g")
+
+
+class FakeMarketData:
+	"""
+	Candle data shared by every FakeExchange instance: 5m bars per symbol,
+	with 15m/1h resampled from them so timeframes stay consistent.
+	"""
+
+	def __init__(
+		self,
+		symbols: Sequence[str] = ("BTC/USD", "ETH/USD"),
+		bars: int = 20_000,
+		seed: int = 0,
+		fixture: Optional[str] = None,
+		trade_fixture: Optional[str] = None,
+	) -> None:
+		self.series: Dict[str, Dict[str, np.ndarray]] = {}
+		self.trade_fixture = trade_fixture
+		self._trades: Dict[str, np.ndarray] = {}
+		for k, symbol in enumerate(symbols):
+			base5 = load_fixture(fixture) if fixture else synthetic_ohlcv(bars, "5m", seed + k)
+			self.series[symbol] = {
+				"5m": base5,
+				"15m": resample(base5, 3),
+				"1h": resample(base5, 12),
+			}
+
+	def rows(self, symbol: str, timeframe: str) -> np.ndarray:
+		by_tf = self.series[symbol]
+		if timeframe not in by_tf and timeframe == "1m":
+			# Generated on demand; only needed by sub-bar refinement scenarios
+			base5 = by_tf["5m"]
+			by_tf["1m"] = synthetic_ohlcv(base5.shape[0] * 5, "1m", seed=len(symbol), start_ts=int(base5[0, 0]))
+		return by_tf[timeframe]
+
+	def trades(self, symbol: str) -> np.ndarray:
+		"""
+		All public trades of `symbol`, sorted by timestamp (built on first use).
+		"""
+		if symbol not in self._trades:
+			if self.trade_fixture:
+				self._trades[symbol] = load_trade_fixture(self.trade_fixture)
+			else:
+				self._trades[symbol] = synthetic_trades(self.series[symbol]["5m"], seed=list(self.series).index(symbol))
+		return self._trades[symbol]
+
+
+class FakeExchange:
+	"""
+	The subset of the ccxt exchange API the backend uses.
+	"""
+
+	def __init__(self, data: FakeMarketData, exchange_id: str = "fake", latency_ms: float = 0.0) -> None:
+		self.id = exchange_id
+		self.data = data
+		self.latency_ms = latency_ms
+
+	def _sleep(self) -> None:
+		if self.latency_ms:
+			time.sleep(self.latency_ms / 1000.0)
+
+	def load_markets(self, reload: bool = False) -> Dict[str, dict]:
+		self._sleep()
+		markets: Dict[str, dict] = {}
+		for symbol in self.data.series:
+			base, quote = symbol.split("/")
+			markets[symbol] = {
+				"id": f"{base}-{quote}",
+				"symbol": symbol,
+				"base": base,
+				"quote": quote,
+				"spot": True,
+				"active": True,
+			}
+		return markets
+
+	def fetch_ohlcv(self, symbol: str, timeframe: str = "5m", since: Optional[int] = None, limit: Optional[int] = None) -> List[List[float]]:
+		self._sleep()
+		rows = self.data.rows(symbol, timeframe)
+		if since is not None:
+			start = int(np.searchsorted(rows[:, 0], since, side="left"))
+			window = rows[start: start + limit] if limit else rows[start:]
+		else:
+			window = rows[-limit:] if limit else rows
+		return window.tolist()
+
+	def fetch_trades(self, symbol: str, since: Optional[int] = None, limit: Optional[int] = None) -> List[dict]:
+		self._sleep()
+		rows = self.data.trades(symbol)
+		if since is not None:
+			start = int(np.searchsorted(rows[:, 0], since, side="left"))
+			window = rows[start: start + limit] if limit else rows[start:]
+		else:
+			window = rows[-limit:] if limit else rows
+		return [
+			{"timestamp": int(ts), "symbol": symbol, "side": "buy" if side > 0 else "sell", "price": price, "amount": amount, "cost": price * amount}
+			for ts, price, amount, side in window.tolist()
+		]
+
+	def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> dict:
+		"""
+		A book around the latest close, deeper on the side the candle moved to.
+		"""
+		self._sleep()
+		ts, open_, _, _, close, volume = self.data.rows(symbol, "5m")[-1].tolist()
+		levels = np.arange(1, (limit or 20) + 1)
+		lean = 1.25 if close >= open_ else 0.8
+		depth = volume / levels.shape[0] / levels
+		return {
+			"symbol": symbol,
+			"timestamp": int(ts),
+			"bids": [[close * (1 - 1e-4 * k), q * lean] for k, q in zip(levels.tolist(), depth.tolist())],
+			"asks": [[close * (1 + 1e-4 * k), q / lean] for k, q in zip(levels.tolist(), depth.tolist())],
+		}
+
+
+@contextmanager
+def fake_market_data(
+	data: FakeMarketData,
+	exchange_ids: Sequence[str] = ("coinbase", "kraken"),
+	latency_ms: float = 0.0,
+) -> Iterator[FakeMarketData]:
+	"""
+	Route the backend's market data layer to FakeExchange for the duration
+	of the block.
+	"""
+	originals = {eid: getattr(ccxt, eid) for eid in exchange_ids}
+	try:
+		for eid in exchange_ids:
+			setattr(ccxt, eid, lambda config=None, _eid=eid: FakeExchange(data, _eid, latency_ms))
+		get_market_data.cache_clear()
+		yield data
+	finally:
+		for eid, klass in originals.items():
+			setattr(ccxt, eid, klass)
+		get_market_data.cache_clear()
@@ -0,0 +1,77 @@
+"""
+Replay a captured request offline against the candles it saw in production.
+
+Download a bundle with `GET /api/v1/profiles/{id}/download?kind=capture`, then:
+
+	python -m backend.benchmarks.replay_profile <id>.json.gz                 # time the handler
+	python -m backend.benchmarks.replay_profile <id>.json.gz --profile       # cProfile, top functions
+	python -m backend.benchmarks.replay_profile <id>.json.gz --profile --out replay.prof
+
+Model-based learners are read from the local `learner_model_dir`, so a
+`/signals` capture with `learner=auto` may take the heuristic path offline.
+"""
+
+from typing import Any, Callable, Dict
+import argparse
+import cProfile
+import gzip
+import importlib
+import json
+import pstats
+import statistics
+import sys
+import time
+
+from backend.app.core import profiling
+
+
+def load_capture(path: str) -> Dict[str, Any]:
+	opener = gzip.open if path.endswith(".gz") else open
+	with opener(path, "rt") as fh:
+		return json.load(fh)
+
+
+def resolve_handler(handler: str) -> Callable[..., Any]:
+	module_name, qualname = handler.split(":", 1)
+	obj: Any = importlib.import_module(module_name)
+	for part in qualname.split("."):
+		obj = getattr(obj, part)
+	return obj
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("capture", help="Capture bundle (.json.gz) downloaded from /profiles")
+	parser.add_argument("--rounds", type=int, default=5)
+	parser.add_argument("--profile", action="store_true", help="Run once more under cProfile and print the top functions")
+	parser.add_argument("--out", default=None, help="Write the replay's cProfile stats here (implies --profile)")
+	parser.add_argument("--top", type=int, default=25)
+	args = parser.parse_args()
+
+	capture = load_capture(args.capture)
+	fn = resolve_handler(capture["handler"])
+	kwargs = capture["kwargs"]
+	print(f"capture {capture['id']}: {capture['path']}?{capture['query']} ({capture['reason']}, {capture['created_at']})")
+	print(f"handler {capture['handler']}({', '.join(f'{k}={v!r}' for k, v in kwargs.items())})")
+
+	samples = []
+	with profiling.replaying(capture["candles"]):
+		fn(**kwargs)  # warm-up
+		for _ in range(args.rounds):
+			t0 = time.perf_counter()
+			fn(**kwargs)
+			samples.append((time.perf_counter() - t0) * 1000.0)
+		print(f"captured {capture['duration_ms']:.2f} ms; replay median {statistics.median(samples):.2f} ms, min {min(samples):.2f} ms over {len(samples)} rounds")
+
+		if args.profile or args.out:
+			prof = cProfile.Profile()
+			prof.runcall(fn, **kwargs)
+			if args.out:
+				prof.dump_stats(args.out)
+				print(f"wrote {args.out}")
+			pstats.Stats(prof, stream=sys.stdout).sort_stats("cumulative").print_stats(args.top)
+	return 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,206 @@
+"""
+Offline latency benchmarks for the API endpoints and their internal functions.
+
+Runs every scenario against the in-process FakeExchange, then compares the
+medians with a stored baseline and reports speedups/regressions.
+
+	python -m backend.benchmarks.suite                    # run + compare with baseline.json
+	python -m backend.benchmarks.suite --save-baseline    # record a new baseline
+	python -m backend.benchmarks.suite --filter endpoint --bars 1000000
+
+A change that moves these numbers on purpose re-records baseline.json in the
+same commit, so the comparison always measures against the current design.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+import argparse
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backend.app.api.v1.endpoints import backtesting, fusion, learning, signals, trend, volume
+from backend.app.core import kernels, scoring
+from backend.app.services.learning import feature_matrix, forward_returns
+from .fake_exchange import FakeMarketData, fake_market_data
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SYMBOL = "BTC/USD"
+COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+
+
+@dataclass
+class Scenario:
+	name: str
+	fn: Callable[[], Any]
+	rounds: Optional[int] = None  # override for slow scenarios
+
+
+def _frames(data: FakeMarketData, bars: int):
+	df5 = pd.DataFrame(data.rows(SYMBOL, "5m")[-bars:], columns=COLUMNS)
+	df15 = pd.DataFrame(data.rows(SYMBOL, "15m")[-max(1, bars // 3):], columns=COLUMNS)
+	return df5, df15
+
+
+def endpoint_call(handler: Callable[..., Any], **kwargs: Any) -> Callable[[], Any]:
+	"""
+	A direct call of a FastAPI handler with every parameter bound. Outside a
+	request FastAPI does not resolve `Query(...)` defaults, so a parameter
+	left out would arrive as the Query object itself; each one is filled with
+	its declared default here, and a missing required one fails at once.
+	"""
+	for name, param in inspect.signature(handler).parameters.items():
+		if name in kwargs:
+			continue
+		default = getattr(param.default, "default", param.default)
+		if default is param.empty or default is Ellipsis or type(default).__name__ == "PydanticUndefinedType":
+			raise TypeError(f"{handler.__name__}: required parameter {name!r} not given")
+		kwargs[name] = default
+	return lambda: handler(**kwargs)
+
+
+def endpoint_scenarios() -> List[Scenario]:
+	return [
+		Scenario("endpoint.trend", endpoint_call(trend.get_trend, symbol=SYMBOL, limit=500)),
+		Scenario("endpoint.volume", endpoint_call(volume.get_volume, symbol=SYMBOL, limit=500)),
+		Scenario("endpoint.fusion", endpoint_call(fusion.get_fusion, symbol=SYMBOL, limit=500, strategy="fusion")),
+		Scenario("endpoint.signals", endpoint_call(signals.get_signals, symbol=SYMBOL, limit=600, learner="heuristic", strategy="fusion"), rounds=3),
+		Scenario("endpoint.learning", endpoint_call(learning.learning_task, symbol=SYMBOL, limit=5000)),
+		Scenario(
+			"endpoint.backtesting",
+			endpoint_call(backtesting.run_backtest, symbol=SYMBOL, limit=1500, exit_model="close", tie_break="stop_loss", refine_1m=False, strategy="fusion"),
+			rounds=3,
+		),
+	]
+
+
+def function_scenarios(data: FakeMarketData, bars: int) -> List[Scenario]:
+	df5, df15 = _frames(data, bars)
+	close = df5["close"].to_numpy(dtype=float)
+	emas5 = trend.compute_emas(df5.copy(), [20, 50, 200])
+	emas15 = trend.compute_emas(df15.copy(), [20, 50, 200])
+	vol5 = volume.compute_volume_features(df5.copy())
+	n = len(df5)
+	rng = np.random.default_rng(0)
+	trend_arr = rng.integers(-1, 2, n)
+	counts = {k: rng.binomial(1, 0.1, n) for k in scoring.SETUP_SIGNAL_KEYS}
+	return [
+		Scenario(f"fn.compute_emas[{bars}]", lambda: trend.compute_emas(df5.copy(), [20, 50, 200])),
+		Scenario(f"fn.compute_volume_features[{bars}]", lambda: volume.compute_volume_features(df5.copy())),
+		Scenario(f"fn.detect_trend_and_signals[{bars}]", lambda: trend.detect_trend_and_signals(emas5, emas15)),
+		Scenario(f"fn.detect_volume_signals[{bars}]", lambda: volume.detect_volume_signals(vol5, "5m")),
+		Scenario(f"fn.feature_matrix[{bars}]", lambda: feature_matrix(df5, df15)),
+		Scenario(f"fn.forward_returns[{bars}]", lambda: forward_returns(close, [6, 12, 24])),
+		Scenario(f"fn.score_setup_batch[{bars}]", lambda: scoring.score_setup_batch(trend_arr, trend_arr, counts)),
+		Scenario(f"fn.kernels.ema200[{bars}]", lambda: kernels.ema(close, 200, 200)),
+	]
+
+
+def git_commit() -> Optional[str]:
+	"""
+	Short hash of the checked-out commit, recorded with a baseline.
+	"""
+	try:
+		out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(__file__), capture_output=True, text=True, timeout=10)
+	except (OSError, subprocess.SubprocessError):
+		return None
+	return out.stdout.strip() or None
+
+
+def run_scenario(scn: Scenario, rounds: int, warmup: int = 1) -> Dict[str, float]:
+	for _ in range(warmup):
+		scn.fn()
+	samples: List[float] = []
+	for _ in range(scn.rounds or rounds):
+		t0 = time.perf_counter()
+		scn.fn()
+		samples.append((time.perf_counter() - t0) * 1000.0)
+	return {
+		"rounds": len(samples),
+		"min_ms": round(min(samples), 4),
+		"median_ms": round(statistics.median(samples), 4),
+		"mean_ms": round(statistics.fmean(samples), 4),
+		"stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+	}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+	"""
+	Print a comparison table; returns the names of regressed scenarios.
+	"""
+	base = baseline.get("results", {})
+	regressions: List[str] = []
+	print(f"{'scenario':<44}{'median ms':>12}{'baseline':>12}{'change':>10}")
+	for name, r in results.items():
+		b = base.get(name)
+		if not b:
+			print(f"{name:<44}{r['median_ms']:>12.3f}{'-':>12}{'new':>10}")
+			continue
+		speedup = b["median_ms"] / r["median_ms"] if r["median_ms"] else float("inf")
+		flag = ""
+		if speedup < 1.0 / (1.0 + tolerance):
+			flag = "  REGRESSION"
+			regressions.append(name)
+		print(f"{name:<44}{r['median_ms']:>12.3f}{b['median_ms']:>12.3f}{speedup:>9.2f}x{flag}")
+	return regressions
+
+
+def main() -> int:
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--bars", type=int, default=100_000, help="5m bars for function scenarios (up to millions)")
+	parser.add_argument("--rounds", type=int, default=5)
+	parser.add_argument("--filter", default="", help="Only run scenarios whose name contains this")
+	parser.add_argument("--fixture", default=None, help="Recorded OHLCV CSV(.gz) to serve instead of synthetic data")
+	parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+	parser.add_argument("--save-baseline", action="store_true")
+	parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed slowdown before flagging a regression")
+	parser.add_argument("--fail-on-regression", action="store_true")
+	args = parser.parse_args()
+
+	data = FakeMarketData(symbols=(SYMBOL, "ETH/USD"), bars=max(args.bars, 6000), fixture=args.fixture)
+	results: Dict[str, Dict[str, float]] = {}
+	with fake_market_data(data):
+		for scn in endpoint_scenarios() + function_scenarios(data, args.bars):
+			if args.filter and args.filter not in scn.name:
+				continue
+			results[scn.name] = run_scenario(scn, args.rounds)
+			print(f"  ran {scn.name}: {results[scn.name]['median_ms']:.3f} ms", file=sys.stderr)
+
+	if args.save_baseline:
+		payload = {
+			"python": platform.python_version(),
+			"machine": platform.machine(),
+			"numba": kernels.HAVE_NUMBA,
+			"bars": args.bars,
+			"commit": git_commit(),
+			"recorded_at": time.strftime("%Y-%m-%d", time.gmtime()),
+			"results": results,
+		}
+		with open(args.baseline, "w") as fh:
+			json.dump(payload, fh, indent=2, sort_keys=True)
+		print(f"Saved baseline with {len(results)} scenarios to {args.baseline}")
+		return 0
+
+	baseline: Dict[str, Any] = {}
+	if os.path.exists(args.baseline):
+		with open(args.baseline) as fh:
+			baseline = json.load(fh)
+		print(f"baseline: recorded at commit {baseline.get('commit') or '?'} on {baseline.get('recorded_at') or '?'}")
+		if baseline.get("bars") != args.bars:
+			print(f"note: baseline recorded with --bars {baseline.get('bars')}, function scenarios are not comparable")
+	regressions = compare(results, baseline, args.tolerance)
+	if regressions:
+		print(f"{len(regressions)} regression(s): {', '.join(regressions)}")
+	return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+	sys.exit(main())
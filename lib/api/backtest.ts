@@ -18,7 +18,7 @@ export type BacktestTrade = {
 };
 
 export type BacktestResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   stats: BacktestStats;
   trades: BacktestTrade[];
@@ -7,7 +7,7 @@ export type Fusion = {
 };
 
 export type FusionResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   fusion: Fusion;
   summary: { trend: string; trend_5m: string; trend_15m: string };
@@ -1,5 +1,5 @@
 export type LearningResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   updated_weights: Record<string, number>;
   feature_ranking: Array<{ feature: string; effectiveness: number; hits: number }>;
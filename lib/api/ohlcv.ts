@@ -1,6 +1,6 @@
 export type Candle = { t: number; iso: string; o: number; h: number; l: number; c: number; v: number };
 export type OHLCVResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   normalized_symbol?: string;
   timeframes: {
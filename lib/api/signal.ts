@@ -1,5 +1,5 @@
 export type SignalResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   action: "buy" | "sell" | "hold";
   confidence: number;
@@ -14,7 +14,7 @@ export type TrendSignal = {
 };
 
 export type TrendResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   summary: TrendSummary;
   signals: TrendSignal[];
@@ -3,7 +3,7 @@ export type VolumeSignal =
   | { type: "accumulation" | "distribution"; timeframe: "5m" | "15m"; ts: number; count: number; score: number };
 
 export type VolumeResponse = {
-  exchange: "coinbase";
+  exchange: string;
   symbol: string;
   signals: VolumeSignal[];
   meta: { generated_at: string; count_5m: number; count_15m: number };